@@ -0,0 +1,235 @@
+# ============================================================
+# ⚙️ Analysis Pool
+# CPU/GPU 분석 작업을 이벤트 루프 밖(전용 스레드 풀)에서 실행
+# 동시 실행 수 + 대기열 길이 제한 → 초과 시 즉시 거절 (backpressure)
+# ============================================================
+
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+
+class PoolSaturatedError(Exception):
+    """실행 슬롯 + 대기열이 모두 찬 경우 (클라이언트는 retry_after초 뒤 재시도)"""
+
+    def __init__(self, endpoint: str, retry_after: int):
+        super().__init__(f"analysis pool saturated ({endpoint})")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class AnalysisPool:
+    """
+    분석 전용 워커 풀
+
+    FastAPI 핸들러는 async지만 ImageComparator 분석은 수 초짜리 동기 작업이라
+    이벤트 루프에서 직접 돌리면 헬스체크(/)까지 전부 멈춘다.
+    분석은 여기로 넘기고 루프는 await만 한다.
+
+    - max_workers: 동시에 실행되는 분석 수
+    - max_queue: 실행 대기 가능한 요청 수 (넘으면 PoolSaturatedError)
+    - 스레드 풀 사용: torch/OpenCV 연산은 GIL을 풀고, 모델 캐시(model_cache)를
+      프로세스 하나에서 공유할 수 있다 (프로세스 풀이면 워커마다 모델을 다시 로드)
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 8, min_retry_after: int = 1):
+        """
+        Args:
+            max_workers: 동시 실행 수
+            max_queue: 대기열 최대 길이
+            min_retry_after: Retry-After 최소값 (초)
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.min_retry_after = max(1, min_retry_after)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="tryangle-analysis"
+        )
+        self._lock = threading.Lock()
+
+        # 현재 상태
+        self._queued = 0
+        self._running = 0
+
+        # 평균 실행 시간 (EMA, Retry-After 추정용)
+        self._avg_run_time = 0.0
+
+        # 엔드포인트별 통계
+        self._endpoint_stats: Dict[str, Dict] = {}
+
+    # --------------------------------------------------------
+    # 실행
+    # --------------------------------------------------------
+    async def run(self, endpoint: str, fn: Callable, *args, **kwargs):
+        """
+        fn(*args, **kwargs)를 워커 스레드에서 실행하고 결과 반환
+
+        Raises:
+            PoolSaturatedError: 실행 슬롯과 대기열이 모두 찬 경우 (즉시)
+
+        await 중인 코루틴이 취소되면 아직 시작 안 한 작업은 실행되지 않고
+        대기열 자리를 돌려준다 (이미 실행 중인 작업은 끝까지 실행되고 결과만 버려짐)
+        """
+        self._admit(endpoint)
+
+        submitted_at = time.perf_counter()
+        ctx = contextvars.copy_context()
+
+        def _job():
+            started_at = time.perf_counter()
+            self._on_start(endpoint, started_at - submitted_at)
+            try:
+                return ctx.run(fn, *args, **kwargs)
+            finally:
+                self._on_finish(endpoint, time.perf_counter() - started_at)
+
+        future = self._executor.submit(_job)
+
+        def _release_if_cancelled(done):
+            # 시작 전에 취소되면 _job이 실행되지 않으므로 _on_start 대신 여기서 자리 반환
+            if done.cancelled():
+                self._on_cancel(endpoint)
+
+        future.add_done_callback(_release_if_cancelled)
+
+        try:
+            result = await asyncio.wrap_future(future)
+        except Exception:
+            self._record(endpoint, 'failed')
+            raise
+
+        self._record(endpoint, 'completed')
+        return result
+
+    def _admit(self, endpoint: str):
+        """대기열 자리 확보 (없으면 거절)"""
+        with self._lock:
+            stats = self._get_endpoint_stats(endpoint)
+
+            if self._running + self._queued >= self.max_workers + self.max_queue:
+                stats['rejected'] += 1
+                raise PoolSaturatedError(endpoint, self._estimate_retry_after())
+
+            self._queued += 1
+            stats['queued'] += 1
+            stats['submitted'] += 1
+
+    def _on_start(self, endpoint: str, wait_time: float):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+
+            stats = self._get_endpoint_stats(endpoint)
+            stats['queued'] -= 1
+            stats['running'] += 1
+            stats['total_wait_time'] += wait_time
+            stats['max_wait_time'] = max(stats['max_wait_time'], wait_time)
+            stats['started'] += 1
+
+    def _on_cancel(self, endpoint: str):
+        """시작 전에 취소된 작업의 대기열 자리 반환"""
+        with self._lock:
+            self._queued -= 1
+
+            stats = self._get_endpoint_stats(endpoint)
+            stats['queued'] -= 1
+            stats['cancelled'] += 1
+
+    def _on_finish(self, endpoint: str, run_time: float):
+        with self._lock:
+            self._running -= 1
+
+            # EMA (alpha=0.2)
+            if self._avg_run_time == 0.0:
+                self._avg_run_time = run_time
+            else:
+                self._avg_run_time = 0.8 * self._avg_run_time + 0.2 * run_time
+
+            stats = self._get_endpoint_stats(endpoint)
+            stats['running'] -= 1
+            stats['total_run_time'] += run_time
+
+    def _record(self, endpoint: str, key: str):
+        with self._lock:
+            self._get_endpoint_stats(endpoint)[key] += 1
+
+    def _get_endpoint_stats(self, endpoint: str) -> Dict:
+        """엔드포인트 통계 dict (없으면 생성, 락 안에서 호출)"""
+        if endpoint not in self._endpoint_stats:
+            self._endpoint_stats[endpoint] = {
+                'queued': 0,
+                'running': 0,
+                'submitted': 0,
+                'completed': 0,
+                'failed': 0,
+                'rejected': 0,
+                'cancelled': 0,
+                'total_wait_time': 0.0,
+                'max_wait_time': 0.0,
+                'total_run_time': 0.0,
+                'started': 0
+            }
+        return self._endpoint_stats[endpoint]
+
+    def _estimate_retry_after(self) -> int:
+        """대기열이 한 바퀴 비는 데 걸릴 시간 추정 (초, 락 안에서 호출)"""
+        backlog = self._running + self._queued
+        estimate = self._avg_run_time * backlog / self.max_workers
+        return max(self.min_retry_after, int(math.ceil(estimate)))
+
+    # --------------------------------------------------------
+    # 통계 / 종료
+    # --------------------------------------------------------
+    def get_stats(self) -> Dict:
+        """
+        풀 통계
+
+        Returns:
+            {
+                'max_workers', 'max_queue', 'running', 'queued',
+                'avg_run_time': 최근 평균 실행 시간 (초),
+                'endpoints': {
+                    endpoint: {
+                        'queue_depth', 'running', 'submitted', 'completed',
+                        'failed', 'rejected', 'cancelled',
+                        'avg_wait_ms', 'max_wait_ms', 'avg_run_ms'
+                    }
+                }
+            }
+        """
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in self._endpoint_stats.items():
+                started = stats['started']
+                finished = started - stats['running']
+                endpoints[endpoint] = {
+                    'queue_depth': stats['queued'],
+                    'running': stats['running'],
+                    'submitted': stats['submitted'],
+                    'completed': stats['completed'],
+                    'failed': stats['failed'],
+                    'rejected': stats['rejected'],
+                    'cancelled': stats['cancelled'],
+                    'avg_wait_ms': stats['total_wait_time'] / started * 1000 if started > 0 else 0.0,
+                    'max_wait_ms': stats['max_wait_time'] * 1000,
+                    'avg_run_ms': stats['total_run_time'] / finished * 1000 if finished > 0 else 0.0
+                }
+
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'running': self._running,
+                'queued': self._queued,
+                'avg_run_time': self._avg_run_time,
+                'endpoints': endpoints
+            }
+
+    def shutdown(self, wait: bool = True):
+        """워커 종료"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,135 @@
+# ============================================================
+# 🔍 Analysis Pool Check
+# 대기열 자리 계산 회귀 검사 (취소 / 실패 / 거절 후 슬롯이 모두 반환되는지)
+# ============================================================
+#
+# 실행 (외부 의존성 없음):
+#   python backend/check_analysis_pool.py
+#
+# 실패하면 exit 1
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from analysis_pool import AnalysisPool, PoolSaturatedError
+
+
+async def _check_cancel_queued(pool: AnalysisPool, release: threading.Event):
+    """워커가 모두 바쁠 때 대기 중인 작업을 취소하면 대기열 자리가 반환되어야 함"""
+    blocker = asyncio.create_task(pool.run("blocker", release.wait))
+    await asyncio.sleep(0.05)
+
+    queued = asyncio.create_task(pool.run("queued", lambda: "never"))
+    await asyncio.sleep(0.05)
+    assert pool.get_stats()["queued"] == 1, pool.get_stats()
+
+    queued.cancel()
+    try:
+        await queued
+    except asyncio.CancelledError:
+        pass
+    await asyncio.sleep(0.05)
+
+    stats = pool.get_stats()
+    assert stats["queued"] == 0, f"취소 후 queued={stats['queued']} (자리 누수)"
+    assert stats["endpoints"]["queued"]["queue_depth"] == 0, stats["endpoints"]["queued"]
+    assert stats["endpoints"]["queued"]["cancelled"] == 1, stats["endpoints"]["queued"]
+
+    release.set()
+    await blocker
+
+
+async def _check_cancel_running(pool: AnalysisPool):
+    """실행 중인 작업을 취소하면 작업은 끝까지 돌고 running 자리가 반환되어야 함"""
+    started, release = threading.Event(), threading.Event()
+
+    def _work():
+        started.set()
+        release.wait()
+        return "done"
+
+    task = asyncio.create_task(pool.run("running", _work))
+    while not started.is_set():
+        await asyncio.sleep(0.01)
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    release.set()
+    for _ in range(100):
+        if pool.get_stats()["running"] == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert pool.get_stats()["running"] == 0, pool.get_stats()
+
+
+async def _check_saturation_recovers(pool: AnalysisPool):
+    """대기열이 찬 뒤 취소로 비우면 다시 받아야 함 (취소가 용량을 영구히 줄이지 않음)"""
+    release = threading.Event()
+    tasks = [asyncio.create_task(pool.run("fill", release.wait)) for _ in range(pool.max_workers + pool.max_queue)]
+    await asyncio.sleep(0.05)
+
+    try:
+        await pool.run("overflow", lambda: None)
+        raise AssertionError("가득 찬 풀이 요청을 받음")
+    except PoolSaturatedError:
+        pass
+
+    for task in tasks[pool.max_workers:]:
+        task.cancel()
+    await asyncio.gather(*tasks[pool.max_workers:], return_exceptions=True)
+    release.set()
+    await asyncio.gather(*tasks[:pool.max_workers])
+
+    assert await pool.run("after", lambda: 42) == 42
+    stats = pool.get_stats()
+    assert stats["queued"] == 0 and stats["running"] == 0, stats
+
+
+async def _check_failure(pool: AnalysisPool):
+    def _fail():
+        raise RuntimeError("boom")
+
+    try:
+        await pool.run("failing", _fail)
+        raise AssertionError("예외가 전달되지 않음")
+    except RuntimeError:
+        pass
+    stats = pool.get_stats()
+    assert stats["queued"] == 0 and stats["running"] == 0, stats
+    assert stats["endpoints"]["failing"]["failed"] == 1, stats["endpoints"]["failing"]
+
+
+async def main():
+    checks = [
+        ("대기 중 취소", lambda pool: _check_cancel_queued(pool, threading.Event())),
+        ("실행 중 취소", _check_cancel_running),
+        ("포화 후 회복", _check_saturation_recovers),
+        ("실패", _check_failure),
+    ]
+
+    failed = False
+    for name, check in checks:
+        pool = AnalysisPool(max_workers=1, max_queue=2)
+        try:
+            await asyncio.wait_for(check(pool), timeout=10)
+            print(f"✅ {name}")
+        except (AssertionError, asyncio.TimeoutError) as e:
+            print(f"❌ {name}: {e!r}")
+            failed = True
+        finally:
+            pool.shutdown(wait=False)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
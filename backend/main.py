@@ -1,11 +1,12 @@
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from typing import Optional
 import sys
 import os
-import tempfile
 import time
+import json
+import asyncio
 import numpy as np
 
 # TryAngle 코드 import
@@ -15,6 +16,14 @@ sys.path.append(os.path.join(project_root, "src", "Multi", "version3"))
 sys.path.append(os.path.join(project_root, "src", "Multi", "version3", "utils"))
 
 from analysis.image_comparator import ImageComparator
+from utils.reference_registry import ReferenceRegistry
+from utils.image_context import ImageContext
+from utils.model_cache import model_cache
+from utils.metrics import register_counter, register_gauge, render_prometheus
+from utils.tracing import TraceStore, start_trace, finish_trace
+from utils.log import configure_logging, get_logger
+from analysis_pool import AnalysisPool, PoolSaturatedError
+from process_memory import read_memory_report
 
 # Phase 1-3 통합
 try:
@@ -23,11 +32,15 @@ try:
     from utils.progress_tracker import ProgressTracker
     from utils.priority_system import PriorityClassifier
     from utils.reference_recommender import ReferenceRecommender
+    from utils.session_store import create_session_store
     PHASE_1_3_AVAILABLE = True
 except ImportError as e:
     print(f"⚠️ Phase 1-3 features not available: {e}")
     PHASE_1_3_AVAILABLE = False
 
+configure_logging()
+logger = get_logger("backend")
+
 app = FastAPI(
     title="TryAngle iOS Backend (Phase 1-3 Enhanced)",
     version="2.0.0",
@@ -44,8 +57,221 @@ app.add_middleware(
 )
 
 
-# 글로벌 진행도 트래커 (세션별 관리)
-_progress_trackers = {}  # {session_id: ProgressTracker}
+# 요청 트레이스 (X-TryAngle-Trace 헤더 또는 ?trace=1 일 때만 기록)
+# TRYANGLE_TRACE_DIR가 있으면 <trace_id>.json 파일로도 저장
+_trace_store = TraceStore(
+    max_traces=int(os.environ.get("TRYANGLE_MAX_TRACES", "100")),
+    dump_dir=os.environ.get("TRYANGLE_TRACE_DIR") or None
+)
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    옵트인 요청 트레이싱
+
+    트레이스는 contextvar로 전달되어 워커 풀 스레드의 분석 단계까지 span으로 기록된다.
+    응답 헤더 X-TryAngle-Trace-Id로 id를 돌려주고 GET /api/traces/{id}로 Chrome trace JSON 조회.
+    """
+    flag = request.headers.get("X-TryAngle-Trace") or request.query_params.get("trace")
+    if not flag or flag.lower() in ("0", "false", "no"):
+        return await call_next(request)
+
+    trace = start_trace(f"{request.method} {request.url.path}")
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        finish_trace(trace, {"status": status_code})
+        _trace_store.put(trace)
+
+    response.headers["X-TryAngle-Trace-Id"] = trace.trace_id
+    logger.info("trace recorded trace_id=%s spans=%d path=%s", trace.trace_id, trace.span_count, request.url.path)
+    return response
+
+
+# 세션별 진행도 트래커 저장소 (LRU + 유휴 TTL, TRYANGLE_SESSION_STORE=sqlite면 워커 간 공유)
+_session_store = create_session_store() if PHASE_1_3_AVAILABLE else None
+SESSION_MAX_HISTORY = int(os.environ.get("TRYANGLE_SESSION_HISTORY", "50"))
+
+# 레퍼런스 등록소 (reference_id → 분석 완료된 레퍼런스)
+_reference_registry = ReferenceRegistry(
+    max_entries=int(os.environ.get("TRYANGLE_MAX_REFERENCES", "64"))
+)
+
+
+# 실시간 엔드포인트가 실제로 쓰는 분석 출력
+# (extract_user_feedback: 포즈 / extract_camera_settings: EXIF ISO, 밝기, 색온도)
+# → 프레임마다 CLIP/OpenCLIP/DINOv2/MiDaS, 클러스터, 품질, 조명 분석을 건너뜀
+REALTIME_OUTPUTS = {"pose", "exif", "brightness", "color"}
+
+# 분석 워커 풀 (이벤트 루프 밖에서 실행, 대기열 초과 시 503 + Retry-After)
+_analysis_pool = AnalysisPool(
+    max_workers=int(os.environ.get("TRYANGLE_WORKERS", "2")),
+    max_queue=int(os.environ.get("TRYANGLE_QUEUE_SIZE", "8")),
+    min_retry_after=int(os.environ.get("TRYANGLE_RETRY_AFTER", "1"))
+)
+
+
+# ============================================================
+# /metrics 게이지/카운터 (수집 시점에 풀/등록소/세션 상태를 읽음)
+# ============================================================
+def _pool_endpoint_gauge(key: str):
+    def collect():
+        endpoints = _analysis_pool.get_stats()["endpoints"]
+        return {(endpoint,): stats[key] for endpoint, stats in endpoints.items()}
+    return collect
+
+
+register_gauge(
+    "tryangle_pool_queue_depth", "Analysis requests waiting for a worker",
+    _pool_endpoint_gauge("queue_depth"), labels=("endpoint",)
+)
+register_gauge(
+    "tryangle_pool_running", "Analysis requests currently running",
+    _pool_endpoint_gauge("running"), labels=("endpoint",)
+)
+register_counter(
+    "tryangle_pool_rejected_total", "Analysis requests rejected because the pool was saturated",
+    _pool_endpoint_gauge("rejected"), labels=("endpoint",)
+)
+register_gauge(
+    "tryangle_pool_avg_wait_ms", "Average time analysis requests waited in the queue",
+    _pool_endpoint_gauge("avg_wait_ms"), labels=("endpoint",)
+)
+register_gauge(
+    "tryangle_references", "Registered references in this worker",
+    lambda: {(): _reference_registry.get_stats()["entries"]}
+)
+register_gauge(
+    "tryangle_model_load_seconds", "Time spent loading each model (loaded models only)",
+    lambda: {(key,): seconds for key, seconds in model_cache.load_times().items()},
+    labels=("model",)
+)
+if _session_store is not None:
+    register_gauge(
+        "tryangle_sessions", "Active progress-tracking sessions",
+        lambda: {(): len(_session_store)}
+    )
+
+
+class ReferenceNotFoundError(Exception):
+    """등록되지 않은 reference_id로 요청한 경우"""
+    pass
+
+
+def _pose_model_key(use_movenet: bool) -> str:
+    return "movenet" if use_movenet else "yolo11"
+
+
+def _analyze_reference_bytes(image_bytes: bytes, use_movenet: bool, name: str = "reference") -> dict:
+    """업로드된 레퍼런스 바이트 분석 (등록용, 메모리에서 디코드)"""
+    ref_image = ImageContext.from_bytes(image_bytes, name=name)
+    return ImageComparator.analyze_reference(ref_image, use_movenet=use_movenet)
+
+
+async def _resolve_reference(
+    reference: Optional[UploadFile],
+    reference_id: Optional[str],
+    use_movenet: bool,
+    endpoint: str
+) -> tuple:
+    """
+    레퍼런스 분석 결과 확보
+
+    - reference_id가 등록돼 있으면 재사용 (재분석 없음)
+    - 이미지가 오면 내용 해시로 조회 → 없을 때만 분석 후 등록
+    - 둘 다 없거나 미등록 id만 오면 ReferenceNotFoundError
+    - 분석은 워커 풀에서 실행 (포화 시 PoolSaturatedError)
+
+    Returns:
+        (reference_id, ref_data)
+    """
+    pose_key = _pose_model_key(use_movenet)
+
+    if reference_id:
+        ref_data = _reference_registry.get(reference_id, pose_key)
+        if ref_data is not None:
+            return reference_id, ref_data
+
+    if reference is None:
+        raise ReferenceNotFoundError(reference_id)
+
+    image_bytes = await reference.read()
+    return await _register_reference_bytes(
+        image_bytes, reference.filename or "reference", use_movenet, endpoint
+    )
+
+
+async def _register_reference_bytes(
+    image_bytes: bytes,
+    name: str,
+    use_movenet: bool,
+    endpoint: str
+) -> tuple:
+    """레퍼런스 바이트 → 내용 해시로 조회, 없을 때만 워커 풀에서 분석 후 등록"""
+    pose_key = _pose_model_key(use_movenet)
+    content_id = ReferenceRegistry.compute_reference_id(image_bytes)
+
+    ref_data = _reference_registry.get(content_id, pose_key)
+    if ref_data is None:
+        ref_data = await _analysis_pool.run(
+            endpoint,
+            _reference_registry.get_or_register,
+            content_id, pose_key,
+            lambda: _analyze_reference_bytes(image_bytes, use_movenet, name)
+        )
+    return content_id, ref_data
+
+
+def _reference_not_found_response(reference_id: Optional[str]) -> JSONResponse:
+    return JSONResponse({
+        "error": "reference not registered",
+        "referenceId": reference_id,
+        "uploadRequired": True
+    }, status_code=404)
+
+
+def _pool_saturated_response(error: PoolSaturatedError, extra: Optional[dict] = None) -> JSONResponse:
+    """분석 대기열 초과 → 503 + Retry-After"""
+    logger.warning("analysis pool saturated endpoint=%s retry_after=%s", error.endpoint, error.retry_after)
+    return JSONResponse({
+        "error": "server busy",
+        "retryAfter": error.retry_after,
+        **(extra or {})
+    }, status_code=503, headers={"Retry-After": str(error.retry_after)})
+
+
+def _run_realtime_analysis(frame_bytes: bytes, frame_name: str, use_movenet: bool, ref_data: dict) -> dict:
+    """실시간 분석 본체 (워커 스레드에서 실행)"""
+    frame_image = ImageContext.from_bytes(frame_bytes, name=frame_name)
+    logger.debug("realtime frame %s", frame_image)
+
+    # 레퍼런스는 등록소에서 재사용, 현재 프레임만 분석
+    comparator = ImageComparator(
+        None, frame_image,
+        use_movenet=use_movenet,
+        reference_data=ref_data,
+        outputs=REALTIME_OUTPUTS
+    )
+    return comparator.compare()
+
+
+def _run_enhanced_analysis(frame_bytes: bytes, frame_name: str, ref_data: dict) -> list:
+    """Enhanced 피드백 분석 본체 (워커 스레드에서 실행)"""
+    frame_image = ImageContext.from_bytes(frame_bytes, name=frame_name)
+    comparator = ImageComparator(None, frame_image, reference_data=ref_data)
+    return comparator.get_prioritized_feedback()
+
+
+def _run_user_analysis(image_bytes: bytes, image_name: str) -> dict:
+    """추천용 사용자 이미지 분석 (워커 스레드에서 실행)"""
+    from analysis.image_analyzer import ImageAnalyzer
+
+    # 추천에는 클러스터 + 128D 임베딩만 필요
+    analyzer = ImageAnalyzer(ImageContext.from_bytes(image_bytes, name=image_name), outputs={"cluster"})
+    return analyzer.analyze()
 
 
 @app.get("/")
@@ -60,26 +286,132 @@ async def root():
             "top_k_feedback": PHASE_1_3_AVAILABLE,
             "workflow_guide": PHASE_1_3_AVAILABLE,
             "progress_tracking": PHASE_1_3_AVAILABLE,
-            "recommendations": PHASE_1_3_AVAILABLE
+            "recommendations": PHASE_1_3_AVAILABLE,
+            "reference_registry": True,
+            "analysis_pool": True
         }
     }
 
 
+@app.get("/api/pool/stats")
+async def pool_stats():
+    """분석 워커 풀 통계 (엔드포인트별 대기열 길이, 대기/실행 시간)"""
+    return JSONResponse(_analysis_pool.get_stats())
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus 메트릭 (text format)
+
+    - tryangle_stage_duration_seconds{stage}: 단계별 지연 히스토그램
+      (decode, feature_*, embed, cluster_match, pose_*, quality, lighting, exif)
+    - tryangle_cache_requests_total / tryangle_cache_hit_ratio: feature_cache, model_cache
+    - tryangle_pool_*: 엔드포인트별 대기열 길이, 실행 수, 거절 수
+    - tryangle_model_load_seconds{model}: 로드된 모델별 로드 시간
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/traces")
+async def list_traces():
+    """이 워커에 보관된 최근 트레이스 id (최근 것부터)"""
+    return JSONResponse({"traceIds": _trace_store.list_ids()})
+
+
+@app.get("/api/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Chrome trace_event JSON (Perfetto / chrome://tracing에서 열기)"""
+    trace = _trace_store.get(trace_id)
+    if trace is None:
+        return JSONResponse({"error": "trace not found", "traceId": trace_id}, status_code=404)
+    return JSONResponse(trace)
+
+
+@app.get("/api/worker/memory")
+async def worker_memory():
+    """
+    이 요청을 처리한 워커의 메모리 (RSS / 공유 / 전용, Linux)
+
+    serve.py 프리포크 모드에서는 shared가 부모와 공유하는 모델 가중치 크기
+    """
+    report = read_memory_report()
+    if report is None:
+        return JSONResponse({"error": "memory report not supported on this OS"}, status_code=501)
+    return JSONResponse(report)
+
+
+@app.post("/api/reference/register")
+async def register_reference(
+    reference: Optional[UploadFile] = File(None),
+    reference_id: Optional[str] = Form(None),
+    pose_model: str = Form("movenet")
+):
+    """
+    레퍼런스 등록
+
+    레퍼런스를 한 번만 업로드(또는 해시만 전송)하고
+    이후 프레임 요청에는 reference_id만 보낸다.
+
+    Args:
+        reference: 레퍼런스 이미지 (미등록일 때 필요)
+        reference_id: 이미지 내용 해시 (SHA256 앞 16자). 등록 여부 확인용
+        pose_model: 포즈 모델 ("yolo11" 또는 "movenet")
+    """
+    start_time = time.time()
+    use_movenet = (pose_model.lower() == "movenet")
+
+    try:
+        resolved_id, _ = await _resolve_reference(reference, reference_id, use_movenet, "reference_register")
+    except ReferenceNotFoundError:
+        return _reference_not_found_response(reference_id)
+    except PoolSaturatedError as e:
+        return _pool_saturated_response(e)
+    except Exception as e:
+        logger.error("reference registration failed: %s", e)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+    elapsed = time.time() - start_time
+    return JSONResponse({
+        "referenceId": resolved_id,
+        "poseModel": _pose_model_key(use_movenet),
+        "processingTime": f"{elapsed:.3f}s"
+    })
+
+
+@app.delete("/api/reference/{reference_id}")
+async def unregister_reference(reference_id: str):
+    """레퍼런스 등록 해제"""
+    removed = _reference_registry.remove(reference_id)
+    return JSONResponse({
+        "referenceId": reference_id,
+        "removed": removed
+    })
+
+
+@app.get("/api/reference/stats")
+async def reference_stats():
+    """레퍼런스 등록소 통계"""
+    return JSONResponse(_reference_registry.get_stats())
+
+
 @app.post("/api/analyze/realtime")
 async def analyze_realtime(
-    reference: UploadFile = File(...),
     current_frame: UploadFile = File(...),
+    reference: Optional[UploadFile] = File(None),
+    reference_id: Optional[str] = Form(None),
     pose_model: str = "movenet"  # Phase 2-4: "yolo11" or "movenet" (Default: movenet for +15% accuracy)
 ):
     """
     실시간 프레임 분석
 
-    iOS에서 레퍼런스 이미지와 현재 프레임을 전송하면
+    iOS에서 레퍼런스 이미지(또는 등록된 reference_id)와 현재 프레임을 전송하면
     AI 분석 후 피드백을 반환
 
     Args:
-        reference: 레퍼런스 이미지
         current_frame: 현재 프레임
+        reference: 레퍼런스 이미지 (reference_id가 등록돼 있으면 생략 가능)
+        reference_id: /api/reference/register에서 받은 id
         pose_model: 포즈 모델 선택 ("yolo11" 또는 "movenet")
     """
     start_time = time.time()
@@ -87,58 +419,341 @@ async def analyze_realtime(
     # Phase 2-4: MoveNet 옵션 설정
     use_movenet = (pose_model.lower() == "movenet")
 
-    # 임시 파일 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as ref_temp:
-        ref_temp.write(await reference.read())
-        ref_path = ref_temp.name
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as frame_temp:
-        frame_temp.write(await current_frame.read())
-        frame_path = frame_temp.name
+    try:
+        resolved_id, ref_data = await _resolve_reference(reference, reference_id, use_movenet, "analyze_realtime")
+    except ReferenceNotFoundError:
+        return _reference_not_found_response(reference_id)
+    except PoolSaturatedError as e:
+        return _pool_saturated_response(e, {"userFeedback": [], "cameraSettings": {}})
+    except Exception as e:
+        logger.error("reference analysis failed: %s", e)
+        return JSONResponse({
+            "error": str(e),
+            "userFeedback": [],
+            "cameraSettings": {}
+        }, status_code=500)
 
     try:
-        print(f"\n📸 분석 시작...")
-        print(f"   레퍼런스: {ref_path}")
-        print(f"   현재 프레임: {frame_path}")
-        print(f"   포즈 모델: {pose_model.upper()}")  # Phase 2-4
+        frame_bytes = await current_frame.read()
 
-        # TryAngle 분석 (기존 Python 코드 활용)
-        # Phase 2-4: MoveNet 옵션 전달
-        comparator = ImageComparator(ref_path, frame_path, use_movenet=use_movenet)
-        comparison = comparator.compare()
+        logger.debug("realtime analysis start reference_id=%s pose_model=%s", resolved_id, pose_model)
 
-        # 사용자 피드백 추출 (행동 가능한 것만)
-        user_feedback = extract_user_feedback(comparison)
+        # TryAngle 분석 (기존 Python 코드 활용)
+        # 메모리에서 한 번만 디코드, 분석은 워커 풀에서 (이벤트 루프 블로킹 없음)
+        comparison = await _analysis_pool.run(
+            "analyze_realtime",
+            _run_realtime_analysis,
+            frame_bytes, current_frame.filename or "frame", use_movenet, ref_data
+        )
 
-        # 카메라 설정 추출 (자동 조정용)
-        camera_settings = extract_camera_settings(comparison)
+        # 사용자 피드백 (행동 가능한 것만) + 카메라 설정 (자동 조정용)
+        user_feedback, camera_settings = _build_realtime_result(comparison)
 
         elapsed = time.time() - start_time
-        print(f"✅ 분석 완료! ({elapsed:.3f}초)")
-        print(f"   피드백 {len(user_feedback)}개 생성")
+        logger.info("realtime analysis done elapsed=%.3fs feedback=%d", elapsed, len(user_feedback))
 
         return JSONResponse({
             "userFeedback": user_feedback,
             "cameraSettings": camera_settings,
+            "referenceId": resolved_id,
             "processingTime": f"{elapsed:.3f}s",
             "timestamp": time.time()
         })
 
+    except PoolSaturatedError as e:
+        return _pool_saturated_response(e, {"userFeedback": [], "cameraSettings": {}})
+
     except Exception as e:
-        print(f"❌ 에러 발생: {e}")
+        logger.error("realtime analysis failed: %s", e)
         return JSONResponse({
             "error": str(e),
             "userFeedback": [],
             "cameraSettings": {}
         }, status_code=500)
 
-    finally:
-        # 임시 파일 삭제
+
+def _build_realtime_result(comparison: dict) -> tuple:
+    """실시간 비교 결과 → (userFeedback, cameraSettings)"""
+    return extract_user_feedback(comparison), extract_camera_settings(comparison)
+
+
+# ============================================================
+# 실시간 스트리밍 (WebSocket)
+# ============================================================
+
+class _LatestFrameSlot:
+    """
+    최신 프레임 1장만 보관하는 슬롯 (latest-frame-wins)
+
+    분석 중에 새 프레임이 여러 장 오면 마지막 것만 남기고 버린다.
+    → 부하가 걸려도 대기열이 쌓이지 않고 결과가 현재 화면보다 뒤처지지 않음
+    """
+
+    def __init__(self):
+        self._item = None
+        self._event = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, frame_bytes: bytes) -> int:
+        """프레임 넣기 (아직 분석 안 된 이전 프레임은 버림). 프레임 번호 반환"""
+        self.received += 1
+        if self._item is not None:
+            self.dropped += 1
+        self._item = (self.received, frame_bytes)
+        self._event.set()
+        return self.received
+
+    def drop(self):
+        """분석할 수 없는 프레임 (레퍼런스 분석 중) → 받은 즉시 버림"""
+        self.received += 1
+        self.dropped += 1
+
+    async def take(self) -> tuple:
+        """다음 프레임 대기 → (프레임 번호, 바이트), 닫혔으면 None"""
+        await self._event.wait()
+        self._event.clear()
+        if self.closed:
+            return None
+        item, self._item = self._item, None
+        return item
+
+    def close(self):
+        """대기 중인 take()를 깨워서 None 반환"""
+        self.closed = True
+        self._item = None
+        self._event.set()
+
+
+class _RealtimeStream:
+    """
+    /ws/realtime 연결 1개의 상태
+
+    - 수신 루프: 제어 메시지(JSON 텍스트) 처리 + 프레임(바이너리)을 슬롯에 넣기
+    - 분석 루프: 슬롯에서 최신 프레임을 꺼내 워커 풀에서 분석 → 결과 push
+    - 레퍼런스 분석: 별도 태스크 (수신 루프를 막지 않음, 그동안 온 프레임은 버림)
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.slot = _LatestFrameSlot()
+        self._send_lock = asyncio.Lock()
+
+        self.reference_id = None
+        self.ref_data = None
+        self.use_movenet = True
+        self.awaiting_reference = False
+        self.registering = False
+
+    async def send(self, payload: dict) -> bool:
+        """
+        메시지 전송 (보냈으면 True)
+
+        연결이 이미 끊겼으면 예외 대신 False를 돌려주고 스트림을 닫는다
+        (분석 루프 / 레퍼런스 태스크는 아무도 await하지 않으므로 예외가 새면 사라짐)
+        """
+        # 수신 루프와 분석 루프가 동시에 보낼 수 있으므로 직렬화
+        async with self._send_lock:
+            try:
+                await self.websocket.send_json(payload)
+                return True
+            except (WebSocketDisconnect, RuntimeError) as e:
+                logger.debug("stream send failed, closing: %r", e)
+                self.slot.close()
+                return False
+
+    async def handle_text(self, text: str):
+        try:
+            message = json.loads(text)
+        except ValueError:
+            await self.send({"type": "error", "error": "invalid json"})
+            return
+
+        msg_type = message.get("type")
+
+        if msg_type == "bind":
+            # 등록된 reference_id로 바인딩 (없으면 업로드 요청)
+            pose_model = message.get("poseModel", "movenet")
+            self.use_movenet = (pose_model.lower() == "movenet")
+            reference_id = message.get("referenceId")
+
+            ref_data = None
+            if reference_id:
+                ref_data = _reference_registry.get(reference_id, _pose_model_key(self.use_movenet))
+
+            if ref_data is None:
+                # 다음 바이너리 메시지를 레퍼런스 이미지로 받음
+                self.awaiting_reference = True
+                await self.send({
+                    "type": "error",
+                    "error": "reference not registered",
+                    "referenceId": reference_id,
+                    "uploadRequired": True
+                })
+                return
+
+            await self._bind(reference_id, ref_data)
+
+        elif msg_type == "reference":
+            # 다음 바이너리 메시지가 레퍼런스 이미지
+            pose_model = message.get("poseModel", "movenet")
+            self.use_movenet = (pose_model.lower() == "movenet")
+            self.awaiting_reference = True
+
+        elif msg_type == "stats":
+            await self.send({
+                "type": "stats",
+                "received": self.slot.received,
+                "dropped": self.slot.dropped
+            })
+
+        else:
+            await self.send({"type": "error", "error": f"unknown message type: {msg_type}"})
+
+    async def handle_bytes(self, data: bytes):
+        if self.awaiting_reference:
+            self.awaiting_reference = False
+            self.registering = True
+            # 레퍼런스 분석(수 초)은 수신 루프 밖에서: 그동안에도 stats / 프레임을 계속 읽음
+            task = asyncio.create_task(self._register_reference(data))
+            _stream_tasks.add(task)
+            task.add_done_callback(_stream_tasks.discard)
+            return
+
+        if self.ref_data is None:
+            if self.registering:
+                self.slot.drop()
+                return
+            await self.send({"type": "error", "error": "reference not bound", "uploadRequired": True})
+            return
+
+        self.slot.put(data)
+
+    async def _register_reference(self, data: bytes):
         try:
-            os.unlink(ref_path)
-            os.unlink(frame_path)
-        except:
-            pass
+            reference_id, ref_data = await _register_reference_bytes(
+                data, "ws_reference", self.use_movenet, "ws_reference"
+            )
+        except PoolSaturatedError as e:
+            self.awaiting_reference = True
+            await self.send({"type": "busy", "retryAfter": e.retry_after})
+            return
+        except Exception as e:
+            logger.error("reference analysis failed (ws): %s", e)
+            await self.send({"type": "error", "error": str(e)})
+            return
+        finally:
+            self.registering = False
+
+        if not self.slot.closed:
+            await self._bind(reference_id, ref_data)
+
+    async def _bind(self, reference_id: str, ref_data: dict):
+        self.reference_id = reference_id
+        self.ref_data = ref_data
+        await self.send({
+            "type": "bound",
+            "referenceId": reference_id,
+            "poseModel": _pose_model_key(self.use_movenet)
+        })
+
+    async def analysis_loop(self):
+        """
+        연결이 끊기면(slot.close) 종료
+
+        분석 중에 끊겨도 작업을 취소하지 않고 끝까지 실행한 뒤 결과만 버린다
+        (진행 중인 프레임 하나만 마저 끝나고 풀 슬롯은 정상 반환)
+        """
+        while True:
+            item = await self.slot.take()
+            if item is None:
+                return
+            frame_seq, frame_bytes = item
+            start_time = time.time()
+
+            try:
+                comparison = await _analysis_pool.run(
+                    "ws_realtime",
+                    _run_realtime_analysis,
+                    frame_bytes, f"ws_frame_{frame_seq}", self.use_movenet, self.ref_data
+                )
+            except PoolSaturatedError as e:
+                # 이 프레임은 버리고 다음 프레임으로
+                if self.slot.closed:
+                    return
+                if not await self.send({"type": "busy", "frameSeq": frame_seq, "retryAfter": e.retry_after}):
+                    return
+                continue
+            except Exception as e:
+                logger.error("stream analysis failed frame_seq=%s: %s", frame_seq, e)
+                if self.slot.closed:
+                    return
+                if not await self.send({"type": "error", "frameSeq": frame_seq, "error": str(e)}):
+                    return
+                continue
+
+            if self.slot.closed:
+                # 분석 중 연결 종료 → 결과 버림
+                return
+
+            user_feedback, camera_settings = _build_realtime_result(comparison)
+            sent = await self.send({
+                "type": "feedback",
+                "frameSeq": frame_seq,
+                "userFeedback": user_feedback,
+                "cameraSettings": camera_settings,
+                "referenceId": self.reference_id,
+                "droppedFrames": self.slot.dropped,
+                "processingTime": f"{time.time() - start_time:.3f}s",
+                "timestamp": time.time()
+            })
+            if not sent:
+                # 확인과 전송 사이에 연결 종료
+                return
+
+
+# 종료 대기 중인 스트림 분석 / 레퍼런스 등록 태스크 (GC 방지)
+_stream_tasks = set()
+
+
+@app.websocket("/ws/realtime")
+async def realtime_stream(websocket: WebSocket):
+    """
+    실시간 프레임 스트리밍
+
+    1. {"type": "bind", "referenceId": "...", "poseModel": "movenet"}
+       (미등록이면 uploadRequired 응답 → 다음 바이너리 메시지로 레퍼런스 전송)
+       또는 {"type": "reference", "poseModel": "movenet"} + 레퍼런스 JPEG (바이너리)
+    2. 이후 바이너리 메시지 = 현재 프레임 JPEG
+    3. 서버는 분석이 끝날 때마다 {"type": "feedback", ...}를 push
+       (분석 중 들어온 프레임은 최신 1장만 남기고 버림)
+    """
+    await websocket.accept()
+    stream = _RealtimeStream(websocket)
+    analysis_task = asyncio.create_task(stream.analysis_loop())
+    # 연결 종료 후에도 진행 중인 프레임이 끝날 때까지 태스크 참조 유지
+    _stream_tasks.add(analysis_task)
+    analysis_task.add_done_callback(_stream_tasks.discard)
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                await stream.handle_bytes(message["bytes"])
+            elif message.get("text") is not None:
+                await stream.handle_text(message["text"])
+
+    except WebSocketDisconnect:
+        pass
+
+    finally:
+        # cancel 대신 종료 신호: 진행 중인 프레임은 끝까지 실행하고 결과만 버림
+        stream.slot.close()
+        logger.info("stream closed received=%d dropped=%d", stream.slot.received, stream.slot.dropped)
 
 
 def extract_user_feedback(comparison: dict) -> list:
@@ -149,7 +764,7 @@ def extract_user_feedback(comparison: dict) -> list:
     feedback = []
 
     # 포즈 피드백만 처리 (서버의 주요 역할)
-    pose = comparison["pose_comparison"]
+    pose = comparison.get("pose_comparison", {"available": False})
     if pose["available"]:
         # 포즈 피드백 안정화를 위해 더 엄격한 조건 적용
         if pose.get("similarity", 0) < 0.8:  # 80% 미만일 때만 피드백
@@ -232,15 +847,15 @@ def extract_camera_settings(comparison: dict) -> dict:
     settings = {}
 
     # 1. ISO
-    exif = comparison["exif_comparison"]
+    exif = comparison.get("exif_comparison", {"available": False})
     if exif["available"]:
         ref_iso = exif["ref_settings"].get("iso")
         if ref_iso:
             settings["iso"] = int(ref_iso)
 
     # 2. 화이트밸런스 (Kelvin)
-    color = comparison["color_comparison"]
-    ref_temp = color["ref_temperature"]
+    color = comparison.get("color_comparison", {})
+    ref_temp = color.get("ref_temperature")
     wb_map = {
         "cool": 6500,    # 차가운 톤
         "neutral": 5500, # 중성 톤
@@ -249,8 +864,9 @@ def extract_camera_settings(comparison: dict) -> dict:
     settings["wbKelvin"] = wb_map.get(ref_temp, 5500)
 
     # 3. 노출 보정 (EV)
-    brightness = comparison["brightness_comparison"]
-    settings["evCompensation"] = brightness["ev_adjustment"]
+    brightness = comparison.get("brightness_comparison")
+    if brightness is not None:
+        settings["evCompensation"] = brightness["ev_adjustment"]
 
     return settings
 
@@ -261,8 +877,9 @@ def extract_camera_settings(comparison: dict) -> dict:
 
 @app.post("/api/feedback/enhanced")
 async def get_enhanced_feedback(
-    reference: UploadFile = File(...),
     current_frame: UploadFile = File(...),
+    reference: Optional[UploadFile] = File(None),
+    reference_id: Optional[str] = Form(None),
     user_level: str = Form("beginner"),  # beginner, intermediate, expert
     top_k: int = Form(3),
     session_id: Optional[str] = Form(None)
@@ -283,21 +900,25 @@ async def get_enhanced_feedback(
 
     start_time = time.time()
 
-    # 임시 파일 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as ref_temp:
-        ref_temp.write(await reference.read())
-        ref_path = ref_temp.name
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as frame_temp:
-        frame_temp.write(await current_frame.read())
-        frame_path = frame_temp.name
+    try:
+        resolved_id, ref_data = await _resolve_reference(reference, reference_id, False, "feedback_enhanced")
+    except ReferenceNotFoundError:
+        return _reference_not_found_response(reference_id)
+    except PoolSaturatedError as e:
+        return _pool_saturated_response(e)
+    except Exception as e:
+        logger.error("reference analysis failed: %s", e)
+        return JSONResponse({"error": str(e)}, status_code=500)
 
     try:
-        print(f"\n📸 Enhanced 분석 시작 (user_level={user_level}, top_k={top_k})...")
+        logger.debug("enhanced analysis start user_level=%s top_k=%s", user_level, top_k)
 
-        # 이미지 비교
-        comparator = ImageComparator(ref_path, frame_path)
-        raw_feedback = comparator.get_prioritized_feedback()
+        # 이미지 비교 (레퍼런스는 등록소에서 재사용, 분석은 워커 풀에서)
+        raw_feedback = await _analysis_pool.run(
+            "feedback_enhanced",
+            _run_enhanced_analysis,
+            await current_frame.read(), current_frame.filename or "frame", ref_data
+        )
 
         # Phase 1.1 & 1.2: 피드백 포맷팅
         formatter = FeedbackFormatter(user_level=user_level)
@@ -315,23 +936,21 @@ async def get_enhanced_feedback(
         # Phase 2.2: 진행도 추적
         progress_data = None
         if session_id:
-            if session_id not in _progress_trackers:
-                # 첫 촬영 - 진행도 트래커 생성
-                _progress_trackers[session_id] = ProgressTracker()
-                _progress_trackers[session_id].set_initial_state(raw_feedback)
-                progress = {
-                    'overall_score': _progress_trackers[session_id].history[0]['score'],
-                    'progress_percent': 0,
-                    'attempt_number': 1,
-                    'is_first': True
-                }
+            tracker = _session_store.get(session_id)
+            if tracker is None:
+                # 첫 촬영 (또는 만료된 세션) - 진행도 트래커 생성
+                tracker = ProgressTracker(max_history=SESSION_MAX_HISTORY)
+                tracker.set_initial_state(raw_feedback)
+                progress = tracker.initial_progress()
+                progress['is_first'] = True
             else:
                 # 후속 촬영 - 진행도 업데이트
-                progress = _progress_trackers[session_id].update_progress(raw_feedback)
+                progress = tracker.update_progress(raw_feedback)
                 progress['is_first'] = False
 
-            progress_text = _progress_trackers[session_id].format_progress_text(progress)
-            encouragement = _progress_trackers[session_id].get_encouragement_message(progress)
+            progress_text = tracker.format_progress_text(progress)
+            encouragement = tracker.get_encouragement_message(progress)
+            _session_store.put(session_id, tracker)
 
             progress_data = {
                 'score': progress['overall_score'],
@@ -343,9 +962,10 @@ async def get_enhanced_feedback(
             }
 
         elapsed = time.time() - start_time
-        print(f"✅ Enhanced 분석 완료! ({elapsed:.3f}초)")
-        print(f"   Primary 피드백: {len(formatted['primary'])}개")
-        print(f"   Workflow 단계: {len([s for s in workflow_steps.values() if s['items']])}개")
+        logger.info(
+            "enhanced analysis done elapsed=%.3fs primary=%d workflow_steps=%d",
+            elapsed, len(formatted['primary']), len([s for s in workflow_steps.values() if s['items']])
+        )
 
         # iOS 친화적 JSON 응답
         return JSONResponse({
@@ -366,32 +986,26 @@ async def get_enhanced_feedback(
                 "recommended": [convert_feedback_to_ios(fb) for fb in priority_groups.get('recommended', [])]
             },
             "progress": progress_data,
+            "reference_id": resolved_id,
             "processing_time": f"{elapsed:.3f}s",
             "timestamp": time.time()
         })
 
+    except PoolSaturatedError as e:
+        return _pool_saturated_response(e)
+
     except Exception as e:
-        print(f"❌ Enhanced 분석 에러: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("enhanced analysis failed: %s", e)
         return JSONResponse({
             "error": str(e)
         }, status_code=500)
 
-    finally:
-        try:
-            os.unlink(ref_path)
-            os.unlink(frame_path)
-        except:
-            pass
-
 
 @app.post("/api/progress/reset")
 async def reset_progress(session_id: str = Form(...)):
     """진행도 초기화"""
-    if session_id in _progress_trackers:
-        del _progress_trackers[session_id]
-        print(f"✅ 진행도 초기화: {session_id}")
+    if _session_store is not None and _session_store.delete(session_id):
+        logger.info("progress reset session_id=%s", session_id)
 
     return JSONResponse({
         "status": "reset",
@@ -399,6 +1013,14 @@ async def reset_progress(session_id: str = Form(...)):
     })
 
 
+@app.get("/api/progress/stats")
+async def progress_stats():
+    """세션 저장소 통계 (세션 수, 만료/제거 수)"""
+    if _session_store is None:
+        return JSONResponse({"error": "Phase 1-3 features not available"}, status_code=503)
+    return JSONResponse(_session_store.get_stats())
+
+
 @app.get("/api/recommendations")
 async def get_recommendations(
     user_image: UploadFile = File(...),
@@ -414,25 +1036,21 @@ async def get_recommendations(
             "error": "Recommendations not available"
         }, status_code=503)
 
-    # 임시 파일 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp:
-        temp.write(await user_image.read())
-        user_path = temp.name
-
     try:
-        from analysis.image_analyzer import ImageAnalyzer
-
-        # 사용자 이미지 분석
-        analyzer = ImageAnalyzer(user_path)
-        features = analyzer.analyze()
+        # 사용자 이미지 분석 (메모리에서 디코드, 워커 풀에서 실행)
+        features = await _analysis_pool.run(
+            "recommendations",
+            _run_user_analysis,
+            await user_image.read(), user_image.filename or "user"
+        )
 
         user_cluster = features['cluster']['cluster_id']
-        user_embedding = features.get('embedding', None)
+        user_embedding = features['cluster'].get('embedding_128d')
 
         if user_embedding is not None:
             recommender = ReferenceRecommender()
             recommendations = recommender.recommend(
-                user_image_path=user_path,
+                user_image_path=None,
                 user_cluster_id=user_cluster,
                 user_embedding=user_embedding,
                 top_k=top_k
@@ -448,18 +1066,15 @@ async def get_recommendations(
                 "error": "Could not extract embedding"
             }, status_code=400)
 
+    except PoolSaturatedError as e:
+        return _pool_saturated_response(e)
+
     except Exception as e:
-        print(f"❌ 추천 에러: {e}")
+        logger.error("recommendation failed: %s", e)
         return JSONResponse({
             "error": str(e)
         }, status_code=500)
 
-    finally:
-        try:
-            os.unlink(user_path)
-        except:
-            pass
-
 
 def convert_feedback_to_ios(feedback: dict) -> dict:
     """Python 피드백을 iOS 친화적 형식으로 변환"""
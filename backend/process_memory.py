@@ -0,0 +1,77 @@
+# ============================================================
+# 🧠 Process Memory
+# /proc/<pid>/smaps_rollup 기반 RSS / 공유 / 전용 메모리 측정 (Linux)
+# ============================================================
+
+from typing import Dict, Optional, Union
+
+# smaps_rollup에서 읽을 항목 (kB)
+_SMAPS_FIELDS = (
+    "Rss", "Pss",
+    "Shared_Clean", "Shared_Dirty",
+    "Private_Clean", "Private_Dirty",
+    "Swap"
+)
+
+
+def read_memory_report(pid: Union[int, str] = "self") -> Optional[Dict]:
+    """
+    프로세스 메모리 요약
+
+    프리포크 워커는 부모가 로드한 모델 가중치 페이지를 copy-on-write로 공유하므로
+    RSS만 보면 워커 수만큼 메모리를 쓰는 것처럼 보인다.
+    shared(다른 프로세스와 공유) / private(이 워커 전용) / pss(공유분을 나눠 계산)를 같이 본다.
+
+    Args:
+        pid: 프로세스 id (기본: 현재 프로세스)
+
+    Returns:
+        {
+            'pid', 'rss_mb', 'pss_mb', 'shared_mb', 'private_mb', 'swap_mb'
+        }
+        smaps_rollup이 없는 OS(macOS/Windows)면 None
+    """
+    path = f"/proc/{pid}/smaps_rollup"
+
+    try:
+        with open(path, "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    values_kb = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].rstrip(":") in _SMAPS_FIELDS:
+            values_kb[parts[0].rstrip(":")] = int(parts[1])
+
+    def _mb(*keys) -> float:
+        return sum(values_kb.get(key, 0) for key in keys) / 1024.0
+
+    return {
+        "pid": pid if pid != "self" else _self_pid(),
+        "rss_mb": _mb("Rss"),
+        "pss_mb": _mb("Pss"),
+        "shared_mb": _mb("Shared_Clean", "Shared_Dirty"),
+        "private_mb": _mb("Private_Clean", "Private_Dirty"),
+        "swap_mb": _mb("Swap")
+    }
+
+
+def format_memory_report(report: Optional[Dict], label: str = "") -> str:
+    """로그용 한 줄 요약"""
+    if report is None:
+        return f"{label} 메모리 정보 없음 (smaps_rollup 미지원)"
+
+    return (
+        f"{label} pid={report['pid']}  "
+        f"RSS={report['rss_mb']:.0f}MB  "
+        f"shared={report['shared_mb']:.0f}MB  "
+        f"private={report['private_mb']:.0f}MB  "
+        f"PSS={report['pss_mb']:.0f}MB"
+    )
+
+
+def _self_pid() -> int:
+    import os
+    return os.getpid()
@@ -0,0 +1,267 @@
+# ============================================================
+# 🚀 TryAngle Pre-fork Server
+# 부모 프로세스에서 모델 로드 + 워밍업 → 워커 fork (가중치 페이지 copy-on-write 공유)
+# ============================================================
+#
+# 실행:
+#   cd backend
+#   TRYANGLE_PROCESSES=4 python serve.py
+#
+# uvicorn --workers N은 워커마다 CLIP/OpenCLIP/DINOv2/MiDaS/YOLO를
+# 따로 로드해서 메모리가 N배가 된다. 여기서는 부모가 한 번만 로드하고
+# 워밍업 추론까지 끝낸 뒤 fork 하므로, 읽기 전용 가중치 페이지를 워커들이 공유한다.
+#
+# MediaPipe(FaceMesh 등)와 TensorFlow(MoveNet interpreter)는 부모에서 만들지 않는다.
+# 둘 다 내부 스레드/뮤텍스를 가진 채 fork되면 자식에서 멈출 수 있으므로
+# 워커가 처음 쓸 때 각자 만든다 (가벼운 모델이라 공유 이득도 작음).
+#
+# 환경변수:
+#   TRYANGLE_HOST / TRYANGLE_PORT     바인드 주소 (기본 0.0.0.0:8000)
+#   TRYANGLE_PROCESSES                워커 프로세스 수 (기본 CPU 코어 수)
+#   TRYANGLE_TORCH_THREADS            워커당 torch 스레드 수 (기본 코어 수 / (워커 수 x 분석 풀 워커 수))
+#   TRYANGLE_WORKERS                  워커 프로세스별 분석 풀 워커 수 (backend/main.py, 기본 2)
+#   TRYANGLE_MEMORY_REPORT_DELAY      워커 시작 후 메모리 리포트까지 대기 (초, 기본 10)
+#   TRYANGLE_METRICS_DIR              워커 메트릭 스냅샷 공유 디렉토리 (기본 임시 디렉토리)
+#
+# /metrics는 아무 워커나 받지만 모든 워커의 스냅샷을 합쳐서 출력한다
+# (시계열마다 worker="<번호>" 라벨, utils/metrics.py 참고).
+#
+# 실행 중 `kill -USR1 <부모 pid>`로 메모리 리포트를 다시 출력할 수 있다.
+# Linux 전용 (fork + /proc/<pid>/smaps_rollup). CUDA를 쓰는 환경에서는
+# fork 후 CUDA 컨텍스트를 쓸 수 없으므로 단일 프로세스로 실행한다.
+
+import gc
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+
+import numpy as np
+
+from process_memory import read_memory_report, format_memory_report
+
+HOST = os.environ.get("TRYANGLE_HOST", "0.0.0.0")
+PORT = int(os.environ.get("TRYANGLE_PORT", "8000"))
+NUM_PROCESSES = int(os.environ.get("TRYANGLE_PROCESSES", str(os.cpu_count() or 1)))
+POOL_WORKERS = max(1, int(os.environ.get("TRYANGLE_WORKERS", "2")))
+TORCH_THREADS = int(os.environ.get(
+    "TRYANGLE_TORCH_THREADS",
+    str(max(1, (os.cpu_count() or 1) // (max(1, NUM_PROCESSES) * POOL_WORKERS)))
+))
+MEMORY_REPORT_DELAY = float(os.environ.get("TRYANGLE_MEMORY_REPORT_DELAY", "10"))
+METRICS_DIR = os.environ.get("TRYANGLE_METRICS_DIR")
+
+# fork 전에 만들지 않는 feature 브랜치 (MediaPipe)
+PREFORK_EXCLUDED_BRANCHES = ("face",)
+# 혹시 부모에서 만들어졌더라도 워커에서 버리고 다시 만들 model_cache 키 (MediaPipe / TF)
+FORK_UNSAFE_CACHE_KEYS = ("feature_face", "movenet_interpreter")
+
+# 부모 프로세스 상태
+_workers = {}          # {pid: worker_index}
+_shutting_down = False
+
+
+# ============================================================
+# 모델 로드 + 워밍업 (부모에서 1회)
+# ============================================================
+def preload_and_warmup():
+    """
+    model_cache에 torch 모델을 올리고 더미 이미지로 한 번씩 추론
+
+    첫 추론 때 일어나는 지연 할당(연산 커널 선택, 버퍼 할당 등)을
+    fork 전에 끝내서 워커들이 그 페이지까지 공유하게 한다.
+    MediaPipe / TF 모델은 만들지도 돌리지도 않는다 (PREFORK_EXCLUDED_BRANCHES).
+    YOLO 포즈는 특징 추출의 yolo_pose 브랜치에서 PoseAnalyzer와 같은 인스턴스로 워밍업된다.
+    피처 캐시(디스크)는 거치지 않는다.
+    """
+    from utils.image_context import ImageContext
+    from feature_extraction.feature_extractor_v2 import load_models, extract_features_v2, FEATURE_BRANCHES
+    from embedder.embedder import get_embedder_models
+    from matching.cluster_matcher import get_cluster_models, match_cluster_from_features
+
+    start = time.time()
+    print("🔧 모델 로드 + 워밍업 (부모 프로세스)...")
+
+    # 브랜치별 lazy 로딩이지만 fork 전에는 torch 모델을 전부 올림
+    load_models(preload=None, exclude=PREFORK_EXCLUDED_BRANCHES)
+    get_embedder_models()
+    get_cluster_models()
+
+    rng = np.random.default_rng(0)
+    dummy = ImageContext.from_array(
+        rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8),
+        name="warmup"
+    )
+
+    branches = set(FEATURE_BRANCHES) - set(PREFORK_EXCLUDED_BRANCHES)
+    features = extract_features_v2(dummy, branches=branches)
+    if features is not None:
+        features["face"] = np.zeros(7, dtype=np.float32)   # 얼굴 미검출과 같은 값
+        match_cluster_from_features(features)
+
+    print(f"✅ 워밍업 완료 ({time.time() - start:.1f}초)")
+
+
+# ============================================================
+# 워커
+# ============================================================
+def _create_socket() -> socket.socket:
+    """부모에서 만들어 워커들이 공유하는 리슨 소켓"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _prepare_metrics_dir() -> tuple:
+    """워커 스냅샷 디렉토리 (이전 실행의 스냅샷은 지움) → (경로, 종료 시 삭제 여부)"""
+    if METRICS_DIR is None:
+        return tempfile.mkdtemp(prefix="tryangle_metrics_"), True
+
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    for name in os.listdir(METRICS_DIR):
+        if name.startswith("worker_"):
+            os.remove(os.path.join(METRICS_DIR, name))
+    return METRICS_DIR, False
+
+
+def _run_worker(index: int, sock: socket.socket, app, metrics_dir: str):
+    """fork된 자식: uvicorn 서버 실행 (반환하지 않음)"""
+    import uvicorn
+    import torch
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+
+    # MediaPipe / TF 객체는 워커마다 처음 쓸 때 새로 만든다
+    from utils.model_cache import model_cache
+    for key in FORK_UNSAFE_CACHE_KEYS:
+        model_cache.clear(key)
+
+    # 워커끼리 코어를 나눠 쓰도록 torch 스레드 제한
+    torch.set_num_threads(TORCH_THREADS)
+
+    # /metrics를 받은 워커가 다른 워커 값까지 합쳐서 출력하도록 스냅샷 시작
+    from utils.metrics import enable_multiprocess
+    enable_multiprocess(metrics_dir, index)
+
+    print(f"  👷 워커 {index} 시작 (pid={os.getpid()}, torch threads={TORCH_THREADS})")
+
+    config = uvicorn.Config(app, log_level="info")
+    server = uvicorn.Server(config)
+    try:
+        server.run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+
+def _spawn_worker(index: int, sock: socket.socket, app, metrics_dir: str):
+    pid = os.fork()
+    if pid == 0:
+        _run_worker(index, sock, app, metrics_dir)
+    _workers[pid] = index
+
+
+# ============================================================
+# 메모리 리포트
+# ============================================================
+def print_memory_report(*_):
+    """부모 + 워커별 RSS / 공유 / 전용 메모리"""
+    print("\n" + "="*60)
+    print("🧠 메모리 리포트 (shared = 다른 프로세스와 공유하는 페이지)")
+    print("="*60)
+    print(format_memory_report(read_memory_report(os.getpid()), "  부모   "))
+
+    total_rss = 0.0
+    total_pss = 0.0
+    for pid, index in sorted(_workers.items(), key=lambda item: item[1]):
+        report = read_memory_report(pid)
+        print(format_memory_report(report, f"  워커 {index}"))
+        if report is not None:
+            total_rss += report["rss_mb"]
+            total_pss += report["pss_mb"]
+
+    print(f"  워커 RSS 합계: {total_rss:.0f}MB / 실제 사용(PSS 합계): {total_pss:.0f}MB")
+    print("="*60 + "\n")
+
+
+# ============================================================
+# 메인
+# ============================================================
+def _handle_shutdown(signum, frame):
+    global _shutting_down
+    _shutting_down = True
+    for pid in list(_workers):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+
+def main():
+    from main import app
+    from feature_extraction.feature_extractor_v2 import device
+
+    if device == "cuda" or not hasattr(os, "fork"):
+        # CUDA 컨텍스트는 fork 후 사용할 수 없음 → 단일 프로세스
+        import uvicorn
+        print("⚠️ CUDA 또는 fork 미지원 환경 → 단일 프로세스로 실행")
+        uvicorn.run(app, host=HOST, port=PORT)
+        return
+
+    preload_and_warmup()
+
+    # fork 전에 살아있는 객체를 GC 추적 대상에서 제외
+    # (GC가 객체 헤더를 건드려 공유 페이지가 복사되는 것을 줄임)
+    gc.collect()
+    gc.freeze()
+
+    sock = _create_socket()
+    metrics_dir, remove_metrics_dir = _prepare_metrics_dir()
+
+    print(f"\n🚀 TryAngle 프리포크 서버: http://{HOST}:{PORT} (워커 {NUM_PROCESSES}개)")
+    for index in range(NUM_PROCESSES):
+        _spawn_worker(index, sock, app, metrics_dir)
+
+    signal.signal(signal.SIGINT, _handle_shutdown)
+    signal.signal(signal.SIGTERM, _handle_shutdown)
+    signal.signal(signal.SIGUSR1, print_memory_report)
+
+    report_at = time.time() + MEMORY_REPORT_DELAY
+    reported = False
+
+    while _workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+
+        if pid == 0:
+            if not reported and time.time() >= report_at:
+                print_memory_report()
+                reported = True
+            time.sleep(0.5)
+            continue
+
+        index = _workers.pop(pid, None)
+        if index is None:
+            continue
+
+        if not _shutting_down:
+            # 죽은 워커 재시작 (모델은 부모 메모리에서 그대로 공유)
+            print(f"⚠️ 워커 {index} 종료 (pid={pid}, status={status}) → 재시작")
+            _spawn_worker(index, sock, app, metrics_dir)
+
+    sock.close()
+    if remove_metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+    print("✅ 서버 종료")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,25 @@
 from PIL import Image
 from PIL.ExifTags import TAGS, GPSTAGS
 from typing import Dict, Optional, Any
+import io
 import os
+import sys
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
     PROJECT_ROOT = PROJECT_ROOT.parent
 
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from utils.image_context import ImageContext
+from utils.metrics import timed
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
 
 class ExifAnalyzer:
     """
@@ -79,29 +91,41 @@ class ExifAnalyzer:
         8: 'Landscape'
     }
 
-    def __init__(self, image_path: str):
+    def __init__(self, image_path):
         """
         Args:
-            image_path: 이미지 파일 경로
+            image_path: 이미지 파일 경로 또는 ImageContext (메모리 이미지)
         """
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image not found: {image_path}")
+        if isinstance(image_path, ImageContext):
+            self.context = image_path
+            self.image_path = image_path.path or image_path.name
+        else:
+            if not os.path.exists(image_path):
+                raise FileNotFoundError(f"Image not found: {image_path}")
+            self.context = None
+            self.image_path = image_path
 
-        self.image_path = image_path
         self.exif_data = {}
         self.raw_exif = {}
 
         # EXIF 추출
         self._extract_exif()
 
+    @timed("exif")
     def _extract_exif(self):
         """EXIF 데이터 추출"""
         try:
-            image = Image.open(self.image_path)
+            if self.context is not None:
+                if self.context.raw_bytes is None:
+                    # 디코드된 배열(카메라 프레임 등)에는 EXIF가 없음
+                    return
+                image = Image.open(io.BytesIO(self.context.raw_bytes))
+            else:
+                image = Image.open(self.image_path)
             exif = image.getexif()
 
             if exif is None or len(exif) == 0:
-                print(f"  ⚠️ No EXIF data found in {os.path.basename(self.image_path)}")
+                logger.debug("no exif data image=%s", os.path.basename(str(self.image_path)))
                 return
 
             # Raw EXIF 저장
@@ -113,7 +137,7 @@ class ExifAnalyzer:
             self._parse_camera_settings()
 
         except Exception as e:
-            print(f"  ⚠️ EXIF extraction failed: {e}")
+            logger.warning("exif extraction failed: %s", e)
 
     def _parse_camera_settings(self):
         """카메라 설정 파싱"""
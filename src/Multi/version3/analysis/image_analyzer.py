@@ -4,7 +4,6 @@
 # ============================================================
 
 import os
-import json
 import cv2
 import numpy as np
 from pathlib import Path
@@ -20,8 +19,14 @@ while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exist
 if str(VERSION3_DIR) not in sys.path:
     sys.path.append(str(VERSION3_DIR))
 
-from feature_extraction.feature_extractor_v2 import extract_features_v2 as extract_features_full
-from matching.cluster_matcher import match_cluster_from_features
+from feature_extraction.feature_extractor_v2 import extract_features_v2 as extract_features_full, FEATURE_BRANCHES, DEPTH_TIER
+from matching.cluster_matcher import match_cluster_from_features, get_cluster_interpretation
+from embedder.embedder import required_branches as embedder_branches
+from utils.image_context import ImageContext, DEPTH_MAP_OUTPUT
+from utils.log import get_logger
+from utils.tracing import span
+
+logger = get_logger(__name__)
 
 # Phase 1.3: Feature Cache
 try:
@@ -67,6 +72,72 @@ except ImportError:
     LIGHTING_AVAILABLE = False
 
 
+# ============================================================
+# 출력 → 의존성 그래프 (요청한 출력에 필요한 단계만 실행)
+# ============================================================
+ALL_OUTPUTS = (
+    "cluster", "depth", "pixels", "composition",
+    "pose", "exif", "quality", "lighting", "raw_features"
+)
+
+# outputs=None일 때 계산할 출력: raw_features(전체 브랜치 추출)는 명시적으로 요청할 때만.
+# 포즈 출력은 PoseAnalyzer가 따로 돌리므로 기본 분석은 클러스터에 필요한 브랜치(+ depth)만 추출
+DEFAULT_OUTPUTS = tuple(name for name in ALL_OUTPUTS if name != "raw_features")
+
+# 엔드포인트에서 쓰는 이름 → analyze() 출력 키
+OUTPUT_ALIASES = {
+    "brightness": "pixels",
+    "color": "pixels",
+}
+
+# 출력 → 먼저 계산돼야 하는 다른 출력
+OUTPUT_DEPENDENCIES = {
+    "depth": {"cluster"},      # cluster_typical_depth
+    "lighting": {"pose"},      # 인물 조명 분석에 pose_data 사용
+}
+
+# 출력 → 필요한 feature 브랜치 (없으면 backbone 실행 안 함)
+# "cluster"는 embedder 가중치(weights.json)가 0이 아닌 브랜치만 (embedder_branches())
+OUTPUT_FEATURE_BRANCHES = {
+    "depth": {"midas"},
+    "raw_features": set(FEATURE_BRANCHES),  # 포즈/얼굴 특징이 필요하면 raw_features 요청
+}
+
+
+def resolve_outputs(outputs=None) -> set:
+    """
+    요청 출력 → 실제로 계산할 출력 집합 (별칭 변환 + 의존성 포함)
+
+    outputs=None이면 DEFAULT_OUTPUTS (raw_features 제외 전체)
+    """
+    if outputs is None:
+        return set(DEFAULT_OUTPUTS)
+
+    pending = [OUTPUT_ALIASES.get(name, name) for name in outputs]
+    resolved = set()
+
+    while pending:
+        name = pending.pop()
+        if name in resolved:
+            continue
+        if name not in ALL_OUTPUTS:
+            raise ValueError(f"❌ 알 수 없는 분석 출력: {name}")
+        resolved.add(name)
+        pending.extend(OUTPUT_DEPENDENCIES.get(name, ()))
+
+    return resolved
+
+
+def required_feature_branches(resolved_outputs) -> set:
+    """계산할 출력 집합 → 필요한 feature 브랜치"""
+    branches = set()
+    for name in resolved_outputs:
+        branches |= OUTPUT_FEATURE_BRANCHES.get(name, set())
+    if "cluster" in resolved_outputs:
+        branches |= embedder_branches()
+    return branches
+
+
 class ImageAnalyzer:
     """
     한 장의 이미지를 분석해서:
@@ -74,58 +145,70 @@ class ImageAnalyzer:
     2) 측정 가능한 값들 추출 (비교용)
     """
     
-    def __init__(self, image_path: str, enable_pose: bool = True, enable_exif: bool = True, enable_quality: bool = True, enable_lighting: bool = True, use_movenet: bool = False):
+    def __init__(self, image_path, enable_pose: bool = True, enable_exif: bool = True, enable_quality: bool = True, enable_lighting: bool = True, use_movenet: bool = False, outputs=None, depth_tier=None):
         """
         Args:
-            image_path: 이미지 파일 경로
+            image_path: 이미지 파일 경로, 인코딩된 bytes, BGR ndarray 또는 ImageContext
+                        (디코드는 한 번만 하고 모든 분석기가 공유, 임시 파일 없음)
             enable_pose: 포즈 분석 활성화
             enable_exif: EXIF 분석 활성화
             enable_quality: 품질 분석 활성화
             enable_lighting: 조명 분석 활성화
             use_movenet: True면 MoveNet 사용, False면 YOLO11 사용 (Phase 2-4)
+            outputs: 필요한 출력 집합 (예: {"pose", "exif", "brightness", "color"})
+                     None이면 raw_features 제외 전체. 필요 없는 단계(backbone, 클러스터 등)는 건너뜀
+            depth_tier: MiDaS depth 티어 ("full" / "reduced" / "small", None이면 DEPTH_TIER)
         """
-        if not os.path.exists(image_path):
+        if isinstance(image_path, (str, Path)) and not os.path.exists(image_path):
             raise FileNotFoundError(f"❌ Image not found: {image_path}")
 
-        self.image_path = image_path
-        self.enable_pose = enable_pose and POSE_AVAILABLE
-        self.enable_exif = enable_exif and EXIF_AVAILABLE
-        self.enable_quality = enable_quality and QUALITY_AVAILABLE
-        self.enable_lighting = enable_lighting and LIGHTING_AVAILABLE
+        self.context = ImageContext.ensure(image_path)
+        self.image_path = self.context.path or self.context.name
+        self.outputs = resolve_outputs(outputs)
+        self.enable_pose = enable_pose and POSE_AVAILABLE and "pose" in self.outputs
+        self.enable_exif = enable_exif and EXIF_AVAILABLE and "exif" in self.outputs
+        self.enable_quality = enable_quality and QUALITY_AVAILABLE and "quality" in self.outputs
+        self.enable_lighting = enable_lighting and LIGHTING_AVAILABLE and "lighting" in self.outputs
         self.use_movenet = use_movenet  # Phase 2-4: MoveNet 옵션
+        self.depth_tier = DEPTH_TIER if depth_tier is None else depth_tier
 
         # ==========================================
-        # Step 1: Feature 추출 (모든 모델 사용)
+        # Step 1: Feature 추출 (필요한 브랜치만)
         # ==========================================
-        print(f"  🔧 Extracting features from {os.path.basename(image_path)}...")
-
-        # Phase 1.3: Feature Cache 사용
-        if FEATURE_CACHE_AVAILABLE:
-            cache_dir = VERSION3_DIR / "cache" / "features"
-            cached_extractor = CachedFeatureExtractor(cache_dir=str(cache_dir))
-            self.features = cached_extractor.extract(image_path)
-        else:
-            # Fallback: 직접 추출
-            self.features = extract_features_full(image_path)
+        self.features = None
+        branches = required_feature_branches(self.outputs)
+
+        if branches:
+            logger.debug("extracting features image=%s branches=%s", self.context.name, sorted(branches))
+
+            with span("features", branches=",".join(sorted(branches))):
+                # Phase 1.3: Feature Cache 사용
+                if FEATURE_CACHE_AVAILABLE:
+                    cache_dir = VERSION3_DIR / "cache" / "features"
+                    cached_extractor = CachedFeatureExtractor(cache_dir=str(cache_dir))
+                    self.features = cached_extractor.extract(self.context, branches=branches, depth_tier=self.depth_tier)
+                else:
+                    # Fallback: 직접 추출
+                    self.features = extract_features_full(self.context, branches=branches, depth_tier=self.depth_tier)
 
-        if self.features is None:
-            raise RuntimeError("❌ Feature extraction failed!")
+            if self.features is None:
+                raise RuntimeError("❌ Feature extraction failed!")
 
         # ==========================================
         # Step 2: 클러스터 예측 (스타일 DNA 찾기)
         # ==========================================
-        self.cluster_result = match_cluster_from_features(self.features)
+        self.cluster_result = None
+        self.cluster_data = None
 
-        # ==========================================
-        # Step 3: 클러스터 특성 로드 (집단지성)
-        # ==========================================
-        cluster_info_path = PROJECT_ROOT / "features" / "cluster_interpretation.json"
-        with open(cluster_info_path, "r", encoding="utf-8") as f:
-            cluster_info = json.load(f)
+        if "cluster" in self.outputs:
+            self.cluster_result = match_cluster_from_features(self.features)
 
-        self.cluster_data = cluster_info[str(self.cluster_result["cluster_id"])]
+            # ==========================================
+            # Step 3: 클러스터 특성 로드 (집단지성)
+            # ==========================================
+            self.cluster_data = get_cluster_interpretation()[str(self.cluster_result["cluster_id"])]
 
-        print(f"  ✅ Cluster {self.cluster_result['cluster_id']}: {self.cluster_data['auto_label']}")
+            logger.debug("cluster matched cluster_id=%s label=%s", self.cluster_result['cluster_id'], self.cluster_data['auto_label'])
 
         # ==========================================
         # Step 4: PoseAnalyzer 초기화 (lazy loading)
@@ -134,11 +217,11 @@ class ImageAnalyzer:
         if self.enable_pose:
             try:
                 # Phase 2-4: MoveNet 옵션 전달
-                self.pose_analyzer = PoseAnalyzer(use_movenet=self.use_movenet)
-                model_name = "MoveNet" if self.use_movenet else "YOLO11"
-                print(f"  ✅ PoseAnalyzer ready (using {model_name})")
+                with span("PoseAnalyzer.init"):
+                    self.pose_analyzer = PoseAnalyzer(use_movenet=self.use_movenet)
+                logger.debug("pose analyzer ready model=%s", "movenet" if self.use_movenet else "yolo11")
             except Exception as e:
-                print(f"  ⚠️ PoseAnalyzer initialization failed: {e}")
+                logger.warning("pose analyzer initialization failed: %s", e)
                 self.enable_pose = False
 
         # ==========================================
@@ -147,13 +230,10 @@ class ImageAnalyzer:
         self.exif_analyzer = None
         if self.enable_exif:
             try:
-                self.exif_analyzer = ExifAnalyzer(image_path)
-                if self.exif_analyzer.has_exif():
-                    print(f"  ✅ EXIF: {len(self.exif_analyzer.exif_data)} fields")
-                else:
-                    print(f"  ⚠️ No EXIF data")
+                self.exif_analyzer = ExifAnalyzer(self.context)
+                logger.debug("exif fields=%d", len(self.exif_analyzer.exif_data))
             except Exception as e:
-                print(f"  ⚠️ EXIF extraction failed: {e}")
+                logger.warning("exif extraction failed: %s", e)
                 self.enable_exif = False
 
         # ==========================================
@@ -162,10 +242,9 @@ class ImageAnalyzer:
         self.quality_analyzer = None
         if self.enable_quality:
             try:
-                self.quality_analyzer = QualityAnalyzer(image_path)
-                print(f"  ✅ Quality analysis ready")
+                self.quality_analyzer = QualityAnalyzer(self.context)
             except Exception as e:
-                print(f"  ⚠️ Quality analysis failed: {e}")
+                logger.warning("quality analyzer initialization failed: %s", e)
                 self.enable_quality = False
 
         # ==========================================
@@ -175,48 +254,61 @@ class ImageAnalyzer:
         if self.enable_lighting:
             try:
                 # pose_data와 depth_data는 나중에 analyze()에서 전달
-                self.lighting_analyzer = LightingAnalyzer(image_path)
-                print(f"  ✅ Lighting analysis ready")
+                self.lighting_analyzer = LightingAnalyzer(self.context)
             except Exception as e:
-                print(f"  ⚠️ Lighting analysis failed: {e}")
+                logger.warning("lighting analyzer initialization failed: %s", e)
                 self.enable_lighting = False
     
     def analyze(self) -> dict:
         """
         비교 가능한 모든 정보 반환
+
+        outputs로 요청하지 않은 항목은 None
         """
         
         # ==========================================
         # 1) 클러스터 정보 (스타일 DNA)
         # ==========================================
-        cluster_info = {
-            "cluster_id": self.cluster_result["cluster_id"],
-            "cluster_label": self.cluster_data["auto_label"],
-            "cluster_distance": self.cluster_result["distance"],
-            "sample_count": self.cluster_data["sample_count"],
-            "embedding_128d": self.cluster_result["raw_embedding"]
-        }
+        cluster_info = None
+        if "cluster" in self.outputs:
+            cluster_info = {
+                "cluster_id": self.cluster_result["cluster_id"],
+                "cluster_label": self.cluster_data["auto_label"],
+                "cluster_distance": self.cluster_result["distance"],
+                "fine_cluster_id": self.cluster_result.get("fine_cluster_id"),
+                "sample_count": self.cluster_data["sample_count"],
+                "embedding_128d": self.cluster_result["raw_embedding"]
+            }
         
         # ==========================================
         # 2) MiDaS Depth (상대적 거리)
         # ==========================================
         # MiDaS feature는 20D지만, depth_mean은 첫 번째 값 (global mean)
-        depth_info = {
-            "depth_mean": float(self.features["midas"][0]),  # global mean
-            "depth_std": float(self.features["midas"][1]),   # global std
-            "cluster_typical_depth": self.cluster_data["depth_mean"],
-            "depth_deviation": float(self.features["midas"][0]) - self.cluster_data["depth_mean"]
-        }
+        depth_info = None
+        if "depth" in self.outputs:
+            depth_info = {
+                "depth_mean": float(self.features["midas"][0]),  # global mean
+                "depth_std": float(self.features["midas"][1]),   # global std
+                "depth_tier": self.depth_tier,
+                "cluster_typical_depth": self.cluster_data["depth_mean"],
+                "depth_deviation": float(self.features["midas"][0]) - self.cluster_data["depth_mean"]
+            }
         
         # ==========================================
         # 3) 픽셀 기반 분석 (직접 측정)
         # ==========================================
-        pixel_analysis = self._analyze_pixels()
+        pixel_analysis = None
+        if "pixels" in self.outputs:
+            with span("pixels"):
+                pixel_analysis = self._analyze_pixels()
         
         # ==========================================
         # 4) 구도 분석
         # ==========================================
-        composition_info = self._analyze_composition()
+        composition_info = None
+        if "composition" in self.outputs:
+            with span("composition"):
+                composition_info = self._analyze_composition()
 
         # ==========================================
         # 5) 포즈 분석 (YOLO + MediaPipe)
@@ -224,10 +316,10 @@ class ImageAnalyzer:
         pose_info = None
         if self.enable_pose and self.pose_analyzer is not None:
             try:
-                pose_info = self.pose_analyzer.analyze(self.image_path)
-                print(f"  ✅ Pose: {pose_info['scenario']} (conf={pose_info['confidence']:.2f})")
+                pose_info = self.pose_analyzer.analyze(self.context)
+                logger.debug("pose scenario=%s confidence=%.2f", pose_info['scenario'], pose_info['confidence'])
             except Exception as e:
-                print(f"  ⚠️ Pose analysis failed: {e}")
+                logger.warning("pose analysis failed: %s", e)
                 pose_info = None
 
         # ==========================================
@@ -247,9 +339,9 @@ class ImageAnalyzer:
         if self.enable_quality and self.quality_analyzer is not None:
             try:
                 quality_info = self.quality_analyzer.analyze_all()
-                print(f"  ✅ Quality: blur={quality_info['blur']['blur_score']:.1f}, noise={quality_info['noise']['noise_level']:.2f}")
+                logger.debug("quality blur=%.1f noise=%.2f", quality_info['blur']['blur_score'], quality_info['noise']['noise_level'])
             except Exception as e:
-                print(f"  ⚠️ Quality analysis failed: {e}")
+                logger.warning("quality analysis failed: %s", e)
                 quality_info = None
 
         # ==========================================
@@ -261,18 +353,22 @@ class ImageAnalyzer:
                 # pose_data와 depth_data 전달 (있으면)
                 if pose_info is not None:
                     self.lighting_analyzer.pose_data = pose_info
-                if depth_info is not None:
-                    # depth_mean을 depth map으로 사용할 수는 없으므로, 일단 None
-                    # 실제로는 MiDaS로 depth map을 생성해야 함
-                    pass
+                # 특징 추출에서 MiDaS를 돌렸으면 그 depth map으로 역광 검출
+                # (feature cache hit이면 depth map이 없으므로 휴리스틱 사용)
+                depth_map = self.context.model_output(DEPTH_MAP_OUTPUT)
+                if depth_map is not None:
+                    self.lighting_analyzer.depth_data = depth_map
+                    self.lighting_analyzer.depth_is_disparity = True
 
                 lighting_info = self.lighting_analyzer.analyze_all()
-                light_dir = lighting_info['light_direction']['direction']
-                backlight = '있음' if lighting_info['backlight']['is_backlight'] else '없음'
-                hdr = '있음' if lighting_info['hdr']['is_hdr'] else '없음'
-                print(f"  ✅ Lighting: {light_dir} 조명, 역광={backlight}, HDR={hdr}")
+                logger.debug(
+                    "lighting direction=%s backlight=%s hdr=%s",
+                    lighting_info['light_direction']['direction'],
+                    lighting_info['backlight']['is_backlight'],
+                    lighting_info['hdr']['is_hdr']
+                )
             except Exception as e:
-                print(f"  ⚠️ Lighting analysis failed: {e}")
+                logger.warning("lighting analysis failed: %s", e)
                 lighting_info = None
 
         return {
@@ -284,27 +380,25 @@ class ImageAnalyzer:
             "exif": exif_info,
             "quality": quality_info,
             "lighting": lighting_info,
-            "raw_features": self.features
+            "raw_features": self.features if "raw_features" in self.outputs else None
         }
     
     def _analyze_pixels(self) -> dict:
         """픽셀 직접 분석"""
-        img = cv2.imread(self.image_path)
+        # 히스토그램/채널 평균은 품질·조명 분석과 공유 (utils/image_stats.py)
+        stats = self.context.stats()
         
         # 밝기
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        brightness = float(np.mean(gray))
+        brightness = stats.gray_mean
         
         # 채도
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        saturation = float(np.mean(hsv[:,:,1]) / 255.0)
+        saturation = float(stats.hsv_moments[1][0] / 255.0)
         
         # 콘트라스트
-        contrast = float(np.std(gray) / 128.0)
+        contrast = float(stats.gray_std / 128.0)
         
         # 색온도
-        b, g, r = cv2.split(img)
-        r_mean, g_mean, b_mean = np.mean(r), np.mean(g), np.mean(b)
+        b_mean, g_mean, r_mean = stats.bgr_means
         warm_score = (r_mean + g_mean) / 2
         cool_score = b_mean
         
@@ -316,11 +410,8 @@ class ImageAnalyzer:
             color_temp = "neutral"
         
         # 히스토그램 분석 (클리핑 검사)
-        hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
-        total_pixels = gray.shape[0] * gray.shape[1]
-        
-        highlight_clipping = float(np.sum(hist[250:]) / total_pixels)
-        shadow_clipping = float(np.sum(hist[:5]) / total_pixels)
+        highlight_clipping = stats.gray_range_ratio(250, 256)
+        shadow_clipping = stats.gray_range_ratio(0, 5)
         
         return {
             "brightness": brightness,  # 0~255
@@ -340,11 +431,10 @@ class ImageAnalyzer:
     
     def _analyze_composition(self) -> dict:
         """구도 분석"""
-        img = cv2.imread(self.image_path)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        gray = self.context.gray
         
-        # 기울기 (간단한 Hough 변환)
-        edges = cv2.Canny(gray, 50, 150)
+        # 기울기 (간단한 Hough 변환, Canny 결과는 품질 분석과 공유)
+        edges = self.context.stats().edges
         lines = cv2.HoughLines(edges, 1, np.pi/180, 100)
         
         if lines is not None and len(lines) > 0:
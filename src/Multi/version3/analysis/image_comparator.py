@@ -4,7 +4,7 @@
 # ============================================================
 
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 # ImageAnalyzer import
 import sys
@@ -21,7 +21,12 @@ if str(VERSION3_DIR) not in sys.path:
 if str(ANALYSIS_DIR) not in sys.path:
     sys.path.append(str(ANALYSIS_DIR))
 
-from image_analyzer import ImageAnalyzer
+from image_analyzer import ImageAnalyzer, resolve_outputs
+from feature_extraction.feature_extractor_v2 import FRAME_DEPTH_TIER
+from utils.log import get_logger
+from utils.tracing import span
+
+logger = get_logger(__name__)
 
 # Phase 1: Feedback Formatter
 try:
@@ -38,7 +43,7 @@ except ImportError:
 
 # Pose comparison
 try:
-    from analysis.pose_analyzer import compare_poses
+    from analysis.pose_analyzer import compare_poses, precompute_reference_pose
     POSE_COMPARE_AVAILABLE = True
 except ImportError:
     POSE_COMPARE_AVAILABLE = False
@@ -75,41 +80,109 @@ class ImageComparator:
     클러스터 정보 + 픽셀 분석 모두 활용
     """
 
-    def __init__(self, reference_path: str, user_path: str, use_movenet: bool = False):
+    # 비교 항목 → (필요한 분석 출력, 양쪽 데이터가 반드시 있어야 하는지)
+    # pose/exif/quality/lighting 비교는 데이터가 없으면 available=False로 자체 처리
+    COMPARISON_OUTPUTS = {
+        "cluster_comparison": ("cluster", True),
+        "pose_comparison": ("pose", False),
+        "exif_comparison": ("exif", False),
+        "quality_comparison": ("quality", False),
+        "lighting_comparison": ("lighting", False),
+        "depth_comparison": ("depth", True),
+        "brightness_comparison": ("pixels", True),
+        "color_comparison": ("pixels", True),
+        "composition_comparison": ("composition", True),
+    }
+
+    def __init__(self, reference_path, user_path, use_movenet: bool = False,
+                 reference_data: Optional[Dict] = None, outputs=None):
         """
         Args:
-            reference_path: 레퍼런스 이미지 경로
-            user_path: 사용자 이미지 경로
+            reference_path: 레퍼런스 이미지 (경로, bytes, BGR ndarray, ImageContext)
+                            reference_data가 있으면 None 가능
+            user_path: 사용자 이미지 (경로, bytes, BGR ndarray, ImageContext)
             use_movenet: True면 MoveNet 사용, False면 YOLO11 사용 (Phase 2-4)
+            reference_data: analyze_reference()로 미리 분석한 레퍼런스 결과
+                            (주어지면 레퍼런스 재분석을 건너뜀)
+            outputs: 필요한 분석 출력 (예: {"pose", "exif", "brightness", "color"})
+                     None이면 raw_features 제외 전체. 요청하지 않은 분석/비교는 건너뜀
+
+        레퍼런스는 DEPTH_TIER, 사용자 이미지(프레임)는 FRAME_DEPTH_TIER로 depth 추출
         """
-        print("\n" + "="*60)
-        print("📸 레퍼런스 이미지 분석")
-        print("="*60)
-        self.ref_analyzer = ImageAnalyzer(reference_path, use_movenet=use_movenet)
-        self.ref_data = self.ref_analyzer.analyze()
+        self.outputs = resolve_outputs(outputs)
 
-        print("\n" + "="*60)
-        print("📸 사용자 이미지 분석")
-        print("="*60)
-        self.user_analyzer = ImageAnalyzer(user_path, use_movenet=use_movenet)
-        self.user_data = self.user_analyzer.analyze()
-        
-    def compare(self) -> Dict:
+        if reference_data is not None:
+            # 등록된 레퍼런스 재사용 (사용자 이미지만 분석)
+            self.ref_analyzer = None
+            self.ref_data = reference_data
+        else:
+            if reference_path is None:
+                raise ValueError("reference_path 또는 reference_data가 필요합니다")
+
+            logger.debug("analyzing reference image")
+            with span("ImageAnalyzer", role="reference"):
+                self.ref_analyzer = ImageAnalyzer(reference_path, use_movenet=use_movenet, outputs=self.outputs)
+                self.ref_data = self._prepare_reference_data(self.ref_analyzer.analyze())
+
+        logger.debug("analyzing user image")
+        with span("ImageAnalyzer", role="user"):
+            self.user_analyzer = ImageAnalyzer(
+                user_path, use_movenet=use_movenet, outputs=self.outputs, depth_tier=FRAME_DEPTH_TIER
+            )
+            self.user_data = self.user_analyzer.analyze()
+
+    @staticmethod
+    def _prepare_reference_data(ref_data: Dict) -> Dict:
+        """레퍼런스 전용 사전 계산 (관절 각도)"""
+        if POSE_COMPARE_AVAILABLE and ref_data.get("pose") is not None:
+            precompute_reference_pose(ref_data["pose"])
+        return ref_data
+
+    @staticmethod
+    def analyze_reference(reference_path, use_movenet: bool = False) -> Dict:
         """
-        모든 차원에서 비교
+        레퍼런스 이미지만 분석 (ReferenceRegistry 등록용)
+
+        Args:
+            reference_path: 경로, bytes, BGR ndarray 또는 ImageContext
+
+        Returns:
+            ImageAnalyzer.analyze() 결과 + 레퍼런스 관절 각도
         """
+        logger.debug("analyzing reference image for registration")
+        with span("ImageAnalyzer", role="reference"):
+            ref_analyzer = ImageAnalyzer(reference_path, use_movenet=use_movenet)
+            return ImageComparator._prepare_reference_data(ref_analyzer.analyze())
 
-        return {
-            "cluster_comparison": self._compare_clusters(),
-            "pose_comparison": self._compare_pose(),
-            "exif_comparison": self._compare_exif(),
-            "quality_comparison": self._compare_quality(),
-            "lighting_comparison": self._compare_lighting(),
-            "depth_comparison": self._compare_depth(),
-            "brightness_comparison": self._compare_brightness(),
-            "color_comparison": self._compare_color(),
-            "composition_comparison": self._compare_composition(),
+    def compare(self) -> Dict:
+        """
+        요청한 출력 기준으로 비교
+
+        outputs에 없는 항목, 또는 양쪽 데이터가 없는 항목은 결과에서 빠진다
+        """
+        compare_fns = {
+            "cluster_comparison": self._compare_clusters,
+            "pose_comparison": self._compare_pose,
+            "exif_comparison": self._compare_exif,
+            "quality_comparison": self._compare_quality,
+            "lighting_comparison": self._compare_lighting,
+            "depth_comparison": self._compare_depth,
+            "brightness_comparison": self._compare_brightness,
+            "color_comparison": self._compare_color,
+            "composition_comparison": self._compare_composition,
         }
+
+        result = {}
+        with span("ImageComparator.compare"):
+            for key, (output, requires_data) in self.COMPARISON_OUTPUTS.items():
+                if output not in self.outputs:
+                    continue
+                if requires_data and (self.ref_data.get(output) is None or self.user_data.get(output) is None):
+                    continue
+                with span(key):
+                    result[key] = compare_fns[key]()
+
+        return result
     
     def _compare_clusters(self) -> Dict:
         """클러스터 비교 (스타일 DNA)"""
@@ -367,7 +440,7 @@ class ImageComparator:
                 "feedback": comparison["feedback"]
             }
         except Exception as e:
-            print(f"  ⚠️ Pose comparison failed: {e}")
+            logger.warning("pose comparison failed: %s", e)
             return {
                 "available": False,
                 "feedback": [f"포즈 비교 실패: {str(e)}"]
@@ -409,7 +482,7 @@ class ImageComparator:
                 "user_settings": user_settings
             }
         except Exception as e:
-            print(f"  ⚠️ EXIF comparison failed: {e}")
+            logger.warning("exif comparison failed: %s", e)
             return {
                 "available": False,
                 "feedback": [f"EXIF 비교 실패: {str(e)}"]
@@ -437,7 +510,7 @@ class ImageComparator:
             comparison = compare_quality(ref_quality, user_quality)
             return comparison
         except Exception as e:
-            print(f"  ⚠️ Quality comparison failed: {e}")
+            logger.warning("quality comparison failed: %s", e)
             return {
                 "available": False,
                 "feedback": []
@@ -465,7 +538,7 @@ class ImageComparator:
             comparison = compare_lighting(ref_lighting, user_lighting)
             return comparison
         except Exception as e:
-            print(f"  ⚠️ Lighting comparison failed: {e}")
+            logger.warning("lighting comparison failed: %s", e)
             return {
                 "available": False,
                 "feedback": []
@@ -487,8 +560,10 @@ class ImageComparator:
         feedback_list = []
 
         # 0순위: 클러스터 (정보성)
-        cluster_comp = comparison["cluster_comparison"]
-        if not cluster_comp["same_cluster"]:
+        cluster_comp = comparison.get("cluster_comparison")
+        if cluster_comp is None:
+            pass
+        elif not cluster_comp["same_cluster"]:
             feedback_list.append({
                 "priority": 0,
                 "category": "style",
@@ -507,7 +582,7 @@ class ImageComparator:
             })
 
         # 0.5순위: 포즈 (매우 중요!)
-        pose_comp = comparison["pose_comparison"]
+        pose_comp = comparison.get("pose_comparison", {"available": False})
         if pose_comp["available"] and pose_comp["feedback"]:
             if pose_comp["feedback"][0] != "✅ 포즈가 적절합니다":
                 for fb in pose_comp["feedback"]:
@@ -529,7 +604,7 @@ class ImageComparator:
                 })
 
         # 1순위: 카메라 설정 (EXIF)
-        exif_comp = comparison["exif_comparison"]
+        exif_comp = comparison.get("exif_comparison", {"available": False})
         if exif_comp["available"] and exif_comp.get("has_differences", False):
             for fb in exif_comp["feedback"]:
                 feedback_list.append({
@@ -540,7 +615,7 @@ class ImageComparator:
                 })
 
         # Quality: 동적 우선순위 (0.5~8.0)
-        quality_comp = comparison["quality_comparison"]
+        quality_comp = comparison.get("quality_comparison", {"available": False})
         if quality_comp["available"] and quality_comp["feedback"]:
             for fb_item in quality_comp["feedback"]:
                 # fb_item = {category, ref_value, user_value, difference_percent,
@@ -554,7 +629,7 @@ class ImageComparator:
                 })
 
         # Lighting: 동적 우선순위 (4~8)
-        lighting_comp = comparison["lighting_comparison"]
+        lighting_comp = comparison.get("lighting_comparison", {"available": False})
         if lighting_comp.get("available", False) and lighting_comp.get("has_issues", False):
             for fb_item in lighting_comp["feedback"]:
                 # fb_item = {category, priority, message, detail, adjustment, adjustment_numeric}
@@ -566,8 +641,8 @@ class ImageComparator:
                 })
 
         # 2순위: 거리
-        depth_comp = comparison["depth_comparison"]
-        if depth_comp["action"] != "none":
+        depth_comp = comparison.get("depth_comparison")
+        if depth_comp is not None and depth_comp["action"] != "none":
             feedback_list.append({
                 "priority": 2,
                 "category": "distance",
@@ -576,8 +651,8 @@ class ImageComparator:
             })
 
         # 3순위: 밝기
-        brightness_comp = comparison["brightness_comparison"]
-        if brightness_comp["action"] != "none":
+        brightness_comp = comparison.get("brightness_comparison")
+        if brightness_comp is not None and brightness_comp["action"] != "none":
             feedback_list.append({
                 "priority": 3,
                 "category": "exposure",
@@ -586,8 +661,8 @@ class ImageComparator:
             })
 
         # 4순위: 색감
-        color_comp = comparison["color_comparison"]
-        if color_comp["feedback"][0] != "색감은 적절합니다":
+        color_comp = comparison.get("color_comparison")
+        if color_comp is not None and color_comp["feedback"][0] != "색감은 적절합니다":
             for fb in color_comp["feedback"]:
                 feedback_list.append({
                     "priority": 4,
@@ -597,8 +672,8 @@ class ImageComparator:
                 })
 
         # 5순위: 구도
-        comp_comp = comparison["composition_comparison"]
-        if comp_comp["feedback"][0] != "구도는 적절합니다":
+        comp_comp = comparison.get("composition_comparison")
+        if comp_comp is not None and comp_comp["feedback"][0] != "구도는 적절합니다":
             for fb in comp_comp["feedback"]:
                 feedback_list.append({
                     "priority": 5,
@@ -5,6 +5,7 @@
 
 import cv2
 import numpy as np
+import sys
 from typing import Optional, Dict
 from pathlib import Path
 
@@ -12,29 +13,44 @@ PROJECT_ROOT = Path(__file__).resolve().parent
 while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
     PROJECT_ROOT = PROJECT_ROOT.parent
 
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from utils.image_context import ImageContext
+from utils.metrics import timed
+
 
 class LightingAnalyzer:
     """
     조명 환경 분석 (조명 방향, 역광, HDR)
     """
 
-    def __init__(self, image_path: str, pose_data: Optional[Dict] = None, depth_data: Optional[np.ndarray] = None):
+    def __init__(self, image_path, pose_data: Optional[Dict] = None, depth_data: Optional[np.ndarray] = None,
+                 depth_is_disparity: bool = False):
         """
         Args:
-            image_path (str): 분석할 이미지 경로
+            image_path: 분석할 이미지 경로 또는 ImageContext (메모리 이미지)
             pose_data (dict, optional): 포즈 분석 결과 (얼굴 bbox 활용)
             depth_data (np.ndarray, optional): depth map (역광 검출에 활용)
+            depth_is_disparity: depth_data가 역깊이(값이 클수록 가까움)인지
+                                (MiDaS predicted_depth는 True)
         """
-        self.image_path = image_path
-        self.img = cv2.imread(image_path)
-
-        if self.img is None:
+        try:
+            self.context = ImageContext.ensure(image_path)
+        except (FileNotFoundError, ValueError):
             raise FileNotFoundError(f"❌ Image not found: {image_path}")
 
-        self.gray = cv2.cvtColor(self.img, cv2.COLOR_BGR2GRAY)
+        self.image_path = self.context.path or self.context.name
+        self.img = self.context.bgr
+
+        self.gray = self.context.gray
+        self.stats = self.context.stats()  # 영역 평균(적분 영상) / 히스토그램 공유
         self.pose_data = pose_data
         self.depth_data = depth_data
+        self.depth_is_disparity = depth_is_disparity
 
+    @timed("lighting")
     def analyze_all(self) -> Dict:
         """
         전체 조명 분석 (통합 함수)
@@ -73,17 +89,7 @@ class LightingAnalyzer:
         def analyze_full_image():
             h, w = self.gray.shape
 
-            left_bright = float(self.gray[:, :w//2].mean())
-            right_bright = float(self.gray[:, w//2:].mean())
-            top_bright = float(self.gray[:h//2, :].mean())
-            bottom_bright = float(self.gray[h//2:, :].mean())
-
-            brightness_map = {
-                "left": left_bright,
-                "right": right_bright,
-                "top": top_bright,
-                "bottom": bottom_bright
-            }
+            brightness_map = self.stats.quadrant_means(0, 0, w, h)
 
             max_side = max(brightness_map, key=brightness_map.get)
             min_bright = min(brightness_map.values())
@@ -152,24 +158,12 @@ class LightingAnalyzer:
             # 범위 벗어나면 전체 이미지로 폴백
             return analyze_full_image()
 
-        face = self.gray[y:y+h, x:x+w]
-
         # 얼굴 너무 작으면 무시
-        if face.shape[0] < 20 or face.shape[1] < 20:
+        if h < 20 or w < 20:
             return analyze_full_image()
 
         # 4분할
-        left_bright = float(face[:, :w//2].mean())
-        right_bright = float(face[:, w//2:].mean())
-        top_bright = float(face[:h//2, :].mean())
-        bottom_bright = float(face[h//2:, :].mean())
-
-        brightness_map = {
-            "left": left_bright,
-            "right": right_bright,
-            "top": top_bright,
-            "bottom": bottom_bright
-        }
+        brightness_map = self.stats.quadrant_means(x, y, w, h)
 
         # 방향 결정 (가장 밝은 쪽)
         max_side = max(brightness_map, key=brightness_map.get)
@@ -217,13 +211,11 @@ class LightingAnalyzer:
             # 중앙부 (전경 가정)
             center_y1, center_y2 = h // 4, 3 * h // 4
             center_x1, center_x2 = w // 4, 3 * w // 4
-            center_region = self.gray[center_y1:center_y2, center_x1:center_x2]
-            fg_brightness = float(center_region.mean())
+            fg_brightness = self.stats.region_mean(center_x1, center_y1, center_x2, center_y2)
 
             # 가장자리 (배경 가정)
             # 상단 가장자리
-            edge_region = self.gray[:h//4, :]
-            bg_brightness = float(edge_region.mean())
+            bg_brightness = self.stats.region_mean(0, 0, w, h // 4)
 
             ratio = bg_brightness / (fg_brightness + 1e-6)
             is_backlight = ratio > 1.5
@@ -248,8 +240,10 @@ class LightingAnalyzer:
             depth_map = cv2.resize(depth_map, (self.gray.shape[1], self.gray.shape[0]))
 
         # 전경/배경 분리 (가까운 30%)
-        fg_threshold = np.percentile(depth_map, 30)
-        fg_mask = depth_map < fg_threshold
+        if self.depth_is_disparity:
+            fg_mask = depth_map > np.percentile(depth_map, 70)
+        else:
+            fg_mask = depth_map < np.percentile(depth_map, 30)
 
         # 전경/배경 밝기
         fg_brightness = float(self.gray[fg_mask].mean())
@@ -286,12 +280,9 @@ class LightingAnalyzer:
                 "highlight_ratio": float   # 밝은 영역 비율
             }
         """
-        hist = cv2.calcHist([self.gray], [0], None, [256], [0, 256])
-        total_pixels = hist.sum()
-
-        # 양 끝 비율
-        shadow_ratio = float(hist[0:30].sum() / total_pixels)
-        highlight_ratio = float(hist[225:256].sum() / total_pixels)
+        # 양 끝 비율 (공유 히스토그램)
+        shadow_ratio = self.stats.gray_range_ratio(0, 30)
+        highlight_ratio = self.stats.gray_range_ratio(225, 256)
 
         # HDR: 양쪽 다 적음 (클리핑 없음)
         is_hdr = (shadow_ratio < 0.05) and (highlight_ratio < 0.05)
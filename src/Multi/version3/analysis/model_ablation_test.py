@@ -20,8 +20,8 @@ if str(VERSION3_DIR) not in sys.path:
     sys.path.append(str(VERSION3_DIR))
 
 from feature_extraction.feature_extractor_v2 import extract_features_v2
-from embedder.embedder import embed_features
-from matching.cluster_matcher import match_cluster_from_features
+from embedder.embedder import embed_features, stack_features
+from matching.cluster_matcher import match_clusters_batch
 
 # ============================================================
 # 모델 조합별 임베딩 생성
@@ -140,7 +140,8 @@ def run_ablation_study(test_images_dir: str, num_samples: int = 50):
     # 결과 저장
     results = {scenario: [] for scenario in scenarios}
 
-    # 각 이미지에 대해 테스트
+    # 각 이미지 특징 추출
+    extracted = []
     for i, img_path in enumerate(image_files):
         print(f"[{i+1}/{len(image_files)}] Processing {img_path.name}...", end=" ")
 
@@ -151,33 +152,28 @@ def run_ablation_study(test_images_dir: str, num_samples: int = 50):
                 print("❌ Feature extraction failed")
                 continue
 
-            # 각 시나리오에 대해 클러스터 매칭 수행
-            for scenario_name, config in scenarios.items():
-                # 커스텀 임베딩 생성
-                custom_embedding = embed_custom_features(
-                    features,
-                    use_clip=config['clip'],
-                    use_openclip=config['openclip'],
-                    use_dino=config['dino']
-                )
-
-                # 클러스터 매칭
-                cluster_result = match_cluster_from_features(features)  # 기본 함수 사용
-                confidence = 1.0 / (1.0 + cluster_result['distance'])
-
-                results[scenario_name].append({
-                    'image': img_path.name,
-                    'cluster_id': cluster_result['cluster_id'],
-                    'distance': cluster_result['distance'],
-                    'confidence': confidence
-                })
-
+            extracted.append((img_path, features))
             print("✅")
 
         except Exception as e:
             print(f"❌ Error: {e}")
             continue
 
+    if not extracted:
+        raise ValueError("No features extracted")
+
+    # 클러스터 매칭 (전체 이미지 한 번에, 기본 임베딩 사용)
+    batch = match_clusters_batch(stack_features(features for _, features in extracted))
+
+    for scenario_name in scenarios:
+        for i, (img_path, _) in enumerate(extracted):
+            results[scenario_name].append({
+                'image': img_path.name,
+                'cluster_id': int(batch['cluster_ids'][i]),
+                'distance': float(batch['min_distances'][i]),
+                'confidence': float(batch['confidences'][i])
+            })
+
     # 결과 분석
     print(f"\n{'='*60}")
     print("📊 Ablation Study Results")
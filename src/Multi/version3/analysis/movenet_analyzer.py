@@ -5,8 +5,8 @@
 
 import os
 import sys
-import cv2
 import numpy as np
+from importlib.util import find_spec
 from typing import Dict, List, Optional
 from pathlib import Path
 
@@ -20,14 +20,40 @@ if str(VERSION3_DIR) not in sys.path:
     sys.path.append(str(VERSION3_DIR))
 
 from utils.model_cache import model_cache
+from utils.image_context import ImageContext
+
+# TensorFlow Lite 인터프리터: tensorflow 또는 tflite_runtime
+# (설치 여부만 확인, import는 인터프리터를 만들 때)
+TFLITE_AVAILABLE = find_spec("tensorflow") is not None or find_spec("tflite_runtime") is not None
+if not TFLITE_AVAILABLE:
+    print("⚠️ TensorFlow not installed. Install: pip install tensorflow==2.15.0 (or tflite-runtime)")
+
+
+def _load_interpreter_class():
+    """
+    TFLite Interpreter 클래스 (tensorflow 우선, 없거나 import가 깨지면 tflite_runtime)
+
+    둘 다 import에 실패하면 TFLITE_AVAILABLE을 내리고 ImportError (미설치와 같은 경로)
+    """
+    global TFLITE_AVAILABLE
+
+    errors = []
+    if find_spec("tensorflow") is not None:
+        try:
+            import tensorflow as tf
+            return tf.lite.Interpreter
+        except ImportError as e:
+            errors.append(f"tensorflow: {e}")
+
+    if find_spec("tflite_runtime") is not None:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+            return Interpreter
+        except ImportError as e:
+            errors.append(f"tflite_runtime: {e}")
 
-# TensorFlow Lite 가져오기
-try:
-    import tensorflow as tf
-    TFLITE_AVAILABLE = True
-except ImportError:
-    print("⚠️ TensorFlow not installed. Install: pip install tensorflow==2.15.0")
     TFLITE_AVAILABLE = False
+    raise ImportError("TFLite interpreter not importable (" + "; ".join(errors or ["not installed"]) + ")")
 
 
 class MoveNetAnalyzer:
@@ -69,7 +95,7 @@ class MoveNetAnalyzer:
             model_path: TFLite 모델 경로. None이면 기본 경로 사용
         """
         if not TFLITE_AVAILABLE:
-            raise ImportError("TensorFlow required. Install: pip install tensorflow==2.15.0")
+            raise ImportError("TensorFlow (or tflite-runtime) required. Install: pip install tensorflow==2.15.0")
 
         # 모델 경로 설정
         if model_path is None:
@@ -85,8 +111,10 @@ class MoveNetAnalyzer:
 
         # Singleton 패턴으로 모델 로드
         def load_interpreter():
+            Interpreter = _load_interpreter_class()
+
             print(f"  🔧 Loading MoveNet from {os.path.basename(self.model_path)}...")
-            interpreter = tf.lite.Interpreter(model_path=self.model_path)
+            interpreter = Interpreter(model_path=self.model_path)
             interpreter.allocate_tensors()
             return interpreter
 
@@ -101,12 +129,12 @@ class MoveNetAnalyzer:
 
         print(f"  ✅ MoveNet loaded (input size: {self.input_size}x{self.input_size})")
 
-    def analyze(self, image_path: str) -> Dict:
+    def analyze(self, image_path) -> Dict:
         """
         이미지에서 포즈 추출
 
         Args:
-            image_path: 이미지 파일 경로
+            image_path: 이미지 파일 경로 또는 ImageContext (메모리 이미지)
 
         Returns:
             {
@@ -115,31 +143,25 @@ class MoveNetAnalyzer:
                 'bbox': [x1, y1, x2, y2] (정규화 좌표)
             }
         """
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image not found: {image_path}")
-
-        # 이미지 로드
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError(f"Failed to load image: {image_path}")
-
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        h, w = img.shape[:2]
+        # 이미지 로드 (ImageContext면 이미 디코드된 배열 재사용)
+        ctx = ImageContext.ensure(image_path)
+        h, w = ctx.shape[:2]
 
-        # 전처리: 256x256 리사이즈
-        img_resized = cv2.resize(img_rgb, (self.input_size, self.input_size))
+        # 전처리: 256x256 리사이즈 (RGB, ImageContext plane 재사용)
+        img_resized = ctx.plane("rgb", (self.input_size, self.input_size))
 
         # UINT8로 변환 (0~255, MoveNet은 정규화 필요 없음)
         img_input = np.expand_dims(img_resized, axis=0).astype(np.uint8)
 
-        # 추론
-        self.interpreter.set_tensor(self.input_details[0]['index'], img_input)
-        self.interpreter.invoke()
+        # 추론 (interpreter는 model_cache로 공유, 입력/출력 텐서가 하나라 호출 전체를 잠금)
+        with model_cache.inference_lock("movenet_interpreter"):
+            self.interpreter.set_tensor(self.input_details[0]['index'], img_input)
+            self.interpreter.invoke()
 
-        # 결과: [1, 1, 17, 3] (batch, person, keypoints, [y, x, confidence])
-        keypoints_with_scores = self.interpreter.get_tensor(
-            self.output_details[0]['index']
-        )[0, 0]  # (17, 3)
+            # 결과: [1, 1, 17, 3] (batch, person, keypoints, [y, x, confidence])
+            keypoints_with_scores = self.interpreter.get_tensor(
+                self.output_details[0]['index']
+            )[0, 0].copy()  # (17, 3)
 
         # 키포인트 파싱
         keypoints = []
@@ -3,11 +3,12 @@
 # Phase 2-3: YOLO11 / MoveNet + MediaPipe 하이브리드 포즈 분석
 # ============================================================
 
-import cv2
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 import os
 import sys
+import threading
+from importlib.util import find_spec
 from pathlib import Path
 
 # Model cache
@@ -20,30 +21,37 @@ if str(VERSION3_DIR) not in sys.path:
     sys.path.append(str(VERSION3_DIR))
 
 from utils.model_cache import model_cache
+from utils.image_context import ImageContext, YOLO_POSE_OUTPUT, FACE_MESH_OUTPUT
+from utils.metrics import timed
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# 설치 여부만 확인하고 실제 import는 처음 쓸 때 (ultralytics / TensorFlow / mediapipe는
+# import만으로 수 초 걸림, scripts/import_time_report.py 참고)
+# 설치는 됐지만 import가 깨진 패키지(의존성 버전 충돌 등)는 처음 import할 때
+# ImportError를 잡아 플래그를 False로 내리고 미설치와 같은 경로로 간다.
 
 # YOLO
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-except ImportError:
+YOLO_AVAILABLE = find_spec("ultralytics") is not None
+if not YOLO_AVAILABLE:
     print("⚠️ ultralytics not installed. YOLO pose detection disabled.")
-    YOLO_AVAILABLE = False
 
 # Phase 2-3: MoveNet 추가
-try:
-    from analysis.movenet_analyzer import MoveNetAnalyzer
-    MOVENET_AVAILABLE = True
-except ImportError:
-    print("⚠️ MoveNet not available. Install TensorFlow: pip install tensorflow==2.15.0")
-    MOVENET_AVAILABLE = False
+# TFLite 인터프리터: tensorflow 또는 tflite_runtime (movenet_analyzer.py)
+MOVENET_AVAILABLE = find_spec("tensorflow") is not None or find_spec("tflite_runtime") is not None
+if not MOVENET_AVAILABLE:
+    print("⚠️ MoveNet not available. Install TensorFlow: pip install tensorflow==2.15.0 (or tflite-runtime)")
 
 # MediaPipe
-try:
-    import mediapipe as mp
-    MEDIAPIPE_AVAILABLE = True
-except ImportError:
+MEDIAPIPE_AVAILABLE = find_spec("mediapipe") is not None
+if not MEDIAPIPE_AVAILABLE:
     print("⚠️ mediapipe not installed. MediaPipe detection disabled.")
-    MEDIAPIPE_AVAILABLE = False
+
+
+def _mark_unavailable(flag: str):
+    """설치됐지만 import 실패 → 이후 호출은 미설치와 같은 경로 (YOLO_AVAILABLE 등)"""
+    globals()[flag] = False
 
 
 class PoseAnalyzer:
@@ -89,8 +97,14 @@ class PoseAnalyzer:
                     "And download model: python scripts/download_movenet.py"
                 )
 
-            print("  🏃 Using MoveNet Thunder (정확도 우선)")
-            self.pose_model = MoveNetAnalyzer(model_path=movenet_model_path)
+            from analysis.movenet_analyzer import MoveNetAnalyzer
+
+            logger.debug("using MoveNet Thunder")
+            try:
+                self.pose_model = MoveNetAnalyzer(model_path=movenet_model_path)
+            except ImportError:
+                _mark_unavailable("MOVENET_AVAILABLE")
+                raise
             self.model_type = 'movenet'
 
         else:
@@ -106,27 +120,49 @@ class PoseAnalyzer:
 
             # 싱글톤 패턴으로 YOLO 모델 로드
             def load_yolo():
+                from ultralytics import YOLO
+
                 print(f"  🔧 Loading YOLO11-pose from {os.path.basename(yolo_model_path)}...")
                 return YOLO(yolo_model_path)
 
-            self.yolo = model_cache.get_or_load("yolo_pose", load_yolo)
+            try:
+                self.yolo = model_cache.get_or_load("yolo_pose", load_yolo)
+            except ImportError as e:
+                _mark_unavailable("YOLO_AVAILABLE")
+                raise ImportError(f"ultralytics installed but failed to import: {e}") from e
             self.pose_model = self.yolo
             self.model_type = 'yolo'
 
         # MediaPipe 초기화 (lazy loading)
+        # 인스턴스별 객체지만 같은 분석기를 여러 스레드가 쓸 수 있어 process 호출을 잠금
+        self._mp_lock = threading.Lock()
         self.mp_pose = None
         self.mp_face = None
         self.mp_hands = None
 
-        if MEDIAPIPE_AVAILABLE:
-            self.mp = mp
-            print("  ✅ MediaPipe available")
-        else:
-            print("  ⚠️ MediaPipe not available - YOLO only mode")
+        if not MEDIAPIPE_AVAILABLE:
+            logger.debug("mediapipe not available, yolo only mode")
+
+    @property
+    def mp(self):
+        """
+        mediapipe 모듈 (처음 MediaPipe 모델을 만들 때 import)
+
+        import가 실패하면 MEDIAPIPE_AVAILABLE을 내리고 None (포즈 모델만 사용)
+        """
+        if not MEDIAPIPE_AVAILABLE:
+            return None
+        try:
+            import mediapipe as mp
+        except ImportError as e:
+            logger.warning("mediapipe installed but failed to import, mediapipe disabled: %s", e)
+            _mark_unavailable("MEDIAPIPE_AVAILABLE")
+            return None
+        return mp
 
     def _init_mediapipe_pose(self):
         """MediaPipe Pose 초기화 (필요시)"""
-        if self.mp_pose is None and MEDIAPIPE_AVAILABLE:
+        if self.mp_pose is None and self.mp is not None:
             self.mp_pose = self.mp.solutions.pose.Pose(
                 static_image_mode=True,
                 model_complexity=2,
@@ -134,27 +170,37 @@ class PoseAnalyzer:
             )
 
     def _init_mediapipe_face(self):
-        """MediaPipe Face Mesh 초기화 (필요시)"""
-        if self.mp_face is None and MEDIAPIPE_AVAILABLE:
+        """
+        MediaPipe Face Mesh 초기화 (필요시)
+
+        특징 추출(extract_face_features)과 같은 설정(refine_landmarks=True)이라
+        같은 이미지의 FaceMesh 결과를 ImageContext로 공유한다.
+        """
+        if self.mp_face is None and self.mp is not None:
             self.mp_face = self.mp.solutions.face_mesh.FaceMesh(
                 static_image_mode=True,
                 max_num_faces=1,
+                refine_landmarks=True,
                 min_detection_confidence=0.5
             )
 
     def _init_mediapipe_hands(self):
         """MediaPipe Hands 초기화 (필요시)"""
-        if self.mp_hands is None and MEDIAPIPE_AVAILABLE:
+        if self.mp_hands is None and self.mp is not None:
             self.mp_hands = self.mp.solutions.hands.Hands(
                 static_image_mode=True,
                 max_num_hands=2,
                 min_detection_confidence=0.5
             )
 
-    def analyze(self, image_path: str) -> Dict:
+    @timed("pose")
+    def analyze(self, image_path) -> Dict:
         """
         Phase 2-3: 이미지에서 포즈 추출 (MoveNet / YOLO11 선택 가능)
 
+        Args:
+            image_path: 이미지 파일 경로 또는 ImageContext (메모리 이미지)
+
         Returns:
             {
                 'scenario': 'full_body' | 'face_closeup' | 'hand_gesture' | 'back_view',
@@ -168,21 +214,18 @@ class PoseAnalyzer:
                 'model_type': 'yolo' | 'movenet'
             }
         """
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image not found: {image_path}")
-
-        # 이미지 로드
-        img = cv2.imread(image_path)
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        h, w = img.shape[:2]
+        # 이미지 로드 (ImageContext면 이미 디코드된 배열 재사용)
+        ctx = ImageContext.ensure(image_path)
+        img_rgb = ctx.rgb
+        h, w = ctx.shape[:2]
 
         # Phase 2-3: MoveNet vs YOLO11 선택
         if self.use_movenet:
             # Step 1: MoveNet 실행
-            pose_result = self._run_movenet(image_path)
+            pose_result = self._run_movenet(ctx)
         else:
             # Step 1: YOLO 실행 (기존)
-            pose_result = self._run_yolo(img_rgb, h, w)
+            pose_result = self._run_yolo(ctx, h, w)
 
         # Phase 1-1: Threshold 최적화 (0.3 → 0.15)
         # 측면 포즈, 얼굴 가린 포즈 등에서 검출률 향상
@@ -208,8 +251,7 @@ class PoseAnalyzer:
         }
 
         if scenario == 'face_closeup' and MEDIAPIPE_AVAILABLE:
-            self._init_mediapipe_face()
-            mp_face_result = self._run_mediapipe_face(img_rgb)
+            mp_face_result = self._run_mediapipe_face(ctx)
             result['mediapipe_face'] = mp_face_result
 
         elif scenario == 'hand_gesture' and MEDIAPIPE_AVAILABLE:
@@ -228,11 +270,22 @@ class PoseAnalyzer:
 
         return result
 
-    def _run_yolo(self, img_rgb: np.ndarray, h: int, w: int) -> Optional[Dict]:
-        """YOLO 포즈 검출"""
-        results = self.yolo(img_rgb, verbose=False)
+    @timed("pose_yolo")
+    def _run_yolo(self, ctx: ImageContext, h: int, w: int) -> Optional[Dict]:
+        """
+        YOLO 포즈 검출
 
-        if len(results) == 0 or len(results[0].keypoints) == 0:
+        ultralytics는 ndarray를 BGR로 받는다. 특징 추출(extract_yolo_pose_features)과
+        같은 모델 인스턴스(model_cache "yolo_pose")면 이미 돌린 결과를 재사용한다.
+        """
+        def _predict():
+            # model_cache "yolo_pose" 인스턴스는 풀 스레드와 특징 추출이 공유 (재진입 불가)
+            with model_cache.inference_lock("yolo_pose"):
+                return self.yolo(ctx.bgr, verbose=False)
+
+        results = ctx.model_output((YOLO_POSE_OUTPUT, id(self.yolo)), _predict)
+
+        if len(results) == 0:
             return None
 
         # 첫 번째 사람만 (가장 confidence 높은)
@@ -246,7 +299,7 @@ class PoseAnalyzer:
 
         # 정규화된 좌표로 변환
         keypoints = []
-        for i, kp_name in enumerate(self.YOLO_KEYPOINTS):
+        for i, kp_name in enumerate(self.KEYPOINTS):
             x, y, conf = keypoints_data[i]
             keypoints.append({
                 'name': kp_name,
@@ -262,12 +315,13 @@ class PoseAnalyzer:
                      float(boxes[2])/w, float(boxes[3])/h]
         }
 
-    def _run_movenet(self, image_path: str) -> Optional[Dict]:
+    @timed("pose_movenet")
+    def _run_movenet(self, image_path) -> Optional[Dict]:
         """
         MoveNet 포즈 검출
 
         Args:
-            image_path: 이미지 파일 경로
+            image_path: 이미지 파일 경로 또는 ImageContext
 
         Returns:
             YOLO와 동일한 포맷의 결과
@@ -289,7 +343,7 @@ class PoseAnalyzer:
             }
 
         except Exception as e:
-            print(f"⚠️ MoveNet analysis failed: {e}")
+            logger.warning("movenet analysis failed: %s", e)
             return None
 
     def _detect_scenario(self, pose_result: Dict, h: int, w: int) -> str:
@@ -343,12 +397,14 @@ class PoseAnalyzer:
         else:
             return 'upper_body'
 
+    @timed("pose_mediapipe_pose")
     def _run_mediapipe_pose(self, img_rgb: np.ndarray) -> Optional[Dict]:
         """MediaPipe Pose 실행 (33 keypoints)"""
         if self.mp_pose is None:
             return None
 
-        results = self.mp_pose.process(img_rgb)
+        with self._mp_lock:
+            results = self.mp_pose.process(img_rgb)
 
         if results.pose_landmarks is None:
             return None
@@ -368,12 +424,19 @@ class PoseAnalyzer:
             'count': len(keypoints)
         }
 
-    def _run_mediapipe_face(self, img_rgb: np.ndarray) -> Optional[Dict]:
-        """MediaPipe Face Mesh 실행 (468 keypoints)"""
-        if self.mp_face is None:
+    @timed("pose_mediapipe_face")
+    def _run_mediapipe_face(self, ctx: ImageContext) -> Optional[Dict]:
+        """MediaPipe Face Mesh 실행 (478 keypoints: 468 + 홍채 10, refine_landmarks)"""
+        if self.mp is None:
             return None
 
-        results = self.mp_face.process(img_rgb)
+        def _process():
+            with self._mp_lock:
+                self._init_mediapipe_face()
+                return self.mp_face.process(ctx.rgb)
+
+        # 특징 추출에서 이미 돌렸으면 재사용 (FaceMesh 추론 생략)
+        results = ctx.model_output(FACE_MESH_OUTPUT, _process)
 
         if results.multi_face_landmarks is None or len(results.multi_face_landmarks) == 0:
             return None
@@ -412,12 +475,14 @@ class PoseAnalyzer:
             'count': len(keypoints)
         }
 
+    @timed("pose_mediapipe_hands")
     def _run_mediapipe_hands(self, img_rgb: np.ndarray) -> Optional[Dict]:
         """MediaPipe Hands 실행 (21 keypoints per hand)"""
         if self.mp_hands is None:
             return None
 
-        results = self.mp_hands.process(img_rgb)
+        with self._mp_lock:
+            results = self.mp_hands.process(img_rgb)
 
         if results.multi_hand_landmarks is None:
             return None
@@ -524,8 +589,13 @@ def compare_poses(ref_pose: Dict, user_pose: Dict) -> Dict:
     ref_kp = ref_pose['merged_keypoints']['base']
     user_kp = user_pose['merged_keypoints']['base']
 
+    # 레퍼런스 각도 (precompute_reference_pose()로 미리 계산된 경우 재사용)
+    ref_angles = ref_pose.get('joint_angles')
+    if ref_angles is None:
+        ref_angles = compute_joint_angles(ref_kp)
+
     # 각도 비교
-    angle_diffs = _compare_angles(ref_kp, user_kp)
+    angle_diffs = _compare_angles(ref_kp, user_kp, ref_angles=ref_angles)
 
     # 위치 비교
     position_diffs = _compare_positions(ref_kp, user_kp)
@@ -534,7 +604,7 @@ def compare_poses(ref_pose: Dict, user_pose: Dict) -> Dict:
     similarity = _calculate_similarity(angle_diffs, position_diffs)
 
     # 피드백 생성
-    feedback = _generate_pose_feedback(angle_diffs, position_diffs, ref_kp, user_kp)
+    feedback = _generate_pose_feedback(angle_diffs, position_diffs, ref_kp, user_kp, ref_angles)
 
     return {
         'similarity': similarity,
@@ -544,64 +614,79 @@ def compare_poses(ref_pose: Dict, user_pose: Dict) -> Dict:
     }
 
 
-def _compare_angles(ref_kp: Dict, user_kp: Dict, conf_threshold: float = 0.25) -> Dict:
+# 관절 각도 정의: {이름: ((꼭짓점 포함 3점), 신뢰도 체크 키포인트, 고정 임계값)}
+# 고정 임계값이 None이면 _compare_angles()의 conf_threshold 사용
+JOINT_ANGLE_SPECS = {
+    'left_elbow': (('left_shoulder', 'left_elbow', 'left_wrist'),
+                   ['left_shoulder', 'left_elbow', 'left_wrist'], None),
+    'right_elbow': (('right_shoulder', 'right_elbow', 'right_wrist'),
+                    ['right_shoulder', 'right_elbow', 'right_wrist'], None),
+    'left_shoulder': (('left_hip', 'left_shoulder', 'left_elbow'),
+                      ['left_shoulder', 'left_elbow', 'left_hip'], None),
+    'right_shoulder': (('right_hip', 'right_shoulder', 'right_elbow'),
+                       ['right_shoulder', 'right_elbow', 'right_hip'], None),
+    'face_angle': (('left_eye', 'nose', 'right_eye'),
+                   ['nose', 'left_eye', 'right_eye'], 0.5),
+}
+
+
+def compute_joint_angles(kp: Dict, conf_threshold: float = 0.25) -> Dict:
     """
-    주요 관절 각도 비교
+    레퍼런스 관절 각도 사전 계산
 
-    Phase 1-1: conf_threshold 최적화 (0.5 → 0.25)
-    낮은 confidence 키포인트도 활용하여 포즈 비교 정확도 향상
+    레퍼런스는 세션 내내 동일하므로 한 번만 계산해두고
+    compare_poses()에서 재사용한다.
+
+    Returns:
+        {joint_name: angle(도)} - 신뢰도 조건을 통과한 관절만
     """
     angles = {}
 
-    # 팔꿈치 각도 (왼쪽)
-    if all(k in ref_kp and ref_kp[k]['confidence'] > conf_threshold for k in ['left_shoulder', 'left_elbow', 'left_wrist']):
-        ref_angle = _calculate_angle(
-            ref_kp['left_shoulder'], ref_kp['left_elbow'], ref_kp['left_wrist']
-        )
-        user_angle = _calculate_angle(
-            user_kp['left_shoulder'], user_kp['left_elbow'], user_kp['left_wrist']
-        )
-        angles['left_elbow'] = user_angle - ref_angle
+    for joint, (points, gate_keys, fixed_threshold) in JOINT_ANGLE_SPECS.items():
+        threshold = conf_threshold if fixed_threshold is None else fixed_threshold
+        if all(k in kp and kp[k]['confidence'] > threshold for k in gate_keys):
+            angles[joint] = _calculate_angle(kp[points[0]], kp[points[1]], kp[points[2]])
 
-    # 팔꿈치 각도 (오른쪽)
-    if all(k in ref_kp and ref_kp[k]['confidence'] > conf_threshold for k in ['right_shoulder', 'right_elbow', 'right_wrist']):
-        ref_angle = _calculate_angle(
-            ref_kp['right_shoulder'], ref_kp['right_elbow'], ref_kp['right_wrist']
-        )
-        user_angle = _calculate_angle(
-            user_kp['right_shoulder'], user_kp['right_elbow'], user_kp['right_wrist']
-        )
-        angles['right_elbow'] = user_angle - ref_angle
+    return angles
 
-    # 어깨 각도 (팔 들어올림 정도)
-    if all(k in ref_kp and ref_kp[k]['confidence'] > conf_threshold for k in ['left_shoulder', 'left_elbow', 'left_hip']):
-        ref_angle = _calculate_angle(
-            ref_kp['left_hip'], ref_kp['left_shoulder'], ref_kp['left_elbow']
-        )
-        user_angle = _calculate_angle(
-            user_kp['left_hip'], user_kp['left_shoulder'], user_kp['left_elbow']
-        )
-        angles['left_shoulder'] = user_angle - ref_angle
 
-    if all(k in ref_kp and ref_kp[k]['confidence'] > conf_threshold for k in ['right_shoulder', 'right_elbow', 'right_hip']):
-        ref_angle = _calculate_angle(
-            ref_kp['right_hip'], ref_kp['right_shoulder'], ref_kp['right_elbow']
-        )
-        user_angle = _calculate_angle(
-            user_kp['right_hip'], user_kp['right_shoulder'], user_kp['right_elbow']
-        )
-        angles['right_shoulder'] = user_angle - ref_angle
+def precompute_reference_pose(pose_info: Optional[Dict]) -> Optional[Dict]:
+    """
+    레퍼런스 포즈 결과에 관절 각도(joint_angles)를 추가
 
-    # 얼굴 각도 (고개 좌우)
-    if all(k in ref_kp and ref_kp[k]['confidence'] > 0.5 for k in ['nose', 'left_eye', 'right_eye']):
-        # 코와 양 눈으로 얼굴 각도 계산
-        ref_angle = _calculate_angle(
-            ref_kp['left_eye'], ref_kp['nose'], ref_kp['right_eye']
-        )
-        user_angle = _calculate_angle(
-            user_kp['left_eye'], user_kp['nose'], user_kp['right_eye']
-        )
-        angles['face_angle'] = user_angle - ref_angle
+    Args:
+        pose_info: PoseAnalyzer.analyze() 결과
+
+    Returns:
+        같은 dict (joint_angles 추가됨)
+    """
+    if pose_info is None or not pose_info.get('merged_keypoints'):
+        return pose_info
+
+    pose_info['joint_angles'] = compute_joint_angles(pose_info['merged_keypoints']['base'])
+    return pose_info
+
+
+def _compare_angles(ref_kp: Dict, user_kp: Dict, conf_threshold: float = 0.25,
+                    ref_angles: Optional[Dict] = None) -> Dict:
+    """
+    주요 관절 각도 비교
+
+    Phase 1-1: conf_threshold 최적화 (0.5 → 0.25)
+    낮은 confidence 키포인트도 활용하여 포즈 비교 정확도 향상
+
+    Args:
+        ref_angles: compute_joint_angles()로 미리 계산한 레퍼런스 각도 (없으면 계산)
+    """
+    if ref_angles is None:
+        ref_angles = compute_joint_angles(ref_kp, conf_threshold)
+
+    angles = {}
+
+    for joint, ref_angle in ref_angles.items():
+        p1, p2, p3 = JOINT_ANGLE_SPECS[joint][0]
+        user_angle = _calculate_angle(user_kp[p1], user_kp[p2], user_kp[p3])
+        angles[joint] = user_angle - ref_angle
 
     return angles
 
@@ -676,8 +761,22 @@ def _calculate_similarity(angle_diffs: Dict, position_diffs: Dict) -> float:
     return float(np.mean(all_scores))
 
 
+def _current_and_target_angle(joint: str, angle_diffs: Dict, ref_kp: Dict, user_kp: Dict,
+                              ref_angles: Optional[Dict] = None) -> Tuple[float, float]:
+    """(현재 각도, 목표 각도) 반환 - 레퍼런스 각도가 미리 계산돼 있으면 재사용"""
+    if ref_angles is not None and joint in ref_angles:
+        target_angle = ref_angles[joint]
+        return target_angle + angle_diffs[joint], target_angle
+
+    p1, p2, p3 = JOINT_ANGLE_SPECS[joint][0]
+    current_angle = _calculate_angle(user_kp[p1], user_kp[p2], user_kp[p3])
+    target_angle = _calculate_angle(ref_kp[p1], ref_kp[p2], ref_kp[p3])
+    return current_angle, target_angle
+
+
 def _generate_pose_feedback(angle_diffs: Dict, position_diffs: Dict,
-                           ref_kp: Dict, user_kp: Dict) -> List[str]:
+                           ref_kp: Dict, user_kp: Dict,
+                           ref_angles: Optional[Dict] = None) -> List[str]:
     """
     Phase 1-3: 구체적인 포즈 피드백 생성 (현재 각도 + 목표 각도 표시)
 
@@ -688,12 +787,8 @@ def _generate_pose_feedback(angle_diffs: Dict, position_diffs: Dict,
 
     # 각도 피드백 (임계값 높여서 안정화)
     if 'left_elbow' in angle_diffs and abs(angle_diffs['left_elbow']) > 25:  # 15 -> 25
-        # 현재 각도 계산
-        current_angle = _calculate_angle(
-            user_kp['left_shoulder'], user_kp['left_elbow'], user_kp['left_wrist']
-        )
-        target_angle = _calculate_angle(
-            ref_kp['left_shoulder'], ref_kp['left_elbow'], ref_kp['left_wrist']
+        current_angle, target_angle = _current_and_target_angle(
+            'left_elbow', angle_diffs, ref_kp, user_kp, ref_angles
         )
 
         if angle_diffs['left_elbow'] > 0:
@@ -708,11 +803,8 @@ def _generate_pose_feedback(angle_diffs: Dict, position_diffs: Dict,
             )
 
     if 'right_elbow' in angle_diffs and abs(angle_diffs['right_elbow']) > 25:  # 15 -> 25
-        current_angle = _calculate_angle(
-            user_kp['right_shoulder'], user_kp['right_elbow'], user_kp['right_wrist']
-        )
-        target_angle = _calculate_angle(
-            ref_kp['right_shoulder'], ref_kp['right_elbow'], ref_kp['right_wrist']
+        current_angle, target_angle = _current_and_target_angle(
+            'right_elbow', angle_diffs, ref_kp, user_kp, ref_angles
         )
 
         if angle_diffs['right_elbow'] > 0:
@@ -727,11 +819,8 @@ def _generate_pose_feedback(angle_diffs: Dict, position_diffs: Dict,
             )
 
     if 'left_shoulder' in angle_diffs and abs(angle_diffs['left_shoulder']) > 30:  # 20 -> 30
-        current_angle = _calculate_angle(
-            user_kp['left_hip'], user_kp['left_shoulder'], user_kp['left_elbow']
-        )
-        target_angle = _calculate_angle(
-            ref_kp['left_hip'], ref_kp['left_shoulder'], ref_kp['left_elbow']
+        current_angle, target_angle = _current_and_target_angle(
+            'left_shoulder', angle_diffs, ref_kp, user_kp, ref_angles
         )
 
         if angle_diffs['left_shoulder'] > 0:
@@ -746,11 +835,8 @@ def _generate_pose_feedback(angle_diffs: Dict, position_diffs: Dict,
             )
 
     if 'right_shoulder' in angle_diffs and abs(angle_diffs['right_shoulder']) > 30:  # 20 -> 30
-        current_angle = _calculate_angle(
-            user_kp['right_hip'], user_kp['right_shoulder'], user_kp['right_elbow']
-        )
-        target_angle = _calculate_angle(
-            ref_kp['right_hip'], ref_kp['right_shoulder'], ref_kp['right_elbow']
+        current_angle, target_angle = _current_and_target_angle(
+            'right_shoulder', angle_diffs, ref_kp, user_kp, ref_angles
         )
 
         if angle_diffs['right_shoulder'] > 0:
@@ -5,23 +5,36 @@
 
 import cv2
 import numpy as np
+import sys
+from pathlib import Path
 from typing import Dict, Optional
 
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from utils.image_context import ImageContext
+from utils.metrics import timed
+
 
 class QualityAnalyzer:
     """이미지 품질 분석 (노이즈, 블러, 선명도, 대비)"""
 
-    def __init__(self, image_path: str):
+    def __init__(self, image_path):
         """
         Args:
-            image_path (str): 분석할 이미지 경로
+            image_path: 분석할 이미지 경로 또는 ImageContext (메모리 이미지)
         """
-        self.image_path = image_path
-        self.img = cv2.imread(image_path)
-        if self.img is None:
+        try:
+            self.context = ImageContext.ensure(image_path)
+        except (FileNotFoundError, ValueError):
             raise FileNotFoundError(f"이미지를 찾을 수 없습니다: {image_path}")
-        self.gray = cv2.cvtColor(self.img, cv2.COLOR_BGR2GRAY)
+        self.image_path = self.context.path or self.context.name
+        self.img = self.context.bgr
+        self.gray = self.context.gray
+        self.stats = self.context.stats()  # Laplacian / Canny / 히스토그램 공유
 
+    @timed("quality")
     def analyze_all(self) -> dict:
         """
         전체 품질 분석 (통합 함수)
@@ -56,8 +69,7 @@ class QualityAnalyzer:
                 "variance": float          # 원본 variance 값
             }
         """
-        laplacian = cv2.Laplacian(self.gray, cv2.CV_64F)
-        noise_variance = laplacian.var()
+        noise_variance = self.stats.laplacian_var
 
         # 정규화 (경험적 임계값: 1000)
         noise_level = min(1.0, noise_variance / 1000)
@@ -90,8 +102,7 @@ class QualityAnalyzer:
                 "severity": str            # "none" / "slight" / "severe"
             }
         """
-        laplacian = cv2.Laplacian(self.gray, cv2.CV_64F)
-        blur_score = laplacian.var()
+        blur_score = self.stats.laplacian_var
 
         # 임계값 (경험적)
         is_blurred = blur_score < 100
@@ -128,21 +139,18 @@ class QualityAnalyzer:
                 "edge_ratio": float        # Edge pixel 비율
             }
         """
-        # ROI 결정
+        # ROI 결정 + Edge density 계산
         if roi is None:
-            # 전체 이미지
-            target = self.gray
+            # 전체 이미지 (Canny 결과 공유)
+            edge_ratio = self.stats.edge_ratio
             roi_used = False
         else:
             # ROI만 추출
             x, y, w, h = roi
-            target = self.gray[y:y+h, x:x+w]
+            edges = cv2.Canny(self.gray[y:y+h, x:x+w], 50, 150)
+            edge_ratio = np.sum(edges > 0) / edges.size
             roi_used = True
 
-        # Edge density 계산
-        edges = cv2.Canny(target, 50, 150)
-        edge_ratio = np.sum(edges > 0) / edges.size
-
         # 정규화 (경험적)
         sharpness_score = min(1.0, edge_ratio * 10)
 
@@ -169,11 +177,8 @@ class QualityAnalyzer:
                 "std_dev": float           # 원본 표준편차
             }
         """
-        hsv = cv2.cvtColor(self.img, cv2.COLOR_BGR2HSV)
-        v_channel = hsv[:, :, 2]
-
-        # V 채널 표준편차
-        std_dev = v_channel.std()
+        # V 채널 표준편차 (히스토그램 기반)
+        std_dev = self.stats.hsv_moments[2][1]
 
         # 정규화
         contrast = std_dev / 255.0
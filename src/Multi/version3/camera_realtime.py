@@ -8,7 +8,6 @@ import numpy as np
 import time
 import sys
 from typing import Dict, List, Optional
-import tempfile
 import threading
 from queue import Queue, Empty
 from pathlib import Path
@@ -23,6 +22,7 @@ sys.path.insert(0, str(PROJECT_ROOT / "utils"))
 
 from analysis.image_analyzer import ImageAnalyzer
 from analysis.image_comparator import ImageComparator
+from utils.image_context import ImageContext
 
 # Phase 3.3: Visual Guide Overlay
 try:
@@ -189,21 +189,13 @@ class RealtimeCameraAnalyzer:
             피드백 리스트
         """
         try:
-            # 프레임을 임시 파일로 저장
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
-                tmp_path = tmp.name
-                cv2.imwrite(tmp_path, frame)
-
-            # 사용자 이미지 분석
-            user_analyzer = ImageAnalyzer(tmp_path)
+            # 사용자 이미지 분석 (프레임 배열을 그대로 전달, 임시 파일 없음)
+            user_analyzer = ImageAnalyzer(ImageContext.from_array(frame, name="camera_frame"))
             user_data = user_analyzer.analyze()
 
             # 비교
             feedback = self._generate_feedback(self.ref_data, user_data)
 
-            # 임시 파일 삭제
-            Path(tmp_path).unlink()
-
             self.analysis_count += 1
 
             return feedback
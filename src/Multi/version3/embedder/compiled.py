@@ -0,0 +1,128 @@
+# ============================================================
+# 📦 Compiled Embedder
+# RobustScaler 5개 + 블록 가중치 + MLP 투영 + KMeans 중심을 .npz 하나로
+# ============================================================
+#
+# 빌드: python training/compile_embedder.py
+#
+# scaler(x) * weight = (x - center) / scale * weight 이므로
+# 1600D 융합 레이아웃 전체를 center 벡터 1개, scale*weight 벡터 1개로 합칠 수 있다.
+#   fusion = (x - center) * multiplier      (x: 브랜치를 레이아웃 순서로 이어 붙인 벡터)
+#   vec128 = projection.transform(fusion)
+#   cluster = argmin ||vec128 - centroids||
+# 서빙 시 sklearn / umap / joblib import 없음, NumPy 배열만 로드.
+#
+# 파일 형식 (.npz):
+#   branches (B,) str, dims (B,) int, active (B,) bool   융합 레이아웃 (브랜치 순서)
+#   center (D,), multiplier (D,)                         D = sum(dims) = 1600
+#   block_names (K,) str, block_weights (K,)             빌드에 쓴 가중치 (확인용)
+#   W0, b0, ..., centroids (C, 128)                      MLP 투영 + KMeans 중심
+
+from typing import Dict, List
+
+import numpy as np
+
+from embedder.projection import MLPProjection
+
+
+class CompiledEmbedder:
+    """
+    feature dict → 128D 임베딩 / 클러스터 (NumPy만 사용)
+
+    Args:
+        branches: 융합 레이아웃 순서의 feature 브랜치
+        dims: 브랜치별 차원
+        active: 브랜치별 사용 여부 (가중치 0인 블록은 False → 입력 없이 0)
+        center, multiplier: (D,) 융합 affine 파라미터
+        projection: MLPProjection (fusion → 128D)
+        centroids: (C, 128) KMeans 중심
+        block_weights: 빌드에 쓴 블록 가중치
+    """
+
+    def __init__(self, branches: List[str], dims: List[int], active: List[bool],
+                 center: np.ndarray, multiplier: np.ndarray, projection: MLPProjection,
+                 centroids: np.ndarray, block_weights: Dict[str, float]):
+        self.branches = list(branches)
+        self.dims = [int(d) for d in dims]
+        self.active = [bool(a) for a in active]
+        self.center = np.asarray(center, dtype=np.float32)
+        self.multiplier = np.asarray(multiplier, dtype=np.float32)
+        self.projection = projection
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        self.block_weights = dict(block_weights)
+
+        offsets = np.concatenate([[0], np.cumsum(self.dims)])
+        self.slices = {
+            branch: slice(int(start), int(end))
+            for branch, start, end in zip(self.branches, offsets[:-1], offsets[1:])
+        }
+        self.dim = int(offsets[-1])
+        if self.center.shape != (self.dim,) or self.multiplier.shape != (self.dim,):
+            raise ValueError(f"❌ center/multiplier 차원이 레이아웃({self.dim}D)과 다릅니다")
+
+    @property
+    def active_branches(self) -> set:
+        return {branch for branch, active in zip(self.branches, self.active) if active}
+
+    def fuse(self, branch_arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """브랜치별 (N, d) 배열 → (N, D) 융합 벡터 (affine 1회)"""
+        n = len(next(iter(branch_arrays.values())))
+        x = np.zeros((n, self.dim), dtype=np.float32)
+        for branch, active in zip(self.branches, self.active):
+            if active:
+                x[:, self.slices[branch]] = branch_arrays[branch]
+        x -= self.center
+        x *= self.multiplier
+        return x
+
+    def transform(self, branch_arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """브랜치별 (N, d) 배열 → (N, 128)"""
+        return self.projection.transform(self.fuse(branch_arrays))
+
+    def predict(self, vec128: np.ndarray) -> np.ndarray:
+        """(N, 128) → (N,) 가장 가까운 KMeans 중심 (KMeans.predict와 같은 결과)"""
+        vec128 = np.asarray(vec128, dtype=np.float64).reshape(-1, self.centroids.shape[1])
+        d2 = (
+            (vec128 ** 2).sum(axis=1, keepdims=True)
+            - 2.0 * vec128 @ self.centroids.T
+            + (self.centroids ** 2).sum(axis=1)
+        )
+        return np.argmin(d2, axis=1)
+
+    # --------------------------------------------------------
+    # 저장 / 로드
+    # --------------------------------------------------------
+    def save(self, path):
+        arrays = {
+            "branches": np.array(self.branches),
+            "dims": np.array(self.dims, dtype=np.int64),
+            "active": np.array(self.active, dtype=bool),
+            "center": self.center,
+            "multiplier": self.multiplier,
+            "block_names": np.array(list(self.block_weights)),
+            "block_weights": np.array(list(self.block_weights.values()), dtype=np.float64),
+            "centroids": self.centroids,
+        }
+        for i, (w, b) in enumerate(zip(self.projection.weights, self.projection.biases)):
+            arrays[f"W{i}"] = w
+            arrays[f"b{i}"] = b
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path) -> "CompiledEmbedder":
+        with np.load(path) as data:
+            n_layers = sum(1 for key in data.files if key.startswith("W"))
+            projection = MLPProjection(
+                [data[f"W{i}"] for i in range(n_layers)],
+                [data[f"b{i}"] for i in range(n_layers)]
+            )
+            return cls(
+                branches=[str(b) for b in data["branches"]],
+                dims=data["dims"].tolist(),
+                active=data["active"].tolist(),
+                center=data["center"],
+                multiplier=data["multiplier"],
+                projection=projection,
+                centroids=data["centroids"],
+                block_weights=dict(zip((str(n) for n in data["block_names"]), data["block_weights"].tolist())),
+            )
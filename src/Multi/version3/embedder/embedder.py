@@ -1,9 +1,9 @@
 # ============================================================
-# 🔧 Load Embedded Models (Scaler + UMAP) — version2 compatible
+# 🔧 Load Embedded Models (Scaler + UMAP/MLP) — version2 compatible
 # ============================================================
 
 import os
-import joblib
+import json
 import numpy as np
 import sys
 from pathlib import Path
@@ -12,6 +12,9 @@ from pathlib import Path
 current_dir = Path(__file__).parent
 sys.path.append(str(current_dir.parent))
 from utils.model_cache import model_cache
+from utils.metrics import timed
+from embedder.projection import MLPProjection
+from embedder.compiled import CompiledEmbedder
 
 # 모델 저장 경로 (상대 경로)
 # embedder.py -> version3 -> Multi -> src -> Try_Angle
@@ -24,37 +27,179 @@ SCALER_COLOR_PATH     = os.path.join(FEATURE_MODEL_DIR, "scaler_color.joblib")
 SCALER_MIDAS_PATH     = os.path.join(FEATURE_MODEL_DIR, "scaler_midas.joblib")
 
 UMAP_MODEL_PATH       = os.path.join(FEATURE_MODEL_DIR, "umap_128d_model.joblib")
+UMAP_MLP_PATH         = os.path.join(FEATURE_MODEL_DIR, "umap_128d_mlp.npz")    # training/distill_umap.py
+WEIGHTS_PATH          = os.path.join(FEATURE_MODEL_DIR, "weights.json")
+COMPILED_PATH         = os.path.join(FEATURE_MODEL_DIR, "embedder_compiled.npz")  # training/compile_embedder.py
+
+# 128D 투영: "umap" (joblib UMAP.transform) / "mlp" (증류 MLP, NumPy)
+# "auto"면 UMAP_MLP_PATH가 있으면 mlp, 없으면 umap
+EMBED_PROJECTION = os.environ.get("TRYANGLE_EMBED_PROJECTION", "auto")
+if EMBED_PROJECTION not in ("auto", "umap", "mlp"):
+    raise ValueError(f"❌ TRYANGLE_EMBED_PROJECTION은 auto / umap / mlp 중 하나여야 합니다: {EMBED_PROJECTION}")
+
+# 서빙 아티팩트: "compiled" (embedder_compiled.npz, sklearn/umap/joblib 없음) / "joblib" (scaler + 투영 개별 로드)
+# "auto"면 COMPILED_PATH가 있으면 compiled. compiled는 MLP 투영이므로
+# TRYANGLE_EMBED_PROJECTION=umap이면 auto여도 joblib (UMAP 사용)
+EMBEDDER_ARTIFACT = os.environ.get("TRYANGLE_EMBEDDER_ARTIFACT", "auto")
+if EMBEDDER_ARTIFACT not in ("auto", "compiled", "joblib"):
+    raise ValueError(f"❌ TRYANGLE_EMBEDDER_ARTIFACT는 auto / compiled / joblib 중 하나여야 합니다: {EMBEDDER_ARTIFACT}")
+if EMBEDDER_ARTIFACT == "compiled" and EMBED_PROJECTION == "umap":
+    raise ValueError("❌ TRYANGLE_EMBEDDER_ARTIFACT=compiled는 MLP 투영만 담고 있어 TRYANGLE_EMBED_PROJECTION=umap과 함께 쓸 수 없습니다")
+
+# -----------------------------
+# 융합 블록 (학습 순서 그대로) / 가중치
+# -----------------------------
+# 블록 → (feature 브랜치, 차원)
+FUSION_BLOCKS = {
+    "clip": (("clip",), 512),
+    "openclip": (("openclip",), 512),
+    "dino": (("dino",), 384),
+    "color": (("color",), 150),
+    "midas": (("midas",), 20),
+    "pose": (("yolo_pose", "face"), 22),   # yolo_pose(15) + face(7), scaling 없음
+}
+
+# 브랜치별 차원 (compiled 레이아웃용)
+BRANCH_DIMS = {
+    "clip": 512, "openclip": 512, "dino": 384, "color": 150, "midas": 20,
+    "yolo_pose": 15, "face": 7,
+}
+
+# weights.json이 없을 때 (training/retrain_clustering.py WEIGHTS와 동일)
+DEFAULT_WEIGHTS = {
+    "clip": 0.30,
+    "openclip": 0.30,
+    "dino": 0.25,
+    "color": 0.12,
+    "midas": 0.03,
+    "pose": 0.00,
+}
 
 # -----------------------------
 # Load models (싱글톤)
 # -----------------------------
-def _load_embedder_models():
-    """Embedder 모델 로드 (한 번만)"""
-    print("🔧 Loading embedder models...")
+def projection_kind() -> str:
+    """실제로 쓸 128D 투영 ("umap" / "mlp")"""
+    if EMBED_PROJECTION == "auto":
+        return "mlp" if os.path.exists(UMAP_MLP_PATH) else "umap"
+    return EMBED_PROJECTION
+
+
+def _load_projection():
+    """128D 투영 모델 (UMAP 또는 증류 MLP, 둘 다 .transform(fusion) 제공)"""
+    if projection_kind() == "mlp":
+        return MLPProjection.load(UMAP_MLP_PATH)
 
-    scaler_clip      = joblib.load(SCALER_CLIP_PATH)
-    scaler_openclip  = joblib.load(SCALER_OPENCLIP_PATH)
-    scaler_dino      = joblib.load(SCALER_DINO_PATH)
-    scaler_color     = joblib.load(SCALER_COLOR_PATH)
-    scaler_midas     = joblib.load(SCALER_MIDAS_PATH)
+    import joblib  # 언피클 시 umap도 여기서 import됨
+    return joblib.load(UMAP_MODEL_PATH)
 
-    umap_model       = joblib.load(UMAP_MODEL_PATH)
 
-    print("✅ Embedder models loaded successfully")
+def compiled_in_use() -> bool:
+    """서빙에 compiled 아티팩트(embedder_compiled.npz)를 쓰는지"""
+    if EMBED_PROJECTION == "umap":
+        return False
+    if EMBEDDER_ARTIFACT == "auto":
+        return os.path.exists(COMPILED_PATH)
+    return EMBEDDER_ARTIFACT == "compiled"
+
+
+def _load_scalers():
+    """블록별 RobustScaler (joblib, 학습/빌드 스크립트도 사용)"""
+    import joblib  # 언피클 시 sklearn도 여기서 import됨
 
     return {
-        "scaler_clip": scaler_clip,
-        "scaler_openclip": scaler_openclip,
-        "scaler_dino": scaler_dino,
-        "scaler_color": scaler_color,
-        "scaler_midas": scaler_midas,
-        "umap_model": umap_model
+        "scaler_clip": joblib.load(SCALER_CLIP_PATH),
+        "scaler_openclip": joblib.load(SCALER_OPENCLIP_PATH),
+        "scaler_dino": joblib.load(SCALER_DINO_PATH),
+        "scaler_color": joblib.load(SCALER_COLOR_PATH),
+        "scaler_midas": joblib.load(SCALER_MIDAS_PATH),
     }
 
+
+def _load_embedder_models():
+    """Embedder 모델 로드 (한 번만)"""
+    print("🔧 Loading embedder models...")
+
+    if compiled_in_use():
+        compiled = CompiledEmbedder.load(COMPILED_PATH)
+        if compiled.block_weights != get_embedder_weights():
+            # 활성 브랜치가 달라서 추출 단계에서 빠진 브랜치로 fuse가 실패하거나, 다른 모델로 임베딩됨
+            raise ValueError(
+                f"❌ {COMPILED_PATH} 가중치 {compiled.block_weights}가 weights.json {get_embedder_weights()}과 다릅니다\n"
+                f"다시 빌드: python training/compile_embedder.py (또는 TRYANGLE_EMBEDDER_ARTIFACT=joblib)"
+            )
+        print("✅ Embedder models loaded successfully (compiled)")
+        return {"compiled": compiled}
+
+    models = _load_scalers()
+    models["projection"] = _load_projection()
+
+    print(f"✅ Embedder models loaded successfully (projection: {projection_kind()})")
+    return models
+
 def get_embedder_models():
     """Embedder 모델 가져오기 (싱글톤)"""
     return model_cache.get_or_load("embedder_models", _load_embedder_models)
 
+
+def _load_embedder_weights():
+    """융합 가중치 (retrain_clustering.py가 모델과 함께 저장한 weights.json)"""
+    weights = dict(DEFAULT_WEIGHTS)
+    if os.path.exists(WEIGHTS_PATH):
+        with open(WEIGHTS_PATH, "r", encoding="utf-8") as f:
+            weights.update(json.load(f))
+    return weights
+
+
+def get_embedder_weights() -> dict:
+    """블록별 융합 가중치 {"clip": 0.3, ..., "pose": 0.0} (싱글톤)"""
+    return model_cache.get_or_load("embedder_weights", _load_embedder_weights)
+
+
+def required_branches() -> set:
+    """
+    임베딩에 실제로 기여하는 feature 브랜치 (가중치 0인 블록 제외)
+
+    클러스터 매칭만 필요한 호출은 이 브랜치만 추출하면 된다
+    (현재 학습 모델은 pose=0 → yolo_pose / face 추출 생략).
+    compiled 아티팩트를 쓰면 그 레이아웃의 활성 브랜치 (fuse가 실제로 읽는 브랜치)
+    """
+    if compiled_in_use():
+        return get_embedder_models()["compiled"].active_branches
+
+    weights = get_embedder_weights()
+    branches = set()
+    for block, (block_branches, _) in FUSION_BLOCKS.items():
+        if weights.get(block, 0.0) != 0.0:
+            branches.update(block_branches)
+    return branches
+
+
+def fuse_features(branch_arrays: dict, models: dict, weights: dict) -> np.ndarray:
+    """
+    브랜치별 (N, d) 배열 → (N, 1600) 융합 벡터
+
+    블록별 scaler 적용 후 가중치 곱 (학습 시와 동일)
+    가중치 0인 블록은 입력 없이 0으로 채움 (extract 단계에서 생략 가능)
+    """
+    n = len(next(iter(branch_arrays.values())))
+    blocks = []
+    for block, (block_branches, dim) in FUSION_BLOCKS.items():
+        weight = weights.get(block, 0.0)
+        if weight == 0.0:
+            blocks.append(np.zeros((n, dim)))
+            continue
+
+        vec = np.concatenate([branch_arrays[name] for name in block_branches], axis=1)
+        scaler = models.get(f"scaler_{block}")
+        if scaler is not None:
+            vec = scaler.transform(vec)   # clip / dino는 반드시 학습 차원과 같아야 함
+        blocks.append(vec * weight)
+
+    return np.concatenate(blocks, axis=1)
+
+
+@timed("embed")
 def embed_features(feature_dict: dict):
     """
     feature_extractor_v2.py → extract_features_v2() 결과(dict) 를 입력으로 받는다.
@@ -68,7 +213,8 @@ def embed_features(feature_dict: dict):
         "face": (7,)         # v2에서 추가
     }
 
-    Note: yolo_pose와 face는 학습 시 가중치=0이므로 실제로는 사용 안 됨
+    Note: 가중치(weights.json)가 0인 블록의 브랜치는 없어도 된다
+          (현재 yolo_pose / face는 가중치=0, required_branches() 참고)
     """
     # -----------------------------
     # 입력이 path 면 → ❌ 잘못된 호출
@@ -79,53 +225,53 @@ def embed_features(feature_dict: dict):
             "먼저 extract_features_full(image_path)로 feature를 추출하세요."
         )
 
+    branch_arrays = {name: np.asarray(value).reshape(1, -1) for name, value in feature_dict.items()}
+    return _embed_arrays(branch_arrays)[0]
+
+
+def stack_features(feature_dicts) -> dict:
+    """
+    feature dict 리스트 → 브랜치별 (N, d) 배열 (embed_features_batch 입력)
+
+    모든 dict에 있는 브랜치만 쌓는다
+    """
+    feature_dicts = list(feature_dicts)
+    if not feature_dicts:
+        raise ValueError("❌ stack_features()에 빈 리스트가 들어왔습니다")
+
+    common = set(feature_dicts[0]).intersection(*feature_dicts[1:])
+    return {
+        name: np.vstack([np.asarray(features[name]).reshape(-1) for features in feature_dicts])
+        for name in feature_dicts[0] if name in common
+    }
+
+
+def embed_features_batch(branch_arrays: dict) -> np.ndarray:
+    """
+    N장 한 번에 임베딩: 브랜치별 (N, d) 배열 → (N, 128)
+
+    embed_features()를 N번 호출한 것과 같은 결과 (scaler / 투영을 행렬 연산 1회로).
+    feature dict 리스트는 stack_features()로 먼저 쌓을 것.
+    """
+    return _embed_arrays({name: np.asarray(value) for name, value in branch_arrays.items()})
+
+
+def _embed_arrays(branch_arrays: dict) -> np.ndarray:
+    """브랜치별 (N, d) 배열 → (N, 128) (embed_features / embed_features_batch 공통)"""
     # 모델 가져오기 (캐시됨)
     models = get_embedder_models()
-    scaler_clip = models["scaler_clip"]
-    scaler_openclip = models["scaler_openclip"]
-    scaler_dino = models["scaler_dino"]
-    scaler_color = models["scaler_color"]
-    scaler_midas = models["scaler_midas"]
-    umap_model = models["umap_model"]
-
-    clip_vec  = feature_dict["clip"].reshape(1, -1)
-    open_vec  = feature_dict["openclip"].reshape(1, -1)
-    dino_vec  = feature_dict["dino"].reshape(1, -1)   # 반드시 384
-    color_vec = feature_dict["color"].reshape(1, -1)
-    midas_vec = feature_dict["midas"].reshape(1, -1)
-
-    # yolo_pose, face (v2에서 추가, 하지만 가중치=0)
-    yolo_pose_vec = feature_dict["yolo_pose"].reshape(1, -1)  # (1, 15)
-    face_vec = feature_dict["face"].reshape(1, -1)            # (1, 7)
-
-    # -----------------------------
-    # feature_models에서 불러온 scaler 적용
-    # -----------------------------
-    clip_scaled      = scaler_clip.transform(clip_vec)
-    openclip_scaled  = scaler_openclip.transform(open_vec)
-    dino_scaled      = scaler_dino.transform(dino_vec)
-    color_scaled     = scaler_color.transform(color_vec)
-    midas_scaled     = scaler_midas.transform(midas_vec)
 
-    # pose, face는 scaling 없이 그냥 사용 (어차피 가중치=0)
-    # 학습 시와 동일하게 처리
-    pose_combined = np.concatenate([yolo_pose_vec, face_vec], axis=1)  # (1, 22)
+    # compiled: 융합 affine 1회 + MLP
+    if "compiled" in models:
+        return models["compiled"].transform(branch_arrays)
 
     # -----------------------------
     # 1600D 융합 (512+512+384+150+20+22)
-    # 학습 시 가중치: clip=0.3, openclip=0.3, dino=0.25, color=0.12, midas=0.03, pose=0.0
     # -----------------------------
-    fusion = np.concatenate([
-        clip_scaled * 0.30,
-        openclip_scaled * 0.30,
-        dino_scaled * 0.25,
-        color_scaled * 0.12,
-        midas_scaled * 0.03,
-        pose_combined * 0.00  # 가중치 0이므로 실제로는 무시됨
-    ], axis=1)
+    fusion = fuse_features(branch_arrays, models, get_embedder_weights())
+    projection = models["projection"]
 
     # -----------------------------
-    # UMAP 128D 축소
+    # 128D 축소 (UMAP 또는 증류 MLP)
     # -----------------------------
-    vec128 = umap_model.transform(fusion)[0]
-    return vec128
+    return projection.transform(fusion)
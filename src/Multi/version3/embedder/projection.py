@@ -0,0 +1,69 @@
+# ============================================================
+# 🧮 MLP Projection (UMAP 128D 대체)
+# 학습 코퍼스의 UMAP 좌표를 재현하도록 증류한 MLP, NumPy forward만 사용
+# ============================================================
+#
+# 학습 / 충실도 리포트: python training/distill_umap.py
+#
+# UMAP.transform은 호출마다 학습 데이터 전체에 대한 최근접 이웃 탐색 +
+# 임베딩 최적화를 돌리고, joblib 파일에 학습 그래프 전체가 들어 있다.
+# MLPProjection은 가중치 행렬 몇 개(수 MB)와 행렬곱 몇 번이면 된다.
+#
+# 파일 형식 (.npz):
+#   W0, b0, W1, b1, ..., W{n-1}, b{n-1}   (은닉층은 ReLU, 마지막 층은 선형)
+
+from typing import List
+
+import numpy as np
+
+
+class MLPProjection:
+    """
+    fusion(1600D) → 128D 투영 (UMAP 모델과 같은 transform 인터페이스)
+
+    Args:
+        weights: 층별 (in, out) 가중치 행렬
+        biases: 층별 (out,) bias
+    """
+
+    def __init__(self, weights: List[np.ndarray], biases: List[np.ndarray]):
+        if len(weights) != len(biases) or not weights:
+            raise ValueError("❌ weights / biases 층 수가 다릅니다")
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+
+    @property
+    def n_components(self) -> int:
+        return self.weights[-1].shape[1]
+
+    def transform(self, x: np.ndarray) -> np.ndarray:
+        """(N, 1600) → (N, 128)"""
+        h = np.asarray(x, dtype=np.float32)
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            h = h @ w + b
+            if i < last:
+                np.maximum(h, 0.0, out=h)
+        return h
+
+    @classmethod
+    def load(cls, path) -> "MLPProjection":
+        with np.load(path) as data:
+            n_layers = sum(1 for key in data.files if key.startswith("W"))
+            weights = [data[f"W{i}"] for i in range(n_layers)]
+            biases = [data[f"b{i}"] for i in range(n_layers)]
+        return cls(weights, biases)
+
+    def save(self, path):
+        arrays = {}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"W{i}"] = w
+            arrays[f"b{i}"] = b
+        np.savez(path, **arrays)
+
+    @classmethod
+    def from_sklearn(cls, mlp) -> "MLPProjection":
+        """학습된 sklearn MLPRegressor (activation='relu') → MLPProjection"""
+        if mlp.activation != "relu":
+            raise ValueError(f"❌ relu MLP만 지원합니다: {mlp.activation}")
+        return cls(list(mlp.coefs_), list(mlp.intercepts_))
@@ -0,0 +1,346 @@
+# ============================================================
+# 🏭 Batch Feature Extractor (v2)
+# 코퍼스 재추출용: 디코드/전처리 prefetch + backbone 배치 forward
+# + 수작업 특징(color / yolo_pose / face)은 별도 프로세스에서 병렬
+# ============================================================
+#
+# 사용:
+#   from feature_extraction.batch_extractor import iter_features_v2_batch
+#
+#   for index, features in iter_features_v2_batch(paths):
+#       ...  # features는 extract_features_v2(paths[index])와 같은 dict (실패 시 None)
+#
+# 구조:
+#   [스레드 풀]  디코드 + CLIP/OpenCLIP/DINO/MiDaS 전처리 (다음 배치를 미리 준비)
+#   [메인]       backbone별 torch.cat → forward 1회 (batch_size장)
+#   [프로세스 풀] 이미지별 color / YOLO-pose / FaceMesh 특징 (워커마다 모델 1벌)
+#
+# 환경변수 (기본값):
+#   TRYANGLE_EXTRACT_BATCH_SIZE   backbone 배치 크기 (16)
+#   TRYANGLE_EXTRACT_THREADS      디코드/전처리 스레드 수 (4)
+#   TRYANGLE_EXTRACT_PROCESSES    수작업 특징 프로세스 수 (CPU 코어 수 - 1, 0이면 메인에서 실행)
+
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import torch
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from utils.image_context import ImageContext
+from utils.log import get_logger
+from utils.torch_runtime import inference_context
+from feature_extraction.feature_extractor_v2 import (
+    FEATURE_BRANCHES,
+    load_models,
+    preprocess_backbone_input,
+    _backbone_forwards,
+    _load_yolo_pose,
+    _create_face_mesh,
+    extract_midas_extended,
+    extract_color_extended,
+    extract_yolo_pose_features,
+    extract_face_features,
+)
+
+logger = get_logger(__name__)
+
+BATCH_SIZE = int(os.environ.get("TRYANGLE_EXTRACT_BATCH_SIZE", "16"))
+NUM_THREADS = int(os.environ.get("TRYANGLE_EXTRACT_THREADS", "4"))
+NUM_PROCESSES = int(os.environ.get(
+    "TRYANGLE_EXTRACT_PROCESSES", str(max(1, (os.cpu_count() or 2) - 1))
+))
+
+BACKBONE_BRANCHES = ("clip", "openclip", "dino", "midas")
+HANDCRAFTED_BRANCHES = ("color", "yolo_pose", "face")
+
+
+# ============================================================
+# 수작업 특징 (워커 프로세스)
+# ============================================================
+# 워커 프로세스 안에서만 쓰는 모델 (initializer에서 1회 로드)
+_worker_models: Dict = {}
+
+
+def _init_handcrafted_worker(branches: Tuple[str, ...]):
+    """워커 프로세스 초기화: 필요한 모델만 로드, 스레드 1개로 제한 (코어는 프로세스 수로 나눔)"""
+    import cv2
+
+    torch.set_num_threads(1)
+    cv2.setNumThreads(1)
+
+    if "yolo_pose" in branches:
+        _worker_models["yolo_pose"] = _load_yolo_pose()
+    if "face" in branches:
+        _worker_models["mp_face_mesh"] = _create_face_mesh()
+
+
+def _handcrafted_features(source, branches: Tuple[str, ...], models: Optional[Dict] = None) -> Optional[Dict]:
+    """
+    이미지 1장의 수작업 특징 (extract_features_v2의 5~7단계와 동일)
+
+    Args:
+        source: 경로 / bytes / BGR ndarray (프로세스 간 전달 가능한 형식)
+        models: None이면 워커 프로세스 모델 사용
+
+    Returns:
+        {branch: ndarray} 또는 디코드 실패 시 None
+    """
+    models = _worker_models if models is None else models
+
+    try:
+        ctx = ImageContext.ensure(source)
+    except Exception as e:
+        logger.warning("image load failed (handcrafted) %s: %s", _describe(source), e)
+        return None
+
+    result = {}
+    if "color" in branches:
+        result["color"] = extract_color_extended(ctx)
+    if "yolo_pose" in branches:
+        result["yolo_pose"] = extract_yolo_pose_features(ctx, models["yolo_pose"])
+    if "face" in branches:
+        result["face"] = extract_face_features(ctx, models["mp_face_mesh"])
+    return result
+
+
+def _picklable_source(image):
+    """ImageContext는 경로나 원본 바이트로 넘김 (디코드된 배열 복사보다 작음)"""
+    if isinstance(image, ImageContext):
+        if image.path is not None:
+            return image.path
+        if image.raw_bytes is not None:
+            return image.raw_bytes
+        return image.bgr
+    if isinstance(image, Path):
+        return str(image)
+    return image
+
+
+def _describe(source) -> str:
+    if isinstance(source, (str, Path)):
+        return str(source)
+    return f"<{type(source).__name__}>"
+
+
+# ============================================================
+# 디코드 + backbone 전처리 (스레드)
+# ============================================================
+def _prepare_backbone_inputs(image, branches: Tuple[str, ...], models: Dict) -> Optional[Dict]:
+    """이미지 1장 디코드 + backbone별 (1, ...) 입력 텐서 (실패 시 None)"""
+    try:
+        ctx = ImageContext.ensure(image)
+    except Exception as e:
+        logger.warning("image load failed %s: %s", _describe(image), e)
+        return None
+
+    try:
+        return {name: preprocess_backbone_input(name, ctx, models) for name in branches}
+    except Exception as e:
+        logger.warning("backbone preprocess failed %s: %s", _describe(image), e)
+        return None
+
+
+def _run_backbones(prepared: List[Optional[Dict]], branches: Tuple[str, ...], forwards: Dict) -> List[Optional[Dict]]:
+    """
+    배치 forward: backbone별로 입력을 모아 shape별 torch.cat → forward 1회
+
+    묶음 forward가 실패하면 (OOM 등) 그 묶음만 이미지별 forward로 다시 돌리고,
+    그래도 실패한 이미지만 None으로 남긴다 (배치 하나 때문에 전체가 멈추지 않게).
+
+    Returns:
+        prepared와 같은 길이의 [{branch: 출력 행}] (prepared가 None이거나 forward 실패면 None)
+    """
+    outputs: List[Optional[Dict]] = [{} if inputs is not None else None for inputs in prepared]
+
+    for name in branches:
+        # 종횡비 유지 전처리 등으로 shape이 다를 수 있으므로 shape별로 묶음
+        groups: Dict[tuple, List[int]] = {}
+        for i, inputs in enumerate(prepared):
+            if outputs[i] is not None:
+                groups.setdefault(tuple(inputs[name].shape[1:]), []).append(i)
+
+        for indices in groups.values():
+            batch = torch.cat([prepared[i][name] for i in indices], dim=0)
+            try:
+                with inference_context():
+                    rows = forwards[name](batch)
+            except Exception as e:
+                logger.warning("batched %s forward failed (%d images), retrying per image: %s", name, len(indices), e)
+                rows = None
+
+            if rows is not None:
+                for row, i in zip(rows, indices):
+                    outputs[i][name] = row
+                continue
+
+            for i in indices:
+                try:
+                    with inference_context():
+                        outputs[i][name] = forwards[name](prepared[i][name])[0]
+                except Exception as e:
+                    logger.warning("%s forward failed for image %d: %s", name, i, e)
+                    outputs[i] = None
+
+    return outputs
+
+
+def _midas_extended_or_none(depth_map):
+    """MiDaS depth map → 20D (실패하면 None, 해당 이미지만 실패 처리)"""
+    try:
+        return extract_midas_extended(depth_map)
+    except Exception as e:
+        logger.warning("midas features failed: %s", e)
+        return None
+
+
+# ============================================================
+# 공개 API
+# ============================================================
+def iter_features_v2_batch(
+    images: Iterable,
+    branches=None,
+    batch_size: int = BATCH_SIZE,
+    num_threads: int = NUM_THREADS,
+    num_processes: int = NUM_PROCESSES
+) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """
+    여러 이미지의 v2 특징을 배치로 추출 (입력 순서대로 yield)
+
+    Args:
+        images: 이미지 경로 / bytes / BGR ndarray / ImageContext 목록
+        branches: 추출할 브랜치 (None이면 전체, extract_features_v2와 동일)
+        batch_size: backbone forward 1회에 묶는 이미지 수
+        num_threads: 디코드/전처리 스레드 수 (다음 배치를 미리 준비)
+        num_processes: 수작업 특징 프로세스 수 (0이면 메인 프로세스에서 실행)
+
+    Yields:
+        (index, features): features는 extract_features_v2(images[index], branches)와
+        같은 키/shape의 dict. 디코드/특징 추출 실패 시 None (다른 이미지는 계속 진행)
+        (backbone 출력은 배치 forward라 batch=1 대비 부동소수점 오차 수준 차이 가능)
+    """
+    branches = set(FEATURE_BRANCHES) if branches is None else set(branches)
+    unknown = branches - set(FEATURE_BRANCHES)
+    if unknown:
+        raise ValueError(f"❌ 알 수 없는 feature 브랜치: {sorted(unknown)}")
+
+    images = list(images)
+    backbone_branches = tuple(name for name in BACKBONE_BRANCHES if name in branches)
+    handcrafted_branches = tuple(name for name in HANDCRAFTED_BRANCHES if name in branches)
+    batch_size = max(1, batch_size)
+
+    models = load_models() if backbone_branches else None
+    forwards = _backbone_forwards(models) if backbone_branches else None
+
+    # 수작업 특징 프로세스 풀 (spawn: torch/OpenMP 스레드가 도는 부모를 fork하지 않음)
+    process_pool = None
+    local_models = None
+    if handcrafted_branches:
+        if num_processes > 0:
+            process_pool = ProcessPoolExecutor(
+                max_workers=num_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_handcrafted_worker,
+                initargs=(handcrafted_branches,)
+            )
+        else:
+            local_models = models if models is not None else load_models()
+
+    thread_pool = ThreadPoolExecutor(max_workers=max(1, num_threads), thread_name_prefix="feature-prefetch")
+
+    def _submit_chunk(start: int):
+        chunk = images[start:start + batch_size]
+        prepare_futures = [
+            thread_pool.submit(_prepare_backbone_inputs, image, backbone_branches, models)
+            for image in chunk
+        ] if backbone_branches else None
+
+        handcrafted_futures = None
+        if process_pool is not None:
+            handcrafted_futures = [
+                process_pool.submit(_handcrafted_features, _picklable_source(image), handcrafted_branches)
+                for image in chunk
+            ]
+        return start, chunk, prepare_futures, handcrafted_futures
+
+    try:
+        starts = list(range(0, len(images), batch_size))
+        pending = _submit_chunk(starts[0]) if starts else None
+
+        for position in range(len(starts)):
+            start, chunk, prepare_futures, handcrafted_futures = pending
+
+            # 다음 배치 디코드/전처리를 미리 시작 (현재 배치 forward와 겹침)
+            pending = _submit_chunk(starts[position + 1]) if position + 1 < len(starts) else None
+
+            # backbone 배치 forward
+            backbone_rows = [{} for _ in chunk]
+            failed = [False] * len(chunk)
+            if backbone_branches:
+                prepared = [future.result() for future in prepare_futures]
+                backbone_rows = _run_backbones(prepared, backbone_branches, forwards)
+                failed = [rows is None for rows in backbone_rows]
+
+            # MiDaS depth map → 20D (스레드 풀에서 병렬, 실패한 이미지만 None)
+            if "midas" in backbone_branches:
+                midas_futures = [
+                    thread_pool.submit(_midas_extended_or_none, rows["midas"]) if rows is not None else None
+                    for rows in backbone_rows
+                ]
+                for offset, future in enumerate(midas_futures):
+                    if future is None:
+                        continue
+                    midas = future.result()
+                    if midas is None:
+                        failed[offset] = True
+                    else:
+                        backbone_rows[offset]["midas"] = midas
+
+            # 수작업 특징
+            for offset, image in enumerate(chunk):
+                features = None
+                if not failed[offset]:
+                    if not handcrafted_branches:
+                        handcrafted = {}
+                    elif handcrafted_futures is not None:
+                        try:
+                            handcrafted = handcrafted_futures[offset].result()
+                        except Exception as e:
+                            logger.warning("handcrafted features failed %s: %s", _describe(_picklable_source(image)), e)
+                            handcrafted = None
+                    else:
+                        try:
+                            handcrafted = _handcrafted_features(image, handcrafted_branches, local_models)
+                        except Exception as e:
+                            logger.warning("handcrafted features failed %s: %s", _describe(_picklable_source(image)), e)
+                            handcrafted = None
+
+                    if handcrafted is not None:
+                        merged = {**backbone_rows[offset], **handcrafted}
+                        features = {name: merged[name] for name in FEATURE_BRANCHES if name in merged}
+
+                yield start + offset, features
+
+    finally:
+        thread_pool.shutdown(wait=True, cancel_futures=True)
+        if process_pool is not None:
+            process_pool.shutdown(wait=True, cancel_futures=True)
+
+
+def extract_features_v2_batch(images: Iterable, branches=None, **kwargs) -> List[Optional[Dict]]:
+    """
+    iter_features_v2_batch 결과를 리스트로 (입력 순서, 실패는 None)
+
+    kwargs: batch_size, num_threads, num_processes
+    """
+    images = list(images)
+    results: List[Optional[Dict]] = [None] * len(images)
+    for index, features in iter_features_v2_batch(images, branches=branches, **kwargs):
+        results[index] = features
+    return results
@@ -0,0 +1,186 @@
+# ============================================================
+# 📦 Micro-Batching
+# 동시에 들어온 전처리 결과를 몇 ms 모아서 backbone forward 1회로 처리
+# ============================================================
+
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+
+from utils.torch_runtime import inference_context
+from utils.tracing import record_span, span
+
+
+class MicroBatcher:
+    """
+    backbone 1개 앞단의 동적 마이크로배치 큐
+
+    여러 세션이 동시에 extract_features_v2를 호출하면 각자 batch=1 forward를
+    N번 돌리게 된다. 대신 입력 텐서(1, C, H, W)를 큐에 넣고
+    - max_batch_size개가 모이거나
+    - 첫 입력 이후 max_wait_ms가 지나면
+    torch.cat 후 forward_fn을 한 번만 실행하고 결과 행을 호출자에게 나눠준다.
+    첫 입력을 꺼냈을 때 큐가 비어 있으면 (동시 호출자 없음) 기다리지 않고 바로 실행한다
+    → 호출자가 1명이면 지연이 늘지 않고, 동시 요청은 앞 forward가 도는 동안 큐에 쌓여 묶인다.
+
+    - forward_fn: (B, ...) 텐서 → (B, ...) numpy 배열 (inference_context() 안에서 호출됨)
+    - 입력 shape이 다르면 (예: 종횡비 유지 resize) shape별로 나눠서 실행
+    - 배치 실행 중 예외는 해당 배치의 모든 호출자에게 전달
+    - 트레이싱: submit 때 호출자 contextvars를 복사해 두고 forward는 첫 호출자
+      컨텍스트에서 실행, 모든 호출자 트레이스에 microbatch_<name> span을 남김
+    - fork 안전: 워커 스레드는 fork된 자식에 복제되지 않으므로
+      pid가 바뀌면 큐와 스레드를 새로 만든다 (backend/serve.py 프리포크)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        forward_fn: Callable[[torch.Tensor], np.ndarray],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Args:
+            name: backbone 이름 (로그/통계용)
+            forward_fn: 배치 forward 함수
+            max_batch_size: 최대 배치 크기
+            max_wait_ms: 첫 입력 이후 최대 대기 시간 (ms)
+        """
+        self.name = name
+        self.forward_fn = forward_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._thread_pid = None
+        self._thread_lock = threading.Lock()
+
+        # 통계
+        self.stats = {
+            'requests': 0,
+            'batches': 0,
+            'max_batch': 0,
+            'errors': 0
+        }
+
+    # --------------------------------------------------------
+    # 호출자 API
+    # --------------------------------------------------------
+    def submit(self, tensor: torch.Tensor) -> Future:
+        """입력 1개 (1, ...) 텐서 제출 → Future (결과: (...) numpy 배열)"""
+        self._ensure_worker()
+
+        future = Future()
+        self._queue.put((tensor, future, contextvars.copy_context()))
+        return future
+
+    def infer(self, tensor: torch.Tensor) -> np.ndarray:
+        """입력 1개 제출 후 결과 대기 (동기)"""
+        return self.submit(tensor).result()
+
+    # --------------------------------------------------------
+    # 워커
+    # --------------------------------------------------------
+    def _ensure_worker(self):
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid:
+            return
+        with self._thread_lock:
+            if self._thread is None or self._thread_pid != pid:
+                if self._thread_pid is not None and self._thread_pid != pid:
+                    # fork된 자식: 부모의 큐/스레드는 쓸 수 없음
+                    self._queue = queue.Queue()
+                self._thread_pid = pid
+                self._thread = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"microbatch-{self.name}",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> List:
+        """
+        첫 입력은 블로킹 대기, 이후 deadline까지 최대 max_batch_size개 수집
+
+        첫 입력 직후 큐가 비어 있으면 대기 없이 1개로 실행
+        """
+        items = [self._queue.get()]
+        if self._queue.empty():
+            return items
+
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    items.append(self._queue.get_nowait())
+                else:
+                    items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return items
+
+    def _worker_loop(self):
+        while True:
+            items = self._collect()
+
+            # shape별 그룹 (대부분 1그룹)
+            groups: Dict[tuple, List] = {}
+            for item in items:
+                groups.setdefault(tuple(item[0].shape[1:]), []).append(item)
+
+            for group in groups.values():
+                self._run_group(group)
+
+    def _run_group(self, group: List):
+        tensors = [tensor for tensor, _, _ in group]
+        futures = [future for _, future, _ in group]
+        contexts = [context for _, _, context in group]
+        span_name = f"microbatch_{self.name}"
+
+        start = time.perf_counter()
+        try:
+            batch = torch.cat(tensors, dim=0)
+            # forward_fn 안의 stage_timer span은 첫 호출자 트레이스에 들어감
+            outputs = contexts[0].run(self._forward, span_name, batch)
+        except Exception as e:
+            self.stats['errors'] += 1
+            for future in futures:
+                future.set_exception(e)
+            return
+        finally:
+            end = time.perf_counter()
+            for context in contexts[1:]:
+                context.run(record_span, span_name, start, end, batch=len(group))
+
+        self.stats['requests'] += len(group)
+        self.stats['batches'] += 1
+        self.stats['max_batch'] = max(self.stats['max_batch'], len(group))
+
+        for i, future in enumerate(futures):
+            future.set_result(outputs[i])
+
+    def _forward(self, span_name: str, batch: torch.Tensor) -> np.ndarray:
+        with span(span_name, batch=batch.shape[0]), inference_context():
+            return self.forward_fn(batch)
+
+    def get_stats(self) -> Dict:
+        """배치 통계 (평균 배치 크기 포함)"""
+        batches = self.stats['batches']
+        return {
+            'name': self.name,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            **self.stats,
+            'avg_batch': self.stats['requests'] / batches if batches > 0 else 0.0
+        }
@@ -4,11 +4,15 @@
 # ============================================================
 
 import os
+import functools
+import inspect
 import cv2
 import numpy as np
 import torch
 from PIL import Image
 import sys
+from collections.abc import Mapping
+from concurrent.futures import Future
 from pathlib import Path
 
 # Model cache
@@ -20,87 +24,368 @@ while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exist
 if str(VERSION3_DIR) not in sys.path:
     sys.path.append(str(VERSION3_DIR))
 from utils.model_cache import model_cache
+from utils.image_context import ImageContext, YOLO_POSE_OUTPUT, FACE_MESH_OUTPUT, DEPTH_MAP_OUTPUT
+from utils.metrics import stage_timer, timed
+from utils.log import get_logger
+from utils.torch_runtime import inference_context, to_channels_last
+from feature_extraction.batching import MicroBatcher
+from feature_extraction.onnx_backend import BACKEND, onnx_forward
 
-# 기존 모델
-import clip
-import open_clip
-from timm import create_model
-from timm.data import resolve_model_data_config
-from timm.data.transforms_factory import create_transform
-from transformers import DPTImageProcessor, DPTForDepthEstimation
+# 모델 패키지(clip, open_clip, timm, transformers, ultralytics, mediapipe)는
+# 각 브랜치 로더 안에서 import (모듈 import만으로 수 초씩 걸리지 않도록,
+# scripts/import_time_report.py 참고)
 
-# 통계
-from scipy.stats import skew, kurtosis
-from skimage.feature import local_binary_pattern
-
-# 🆕 YOLOv11-Pose
-from ultralytics import YOLO
-
-# 🆕 MediaPipe Face
-import mediapipe as mp
+logger = get_logger(__name__)
 
 # ------------------------------------------------------------
 # Device
 # ------------------------------------------------------------
 device = "cuda" if torch.cuda.is_available() else "cpu"
 
+# ------------------------------------------------------------
+# Micro-batching 설정 (환경변수)
+# ------------------------------------------------------------
+MICRO_BATCHING_ENABLED = os.environ.get("TRYANGLE_MICRO_BATCHING", "1") != "0"
+BATCH_MAX_SIZE = int(os.environ.get("TRYANGLE_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("TRYANGLE_BATCH_MAX_WAIT_MS", "5"))
+
+# ------------------------------------------------------------
+# MiDaS depth tier (환경변수)
+# - full:    DPT-Hybrid, 기본 입력 크기 (384x384)
+# - reduced: DPT-Hybrid, 입력 DEPTH_REDUCED_SIZE (가중치 동일, 정사각형, 패치 16의 배수)
+# - small:   MiDaS_small (torch.hub intel-isl/MiDaS, depth 스케일이 DPT와 다름)
+# 레퍼런스는 DEPTH_TIER, 실시간/사용자 프레임은 FRAME_DEPTH_TIER
+# 티어별 차이 측정: scripts/depth_tier_report.py
+# ------------------------------------------------------------
+DEPTH_TIERS = ("full", "reduced", "small")
+DEPTH_TIER = os.environ.get("TRYANGLE_DEPTH_TIER", "full")
+FRAME_DEPTH_TIER = os.environ.get("TRYANGLE_FRAME_DEPTH_TIER", DEPTH_TIER)
+DEPTH_REDUCED_SIZE = int(os.environ.get("TRYANGLE_DEPTH_REDUCED_SIZE", "256"))
+
+for _tier in (DEPTH_TIER, FRAME_DEPTH_TIER):
+    if _tier not in DEPTH_TIERS:
+        raise ValueError(f"❌ depth tier는 {DEPTH_TIERS} 중 하나여야 합니다: {_tier}")
+
+# DPT-Hybrid 패치 크기 (위치 임베딩 격자 = 입력 / 16)
+DPT_PATCH_SIZE = 16
+if DEPTH_REDUCED_SIZE <= 0 or DEPTH_REDUCED_SIZE % DPT_PATCH_SIZE != 0:
+    raise ValueError(f"❌ TRYANGLE_DEPTH_REDUCED_SIZE는 {DPT_PATCH_SIZE}의 배수여야 합니다: {DEPTH_REDUCED_SIZE}")
+
+# 티어 → backbone 이름 (= 마이크로배치 큐 / 지연 메트릭 / 특징 캐시 키)
+DEPTH_TIER_BACKBONES = {"full": "midas", "reduced": "midas_reduced", "small": "midas_small"}
+
 # ------------------------------------------------------------
 # Model Loader (Singleton with cache)
 # ------------------------------------------------------------
-def load_models():
-    """전체 모델 로드 (v2) - 싱글톤 캐싱"""
+YOLO_POSE_WEIGHTS = VERSION3_DIR / "yolo11s-pose.pt"
+
 
-    def _load_all_models():
-        print("🔧 Loading AI backbone models...")
+def _load_yolo_pose():
+    """
+    YOLOv11s-Pose (포즈 특징 15D용)
 
-        # ---- CLIP ----
-        clip_model, clip_preprocess = clip.load("ViT-B/32", device=device)
+    PoseAnalyzer와 같은 model_cache 키("yolo_pose")를 써서 인스턴스 1개를 공유한다
+    (같은 모델이면 이미지별 추론 결과도 ImageContext.model_output으로 공유)
+    """
+    def _load():
+        from ultralytics import YOLO
+
+        weights = YOLO_POSE_WEIGHTS if YOLO_POSE_WEIGHTS.exists() else YOLO_POSE_WEIGHTS.name
+        return YOLO(str(weights))
+
+    return model_cache.get_or_load("yolo_pose", _load)
+
+
+def _create_face_mesh():
+    """MediaPipe Face Mesh (얼굴 특징 7D용, 설정은 FACE_MESH_OUTPUT 키 주석과 동일)"""
+    import mediapipe as mp
+
+    return mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=True,
+        max_num_faces=1,
+        refine_landmarks=True,
+        min_detection_confidence=0.5
+    )
+
+
+def _load_clip():
+    import clip
+
+    clip_model, clip_preprocess = clip.load("ViT-B/32", device=device)
+    return {"clip_model": clip_model, "clip_preprocess": clip_preprocess}
+
+
+def _load_openclip():
+    import open_clip
+
+    openclip_model, _, openclip_preprocess = open_clip.create_model_and_transforms(
+        'ViT-B-32', pretrained='laion2b_s34b_b79k', device=device
+    )
+    return {
+        "openclip_model": openclip_model,
+        "openclip_preprocess": openclip_preprocess,
+        "openclip_tokenizer": open_clip.get_tokenizer('ViT-B-32'),
+    }
+
+
+def _load_dino():
+    from timm import create_model
+    from timm.data import resolve_model_data_config
+    from timm.data.transforms_factory import create_transform
+
+    dino = create_model("vit_small_patch14_dinov2.lvd142m", pretrained=True).eval().to(device)
+    dino_cfg = resolve_model_data_config(dino)
+    return {"dino_model": dino, "dino_tf": create_transform(**dino_cfg)}
 
-        # ---- OpenCLIP ----
-        openclip_model, _, openclip_preprocess = open_clip.create_model_and_transforms(
-            'ViT-B-32', pretrained='laion2b_s34b_b79k', device=device
-        )
-        openclip_tokenizer = open_clip.get_tokenizer('ViT-B-32')
-
-        # ---- DINOv2 ----
-        dino = create_model("vit_small_patch14_dinov2.lvd142m", pretrained=True).eval().to(device)
-        dino_cfg = resolve_model_data_config(dino)
-        dino_tf = create_transform(**dino_cfg)
-
-        # ---- MiDaS (Depth) ----
-        midas_processor = DPTImageProcessor.from_pretrained("Intel/dpt-hybrid-midas")
-        midas_model = DPTForDepthEstimation.from_pretrained("Intel/dpt-hybrid-midas").to(device).eval()
-
-        # ---- 🆕 YOLOv11-Pose ----
-        yolo_pose = YOLO("yolo11s-pose.pt")  # YOLOv11s-Pose 모델
-
-        # ---- 🆕 MediaPipe Face Mesh ----
-        mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
-            static_image_mode=True,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5
-        )
 
-        _models = {
-            "clip_model": clip_model,
-            "clip_preprocess": clip_preprocess,
-            "openclip_model": openclip_model,
-            "openclip_preprocess": openclip_preprocess,
-            "openclip_tokenizer": openclip_tokenizer,
-            "dino_model": dino,
-            "dino_tf": dino_tf,
-            "midas_processor": midas_processor,
-            "midas_model": midas_model,
-            "yolo_pose": yolo_pose,
-            "mp_face_mesh": mp_face_mesh,
+def _allow_reduced_input(midas_model):
+    """
+    reduced 티어용: DPT-Hybrid 임베딩이 384가 아닌 입력도 받도록
+
+    DPTViTHybridEmbeddings.forward는 interpolate_pos_encoding=False면 입력이
+    config.image_size(384)와 다를 때 ValueError를 내는데, DPTModel.forward가
+    이 인자를 넘겨주지 않는다. 임베딩 모듈 인스턴스의 forward에 True를 고정한다.
+    위치 임베딩은 원래도 항상 입력 패치 격자 크기로 _resize_pos_embed 되므로
+    384 입력(full 티어)의 결과는 그대로다.
+    """
+    embeddings = midas_model.dpt.embeddings
+    if "interpolate_pos_encoding" not in inspect.signature(embeddings.forward).parameters:
+        logger.warning("transformers DPT embeddings has no interpolate_pos_encoding, depth tier 'reduced' unavailable")
+        return
+    embeddings.forward = functools.partial(embeddings.forward, interpolate_pos_encoding=True)
+
+
+def _load_midas():
+    from transformers import DPTImageProcessor, DPTForDepthEstimation
+
+    midas_model = DPTForDepthEstimation.from_pretrained("Intel/dpt-hybrid-midas").to(device).eval()
+    _allow_reduced_input(midas_model)
+    return {
+        "midas_processor": DPTImageProcessor.from_pretrained("Intel/dpt-hybrid-midas"),
+        "midas_model": midas_model,
+    }
+
+
+def _load_midas_small():
+    """MiDaS_small (depth tier "small")"""
+    model = torch.hub.load("intel-isl/MiDaS", "MiDaS_small").to(device).eval()
+    midas_transforms = torch.hub.load("intel-isl/MiDaS", "transforms")
+    return {"midas_small_model": model, "midas_small_transform": midas_transforms.small_transform}
+
+
+# 브랜치 → (로더, 로더가 돌려주는 모델 키). 브랜치마다 model_cache 항목 1개 ("feature_<branch>")
+_MODEL_LOADERS = {
+    "clip": (_load_clip, ("clip_model", "clip_preprocess")),
+    "openclip": (_load_openclip, ("openclip_model", "openclip_preprocess", "openclip_tokenizer")),
+    "dino": (_load_dino, ("dino_model", "dino_tf")),
+    "midas": (_load_midas, ("midas_processor", "midas_model")),
+    "midas_small": (_load_midas_small, ("midas_small_model", "midas_small_transform")),
+    "yolo_pose": (lambda: {"yolo_pose": _load_yolo_pose()}, ("yolo_pose",)),
+    "face": (lambda: {"mp_face_mesh": _create_face_mesh()}, ("mp_face_mesh",)),
+}
+_MODEL_BRANCH = {key: branch for branch, (_, keys) in _MODEL_LOADERS.items() for key in keys}
+
+
+class LazyModels(Mapping):
+    """
+    load_models() 결과 (dict처럼 사용)
+
+    models["clip_model"]처럼 키를 처음 읽을 때 그 브랜치 모델만 로드한다.
+    포즈만 쓰는 프로세스는 CLIP/OpenCLIP/DINO/MiDaS를 로드하지 않는다.
+    로드 시간은 model_cache.load_times()에 브랜치별로 남는다.
+    """
+
+    def __getitem__(self, key):
+        branch = _MODEL_BRANCH[key]
+        loader, _ = _MODEL_LOADERS[branch]
+        return model_cache.get_or_load(f"feature_{branch}", loader)[key]
+
+    def __iter__(self):
+        return iter(_MODEL_BRANCH)
+
+    def __len__(self):
+        return len(_MODEL_BRANCH)
+
+    def preload(self, branches=None, exclude=()):
+        """지정 브랜치(None이면 설정된 depth tier에 필요한 것까지 전체) 모델을 미리 로드 (워밍업 / fork 전 공유용)"""
+        for branch in (_default_preload() if branches is None else branches):
+            if branch in exclude:
+                continue
+            loader, _ = _MODEL_LOADERS[branch]
+            model_cache.get_or_load(f"feature_{branch}", loader)
+        return self
+
+
+def _default_preload():
+    """preload(None) 대상: depth 모델은 DEPTH_TIER / FRAME_DEPTH_TIER가 쓰는 것만"""
+    tiers = {DEPTH_TIER, FRAME_DEPTH_TIER}
+    depth = []
+    if tiers & {"full", "reduced"}:
+        depth.append("midas")
+    if "small" in tiers:
+        depth.append("midas_small")
+    return [branch for branch in _MODEL_LOADERS if branch not in ("midas", "midas_small")] + depth
+
+
+_lazy_models = LazyModels()
+
+
+def load_models(preload=(), exclude=()):
+    """
+    v2 모델 접근자 (브랜치별 lazy 로딩, 싱글톤 캐싱)
+
+    Args:
+        preload: 바로 로드할 브랜치 목록 (None이면 전체, 기본은 아무것도 안 함)
+        exclude: preload에서 뺄 브랜치 (예: fork 전에 만들면 안 되는 "face")
+
+    Returns:
+        LazyModels: models["clip_model"] 등 기존 dict 키 그대로 사용
+    """
+    if preload is None or preload:
+        _lazy_models.preload(preload, exclude)
+    return _lazy_models
+
+
+# ============================================================
+# 🆕 Backbone batch forward (B, ...) → numpy (B, ...)
+# ============================================================
+def _dino_cls_token(feats):
+    """DINOv2 forward_features 출력 → CLS 토큰 (B, 384)"""
+    if isinstance(feats, dict):
+        if "x_norm_clstoken" in feats:
+            dino_token = feats["x_norm_clstoken"]  # (B, 384)
+        elif "pool" in feats:
+            dino_token = feats["pool"]  # (B, 384)
+        else:
+            raise ValueError("❌ DINO dict에서 토큰을 찾을 수 없음.")
+    elif isinstance(feats, torch.Tensor):
+        # Tensor 형태인 경우
+        if feats.ndim == 3:
+            # (B, num_patches, 384) 형태
+            # CLS token은 첫 번째 토큰
+            dino_token = feats[:, 0, :]  # (B, 384)
+        elif feats.ndim == 2:
+            # (B, 384) 형태 - 이미 CLS token
+            dino_token = feats
+        else:
+            raise ValueError(f"❌ DINO tensor 차원 오류: {feats.shape}")
+
+        # 최종 shape 확인
+        if dino_token.shape[-1] != 384:
+            raise ValueError(f"❌ DINO token shape mismatch: {dino_token.shape}, expected (B, 384)")
+    else:
+        raise ValueError("❌ DINO 출력 형식이 완전히 다릅니다.")
+
+    return dino_token
+
+
+def _backbone_forwards(models, backend=None):
+    """
+    backbone별 배치 forward 함수 (inference_context() 안에서 호출)
+
+    Args:
+        backend: "torch" | "onnx" (None이면 TRYANGLE_BACKEND).
+                 onnx면 같은 전처리 입력을 onnxruntime 세션으로 실행 (onnx_backend.py)
+
+    지연 메트릭은 forward 1회(= 마이크로배치 1개) 단위로 기록 (stage: feature_<backbone>)
+    """
+    backend = BACKEND if backend is None else backend
+
+    def clip_forward(batch):
+        feat = models["clip_model"].encode_image(batch)
+        return (feat / feat.norm(dim=-1, keepdim=True)).cpu().numpy().astype(np.float32)
+
+    def openclip_forward(batch):
+        feat = models["openclip_model"].encode_image(batch)
+        return (feat / feat.norm(dim=-1, keepdim=True)).cpu().numpy().astype(np.float32)
+
+    def dino_forward(batch):
+        dino_token = _dino_cls_token(models["dino_model"].forward_features(batch))
+        dino_token = dino_token / (dino_token.norm(dim=-1, keepdim=True) + 1e-8)
+        return dino_token.cpu().numpy().astype(np.float32)
+
+    def midas_forward(batch):
+        depth = models["midas_model"](to_channels_last("feature_midas", batch)).predicted_depth  # (B, H, W)
+        return depth.cpu().numpy()
+
+    def midas_small_forward(batch):
+        depth = models["midas_small_model"](to_channels_last("feature_midas_small", batch))  # (B, H, W)
+        return depth.cpu().numpy()
+
+    forwards = {
+        "clip": clip_forward,
+        "openclip": openclip_forward,
+        "dino": dino_forward,
+        "midas": midas_forward,
+        "midas_reduced": midas_forward,
+        "midas_small": midas_small_forward,
+    }
+
+    if backend == "onnx":
+        # MiDaS_small은 내보내지 않으므로 torch 그대로
+        # (midas / midas_reduced는 입력 크기가 달라 그래프가 따로 있음)
+        forwards.update({
+            name: onnx_forward(name) for name in ("clip", "openclip", "dino", "midas", "midas_reduced")
+        })
+
+    return {name: timed(f"feature_{name}")(fn) for name, fn in forwards.items()}
+
+
+def preprocess_backbone_input(name, ctx, models):
+    """
+    backbone 입력 전처리 → (1, ...) 텐서 (device)
+
+    단일 추출(extract_features_v2)과 배치 추출(batch_extractor)이 같은 전처리를 쓰도록 공유
+    """
+    if name == "clip":
+        return models["clip_preprocess"](ctx.pil).unsqueeze(0).to(device)
+    if name == "openclip":
+        return models["openclip_preprocess"](ctx.pil).unsqueeze(0).to(device)
+    if name == "dino":
+        return models["dino_tf"](ctx.pil).unsqueeze(0).to(device)
+    if name == "midas":
+        return models["midas_processor"](images=ctx.pil, return_tensors="pt").to(device)["pixel_values"]
+    if name == "midas_reduced":
+        # 정사각형 고정 (DPT-Hybrid reassemble은 토큰 수의 제곱근으로 격자를 복원)
+        size = {"height": DEPTH_REDUCED_SIZE, "width": DEPTH_REDUCED_SIZE}
+        return models["midas_processor"](
+            images=ctx.pil, size=size, keep_aspect_ratio=False, return_tensors="pt"
+        ).to(device)["pixel_values"]
+    if name == "midas_small":
+        return models["midas_small_transform"](ctx.rgb).to(device)
+    raise ValueError(f"❌ 알 수 없는 backbone: {name}")
+
+
+def get_batchers():
+    """backbone별 MicroBatcher (싱글톤)"""
+
+    def _create_batchers():
+        forwards = _backbone_forwards(load_models())
+        return {
+            name: MicroBatcher(name, fn, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
+            for name, fn in forwards.items()
         }
 
-        print("✅ Backbone models loaded")
-        return _models
+    return model_cache.get_or_load("feature_extractor_batchers", _create_batchers)
+
 
-    # 싱글톤 캐시에서 가져오기
-    return model_cache.get_or_load("feature_extractor_models", _load_all_models)
+def _submit_backbone(name, tensor):
+    """
+    전처리된 입력 1개 (1, ...) 제출 → Future (결과: backbone 출력 (...))
+
+    MICRO_BATCHING_ENABLED면 동시 요청과 묶어서 한 번에 forward,
+    아니면 바로 batch=1로 실행한 완료된 Future
+    """
+    if MICRO_BATCHING_ENABLED:
+        return get_batchers()[name].submit(tensor)
+
+    future = Future()
+    try:
+        with inference_context():
+            future.set_result(_backbone_forwards(load_models())[name](tensor)[0])
+    except Exception as e:
+        future.set_exception(e)
+    return future
 
 
 # ============================================================
@@ -168,86 +453,61 @@ def extract_midas_extended(depth_map):
 # ============================================================
 # 🆕 Color 확장 (150D)
 # ============================================================
-def extract_color_extended(img_bgr):
+COLOR_FEATURE_SIZE = (256, 256)
+
+
+def extract_color_extended(image):
     """
     확장된 색감 특징 추출 (150D)
+
+    Args:
+        image: ImageContext 또는 BGR ndarray
+               (256x256 기준 통계는 ImageContext.stats로 한 번만 계산, utils/image_stats.py)
     """
-    img = cv2.resize(img_bgr, (256, 256))
-    img_hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-    img_lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    stats = ImageContext.ensure(image).stats(COLOR_FEATURE_SIZE)
 
     feats = []
 
     # ---- 기존 (119D) ----
     
-    # HSV histogram (96D)
-    for channel in cv2.split(img_hsv):
-        hist = cv2.calcHist([channel], [0], None, [32], [0, 256]).flatten()
+    # HSV histogram (96D) - 256 bin 히스토그램을 32 bin으로 묶음
+    for hist in stats.hsv_hist:
+        hist = hist.reshape(32, 8).sum(axis=1)
         hist = hist / (hist.sum() + 1e-6)
         feats.extend(hist)
 
-    # LAB stats (12D)
-    for channel in cv2.split(img_lab):
-        flat = channel.flatten()
-        feats.extend([flat.mean(), flat.std(), skew(flat), kurtosis(flat)])
+    # LAB stats (12D) - mean, std, skew, kurtosis
+    for moments in stats.lab_moments:
+        feats.extend(moments)
 
     # LBP texture (10D)
-    lbp = local_binary_pattern(gray, P=8, R=1, method='uniform')
-    lbp_hist, _ = np.histogram(lbp.ravel(), bins=10, range=(0, 10))
+    lbp_hist = stats.lbp_hist
     lbp_hist = lbp_hist / (lbp_hist.sum() + 1e-6)
     feats.extend(lbp_hist)
 
-    # Edge density (1D)
-    edges = cv2.Canny(gray, 50, 150)
-    edge_density = edges.sum() / edges.size
+    # Edge density (1D) - Canny 출력(0/255) 합 / 픽셀 수 (학습 특징과 같은 스케일)
+    edge_density = stats.edge_ratio * 255.0
     feats.append(edge_density)
 
     # ---- 🆕 추가 (31D) ----
     
-    # Hue Distribution (7D) - 쿨톤/웜톤 판단!
-    h_channel = img_hsv[:, :, 0]
-    hue_ranges = {
-        'red': ((0, 15), (165, 180)),    # 빨강
-        'orange': (15, 30),              # 주황
-        'yellow': (30, 60),              # 노랑
-        'green': (60, 90),               # 초록
-        'cyan': (90, 120),               # 청록
-        'blue': (120, 150),              # 파랑
-        'purple': (150, 165),            # 보라
-    }
-    
-    for key, ranges in hue_ranges.items():
-        if isinstance(ranges, tuple) and len(ranges) == 2 and isinstance(ranges[0], tuple):
-            # Red (wrap around)
-            mask1 = (h_channel >= ranges[0][0]) & (h_channel < ranges[0][1])
-            mask2 = (h_channel >= ranges[1][0]) & (h_channel < ranges[1][1])
-            ratio = float((np.sum(mask1) + np.sum(mask2)) / h_channel.size)
-        else:
-            mask = (h_channel >= ranges[0]) & (h_channel < ranges[1])
-            ratio = float(np.sum(mask) / h_channel.size)
-        feats.append(ratio)
+    # Hue Distribution (7D) - 쿨톤/웜톤 판단! (red/orange/yellow/green/cyan/blue/purple)
+    feats.extend(stats.hue_ratios)
     
     # Brightness Histogram (16D)
-    brightness_hist, _ = np.histogram(gray.ravel(), bins=16, range=(0, 256))
+    brightness_hist = stats.gray_hist.reshape(16, 16).sum(axis=1)
     brightness_hist = brightness_hist / (brightness_hist.sum() + 1e-6)
     feats.extend(brightness_hist)
     
     # Contrast (1D)
-    contrast = float(np.std(gray) / 128.0)
+    contrast = stats.gray_std / 128.0
     feats.append(contrast)
     
     # Sharpness (1D) - Laplacian variance
-    laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-    sharpness = float(laplacian.var())
-    feats.append(sharpness)
+    feats.append(stats.laplacian_var)
     
-    # Dominant Colors (6D) - K-Means로 주요 색 2개 추출
-    pixels = img.reshape(-1, 3).astype(np.float32)
-    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
-    _, _, centers = cv2.kmeans(pixels, 2, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
-    
-    dominant_colors = centers.flatten() / 255.0  # Normalize to 0-1
+    # Dominant Colors (6D) - K-Means로 주요 색 2개 추출 (샘플링)
+    dominant_colors = stats.dominant_colors(k=2).flatten() / 255.0  # Normalize to 0-1
     feats.extend(dominant_colors)
 
     return np.array(feats, dtype=np.float32)
@@ -256,14 +516,24 @@ def extract_color_extended(img_bgr):
 # ============================================================
 # 🆕 YOLOv11-Pose 특징 (15D)
 # ============================================================
-def extract_yolo_pose_features(image_path, yolo_model):
+def extract_yolo_pose_features(image, yolo_model):
     """
     YOLOv11-Pose로 포즈 특징 추출 (15D)
+
+    Args:
+        image: 이미지 경로 또는 ImageContext
     
     Returns:
         numpy array (15,)
     """
-    results = yolo_model.predict(image_path, verbose=False)
+    ctx = ImageContext.ensure(image)
+    # PoseAnalyzer가 같은 이미지에 이미 돌렸으면 그 결과 재사용 (반대도 마찬가지)
+    def _predict():
+        # 풀 스레드들이 공유하는 인스턴스 (predictor 상태가 재진입 불가)
+        with model_cache.inference_lock("yolo_pose"):
+            return yolo_model.predict(ctx.bgr, verbose=False)
+
+    results = ctx.model_output((YOLO_POSE_OUTPUT, id(yolo_model)), _predict)
     
     if len(results) == 0 or results[0].keypoints is None or len(results[0].keypoints) == 0:
         # 사람 검출 실패
@@ -361,21 +631,28 @@ def extract_yolo_pose_features(image_path, yolo_model):
 # ============================================================
 # 🆕 MediaPipe Face 특징 (7D)
 # ============================================================
-def extract_face_features(image_path, face_mesh):
+def extract_face_features(image, face_mesh):
     """
     MediaPipe Face Mesh로 얼굴 각도 추출 (7D)
+
+    Args:
+        image: 이미지 경로 또는 ImageContext
     
     Returns:
         numpy array (7,)
     """
-    img = cv2.imread(image_path)
-    if img is None:
+    try:
+        ctx = ImageContext.ensure(image)
+    except (FileNotFoundError, ValueError):
         return np.zeros(7, dtype=np.float32)
     
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    h, w, _ = img.shape
-    
-    results = face_mesh.process(img_rgb)
+    # PoseAnalyzer(얼굴 클로즈업)와 FaceMesh 결과 공유
+    def _process():
+        # model_cache "feature_face" 인스턴스 공유 (MediaPipe 그래프는 재진입 불가)
+        with model_cache.inference_lock("feature_face"):
+            return face_mesh.process(ctx.rgb)
+
+    results = ctx.model_output(FACE_MESH_OUTPUT, _process)
     
     if not results.multi_face_landmarks:
         # 얼굴 검출 실패
@@ -440,12 +717,24 @@ def extract_face_features(image_path, face_mesh):
 # ============================================================
 # 🎯 Main Feature Extractor v2
 # ============================================================
-def extract_features_v2(image_path):
+FEATURE_BRANCHES = ("clip", "openclip", "dino", "midas", "color", "yolo_pose", "face")
+
+
+@timed("feature_extraction")
+def extract_features_v2(image, branches=None, depth_tier=None):
     """
-    이미지 1장에서 모든 특징 추출 (v2)
+    이미지 1장에서 특징 추출 (v2)
+
+    Args:
+        image: 이미지 경로, 인코딩된 bytes, BGR ndarray 또는 ImageContext
+               (디코드는 한 번만 수행하고 모든 브랜치가 공유)
+        branches: 추출할 브랜치 집합 (None이면 전체).
+                  요청하지 않은 backbone은 전처리/forward 모두 건너뜀
+        depth_tier: midas 브랜치의 depth 모델 티어 (DEPTH_TIERS, None이면 DEPTH_TIER).
+                    어느 티어든 midas 특징은 같은 20D 형식
     
     Returns:
-        dict with keys:
+        dict with keys (요청한 브랜치만):
         - clip: (512,)
         - openclip: (512,)
         - dino: (384,)
@@ -454,102 +743,86 @@ def extract_features_v2(image_path):
         - yolo_pose: (15,)
         - face: (7,)
     """
+    branches = set(FEATURE_BRANCHES) if branches is None else set(branches)
+    unknown = branches - set(FEATURE_BRANCHES)
+    if unknown:
+        raise ValueError(f"❌ 알 수 없는 feature 브랜치: {sorted(unknown)}")
+
+    depth_tier = DEPTH_TIER if depth_tier is None else depth_tier
+    if depth_tier not in DEPTH_TIERS:
+        raise ValueError(f"❌ 알 수 없는 depth tier: {depth_tier}")
+
     models = load_models()
 
     try:
-        img_pil = Image.open(image_path).convert("RGB")
+        ctx = ImageContext.ensure(image)
     except Exception as e:
-        print(f"[❌] 이미지 로드 실패: {image_path} : {e}")
+        logger.error("image load failed image=%s: %s", image if isinstance(image, (str, Path)) else type(image).__name__, e)
         return None
 
-    img_bgr = cv2.imread(image_path)
+    result = {}
+    futures = {}
+
+    # backbone 입력을 모두 전처리해서 마이크로배치 큐에 먼저 제출하고
+    # 결과는 나중에 모은다 (동시 요청과 묶여 backbone별 forward 1회)
 
     # --------------------------------------------------------
     # 1) CLIP
     # --------------------------------------------------------
-    clip_in = models["clip_preprocess"](img_pil).unsqueeze(0).to(device)
-    with torch.no_grad():
-        clip_feat = models["clip_model"].encode_image(clip_in)
-        clip_feat = (clip_feat / clip_feat.norm(dim=-1, keepdim=True)).cpu().numpy().astype(np.float32).flatten()
+    if "clip" in branches:
+        futures["clip"] = _submit_backbone("clip", preprocess_backbone_input("clip", ctx, models))
 
     # --------------------------------------------------------
     # 2) OpenCLIP
     # --------------------------------------------------------
-    openclip_in = models["openclip_preprocess"](img_pil).unsqueeze(0).to(device)
-    with torch.no_grad():
-        openclip_feat = models["openclip_model"].encode_image(openclip_in)
-        openclip_feat = (openclip_feat / openclip_feat.norm(dim=-1, keepdim=True)).cpu().numpy().astype(np.float32).flatten()
+    if "openclip" in branches:
+        futures["openclip"] = _submit_backbone("openclip", preprocess_backbone_input("openclip", ctx, models))
 
     # --------------------------------------------------------
     # 3) DINOv2
     # --------------------------------------------------------
-    dino_in = models["dino_tf"](img_pil).unsqueeze(0).to(device)
-    with torch.no_grad():
-        feats = models["dino_model"].forward_features(dino_in)
-        
-        if isinstance(feats, dict):
-            if "x_norm_clstoken" in feats:
-                dino_token = feats["x_norm_clstoken"]  # (1, 384)
-            elif "pool" in feats:
-                dino_token = feats["pool"]  # (1, 384)
-            else:
-                raise ValueError("❌ DINO dict에서 토큰을 찾을 수 없음.")
-        elif isinstance(feats, torch.Tensor):
-            # Tensor 형태인 경우
-            if feats.ndim == 3:
-                # (1, num_patches, 384) 형태
-                # CLS token은 첫 번째 토큰
-                dino_token = feats[:, 0, :]  # (1, 384)
-            elif feats.ndim == 2:
-                # (1, 384) 형태 - 이미 CLS token
-                dino_token = feats
-            else:
-                raise ValueError(f"❌ DINO tensor 차원 오류: {feats.shape}")
-            
-            # 최종 shape 확인
-            if dino_token.shape[-1] != 384:
-                raise ValueError(f"❌ DINO token shape mismatch: {dino_token.shape}, expected (1, 384)")
-        else:
-            raise ValueError("❌ DINO 출력 형식이 완전히 다릅니다.")
-
-        # Normalize
-        dino_token = dino_token / (dino_token.norm(dim=-1, keepdim=True) + 1e-8)
-        dino_feat = dino_token.squeeze().cpu().numpy().astype(np.float32)  # (384,)
+    if "dino" in branches:
+        futures["dino"] = _submit_backbone("dino", preprocess_backbone_input("dino", ctx, models))
 
     # --------------------------------------------------------
     # 4) MiDaS Depth (확장)
     # --------------------------------------------------------
-    inputs = models["midas_processor"](images=img_pil, return_tensors="pt").to(device)
-    with torch.no_grad():
-        depth = models["midas_model"](inputs["pixel_values"]).predicted_depth
-    
-    depth_map = depth.squeeze().cpu().numpy()
-    midas_feat = extract_midas_extended(depth_map)
+    if "midas" in branches:
+        depth_backbone = DEPTH_TIER_BACKBONES[depth_tier]
+        futures["midas"] = _submit_backbone(depth_backbone, preprocess_backbone_input(depth_backbone, ctx, models))
+
+    # clip/openclip (512,), dino (384,), midas depth map (H, W)
+    for name, future in futures.items():
+        result[name] = future.result()
+
+    if "midas" in result:
+        # depth map은 20D 통계로 줄이기 전에 보관 (LightingAnalyzer 역광 검출에서 사용)
+        ctx.set_model_output(DEPTH_MAP_OUTPUT, result["midas"])
+        with stage_timer("feature_midas_stats"):
+            result["midas"] = extract_midas_extended(result["midas"])
 
     # --------------------------------------------------------
     # 5) Color + Texture (확장)
     # --------------------------------------------------------
-    color_feat = extract_color_extended(img_bgr)
+    if "color" in branches:
+        with stage_timer("feature_color"):
+            result["color"] = extract_color_extended(ctx)
 
     # --------------------------------------------------------
     # 6) 🆕 YOLOv11-Pose
     # --------------------------------------------------------
-    yolo_pose_feat = extract_yolo_pose_features(image_path, models["yolo_pose"])
+    if "yolo_pose" in branches:
+        with stage_timer("feature_yolo_pose"):
+            result["yolo_pose"] = extract_yolo_pose_features(ctx, models["yolo_pose"])
 
     # --------------------------------------------------------
     # 7) 🆕 MediaPipe Face
     # --------------------------------------------------------
-    face_feat = extract_face_features(image_path, models["mp_face_mesh"])
+    if "face" in branches:
+        with stage_timer("feature_face"):
+            result["face"] = extract_face_features(ctx, models["mp_face_mesh"])
 
-    return {
-        "clip": clip_feat,
-        "openclip": openclip_feat,
-        "dino": dino_feat,
-        "midas": midas_feat,
-        "color": color_feat,
-        "yolo_pose": yolo_pose_feat,
-        "face": face_feat,
-    }
+    return {name: result[name] for name in FEATURE_BRANCHES if name in result}
 
 
 # ============================================================
@@ -24,6 +24,8 @@ if str(VERSION3_DIR) not in sys.path:
 
 from contrastive.contrastive_model import create_contrastive_model
 from utils.model_cache import model_cache
+from utils.torch_runtime import inference_context, to_channels_last
+from feature_extraction.onnx_backend import onnx_enabled, onnx_forward
 
 # v2와의 호환성을 위해 import
 try:
@@ -119,12 +121,15 @@ def extract_contrastive_features(image_path: str) -> np.ndarray:
     img = Image.open(image_path).convert('RGB')
     img_tensor = transform(img).unsqueeze(0).to(device)
 
-    # 특징 추출
-    with torch.no_grad():
-        embedding = model.get_embeddings(img_tensor)
+    # 특징 추출 (TRYANGLE_BACKEND=onnx면 onnxruntime, 전처리는 동일)
+    if onnx_enabled():
+        embedding = onnx_forward("contrastive")(img_tensor).flatten()
+    else:
+        with inference_context():
+            embedding = model.get_embeddings(to_channels_last("contrastive_model", img_tensor))
 
-    # NumPy로 변환
-    embedding = embedding.cpu().numpy().flatten()
+        # NumPy로 변환
+        embedding = embedding.cpu().numpy().flatten()
 
     return embedding
 
@@ -0,0 +1,252 @@
+# ============================================================
+# ⚡ ONNX Runtime Backend
+# CLIP / OpenCLIP / DINOv2 / MiDaS / Contrastive ResNet50 forward를
+# torch eager 대신 onnxruntime으로 실행 (CPU 노드용)
+# ============================================================
+#
+# 1) 내보내기 (torch 모델 → ONNX, 선택적으로 동적 INT8 양자화):
+#      python scripts/export_onnx.py
+#
+# 2) 서버/스크립트 실행 시 backend 선택:
+#      TRYANGLE_BACKEND=onnx python main.py
+#
+# 3) torch 대비 특징 cosine / 클러스터 일치율 확인:
+#      python scripts/check_onnx_parity.py
+#
+# 전처리(리사이즈/정규화)는 torch 경로와 같은 함수를 그대로 쓰고,
+# forward만 onnxruntime 세션으로 바꾼다. 출력도 torch forward와 같은 값
+# (L2 정규화된 임베딩 / depth map)이 되도록 후처리까지 그래프에 포함해서 내보낸다.
+#
+# 환경변수 (기본값):
+#   TRYANGLE_BACKEND        torch | onnx (torch)
+#   TRYANGLE_ONNX_INT8      "1"이면 동적 INT8 양자화 모델 사용 (0)
+#   TRYANGLE_ONNX_DIR       ONNX 파일 위치 (models/onnx)
+#   TRYANGLE_ONNX_THREADS   세션별 intra-op 스레드 수 (0 = onnxruntime 기본값)
+
+import os
+from importlib.util import find_spec
+from pathlib import Path
+
+import numpy as np
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+
+from utils.model_cache import model_cache
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+BACKENDS = ("torch", "onnx")
+BACKEND = os.environ.get("TRYANGLE_BACKEND", "torch").lower()
+ONNX_INT8 = os.environ.get("TRYANGLE_ONNX_INT8", "0") == "1"
+ONNX_DIR = Path(os.environ.get("TRYANGLE_ONNX_DIR", str(VERSION3_DIR / "models" / "onnx")))
+ONNX_THREADS = int(os.environ.get("TRYANGLE_ONNX_THREADS", "0"))
+ONNX_OPSET = 17
+
+if BACKEND not in BACKENDS:
+    raise ValueError(f"❌ TRYANGLE_BACKEND는 {BACKENDS} 중 하나여야 합니다: {BACKEND}")
+
+ONNXRUNTIME_AVAILABLE = find_spec("onnxruntime") is not None
+
+# 내보내는 모델 (feature_extractor_v2 backbone + v3 contrastive)
+# ONNX 그래프는 입력 H/W가 고정이라 MiDaS depth tier마다 따로 내보낸다 (midas 384 / midas_reduced)
+ONNX_MODELS = ("clip", "openclip", "dino", "midas", "midas_reduced", "contrastive")
+
+
+def onnx_enabled() -> bool:
+    return BACKEND == "onnx"
+
+
+def onnx_path(name: str, int8: bool = None) -> Path:
+    """모델 이름 → ONNX 파일 경로 (INT8이면 <name>.int8.onnx)"""
+    int8 = ONNX_INT8 if int8 is None else int8
+    return ONNX_DIR / (f"{name}.int8.onnx" if int8 else f"{name}.onnx")
+
+
+# ============================================================
+# 세션 로드 / forward
+# ============================================================
+def _create_session(path: Path):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if ONNX_THREADS > 0:
+        options.intra_op_num_threads = ONNX_THREADS
+
+    providers = [
+        provider for provider in ("CUDAExecutionProvider", "CPUExecutionProvider")
+        if provider in ort.get_available_providers()
+    ]
+    return ort.InferenceSession(str(path), sess_options=options, providers=providers)
+
+
+def load_session(name: str, int8: bool = None):
+    """onnxruntime 세션 (model_cache 키 "onnx_<name>" / "onnx_<name>_int8")"""
+    int8 = ONNX_INT8 if int8 is None else int8
+    path = onnx_path(name, int8)
+
+    def _load():
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("❌ onnxruntime이 설치되어 있지 않습니다 (pip install onnxruntime)")
+        if not path.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found: {path}\n"
+                f"Export first: python scripts/export_onnx.py"
+            )
+        return _create_session(path)
+
+    return model_cache.get_or_load(f"onnx_{name}_int8" if int8 else f"onnx_{name}", _load)
+
+
+def onnx_forward(name: str, int8: bool = None):
+    """
+    torch forward와 같은 입출력 규약의 배치 forward 함수
+
+    입력: 전처리된 (B, ...) torch 텐서 또는 ndarray
+    출력: (B, ...) float32 ndarray
+
+    세션은 첫 호출 때 로드 (파일이 없는 브랜치는 그 브랜치 호출만 실패)
+    """
+
+    def forward(batch):
+        session = load_session(name, int8)
+        if hasattr(batch, "detach"):
+            batch = batch.detach().cpu().numpy()
+        outputs = session.run(None, {session.get_inputs()[0].name: np.ascontiguousarray(batch, dtype=np.float32)})
+        return outputs[0]
+
+    return forward
+
+
+# ============================================================
+# 내보내기 (torch → ONNX)
+# ============================================================
+def _export_module(name: str, models=None):
+    """
+    모델 이름 → (torch.nn.Module, 예시 입력, 동적 축)
+
+    모듈의 forward 출력 = feature_extractor_v2._backbone_forwards / extract_contrastive_features 출력
+    """
+    import torch
+    from utils.image_context import ImageContext
+
+    sample = ImageContext.from_array(np.full((480, 640, 3), 127, dtype=np.uint8), name="onnx_export")
+    batch_axes = {"input": {0: "batch"}, "output": {0: "batch"}}
+
+    if name == "contrastive":
+        from feature_extraction.feature_extractor_v3 import get_contrastive_model
+
+        model, device, transform = get_contrastive_model()
+
+        class ContrastiveEmbedding(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.model = model
+
+            def forward(self, x):
+                return self.model.get_embeddings(x)
+
+        example = transform(sample.pil).unsqueeze(0).to(device)
+        return ContrastiveEmbedding().eval(), example, batch_axes
+
+    from feature_extraction.feature_extractor_v2 import (
+        load_models, preprocess_backbone_input, _dino_cls_token,
+    )
+
+    # midas_reduced는 같은 MiDaS 가중치에 입력 크기만 다름
+    backbone = "midas" if name == "midas_reduced" else name
+    models = load_models(preload=(backbone,)) if models is None else models
+    example = preprocess_backbone_input(name, sample, models)
+
+    class NormalizedEmbedding(torch.nn.Module):
+        """CLIP / OpenCLIP encode_image + L2 정규화"""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, x):
+            feat = self.model.encode_image(x)
+            return feat / feat.norm(dim=-1, keepdim=True)
+
+    if name == "clip":
+        # CUDA에서 로드하면 fp16 → 내보내기는 fp32
+        return NormalizedEmbedding(models["clip_model"].float()).eval(), example, batch_axes
+
+    if name == "openclip":
+        return NormalizedEmbedding(models["openclip_model"]).eval(), example, batch_axes
+
+    if name == "dino":
+        dino = models["dino_model"]
+
+        class DinoCls(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.model = dino
+
+            def forward(self, x):
+                token = _dino_cls_token(self.model.forward_features(x))
+                return token / (token.norm(dim=-1, keepdim=True) + 1e-8)
+
+        return DinoCls().eval(), example, batch_axes
+
+    if name in ("midas", "midas_reduced"):
+        midas = models["midas_model"]
+
+        class MidasDepth(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.model = midas
+
+            def forward(self, x):
+                return self.model(x).predicted_depth
+
+        # DPT-Hybrid 위치 임베딩 보간이 트레이싱 때 상수로 고정되므로 H/W는 예시 입력 크기로 고정
+        return MidasDepth().eval(), example, batch_axes
+
+    raise ValueError(f"❌ 알 수 없는 ONNX 모델: {name}")
+
+
+def export_onnx(name: str, quantize: bool = True, models=None) -> Path:
+    """
+    모델 1개를 ONNX로 내보내기 (+ 동적 INT8 양자화)
+
+    Args:
+        name: ONNX_MODELS 중 하나
+        quantize: True면 <name>.int8.onnx도 생성 (가중치 INT8, 활성값은 실행 시 양자화)
+        models: feature_extractor_v2.load_models() 결과 (None이면 해당 브랜치만 로드)
+
+    Returns:
+        FP32 ONNX 파일 경로
+
+    캐시된 torch 모델을 CPU/fp32로 옮기므로 내보내기 전용 프로세스에서 실행할 것
+    """
+    import torch
+
+    module, example, dynamic_axes = _export_module(name, models)
+    module = module.cpu()
+    example = example.detach().cpu().float()
+
+    ONNX_DIR.mkdir(parents=True, exist_ok=True)
+    path = onnx_path(name, int8=False)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            module, (example,), str(path),
+            input_names=["input"],
+            output_names=["output"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+            do_constant_folding=True,
+        )
+    logger.info("exported %s → %s", name, path)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        int8_path = onnx_path(name, int8=True)
+        quantize_dynamic(str(path), str(int8_path), weight_type=QuantType.QInt8)
+        logger.info("quantized %s → %s", name, int8_path)
+
+    return path
@@ -155,7 +155,7 @@ def get_enhanced_feedback(
             # 사용자 이미지의 클러스터 정보 가져오기
             comparison = comparator.compare()
             user_cluster = comparison['cluster_comparison']['user_cluster']
-            user_embedding = comparator.user_analyzer.features.get('embedding', None)
+            user_embedding = (comparator.user_analyzer.cluster_result or {}).get('raw_embedding')
 
             if user_embedding is not None:
                 recommender = ReferenceRecommender()
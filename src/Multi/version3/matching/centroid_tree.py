@@ -0,0 +1,180 @@
+# ============================================================
+# 🌳 Centroid Tree
+# 2단계 클러스터 중심 (coarse 스타일 → 세부 스타일) + beam 탐색 배정
+# ============================================================
+#
+# 빌드: training/retrain_clustering.py (TREE_K_FINE) → feature_models/centroid_tree.npz
+# 벤치마크 (K별 지연 / 전수 탐색 대비 정확도): python scripts/benchmark_centroid_tree.py
+#
+# 세부 스타일 K가 수백~수천이 되면 매 요청 전체 중심과의 거리 계산(K x 128)이 커진다.
+# 트리 배정은
+#   1) coarse 중심(기존 K=20 스타일)과의 거리 → 가까운 beam개 선택
+#   2) 선택한 coarse 아래의 fine 중심들과만 거리 계산 → 가장 가까운 fine
+# beam이 클수록 전수 탐색 결과에 가까워지고 (beam = coarse 수면 동일), 느려진다.
+#
+# 파일 형식 (.npz):
+#   coarse (Kc, 128), fine (K, 128), parent (K,) int    fine 중심별 coarse 부모
+#   fine_counts (K,) int                                 학습 샘플 수 (세부 스타일 메타데이터)
+
+from typing import Tuple
+
+import numpy as np
+
+# 한 번에 gather할 행 수 (N x beam x 자식 수 x 128 메모리 제한)
+ASSIGN_CHUNK = 256
+
+
+class CentroidTree:
+    """
+    coarse → fine 2단계 중심
+
+    Args:
+        coarse: (Kc, D) coarse 중심
+        fine: (K, D) fine 중심 (전역 id 0..K-1)
+        parent: (K,) fine 중심별 coarse id
+        fine_counts: (K,) fine 클러스터별 학습 샘플 수 (없으면 0)
+    """
+
+    def __init__(self, coarse: np.ndarray, fine: np.ndarray, parent: np.ndarray, fine_counts: np.ndarray = None):
+        self.coarse = np.asarray(coarse, dtype=np.float64)
+        self.fine = np.asarray(fine, dtype=np.float64)
+        self.parent = np.asarray(parent, dtype=np.int64)
+        self.fine_counts = (
+            np.zeros(len(self.fine), dtype=np.int64) if fine_counts is None
+            else np.asarray(fine_counts, dtype=np.int64)
+        )
+        if len(self.parent) != len(self.fine) or self.parent.max(initial=-1) >= len(self.coarse):
+            raise ValueError("❌ parent가 fine / coarse 중심과 맞지 않습니다")
+
+        # 중심 제곱 노름 캐시
+        self.coarse_sq_norms = (self.coarse ** 2).sum(axis=1)
+        self.fine_sq_norms = (self.fine ** 2).sum(axis=1)
+
+        # coarse별 자식 fine id (Kc, 최대 자식 수), 빈 칸은 -1
+        children = [np.flatnonzero(self.parent == c) for c in range(len(self.coarse))]
+        width = max(1, max(len(ids) for ids in children))
+        self.children = np.full((len(self.coarse), width), -1, dtype=np.int64)
+        for c, ids in enumerate(children):
+            self.children[c, :len(ids)] = ids
+
+    @property
+    def n_coarse(self) -> int:
+        return len(self.coarse)
+
+    @property
+    def n_fine(self) -> int:
+        return len(self.fine)
+
+    def assign(self, vec128: np.ndarray, beam: int = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        트리 탐색 배정
+
+        Args:
+            vec128: (N, D) 임베딩
+            beam: 내려갈 coarse 수
+
+        Returns:
+            (fine_ids (N,), fine_distances (N,), coarse_ids (N,))
+        """
+        vec128 = np.asarray(vec128, dtype=np.float64).reshape(-1, self.coarse.shape[1])
+        beam = max(1, min(int(beam), self.n_coarse))
+
+        fine_ids = np.empty(len(vec128), dtype=np.int64)
+        fine_d2 = np.empty(len(vec128))
+        coarse_ids = np.empty(len(vec128), dtype=np.int64)
+
+        for start in range(0, len(vec128), ASSIGN_CHUNK):
+            v = vec128[start:start + ASSIGN_CHUNK]
+            rows = np.arange(len(v))
+            v_sq = (v ** 2).sum(axis=1, keepdims=True)
+
+            # 1) coarse
+            coarse_d2 = v_sq - 2.0 * v @ self.coarse.T + self.coarse_sq_norms
+            top = np.argpartition(coarse_d2, beam - 1, axis=1)[:, :beam]
+            coarse_ids[start:start + len(v)] = np.argmin(coarse_d2, axis=1)
+
+            # 2) beam 안 coarse들의 자식 fine만
+            candidates = self.children[top].reshape(len(v), -1)
+            valid = candidates >= 0
+            safe = np.where(valid, candidates, 0)
+            d2 = (
+                v_sq
+                - 2.0 * np.einsum("nd,nkd->nk", v, self.fine[safe])
+                + self.fine_sq_norms[safe]
+            )
+            d2[~valid] = np.inf
+
+            best = np.argmin(d2, axis=1)
+            fine_ids[start:start + len(v)] = safe[rows, best]
+            fine_d2[start:start + len(v)] = d2[rows, best]
+
+        return fine_ids, np.sqrt(np.maximum(fine_d2, 0.0)), coarse_ids
+
+    def assign_exhaustive(self, vec128: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """전체 fine 중심 전수 탐색 (정확도 기준) → (fine_ids, fine_distances)"""
+        vec128 = np.asarray(vec128, dtype=np.float64).reshape(-1, self.fine.shape[1])
+        d2 = (vec128 ** 2).sum(axis=1, keepdims=True) - 2.0 * vec128 @ self.fine.T + self.fine_sq_norms
+        ids = np.argmin(d2, axis=1)
+        return ids, np.sqrt(np.maximum(d2[np.arange(len(ids)), ids], 0.0))
+
+    # --------------------------------------------------------
+    # 저장 / 로드
+    # --------------------------------------------------------
+    def save(self, path):
+        np.savez(path, coarse=self.coarse, fine=self.fine, parent=self.parent, fine_counts=self.fine_counts)
+
+    @classmethod
+    def load(cls, path) -> "CentroidTree":
+        with np.load(path) as data:
+            return cls(data["coarse"], data["fine"], data["parent"], data["fine_counts"])
+
+
+# ============================================================
+# 빌드 (학습 / 벤치마크 전용, sklearn 필요)
+# ============================================================
+def build_centroid_tree(points: np.ndarray, n_fine: int, coarse_centroids: np.ndarray = None,
+                        coarse_labels: np.ndarray = None, n_coarse: int = None,
+                        random_state: int = 42) -> CentroidTree:
+    """
+    학습 임베딩 → CentroidTree
+
+    coarse 클러스터마다 소속 샘플 수에 비례해 fine 중심 개수를 나누고 KMeans로 학습한다.
+
+    Args:
+        points: (N, D) 학습 임베딩 (UMAP 128D)
+        n_fine: 전체 fine 중심 수 (반올림 때문에 약간 다를 수 있음)
+        coarse_centroids, coarse_labels: 이미 학습한 coarse KMeans (retrain의 K=20)
+        n_coarse: coarse를 새로 학습할 때 개수 (기본 sqrt(n_fine))
+    """
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    points = np.asarray(points, dtype=np.float64)
+
+    if coarse_centroids is None:
+        n_coarse = n_coarse or max(1, int(round(np.sqrt(n_fine))))
+        coarse_km = KMeans(n_clusters=n_coarse, random_state=random_state, n_init=4).fit(points)
+        coarse_centroids, coarse_labels = coarse_km.cluster_centers_, coarse_km.labels_
+
+    coarse_centroids = np.asarray(coarse_centroids, dtype=np.float64)
+    coarse_labels = np.asarray(coarse_labels)
+
+    fine, parent, counts = [], [], []
+    for c in range(len(coarse_centroids)):
+        members = points[coarse_labels == c]
+        k = min(len(members), max(1, int(round(n_fine * len(members) / len(points)))))
+
+        if len(members) == 0:
+            # 샘플 없는 coarse: 자기 중심을 fine 1개로 (탐색 시 빈 beam 방지)
+            centers, member_counts = coarse_centroids[c:c + 1], np.zeros(1, dtype=np.int64)
+        elif k == 1:
+            centers, member_counts = members.mean(axis=0, keepdims=True), np.array([len(members)])
+        else:
+            km_cls = MiniBatchKMeans if len(members) > 10000 else KMeans
+            km = km_cls(n_clusters=k, random_state=random_state, n_init=3).fit(members)
+            centers, member_counts = km.cluster_centers_, np.bincount(km.labels_, minlength=k)
+
+        fine.append(centers)
+        parent.append(np.full(len(centers), c))
+        counts.append(member_counts)
+
+    return CentroidTree(coarse_centroids, np.vstack(fine), np.concatenate(parent), np.concatenate(counts))
@@ -4,7 +4,6 @@
 
 import os
 import numpy as np
-import joblib
 import json
 import sys
 from pathlib import Path
@@ -19,29 +18,49 @@ if str(VERSION3_DIR) not in sys.path:
     sys.path.append(str(VERSION3_DIR))
 
 from utils.model_cache import model_cache
+from utils.metrics import timed
+from utils.log import get_logger
+
+logger = get_logger(__name__)
 
 # 🔥 절대 import로만 구성 (가장 안정적)
 from feature_extraction.feature_extractor_v2 import extract_features_v2 as extract_features_full
-from embedder.embedder import embed_features
+from matching.centroid_tree import CentroidTree
+from embedder.embedder import (
+    embed_features, embed_features_batch, required_branches, compiled_in_use, get_embedder_models,
+)
 
 # =============================================
 # 1) 모델 경로 설정
 # =============================================
 FEATURE_MODEL_DIR = PROJECT_ROOT / "feature_models"
 
-KMEANS_MODEL_PATH   = FEATURE_MODEL_DIR / "kmeans_model.pkl"
 CENTROIDS_PATH      = FEATURE_MODEL_DIR / "kmeans_centroids.npy"
 CLUSTER_INFO_PATH   = FEATURE_MODEL_DIR / "cluster_info.json"
+CENTROID_TREE_PATH  = FEATURE_MODEL_DIR / "centroid_tree.npz"   # retrain_clustering.py (TREE_K_FINE)
+INTERPRETATION_PATH = PROJECT_ROOT / "features" / "cluster_interpretation.json"
+
+# 세부 스타일 트리 배정 시 내려갈 coarse 수 (트리 파일이 있을 때만 사용)
+TREE_BEAM = int(os.environ.get("TRYANGLE_TREE_BEAM", "2"))
 
 # ---------------------------------------------------------
 # [2] 모델 로딩 (싱글톤)
 # ---------------------------------------------------------
 def _load_cluster_models():
-    """Cluster 모델 로드 (한 번만)"""
+    """
+    Cluster 모델 로드 (한 번만)
+
+    KMeans.predict = 가장 가까운 중심이므로 중심 배열만 있으면 된다
+    (sklearn KMeans는 로드하지 않음). compiled embedder(embedder_compiled.npz)를 쓰면
+    중심도 거기서 가져온다. 중심 제곱 노름은 여기서 한 번만 계산해 둔다.
+    """
     print("🔧 Loading cluster matcher models...")
 
-    kmeans_model = joblib.load(KMEANS_MODEL_PATH)
-    centroids    = np.load(CENTROIDS_PATH)
+    if compiled_in_use():
+        centroids = get_embedder_models()["compiled"].centroids
+    else:
+        centroids = np.load(CENTROIDS_PATH)
+    centroids = np.asarray(centroids, dtype=np.float64)
 
     # interpretation(라벨)이 있으면 불러오고 없으면 None
     if os.path.exists(CLUSTER_INFO_PATH):
@@ -50,51 +69,90 @@ def _load_cluster_models():
     else:
         cluster_info = None
 
+    # 세부 스타일 트리 (coarse = 위 중심과 같아야 함)
+    tree = None
+    if os.path.exists(CENTROID_TREE_PATH):
+        tree = CentroidTree.load(CENTROID_TREE_PATH)
+        if tree.coarse.shape != centroids.shape or not np.allclose(tree.coarse, centroids):
+            logger.warning("centroid tree coarse level differs from cluster centroids, ignoring %s", CENTROID_TREE_PATH)
+            tree = None
+
     print("✅ Cluster matcher models loaded successfully")
 
     return {
-        "kmeans_model": kmeans_model,
         "centroids": centroids,
-        "cluster_info": cluster_info
+        "centroid_sq_norms": (centroids ** 2).sum(axis=1),
+        "cluster_info": cluster_info,
+        "tree": tree
     }
 
-# 싱글톤으로 로드
-_cluster_models = None
-
 def get_cluster_models():
     """Cluster 모델 가져오기 (싱글톤)"""
     return model_cache.get_or_load("cluster_matcher_models", _load_cluster_models)
 
 
+def _load_cluster_interpretation():
+    with open(INTERPRETATION_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_cluster_interpretation() -> dict:
+    """cluster_interpretation.json {"<cluster_id>": {...}} (싱글톤, 요청마다 파일을 열지 않음)"""
+    return model_cache.get_or_load("cluster_interpretation", _load_cluster_interpretation)
+
+
+def centroid_distances(vec128, models=None) -> np.ndarray:
+    """
+    (N, 128) 임베딩 → (N, C) 모든 클러스터 중심까지의 유클리드 거리
+
+    ||v - c||^2 = ||v||^2 - 2 v·c + ||c||^2  (중심 노름은 캐시, 행렬곱 1회)
+    """
+    models = get_cluster_models() if models is None else models
+    vec128 = np.asarray(vec128, dtype=np.float64).reshape(-1, models["centroids"].shape[1])
+
+    d2 = (
+        (vec128 ** 2).sum(axis=1, keepdims=True)
+        - 2.0 * vec128 @ models["centroids"].T
+        + models["centroid_sq_norms"]
+    )
+    return np.sqrt(np.maximum(d2, 0.0))
+
+
+def _cluster_label(cluster_info, cluster_id):
+    if cluster_info and str(cluster_id) in cluster_info:
+        return cluster_info[str(cluster_id)]
+    return f"cluster_{cluster_id}"
+
+
 # ---------------------------------------------------------
 # [3] 클러스터 예측 함수
 # ---------------------------------------------------------
+@timed("cluster_match")
 def match_cluster_from_features(feature_dict):
     # 모델 가져오기 (캐시됨)
     models = get_cluster_models()
-    kmeans_model = models["kmeans_model"]
-    centroids = models["centroids"]
-    cluster_info = models["cluster_info"]
 
     vec_128 = embed_features(feature_dict).reshape(1, -1)
 
-    cluster_id = int(kmeans_model.predict(vec_128)[0])
-
-    center = centroids[cluster_id]
-    dist = float(np.linalg.norm(vec_128 - center))
-
-    if cluster_info and str(cluster_id) in cluster_info:
-        label = cluster_info[str(cluster_id)]
-    else:
-        label = f"cluster_{cluster_id}"
+    # 가장 가까운 중심 = KMeans.predict (거리 계산 1회로 배정 + 거리)
+    distances = centroid_distances(vec_128, models)[0]
+    cluster_id = int(np.argmin(distances))
 
-    return {
+    result = {
         "cluster_id": cluster_id,
-        "distance": dist,
-        "label": label,
+        "distance": float(distances[cluster_id]),
+        "label": _cluster_label(models["cluster_info"], cluster_id),
         "raw_embedding": vec_128.flatten()
     }
 
+    # 세부 스타일 (트리 파일이 있을 때만)
+    if models["tree"] is not None:
+        fine_ids, fine_distances, _ = models["tree"].assign(vec_128, beam=TREE_BEAM)
+        result["fine_cluster_id"] = int(fine_ids[0])
+        result["fine_distance"] = float(fine_distances[0])
+
+    return result
+
 
 # ---------------------------------------------------------
 # [3.5] Phase 1-2: 클러스터 폴백 로직 추가
@@ -120,16 +178,13 @@ def match_with_fallback(feature_dict, confidence_threshold=0.6):
     """
     # 모델 가져오기
     models = get_cluster_models()
-    kmeans_model = models["kmeans_model"]
-    centroids = models["centroids"]
-    cluster_info = models["cluster_info"]
 
     # 128D 임베딩 생성
     vec_128 = embed_features(feature_dict).reshape(1, -1)
 
     # 모든 클러스터 중심까지의 거리 계산
-    distances = np.linalg.norm(centroids - vec_128, axis=1)
-    nearest_cluster = np.argmin(distances)
+    distances = centroid_distances(vec_128, models)[0]
+    nearest_cluster = int(np.argmin(distances))
     min_distance = float(distances[nearest_cluster])
 
     # Confidence 계산 (거리 기반, 0~1 범위)
@@ -137,16 +192,13 @@ def match_with_fallback(feature_dict, confidence_threshold=0.6):
     confidence = 1.0 / (1.0 + min_distance)
 
     # 라벨 가져오기
-    if cluster_info and str(nearest_cluster) in cluster_info:
-        label = cluster_info[str(nearest_cluster)]
-    else:
-        label = f"cluster_{nearest_cluster}"
+    label = _cluster_label(models["cluster_info"], nearest_cluster)
 
     # Threshold 체크
     if confidence >= confidence_threshold:
         # 클러스터 매칭 성공
         return {
-            'cluster_id': int(nearest_cluster),
+            'cluster_id': nearest_cluster,
             'distance': min_distance,
             'confidence': confidence,
             'method': 'cluster',
@@ -155,7 +207,7 @@ def match_with_fallback(feature_dict, confidence_threshold=0.6):
         }
     else:
         # 폴백 모드: 클러스터 없음 (직접 유사도 비교로 전환 필요)
-        print(f"⚠️ Cluster confidence low ({confidence:.3f} < {confidence_threshold}), using fallback mode...")
+        logger.info("cluster confidence low (%.3f < %s), using fallback mode", confidence, confidence_threshold)
 
         return {
             'cluster_id': -1,  # 클러스터 없음
@@ -168,12 +220,86 @@ def match_with_fallback(feature_dict, confidence_threshold=0.6):
         }
 
 
+# ---------------------------------------------------------
+# [3.7] 배치 매칭 (오프라인 작업용: ablation / interpretation / 레퍼런스 인덱싱)
+# ---------------------------------------------------------
+def match_clusters_batch(branch_arrays, top_k=3, temperature=1.0, confidence_threshold=0.6, beam=None):
+    """
+    N장 한 번에 클러스터 매칭 (이미지별 match_cluster_from_features / match_with_fallback 루프 대체)
+
+    Args:
+        branch_arrays: 브랜치별 (N, d) 배열 (feature dict 리스트는 embedder.stack_features로 변환)
+        top_k: soft assignment에 남길 가까운 클러스터 수
+        temperature: softmax(-distance / temperature) 온도
+        confidence_threshold: match_with_fallback과 같은 폴백 임계값
+        beam: 세부 스타일 트리 beam (None이면 TRYANGLE_TREE_BEAM)
+
+    Returns:
+        {
+            'embeddings': (N, 128),
+            'cluster_ids': (N,) 가장 가까운 클러스터 (= match_cluster_from_features의 cluster_id),
+            'distances': (N, C) 모든 중심까지의 거리,
+            'min_distances': (N,),
+            'confidences': (N,) 1 / (1 + min_distance) (= match_with_fallback의 confidence),
+            'fallback': (N,) bool, confidence < confidence_threshold,
+            'topk_ids': (N, k) 가까운 순 클러스터,
+            'topk_probs': (N, k) top-k 안에서 정규화한 softmax 확률,
+            'labels': [str] * N,
+            'fine_ids': (N,) 세부 스타일 (트리 파일이 없으면 None),
+            'fine_distances': (N,) (트리 파일이 없으면 None)
+        }
+    """
+    models = get_cluster_models()
+
+    embeddings = embed_features_batch(branch_arrays)
+    distances = centroid_distances(embeddings, models)
+    n = len(distances)
+
+    rows = np.arange(n)[:, None]
+    k = min(top_k, distances.shape[1])
+    topk_ids = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    topk_ids = topk_ids[rows, np.argsort(distances[rows, topk_ids], axis=1)]
+    topk_dist = distances[rows, topk_ids]
+
+    # 가장 가까운 거리 기준으로 빼서 exp 안정화
+    logits = -(topk_dist - topk_dist[:, :1]) / temperature
+    topk_probs = np.exp(logits)
+    topk_probs /= topk_probs.sum(axis=1, keepdims=True)
+
+    cluster_ids = topk_ids[:, 0]
+    min_distances = topk_dist[:, 0]
+    confidences = 1.0 / (1.0 + min_distances)
+
+    fine_ids = fine_distances = None
+    if models["tree"] is not None:
+        fine_ids, fine_distances, _ = models["tree"].assign(embeddings, beam=TREE_BEAM if beam is None else beam)
+
+    return {
+        "embeddings": embeddings,
+        "cluster_ids": cluster_ids,
+        "distances": distances,
+        "min_distances": min_distances,
+        "confidences": confidences,
+        "fallback": confidences < confidence_threshold,
+        "topk_ids": topk_ids,
+        "topk_probs": topk_probs,
+        "labels": [_cluster_label(models["cluster_info"], int(c)) for c in cluster_ids],
+        "fine_ids": fine_ids,
+        "fine_distances": fine_distances
+    }
+
+
 # ---------------------------------------------------------
 # [4] 이미지 파일 입력 전용
 # ---------------------------------------------------------
-def match_cluster_from_image(image_path):
+def match_cluster_from_image(image_path, extra_branches=()):
+    """
+    이미지 → 클러스터
 
-    feat = extract_features_full(image_path)
+    임베딩에 쓰이는 브랜치만 추출한다 (가중치 0인 yolo_pose / face 생략).
+    다른 용도로 포즈/얼굴 특징도 필요하면 extra_branches로 추가.
+    """
+    feat = extract_features_full(image_path, branches=required_branches() | set(extra_branches))
     if feat is None:
         raise ValueError(f"❌ Feature extraction failed: {image_path}")
 
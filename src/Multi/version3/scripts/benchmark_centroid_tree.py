@@ -0,0 +1,120 @@
+# ============================================================
+# 🌳 Centroid Tree Benchmark
+# K(세부 스타일 수)별 트리 배정 vs 전수 탐색: 지연 + 정확도
+# ============================================================
+#
+# 실행:
+#   python scripts/benchmark_centroid_tree.py
+#
+# 데이터: feature_models/fusion_128d.npy (retrain_clustering.py 출력)이 있으면 사용,
+#         없으면 합성 128D 가우시안 혼합
+# 학습 샘플로 트리를 만들고, 나머지 샘플을 질의로 써서
+#   - 1장 배정 지연 (실시간 요청과 같은 단일 질의)
+#   - 배치 처리량 (오프라인 인덱싱)
+#   - 전수 탐색과 fine id 일치율, 거리 비율 (트리 거리 / 최적 거리)
+# 을 비교한다.
+#
+# 환경변수 (기본값):
+#   TRYANGLE_TREE_BENCH_KS        쉼표로 구분한 fine K 목록 (20,100,500,2000)
+#   TRYANGLE_TREE_BENCH_BEAMS     쉼표로 구분한 beam 목록 (1,2,4,8)
+#   TRYANGLE_TREE_BENCH_QUERIES   질의 샘플 수 (2000)
+#   TRYANGLE_TREE_BENCH_SINGLE    단일 질의 지연 측정 횟수 (300)
+
+import os
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = VERSION3_DIR
+while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
+    PROJECT_ROOT = PROJECT_ROOT.parent
+
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from matching.centroid_tree import build_centroid_tree
+
+KS = [int(k) for k in os.environ.get("TRYANGLE_TREE_BENCH_KS", "20,100,500,2000").split(",") if k.strip()]
+BEAMS = [int(b) for b in os.environ.get("TRYANGLE_TREE_BENCH_BEAMS", "1,2,4,8").split(",") if b.strip()]
+QUERIES = int(os.environ.get("TRYANGLE_TREE_BENCH_QUERIES", "2000"))
+SINGLE_RUNS = int(os.environ.get("TRYANGLE_TREE_BENCH_SINGLE", "300"))
+
+EMBEDDING_PATHS = (
+    PROJECT_ROOT / "feature_models" / "fusion_128d.npy",
+    PROJECT_ROOT / "feature_models" / "feature_models_v3" / "fusion_128d.npy",
+)
+
+
+def _load_embeddings() -> np.ndarray:
+    for path in EMBEDDING_PATHS:
+        if path.exists():
+            print(f"📂 {path}")
+            return np.load(path).astype(np.float64)
+
+    print("⚠️  fusion_128d.npy 없음 → 합성 데이터 (128D, 스타일 200개, 샘플 20000)")
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(200, 128)) * 3.0
+    labels = rng.integers(0, len(centers), size=20000)
+    return centers[labels] + rng.normal(size=(len(labels), 128))
+
+
+def _single_ms(fn, queries) -> float:
+    """질의 1개씩 호출한 평균 ms"""
+    runs = min(SINGLE_RUNS, len(queries))
+    start = time.perf_counter()
+    for i in range(runs):
+        fn(queries[i:i + 1])
+    return (time.perf_counter() - start) * 1000 / runs
+
+
+def main():
+    print("="*60)
+    print("🌳 Centroid Tree Benchmark")
+    print("="*60)
+
+    points = _load_embeddings()
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(points))
+    n_query = min(QUERIES, len(points) // 5)
+    queries, train = points[order[:n_query]], points[order[n_query:]]
+    print(f"   학습 {len(train)} / 질의 {len(queries)}")
+
+    for k in KS:
+        if k > len(train):
+            print(f"\n⚠️  K={k} > 학습 샘플 수, 건너뜀")
+            continue
+
+        start = time.perf_counter()
+        tree = build_centroid_tree(train, k)
+        build_s = time.perf_counter() - start
+
+        exact_ids, exact_dist = tree.assign_exhaustive(queries)
+        exhaustive_ms = _single_ms(tree.assign_exhaustive, queries)
+        start = time.perf_counter()
+        tree.assign_exhaustive(queries)
+        exhaustive_batch = len(queries) / (time.perf_counter() - start)
+
+        print(f"\n📊 K={tree.n_fine} (coarse {tree.n_coarse}, 빌드 {build_s:.1f}s)")
+        print(f"   {'방식':<14} {'1장 ms':>8} {'배치 장/s':>11} {'일치율':>8} {'거리 비율':>9}")
+        print(f"   {'exhaustive':<14} {exhaustive_ms:8.3f} {exhaustive_batch:11.0f} {1.0:8.1%} {1.0:9.4f}")
+
+        for beam in BEAMS:
+            if beam > tree.n_coarse:
+                continue
+            ids, dist, _ = tree.assign(queries, beam=beam)
+            single_ms = _single_ms(lambda q: tree.assign(q, beam=beam), queries)
+            start = time.perf_counter()
+            tree.assign(queries, beam=beam)
+            batch = len(queries) / (time.perf_counter() - start)
+
+            agreement = float(np.mean(ids == exact_ids))
+            ratio = float(np.mean(dist / np.maximum(exact_dist, 1e-12)))
+            print(f"   {f'tree beam={beam}':<14} {single_ms:8.3f} {batch:11.0f} {agreement:8.1%} {ratio:9.4f}")
+
+    print("\n💡 서빙 beam: TRYANGLE_TREE_BEAM (기본 2)")
+
+
+if __name__ == "__main__":
+    main()
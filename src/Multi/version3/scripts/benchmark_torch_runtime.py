@@ -0,0 +1,168 @@
+# ============================================================
+# ⏱️ Torch Runtime Profile Benchmark
+# 프로필(default / latency / throughput)별 모델 forward 지연/처리량 비교
+# ============================================================
+#
+# 실행:
+#   python scripts/benchmark_torch_runtime.py
+#
+# 스레드 수 등 프로세스 전역 설정은 한 번만 바꿀 수 있어서
+# 프로필마다 새 프로세스(TRYANGLE_TORCH_PROFILE=<프로필>)에서 측정하고 결과만 모은다.
+#
+# 환경변수 (기본값):
+#   TRYANGLE_BENCH_PROFILES   비교할 프로필 (default,latency,throughput)
+#   TRYANGLE_BENCH_MODELS     모델 (clip,openclip,dino,midas,contrastive)
+#   TRYANGLE_BENCH_RUNS       측정 반복 수 (20)
+#   TRYANGLE_BENCH_WARMUP     워밍업 반복 수, compile 포함 (3)
+#   TRYANGLE_BENCH_BATCH      처리량 측정 배치 크기 (8)
+#
+# 결과 보는 법:
+#   - batch=1 p50/p95 → 실시간 단일 요청 경로 (TRYANGLE_TORCH_PROFILE 서버 설정)
+#   - batch=N img/s   → 배치 추출 (feature_extraction/batch_extractor.py)
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+PROFILES = [p.strip() for p in os.environ.get("TRYANGLE_BENCH_PROFILES", "default,latency,throughput").split(",") if p.strip()]
+MODELS = [m.strip() for m in os.environ.get("TRYANGLE_BENCH_MODELS", "clip,openclip,dino,midas,contrastive").split(",") if m.strip()]
+RUNS = max(1, int(os.environ.get("TRYANGLE_BENCH_RUNS", "20")))
+WARMUP = max(1, int(os.environ.get("TRYANGLE_BENCH_WARMUP", "3")))
+BATCH = max(1, int(os.environ.get("TRYANGLE_BENCH_BATCH", "8")))
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+# ============================================================
+# 자식 프로세스: 현재 프로필로 측정
+# ============================================================
+def _model_runners():
+    """모델 이름 → (입력 1개 (1, ...), forward 함수)"""
+    from utils.image_context import ImageContext
+    from feature_extraction.feature_extractor_v2 import load_models, preprocess_backbone_input, _backbone_forwards
+
+    rng = np.random.default_rng(0)
+    sample = ImageContext.from_array(rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8), name="bench")
+
+    runners = {}
+    backbones = [name for name in MODELS if name in ("clip", "openclip", "dino", "midas")]
+    if backbones:
+        models = load_models(preload=backbones)
+        forwards = _backbone_forwards(models, backend="torch")
+        for name in backbones:
+            runners[name] = (preprocess_backbone_input(name, sample, models), forwards[name])
+
+    if "contrastive" in MODELS:
+        try:
+            from feature_extraction.feature_extractor_v3 import get_contrastive_model
+            model, device, transform = get_contrastive_model()
+            from utils.torch_runtime import to_channels_last
+            runners["contrastive"] = (
+                transform(sample.pil).unsqueeze(0).to(device),
+                lambda batch: model.get_embeddings(to_channels_last("contrastive_model", batch)),
+            )
+        except FileNotFoundError as e:
+            print(f"⚠️  contrastive 건너뜀: {e}", file=sys.stderr)
+
+    return runners
+
+
+def _measure(tensor, forward):
+    import torch
+    from utils.torch_runtime import inference_context
+
+    batch = torch.cat([tensor] * BATCH, dim=0)
+
+    with inference_context():
+        for _ in range(WARMUP):
+            forward(tensor)
+            forward(batch)
+
+        single = []
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            forward(tensor)
+            single.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            forward(batch)
+        batch_seconds = time.perf_counter() - start
+
+    return {
+        "p50_ms": float(np.percentile(single, 50) * 1000),
+        "p95_ms": float(np.percentile(single, 95) * 1000),
+        "img_per_s": BATCH * RUNS / batch_seconds,
+    }
+
+
+def run_child():
+    from utils.torch_runtime import describe_profile
+
+    results = {name: _measure(tensor, forward) for name, (tensor, forward) in _model_runners().items()}
+    print(RESULT_PREFIX + json.dumps({"profile": describe_profile(), "models": results}))
+
+
+# ============================================================
+# 부모 프로세스: 프로필별 실행 + 표
+# ============================================================
+def _run_profile(profile: str):
+    env = dict(os.environ, TRYANGLE_TORCH_PROFILE=profile, TRYANGLE_BENCH_CHILD="1")
+    proc = subprocess.run([sys.executable, __file__], env=env, capture_output=True, text=True)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"{profile} 측정 실패:\n{proc.stderr[-2000:]}")
+
+
+def main():
+    print("="*60)
+    print(f"⏱️  Torch Runtime Benchmark (runs={RUNS}, batch={BATCH}, cpu={os.cpu_count()})")
+    print("="*60)
+
+    results = {}
+    for profile in PROFILES:
+        print(f"\n▶️  {profile} ...")
+        try:
+            results[profile] = _run_profile(profile)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            continue
+        settings = results[profile]["profile"]
+        print(f"   intra={settings['intra_op_threads']} inter={settings['inter_op_threads']} "
+              f"inference_mode={settings['inference_mode']} channels_last={settings['channels_last']} "
+              f"compile={settings['compile']}")
+
+    if not results:
+        sys.exit(1)
+
+    for model in MODELS:
+        rows = {profile: r["models"][model] for profile, r in results.items() if model in r["models"]}
+        if not rows:
+            continue
+        best_latency = min(rows, key=lambda p: rows[p]["p50_ms"])
+        best_throughput = max(rows, key=lambda p: rows[p]["img_per_s"])
+
+        print(f"\n📦 {model}")
+        print(f"   {'profile':<12} {'p50 ms':>9} {'p95 ms':>9} {f'img/s (b={BATCH})':>16}")
+        for profile, row in rows.items():
+            marks = ("⚡" if profile == best_latency else " ") + ("🚚" if profile == best_throughput else " ")
+            print(f"   {profile:<12} {row['p50_ms']:9.1f} {row['p95_ms']:9.1f} {row['img_per_s']:16.1f} {marks}")
+
+    print("\n⚡ = 단일 요청 지연 최소 (실시간), 🚚 = 배치 처리량 최대 (배치 추출)")
+
+
+if __name__ == "__main__":
+    if os.environ.get("TRYANGLE_BENCH_CHILD") == "1":
+        run_child()
+    else:
+        main()
@@ -0,0 +1,175 @@
+# ============================================================
+# 🗂️ Build Reference Index
+# 레퍼런스 이미지 → 128D 임베딩 → utils/reference_index.py 인덱스
+# ============================================================
+#
+# 실행:
+#   python scripts/build_reference_index.py
+#
+# 입력: data/clustered_images/cluster_<id>/*.jpg|png|jpeg
+#   클러스터 id는 폴더 이름 (폴더 이름에서 읽을 수 없으면 클러스터 매칭 결과)
+# 출력: TRYANGLE_REFERENCE_INDEX_DIR (feature_models/reference_index)
+#
+# 레퍼런스를 추가/삭제하거나 임베더(scaler / 투영 / compiled)를 바꾸면 다시 실행할 것.
+# 품질 점수는 analysis/quality_analyzer.py 기준 (블러 / 선명도 / 대비 평균, 0~1).
+# 빌드 후 레퍼런스 일부를 질의로 써서 exact / ivf 검색 지연과 ivf recall@10을 출력한다.
+#
+# 환경변수 (기본값):
+#   TRYANGLE_REFERENCE_IMAGES_DIR  레퍼런스 이미지 위치 (data/clustered_images)
+#   TRYANGLE_INDEX_LISTS           IVF 리스트 수 (0 = N >= TRYANGLE_INDEX_IVF_MIN이면 sqrt(N), 아니면 IVF 없음)
+#   TRYANGLE_INDEX_CHUNK           특징 추출/임베딩 청크 이미지 수 (512)
+#   TRYANGLE_INDEX_EVAL_QUERIES    검증 질의 수 (200)
+#   (배치 추출 크기/스레드는 feature_extraction/batch_extractor.py 환경변수)
+
+import os
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = VERSION3_DIR
+while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
+    PROJECT_ROOT = PROJECT_ROOT.parent
+
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from feature_extraction.batch_extractor import iter_features_v2_batch
+from embedder.embedder import required_branches, stack_features
+from matching.cluster_matcher import match_clusters_batch
+from utils.reference_index import ReferenceIndex, INDEX_DIR, IVF_MIN, build_reference_index
+from utils.reference_recommender import MIN_QUALITY
+from analysis.quality_analyzer import QualityAnalyzer
+
+IMAGES_DIR = Path(os.environ.get("TRYANGLE_REFERENCE_IMAGES_DIR", str(PROJECT_ROOT / "data" / "clustered_images")))
+N_LISTS = int(os.environ.get("TRYANGLE_INDEX_LISTS", "0"))
+CHUNK = int(os.environ.get("TRYANGLE_INDEX_CHUNK", "512"))
+EVAL_QUERIES = int(os.environ.get("TRYANGLE_INDEX_EVAL_QUERIES", "200"))
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+
+
+def _find_references():
+    """(이미지 경로, 폴더 클러스터 id 또는 -1) 목록"""
+    references = []
+    for path in sorted(IMAGES_DIR.rglob("*")):
+        if path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        folder = path.parent.name
+        cluster = int(folder.split("_", 1)[1]) if folder.startswith("cluster_") and folder[8:].isdigit() else -1
+        references.append((path, cluster))
+    return references
+
+
+def _image_quality(path: Path) -> float:
+    """
+    QualityAnalyzer 기반 품질 점수 0~1
+
+    블러 (Laplacian variance 500 이상 = 흐림 없음 → 1),
+    선명도 (sharpness_score), 대비 (V 표준편차 0.2 이상 = normal → 1)의 평균
+    """
+    analyzer = QualityAnalyzer(str(path))
+    blur = min(1.0, analyzer.detect_blur()["blur_score"] / 500)
+    sharpness = analyzer.analyze_sharpness()["sharpness_score"]
+    contrast = min(1.0, analyzer.analyze_contrast()["contrast"] / 0.2)
+    return float((blur + sharpness + contrast) / 3)
+
+
+def _embed_all(paths):
+    """경로 목록 → (임베딩, 매칭 클러스터, 성공한 인덱스), 청크 단위 배치 추출 + 배치 임베딩"""
+    branches = required_branches()
+    embeddings, clusters, kept = [], [], []
+
+    for start in range(0, len(paths), CHUNK):
+        chunk = paths[start:start + CHUNK]
+        features, indices = [], []
+        for i, feat in iter_features_v2_batch([str(p) for p in chunk], branches=branches):
+            if feat is None:
+                print(f"   ⚠️ 추출 실패: {chunk[i]}")
+                continue
+            features.append(feat)
+            indices.append(start + i)
+
+        if features:
+            batch = match_clusters_batch(stack_features(features))
+            embeddings.append(batch["embeddings"])
+            clusters.append(batch["cluster_ids"])
+            kept.extend(indices)
+        print(f"   {min(start + CHUNK, len(paths))}/{len(paths)}")
+
+    if not kept:
+        return np.empty((0, 128)), np.empty(0, dtype=np.int64), []
+    return np.vstack(embeddings), np.concatenate(clusters), kept
+
+
+def _evaluate(index: ReferenceIndex, embeddings: np.ndarray):
+    """embeddings: 빌드에 쓴 원래 임베딩 (질의는 서빙과 같이 중심화 전 값으로)"""
+    rng = np.random.default_rng(0)
+    queries = rng.choice(len(index), size=min(EVAL_QUERIES, len(index)), replace=False)
+    vectors = embeddings[np.sort(queries)]
+
+    def run(mode):
+        start = time.perf_counter()
+        results = [index.search(q, top_k=10, mode=mode)[0] for q in vectors]
+        return results, (time.perf_counter() - start) * 1000 / len(vectors)
+
+    exact, exact_ms = run("exact")
+    print(f"   exact  {exact_ms:8.3f}ms/질의")
+
+    if index.ivf is not None:
+        approx, ivf_ms = run("ivf")
+        recall = np.mean([len(np.intersect1d(a, e)) / max(len(e), 1) for a, e in zip(approx, exact)])
+        print(f"   ivf    {ivf_ms:8.3f}ms/질의  recall@10 {recall:.1%} (TRYANGLE_INDEX_NPROBE로 조절)")
+
+
+def main():
+    print("="*60)
+    print("🗂️  Build Reference Index")
+    print("="*60)
+
+    references = _find_references()
+    if not references:
+        print(f"❌ {IMAGES_DIR}에 레퍼런스 이미지가 없습니다")
+        sys.exit(1)
+    print(f"📂 {IMAGES_DIR}: {len(references)}장")
+
+    print("\n🔧 Extracting + embedding...")
+    paths = [path for path, _ in references]
+    embeddings, matched, kept = _embed_all(paths)
+    if not kept:
+        print("❌ 임베딩한 이미지가 없습니다")
+        sys.exit(1)
+
+    folder_clusters = np.array([references[i][1] for i in kept])
+    clusters = np.where(folder_clusters >= 0, folder_clusters, matched)
+    labeled = folder_clusters >= 0
+    if labeled.any():
+        agreement = np.mean(folder_clusters[labeled] == matched[labeled])
+        print(f"   폴더 클러스터 vs 현재 임베더 매칭 일치: {agreement:.1%}")
+
+    print("\n🔍 Quality...")
+    quality = np.array([_image_quality(paths[i]) for i in kept], dtype=np.float32)
+    p10, p50, p90 = np.percentile(quality, [10, 50, 90])
+    print(f"   p10 {p10:.2f} / p50 {p50:.2f} / p90 {p90:.2f}, "
+          f"추천 기준({MIN_QUALITY}) 이상 {np.mean(quality >= MIN_QUALITY):.1%}")
+
+    n_lists = N_LISTS if N_LISTS > 0 else (int(np.sqrt(len(kept))) if len(kept) >= IVF_MIN else 0)
+    index = build_reference_index(
+        embeddings,
+        [paths[i] for i in kept],
+        clusters,
+        quality,
+        n_lists=n_lists,
+    )
+    index.save(INDEX_DIR)
+    print(f"\n💾 {INDEX_DIR} ({len(index)}장, IVF {'리스트 ' + str(n_lists) + '개' if n_lists else '없음'})")
+
+    print("\n⏱️  검색 확인 (인덱스 다시 열어서 memmap으로)...")
+    _evaluate(ReferenceIndex.load(INDEX_DIR), embeddings)
+
+    print("\n🎉 완료!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# ============================================================
+# 🔍 Batch Extractor Parity + Speed Check
+# extract_features_v2 (1장씩) vs iter_features_v2_batch 결과/시간 비교
+# ============================================================
+#
+# 실행:
+#   python scripts/check_batch_extractor.py
+#
+# 환경변수:
+#   TRYANGLE_PARITY_IMAGES   비교할 이미지 수 (기본 32)
+#   (배치 크기/스레드/프로세스는 feature_extraction/batch_extractor.py 환경변수)
+
+import os
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = VERSION3_DIR
+while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
+    PROJECT_ROOT = PROJECT_ROOT.parent
+
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from feature_extraction.feature_extractor_v2 import extract_features_v2, load_models, FEATURE_BRANCHES
+from feature_extraction.batch_extractor import extract_features_v2_batch, BATCH_SIZE, NUM_THREADS, NUM_PROCESSES
+
+NUM_IMAGES = int(os.environ.get("TRYANGLE_PARITY_IMAGES", "32"))
+
+# backbone은 배치 forward라 부동소수점 오차 허용, 수작업 특징은 완전 일치
+TOLERANCE = {"clip": 1e-4, "openclip": 1e-4, "dino": 1e-4, "midas": 1e-3}
+
+
+def _find_images():
+    for image_dir in [PROJECT_ROOT / "data" / "train_images", PROJECT_ROOT / "data" / "test_images"]:
+        if image_dir.exists():
+            images = sorted(p for p in image_dir.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+            if images:
+                return [str(p) for p in images[:NUM_IMAGES]]
+    return []
+
+
+def main():
+    paths = _find_images()
+    if not paths:
+        print("❌ data/train_images 또는 data/test_images에 이미지가 없습니다")
+        sys.exit(1)
+
+    print("="*60)
+    print(f"🔍 Batch Extractor Check ({len(paths)}장, batch={BATCH_SIZE}, threads={NUM_THREADS}, processes={NUM_PROCESSES})")
+    print("="*60)
+
+    load_models(preload=None)
+
+    start = time.perf_counter()
+    single = [extract_features_v2(path) for path in paths]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = extract_features_v2_batch(paths)
+    batch_time = time.perf_counter() - start
+
+    print(f"\n⏱️  1장씩: {single_time:.1f}초 ({len(paths) / single_time:.2f} img/s)")
+    print(f"⏱️  배치:  {batch_time:.1f}초 ({len(paths) / batch_time:.2f} img/s) → {single_time / batch_time:.2f}x")
+
+    print("\n📏 브랜치별 최대 절대 오차:")
+    passed = True
+    for name in FEATURE_BRANCHES:
+        max_diff = 0.0
+        for a, b in zip(single, batched):
+            if a is None or b is None:
+                if (a is None) != (b is None):
+                    passed = False
+                continue
+            if a[name].shape != b[name].shape:
+                print(f"   ❌ {name}: shape 다름 {a[name].shape} vs {b[name].shape}")
+                passed = False
+                break
+            max_diff = max(max_diff, float(np.max(np.abs(a[name] - b[name]))))
+
+        ok = max_diff <= TOLERANCE.get(name, 0.0)
+        passed = passed and ok
+        print(f"   {'✅' if ok else '❌'} {name:<10} {max_diff:.2e}")
+
+    print("\n" + ("✅ 일치" if passed else "❌ 불일치"))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# ============================================================
+# 🔍 Image Orientation Check
+# EXIF orientation=6 JPEG에서 ImageContext 두 view가 기존 로더와 같은지 확인
+#   bgr  = cv2.imread (EXIF 회전 적용)
+#   pil  = Image.open().convert("RGB") (회전 없음)
+# ============================================================
+#
+# 실행:
+#   python scripts/check_image_orientation.py
+#
+# 이미지는 메모리에서 만든다 (데이터 폴더 필요 없음). 실패하면 exit 1
+
+import sys
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from utils.image_context import ImageContext, EXIF_ORIENTATION_TAG
+
+# JPEG 손실 때문에 블록 경계 근처 값이 조금 다를 수 있어 색 블록으로 확인
+WIDTH, HEIGHT = 96, 48
+TOLERANCE = 12
+
+
+def _oriented_jpeg(orientation: int) -> bytes:
+    """왼쪽 절반 빨강 / 오른쪽 절반 파랑 (가로로 긴) JPEG + EXIF orientation"""
+    rgb = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    rgb[:, :WIDTH // 2] = (255, 0, 0)
+    rgb[:, WIDTH // 2:] = (0, 0, 255)
+
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION_TAG] = orientation
+    buf = BytesIO()
+    Image.fromarray(rgb).save(buf, format="JPEG", quality=95, exif=exif.tobytes())
+    return buf.getvalue()
+
+
+def _close(a: np.ndarray, b: np.ndarray) -> bool:
+    return a.shape == b.shape and int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max()) <= TOLERANCE
+
+
+def main():
+    data = _oriented_jpeg(6)
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "orientation6.jpg"
+        path.write_bytes(data)
+
+        expected_bgr = cv2.imread(str(path))                           # 회전 적용 → (W, H)
+        expected_pil = np.asarray(Image.open(path).convert("RGB"))     # 회전 없음 → (H, W)
+
+        for name, ctx in (("from_path", ImageContext.from_path(path)), ("from_bytes", ImageContext.from_bytes(data))):
+            checks = {
+                "bgr = cv2.imread (회전)": (ctx.bgr.shape[:2] == (WIDTH, HEIGHT) and _close(ctx.bgr, expected_bgr)),
+                "pil = Image.open (회전 없음)": (ctx.pil.size == (WIDTH, HEIGHT) and _close(np.asarray(ctx.pil), expected_pil)),
+            }
+            for check, ok in checks.items():
+                print(f"{'✅' if ok else '❌'} {name}: {check}")
+                failed = failed or not ok
+
+    # 회전 태그가 없으면 pil은 rgb plane 공유 (디코드 1회)
+    ctx = ImageContext.from_bytes(_oriented_jpeg(1))
+    ok = _close(np.asarray(ctx.pil), ctx.rgb)
+    print(f"{'✅' if ok else '❌'} orientation=1: pil == rgb")
+    failed = failed or not ok
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
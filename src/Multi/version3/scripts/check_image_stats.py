@@ -0,0 +1,262 @@
+# ============================================================
+# 🔍 Image Stats Parity + Speed Check
+# 공유 통계(utils/image_stats.py) 기반 색감 특징 / 품질 / 조명 / 픽셀 분석이
+# 이전 구현(분석기마다 따로 계산)과 같은 값을 내는지 비교
+# ============================================================
+#
+# 실행:
+#   python scripts/check_image_stats.py
+#
+# 환경변수:
+#   TRYANGLE_PARITY_IMAGES   비교할 이미지 수 (기본 32)
+#
+# 주요 색(K-Means, 랜덤 초기화)은 원래도 실행마다 값이 달라서
+# 클러스터 순서를 무시하고 허용 오차(DOMINANT_TOLERANCE)로만 비교한다.
+
+import os
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+import cv2
+from scipy.stats import skew, kurtosis
+from skimage.feature import local_binary_pattern
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = VERSION3_DIR
+while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
+    PROJECT_ROOT = PROJECT_ROOT.parent
+
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from utils.image_context import ImageContext
+from feature_extraction.feature_extractor_v2 import extract_color_extended
+from analysis.quality_analyzer import QualityAnalyzer
+from analysis.lighting_analyzer import LightingAnalyzer
+from analysis.image_analyzer import ImageAnalyzer
+
+NUM_IMAGES = int(os.environ.get("TRYANGLE_PARITY_IMAGES", "32"))
+
+TOLERANCE = 1e-4            # 상대 오차 (float32 히스토그램 정규화 차이 수준)
+DOMINANT_TOLERANCE = 0.05   # 주요 색 (0~1 정규화 BGR)
+COLOR_DOMINANT_SLICE = slice(144, 150)
+
+
+# ============================================================
+# 이전 구현 (비교 기준)
+# ============================================================
+def legacy_color_extended(img_bgr):
+    img = cv2.resize(img_bgr, (256, 256))
+    img_hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    img_lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    feats = []
+    for channel in cv2.split(img_hsv):
+        hist = cv2.calcHist([channel], [0], None, [32], [0, 256]).flatten()
+        feats.extend(hist / (hist.sum() + 1e-6))
+
+    for channel in cv2.split(img_lab):
+        flat = channel.flatten()
+        feats.extend([flat.mean(), flat.std(), skew(flat), kurtosis(flat)])
+
+    lbp = local_binary_pattern(gray, P=8, R=1, method='uniform')
+    lbp_hist, _ = np.histogram(lbp.ravel(), bins=10, range=(0, 10))
+    feats.extend(lbp_hist / (lbp_hist.sum() + 1e-6))
+
+    edges = cv2.Canny(gray, 50, 150)
+    feats.append(edges.sum() / edges.size)
+
+    h_channel = img_hsv[:, :, 0]
+    for low, high in [(0, 15), (15, 30), (30, 60), (60, 90), (90, 120), (120, 150), (150, 165)]:
+        mask = (h_channel >= low) & (h_channel < high)
+        if low == 0:
+            mask |= (h_channel >= 165) & (h_channel < 180)
+        feats.append(float(np.sum(mask) / h_channel.size))
+
+    brightness_hist, _ = np.histogram(gray.ravel(), bins=16, range=(0, 256))
+    feats.extend(brightness_hist / (brightness_hist.sum() + 1e-6))
+    feats.append(float(np.std(gray) / 128.0))
+    feats.append(float(cv2.Laplacian(gray, cv2.CV_64F).var()))
+
+    pixels = img.reshape(-1, 3).astype(np.float32)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+    _, _, centers = cv2.kmeans(pixels, 2, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+    feats.extend(centers.flatten() / 255.0)
+
+    return np.array(feats, dtype=np.float32)
+
+
+def legacy_quality(img_bgr):
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+    edges = cv2.Canny(gray, 50, 150)
+    hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
+    return {
+        "noise_variance": cv2.Laplacian(gray, cv2.CV_64F).var(),
+        "blur_score": cv2.Laplacian(gray, cv2.CV_64F).var(),
+        "edge_ratio": np.sum(edges > 0) / edges.size,
+        "v_std": hsv[:, :, 2].std(),
+    }
+
+
+def legacy_lighting(img_bgr):
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
+    return {
+        "left": gray[:, :w//2].mean(),
+        "right": gray[:, w//2:].mean(),
+        "top": gray[:h//2, :].mean(),
+        "bottom": gray[h//2:, :].mean(),
+        "fg": gray[h//4:3*h//4, w//4:3*w//4].mean(),
+        "bg": gray[:h//4, :].mean(),
+        "shadow": hist[0:30].sum() / hist.sum(),
+        "highlight": hist[225:256].sum() / hist.sum(),
+    }
+
+
+def legacy_pixels(img_bgr):
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+    hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
+    b, g, r = cv2.split(img_bgr)
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
+    total = gray.shape[0] * gray.shape[1]
+    return {
+        "brightness": np.mean(gray),
+        "saturation": np.mean(hsv[:, :, 1]) / 255.0,
+        "contrast": np.std(gray) / 128.0,
+        "r_ratio": np.mean(r) / (np.mean(g) + 1e-8),
+        "b_ratio": np.mean(b) / (np.mean(g) + 1e-8),
+        "highlight_clipping": np.sum(hist[250:]) / total,
+        "shadow_clipping": np.sum(hist[:5]) / total,
+    }
+
+
+# ============================================================
+# 현재 구현
+# ============================================================
+def current_values(ctx):
+    quality = QualityAnalyzer(ctx).analyze_all()
+    lighting = LightingAnalyzer(ctx)
+    direction = lighting.detect_light_direction()["brightness_map"]
+    backlight = lighting.detect_backlight()
+    hdr = lighting.detect_hdr()
+
+    # 모델 로드 없이 픽셀 분석만 (ImageAnalyzer.__init__은 특징 추출까지 수행)
+    analyzer = object.__new__(ImageAnalyzer)
+    analyzer.context = ctx
+    pixels = analyzer._analyze_pixels()
+
+    return {
+        "color": extract_color_extended(ctx),
+        "quality": {
+            "noise_variance": quality["noise"]["variance"],
+            "blur_score": quality["blur"]["blur_score"],
+            "edge_ratio": quality["sharpness"]["edge_ratio"],
+            "v_std": quality["contrast"]["std_dev"],
+        },
+        "lighting": {
+            **direction,
+            "fg": backlight["fg_brightness"],
+            "bg": backlight["bg_brightness"],
+            "shadow": hdr["shadow_ratio"],
+            "highlight": hdr["highlight_ratio"],
+        },
+        "pixels": {
+            "brightness": pixels["brightness"],
+            "saturation": pixels["saturation"],
+            "contrast": pixels["contrast"],
+            "r_ratio": pixels["rgb_ratio"]["r"],
+            "b_ratio": pixels["rgb_ratio"]["b"],
+            "highlight_clipping": pixels["histogram"]["highlight_clipping"],
+            "shadow_clipping": pixels["histogram"]["shadow_clipping"],
+        },
+    }
+
+
+# ============================================================
+# 비교
+# ============================================================
+def _rel_diff(a, b) -> float:
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    both_nan = np.isnan(a) & np.isnan(b)
+    diff = np.abs(a - b) / np.maximum(1.0, np.abs(b))
+    return float(np.max(np.where(both_nan, 0.0, diff)))
+
+
+def _dominant_diff(a, b) -> float:
+    """클러스터 2개 순서 무시"""
+    a = np.asarray(a).reshape(2, 3)
+    b = np.asarray(b).reshape(2, 3)
+    return float(min(np.abs(a - b).max(), np.abs(a[::-1] - b).max()))
+
+
+def _find_images():
+    for image_dir in [PROJECT_ROOT / "data" / "train_images", PROJECT_ROOT / "data" / "test_images"]:
+        if image_dir.exists():
+            images = sorted(p for p in image_dir.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+            if images:
+                return [str(p) for p in images[:NUM_IMAGES]]
+    return []
+
+
+def main():
+    paths = _find_images()
+    if not paths:
+        print("❌ data/train_images 또는 data/test_images에 이미지가 없습니다")
+        sys.exit(1)
+
+    print("="*60)
+    print(f"🔍 Image Stats Check ({len(paths)}장)")
+    print("="*60)
+
+    max_diff = {"color": 0.0, "dominant": 0.0, "quality": 0.0, "lighting": 0.0, "pixels": 0.0}
+    legacy_time = 0.0
+    current_time = 0.0
+
+    for path in paths:
+        img = cv2.imread(path)
+
+        start = time.perf_counter()
+        legacy = {
+            "color": legacy_color_extended(img),
+            "quality": legacy_quality(img),
+            "lighting": legacy_lighting(img),
+            "pixels": legacy_pixels(img),
+        }
+        legacy_time += time.perf_counter() - start
+
+        ctx = ImageContext.from_array(img, name=os.path.basename(path))
+        start = time.perf_counter()
+        current = current_values(ctx)
+        current_time += time.perf_counter() - start
+
+        color_mask = np.ones(150, dtype=bool)
+        color_mask[COLOR_DOMINANT_SLICE] = False
+        max_diff["color"] = max(max_diff["color"], _rel_diff(current["color"][color_mask], legacy["color"][color_mask]))
+        max_diff["dominant"] = max(max_diff["dominant"], _dominant_diff(
+            current["color"][COLOR_DOMINANT_SLICE], legacy["color"][COLOR_DOMINANT_SLICE]
+        ))
+        for group in ("quality", "lighting", "pixels"):
+            for key, value in legacy[group].items():
+                max_diff[group] = max(max_diff[group], _rel_diff(current[group][key], value))
+
+    print(f"\n⏱️  이전: {legacy_time * 1000 / len(paths):.1f}ms/장")
+    print(f"⏱️  현재: {current_time * 1000 / len(paths):.1f}ms/장 → {legacy_time / current_time:.2f}x")
+
+    print("\n📏 최대 상대 오차:")
+    passed = True
+    for name, diff in max_diff.items():
+        ok = diff <= (DOMINANT_TOLERANCE if name == "dominant" else TOLERANCE)
+        passed = passed and ok
+        print(f"   {'✅' if ok else '❌'} {name:<10} {diff:.2e}")
+
+    print("\n" + ("✅ 일치" if passed else "❌ 불일치"))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
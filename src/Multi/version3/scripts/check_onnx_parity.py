@@ -0,0 +1,209 @@
+# ============================================================
+# 🔍 ONNX Runtime Parity + Speed Check
+# torch backbone forward vs onnxruntime (FP32 / INT8) 특징 cosine 유사도,
+# 클러스터 배정 일치율, forward 시간 비교
+# ============================================================
+#
+# 실행 (먼저 python scripts/export_onnx.py):
+#   python scripts/check_onnx_parity.py
+#
+# 환경변수 (기본값):
+#   TRYANGLE_PARITY_IMAGES         비교할 이미지 수 (32)
+#   TRYANGLE_ONNX_MIN_COSINE       FP32 최소 cosine (0.999)
+#   TRYANGLE_ONNX_INT8_MIN_COSINE  INT8 최소 cosine (0.98)
+#   TRYANGLE_ONNX_MIN_AGREEMENT    최소 클러스터 일치율 (0.95)
+#
+# 같은 이미지 순서(data/train_images 정렬 후 앞에서부터)로 비교하므로 실행마다 결과가 같다.
+# INT8 파일이 없으면 FP32만 비교한다. contrastive는 클러스터 모델이 없어서 cosine만.
+
+import os
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+import torch
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = VERSION3_DIR
+while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
+    PROJECT_ROOT = PROJECT_ROOT.parent
+
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from utils.image_context import ImageContext
+from feature_extraction.onnx_backend import onnx_forward, onnx_path
+from feature_extraction.feature_extractor_v2 import (
+    extract_features_v2,
+    extract_midas_extended,
+    load_models,
+    preprocess_backbone_input,
+    _backbone_forwards,
+)
+from matching.cluster_matcher import match_cluster_from_features
+
+NUM_IMAGES = int(os.environ.get("TRYANGLE_PARITY_IMAGES", "32"))
+MIN_COSINE = {
+    "onnx": float(os.environ.get("TRYANGLE_ONNX_MIN_COSINE", "0.999")),
+    "onnx_int8": float(os.environ.get("TRYANGLE_ONNX_INT8_MIN_COSINE", "0.98")),
+}
+MIN_AGREEMENT = float(os.environ.get("TRYANGLE_ONNX_MIN_AGREEMENT", "0.95"))
+
+BACKBONES = ("clip", "openclip", "dino", "midas", "midas_reduced")
+# load_models 브랜치 (midas_reduced는 midas 가중치 공유)
+PRELOAD = ("clip", "openclip", "dino", "midas")
+HANDCRAFTED = ("color", "yolo_pose", "face")
+
+
+def _find_images():
+    for image_dir in [PROJECT_ROOT / "data" / "train_images", PROJECT_ROOT / "data" / "test_images"]:
+        if image_dir.exists():
+            images = sorted(p for p in image_dir.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+            if images:
+                return [str(p) for p in images[:NUM_IMAGES]]
+    return []
+
+
+def _cosine(a, b) -> float:
+    a = np.asarray(a, dtype=np.float64).ravel()
+    b = np.asarray(b, dtype=np.float64).ravel()
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
+
+
+def _variants():
+    """비교할 ONNX 변형 {이름: int8 여부} (파일이 있는 것만)"""
+    variants = {}
+    for name, int8 in (("onnx", False), ("onnx_int8", True)):
+        if all(onnx_path(model, int8).exists() for model in BACKBONES):
+            variants[name] = int8
+    return variants
+
+
+def _contrastive_runner():
+    """(전처리, torch forward, {변형: onnx forward}) 또는 체크포인트/ONNX가 없으면 None"""
+    try:
+        from feature_extraction.feature_extractor_v3 import get_contrastive_model
+        model, device, transform = get_contrastive_model()
+    except FileNotFoundError:
+        return None
+
+    onnx_runs = {
+        variant: onnx_forward("contrastive", int8)
+        for variant, int8 in _variants().items()
+        if onnx_path("contrastive", int8).exists()
+    }
+    if not onnx_runs:
+        return None
+
+    def preprocess(ctx):
+        return transform(ctx.pil).unsqueeze(0).to(device)
+
+    def torch_run(tensor):
+        with torch.no_grad():
+            return model.get_embeddings(tensor).cpu().numpy()
+
+    return preprocess, torch_run, onnx_runs
+
+
+def main():
+    paths = _find_images()
+    if not paths:
+        print("❌ data/train_images 또는 data/test_images에 이미지가 없습니다")
+        sys.exit(1)
+
+    variants = _variants()
+    if not variants:
+        print("❌ ONNX 모델이 없습니다 → python scripts/export_onnx.py")
+        sys.exit(1)
+
+    print("="*60)
+    print(f"🔍 ONNX Parity Check ({len(paths)}장, {', '.join(variants)})")
+    print("="*60)
+
+    models = load_models(preload=PRELOAD)
+    forwards = {"torch": _backbone_forwards(models, backend="torch")}
+    for variant, int8 in variants.items():
+        forwards[variant] = {name: onnx_forward(name, int8) for name in BACKBONES}
+    contrastive = _contrastive_runner()
+
+    cosines = {variant: {} for variant in variants}
+    agreement = {variant: 0 for variant in variants}
+    seconds = {backend: 0.0 for backend in forwards}
+    compared = 0
+
+    for path in paths:
+        try:
+            ctx = ImageContext.ensure(path)
+        except Exception as e:
+            print(f"⚠️  {os.path.basename(path)}: 로드 실패 ({e})")
+            continue
+
+        handcrafted = extract_features_v2(ctx, branches=HANDCRAFTED)
+        inputs = {name: preprocess_backbone_input(name, ctx, models) for name in BACKBONES}
+
+        outputs = {}
+        for backend, backend_forwards in forwards.items():
+            outputs[backend] = {}
+            for name in BACKBONES:
+                start = time.perf_counter()
+                with torch.no_grad():
+                    outputs[backend][name] = backend_forwards[name](inputs[name])[0]
+                seconds[backend] += time.perf_counter() - start
+
+        features = {
+            backend: {
+                **handcrafted,
+                **{name: out[name] for name in ("clip", "openclip", "dino")},
+                "midas": extract_midas_extended(out["midas"]),
+            }
+            for backend, out in outputs.items()
+        }
+        reference_cluster = match_cluster_from_features(features["torch"])["cluster_id"]
+
+        for variant in variants:
+            for name in BACKBONES:
+                cosines[variant].setdefault(name, []).append(_cosine(outputs[variant][name], outputs["torch"][name]))
+            cosines[variant].setdefault("midas_20d", []).append(
+                _cosine(features[variant]["midas"], features["torch"]["midas"])
+            )
+            if match_cluster_from_features(features[variant])["cluster_id"] == reference_cluster:
+                agreement[variant] += 1
+
+        if contrastive is not None:
+            preprocess, torch_run, onnx_runs = contrastive
+            tensor = preprocess(ctx)
+            reference = torch_run(tensor)
+            for variant, run in onnx_runs.items():
+                cosines[variant].setdefault("contrastive", []).append(_cosine(run(tensor), reference))
+
+        compared += 1
+
+    if compared == 0:
+        print("❌ 비교한 이미지가 없습니다")
+        sys.exit(1)
+
+    print(f"\n⏱️  backbone forward ({'+'.join(BACKBONES)}):")
+    for backend, total in seconds.items():
+        speedup = f" → {seconds['torch'] / total:.2f}x" if backend != "torch" and total > 0 else ""
+        print(f"   {backend:<10} {total * 1000 / compared:8.1f}ms/장{speedup}")
+
+    passed = True
+    for variant in variants:
+        print(f"\n📏 {variant} vs torch cosine (최소 {MIN_COSINE[variant]}):")
+        for name, values in cosines[variant].items():
+            ok = min(values) >= MIN_COSINE[variant]
+            passed = passed and ok
+            print(f"   {'✅' if ok else '❌'} {name:<12} min {min(values):.5f}  mean {np.mean(values):.5f}")
+
+        ratio = agreement[variant] / compared
+        ok = ratio >= MIN_AGREEMENT
+        passed = passed and ok
+        print(f"   {'✅' if ok else '❌'} {'cluster':<12} 일치 {agreement[variant]}/{compared} ({ratio:.1%}, 최소 {MIN_AGREEMENT:.0%})")
+
+    print("\n" + ("✅ 일치" if passed else "❌ 불일치"))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
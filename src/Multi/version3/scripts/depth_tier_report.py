@@ -0,0 +1,171 @@
+# ============================================================
+# 📏 Depth Tier Report
+# MiDaS depth 티어(full / reduced / small)별 속도와
+# full 대비 변화량 (20D depth 특징, depth_mean, 거리 피드백, 클러스터 배정) 측정
+# ============================================================
+#
+# 실행:
+#   python scripts/depth_tier_report.py
+#
+# 환경변수 (기본값):
+#   TRYANGLE_PARITY_IMAGES        비교할 이미지 수 (32)
+#   TRYANGLE_DEPTH_REPORT_TIERS   full과 비교할 티어 (reduced,small)
+#   TRYANGLE_DEPTH_REDUCED_SIZE   reduced 티어 입력 크기 (feature_extractor_v2, 256)
+#
+# 측정 항목 (티어별):
+#   - depth forward+통계 시간 (ms/장)
+#   - 20D midas 특징: full 대비 cosine, 차원별 평균 상대 오차
+#   - depth_mean (ImageAnalyzer → ImageComparator._compare_depth 입력) 상대 오차
+#   - 거리 피드백: 레퍼런스 full + 프레임 티어 조합의 action이
+#     둘 다 full일 때와 같은 비율 (이미지 쌍 i → i+1)
+#   - 클러스터 배정: midas만 티어 값으로 바꿨을 때 full과 같은 비율
+
+import os
+import sys
+import time
+import numpy as np
+from pathlib import Path
+from types import SimpleNamespace
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = VERSION3_DIR
+while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
+    PROJECT_ROOT = PROJECT_ROOT.parent
+
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from utils.image_context import ImageContext
+from feature_extraction.feature_extractor_v2 import (
+    DEPTH_TIERS,
+    DEPTH_REDUCED_SIZE,
+    extract_features_v2,
+    load_models,
+)
+from embedder.embedder import stack_features
+from matching.cluster_matcher import match_clusters_batch
+from analysis.image_comparator import ImageComparator
+
+NUM_IMAGES = int(os.environ.get("TRYANGLE_PARITY_IMAGES", "32"))
+TIERS = [
+    tier.strip() for tier in os.environ.get("TRYANGLE_DEPTH_REPORT_TIERS", "reduced,small").split(",")
+    if tier.strip() and tier.strip() != "full"
+]
+
+MIDAS_DIM_NAMES = (
+    ["depth_mean", "depth_std", "depth_min", "depth_max", "fg_ratio", "mg_ratio", "bg_ratio", "gradient_y", "gradient_x"]
+    + [f"grid_{i}" for i in range(9)]
+    + ["center_depth", "focus_sharpness"]
+)
+
+
+def _find_images():
+    for image_dir in [PROJECT_ROOT / "data" / "train_images", PROJECT_ROOT / "data" / "test_images"]:
+        if image_dir.exists():
+            images = sorted(p for p in image_dir.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+            if images:
+                return [str(p) for p in images[:NUM_IMAGES]]
+    return []
+
+
+def _cosine(a, b) -> float:
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
+
+
+def _depth_action(ref_depth_mean: float, user_depth_mean: float) -> str:
+    """ImageComparator._compare_depth와 같은 판정"""
+    comparator = SimpleNamespace(
+        ref_data={"depth": {"depth_mean": ref_depth_mean}},
+        user_data={"depth": {"depth_mean": user_depth_mean}},
+    )
+    return ImageComparator._compare_depth(comparator)["action"]
+
+
+def _timed_midas(ctx, tier):
+    start = time.perf_counter()
+    features = extract_features_v2(ctx, branches={"midas"}, depth_tier=tier)
+    return features["midas"], time.perf_counter() - start
+
+
+def main():
+    unknown = set(TIERS) - set(DEPTH_TIERS)
+    if unknown:
+        print(f"❌ 알 수 없는 티어: {sorted(unknown)} (가능: {', '.join(DEPTH_TIERS)})")
+        sys.exit(1)
+
+    paths = _find_images()
+    if not paths:
+        print("❌ data/train_images 또는 data/test_images에 이미지가 없습니다")
+        sys.exit(1)
+
+    print("="*60)
+    print(f"📏 Depth Tier Report ({len(paths)}장, full vs {', '.join(TIERS)}, reduced={DEPTH_REDUCED_SIZE}px)")
+    print("="*60)
+
+    depth_branches = {"full": "midas", "reduced": "midas", "small": "midas_small"}
+    load_models(preload={depth_branches[tier] for tier in ["full", *TIERS]})
+
+    full_features = []
+    midas = {tier: [] for tier in ["full", *TIERS]}
+    seconds = {tier: 0.0 for tier in ["full", *TIERS]}
+
+    for path in paths:
+        try:
+            ctx = ImageContext.ensure(path)
+        except Exception as e:
+            print(f"⚠️  {os.path.basename(path)}: 로드 실패 ({e})")
+            continue
+
+        features = extract_features_v2(ctx, depth_tier="full")
+        if features is None:
+            continue
+        full_features.append(features)
+
+        for tier in midas:
+            # 첫 호출 워밍업 영향을 줄이려고 모든 티어를 같은 방식(midas만 추출)으로 측정
+            vec, elapsed = _timed_midas(ctx, tier)
+            midas[tier].append(vec)
+            seconds[tier] += elapsed
+
+    count = len(full_features)
+    if count == 0:
+        print("❌ 분석한 이미지가 없습니다")
+        sys.exit(1)
+
+    full = np.stack(midas["full"])
+    full_branches = stack_features(full_features)
+    full_clusters = match_clusters_batch(full_branches)["cluster_ids"]
+    full_actions = [_depth_action(full[i, 0], full[i + 1, 0]) for i in range(count - 1)]
+
+    print(f"\n⏱️  depth (forward + 20D 통계):")
+    for tier, total in seconds.items():
+        speedup = f" → {seconds['full'] / total:.2f}x" if tier != "full" and total > 0 else ""
+        print(f"   {tier:<8} {total * 1000 / count:8.1f}ms/장{speedup}")
+
+    for tier in TIERS:
+        vecs = np.stack(midas[tier])
+        rel = np.abs(vecs - full) / np.maximum(np.abs(full), 1e-6)
+
+        cosines = [_cosine(a, b) for a, b in zip(vecs, full)]
+        clusters = match_clusters_batch({**full_branches, "midas": vecs})["cluster_ids"]
+        cluster_agreement = np.mean(clusters == full_clusters)
+
+        # 레퍼런스는 full, 프레임만 티어 적용 (배포 구성)
+        actions = [_depth_action(full[i, 0], vecs[i + 1, 0]) for i in range(count - 1)]
+        action_agreement = np.mean([a == b for a, b in zip(actions, full_actions)]) if actions else float("nan")
+
+        print(f"\n📊 {tier} vs full:")
+        print(f"   20D cosine            min {min(cosines):.4f}  mean {np.mean(cosines):.4f}")
+        print(f"   depth_mean 상대 오차   mean {rel[:, 0].mean():.2%}  max {rel[:, 0].max():.2%}")
+        print(f"   거리 피드백 일치       {action_agreement:.1%} ({count - 1}쌍)")
+        print(f"   클러스터 배정 일치     {cluster_agreement:.1%} ({count}장)")
+        print(f"   차원별 평균 상대 오차 (큰 순):")
+        order = np.argsort(-rel.mean(axis=0))
+        for dim in order[:5]:
+            print(f"      {MIDAS_DIM_NAMES[dim]:<16} {rel[:, dim].mean():.2%}")
+
+
+if __name__ == "__main__":
+    main()
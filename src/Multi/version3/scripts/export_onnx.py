@@ -0,0 +1,75 @@
+# ============================================================
+# 📦 ONNX Export
+# CLIP / OpenCLIP / DINOv2 / MiDaS (384 + reduced) / Contrastive ResNet50 → models/onnx/*.onnx
+# (+ 동적 INT8 양자화 *.int8.onnx)
+# ============================================================
+#
+# 실행:
+#   python scripts/export_onnx.py
+#
+# 환경변수 (기본값):
+#   TRYANGLE_ONNX_EXPORT     쉼표로 구분한 모델 (clip,openclip,dino,midas,midas_reduced,contrastive)
+#   TRYANGLE_ONNX_QUANTIZE   "0"이면 INT8 양자화 생략 (1)
+#   TRYANGLE_ONNX_DIR        출력 위치 (models/onnx)
+#   TRYANGLE_DEPTH_REDUCED_SIZE  midas_reduced 입력 크기 (256), 바꾸면 midas_reduced를 다시 내보낼 것
+#
+# 내보낸 뒤 scripts/check_onnx_parity.py로 torch 대비 값을 확인하고
+# TRYANGLE_BACKEND=onnx로 실행한다.
+
+import os
+import sys
+import time
+from pathlib import Path
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from feature_extraction.onnx_backend import ONNX_MODELS, ONNX_DIR, export_onnx, onnx_path
+
+TARGETS = [
+    name.strip() for name in os.environ.get("TRYANGLE_ONNX_EXPORT", ",".join(ONNX_MODELS)).split(",")
+    if name.strip()
+]
+QUANTIZE = os.environ.get("TRYANGLE_ONNX_QUANTIZE", "1") != "0"
+
+
+def _size_mb(path: Path) -> str:
+    return f"{path.stat().st_size / 1024 / 1024:.1f}MB" if path.exists() else "-"
+
+
+def main():
+    unknown = set(TARGETS) - set(ONNX_MODELS)
+    if unknown:
+        print(f"❌ 알 수 없는 모델: {sorted(unknown)} (가능: {', '.join(ONNX_MODELS)})")
+        sys.exit(1)
+
+    print("="*60)
+    print(f"📦 ONNX Export → {ONNX_DIR} (int8={'on' if QUANTIZE else 'off'})")
+    print("="*60)
+
+    failed = []
+    for name in TARGETS:
+        start = time.perf_counter()
+        try:
+            path = export_onnx(name, quantize=QUANTIZE)
+        except FileNotFoundError as e:
+            # contrastive 체크포인트가 없는 환경 등
+            print(f"⚠️  {name}: 건너뜀 ({e})")
+            continue
+        except Exception as e:
+            print(f"❌ {name}: {e}")
+            failed.append(name)
+            continue
+
+        int8_size = _size_mb(onnx_path(name, int8=True)) if QUANTIZE else "-"
+        print(f"✅ {name:<12} fp32 {_size_mb(path):>8}  int8 {int8_size:>8}  ({time.perf_counter() - start:.1f}초)")
+
+    if failed:
+        print(f"\n❌ 실패: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ 완료 → python scripts/check_onnx_parity.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# ============================================================
+# ⏱️ Import Time Report
+# python -X importtime 결과를 최상위 패키지별로 집계 + 회귀 검사
+# ============================================================
+#
+# 실행:
+#   python scripts/import_time_report.py
+#
+# 검사 (하나라도 실패하면 exit 1):
+#   1) 시작 시 import되면 안 되는 무거운 패키지(LAZY_PACKAGES)가 import됨
+#      → 해당 단계가 실행될 때 import하도록 되어 있어야 함
+#   2) 대상 모듈 전체 import 시간이 예산(TRYANGLE_IMPORT_BUDGET_MS)을 넘음
+#   3) 기준값 파일(TRYANGLE_IMPORT_BASELINE)보다 TRYANGLE_IMPORT_TOLERANCE 이상 느려짐
+#
+# 환경변수 (기본값):
+#   TRYANGLE_IMPORT_TARGETS        쉼표로 구분한 모듈 ("main" = backend/main.py)
+#   TRYANGLE_IMPORT_RUNS           대상별 반복 횟수, 가장 빠른 실행 사용 (3)
+#   TRYANGLE_IMPORT_TOP            출력할 패키지 수 (15)
+#   TRYANGLE_IMPORT_BUDGET_MS      대상별 import 시간 예산 (없음)
+#   TRYANGLE_IMPORT_BASELINE       기준값 JSON (scripts/import_time_baseline.json)
+#   TRYANGLE_IMPORT_TOLERANCE      기준값 대비 허용 증가율 (0.2)
+#   TRYANGLE_IMPORT_SAVE_BASELINE  "1"이면 이번 결과를 기준값으로 저장
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = VERSION3_DIR
+while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
+    PROJECT_ROOT = PROJECT_ROOT.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+TARGETS = [t.strip() for t in os.environ.get("TRYANGLE_IMPORT_TARGETS", "main").split(",") if t.strip()]
+RUNS = max(1, int(os.environ.get("TRYANGLE_IMPORT_RUNS", "3")))
+TOP = int(os.environ.get("TRYANGLE_IMPORT_TOP", "15"))
+BUDGET_MS = os.environ.get("TRYANGLE_IMPORT_BUDGET_MS")
+BASELINE_PATH = Path(os.environ.get("TRYANGLE_IMPORT_BASELINE", str(VERSION3_DIR / "scripts" / "import_time_baseline.json")))
+TOLERANCE = float(os.environ.get("TRYANGLE_IMPORT_TOLERANCE", "0.2"))
+SAVE_BASELINE = os.environ.get("TRYANGLE_IMPORT_SAVE_BASELINE", "0") == "1"
+
+# 분석 단계에서만 필요한 패키지: 서버/CLI 시작 시 import되면 회귀
+LAZY_PACKAGES = (
+    "clip", "open_clip", "timm", "transformers", "ultralytics", "mediapipe",
+    "tensorflow", "tflite_runtime", "scipy", "skimage", "sklearn", "umap", "joblib",
+)
+
+
+# ============================================================
+# -X importtime 실행 + 파싱
+# ============================================================
+def _run_importtime(target: str) -> str:
+    """대상 모듈을 새 인터프리터에서 import하고 stderr(importtime 로그) 반환"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in [str(VERSION3_DIR), str(VERSION3_DIR / "utils"), env.get("PYTHONPATH", "")] if p
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=str(BACKEND_DIR), env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(line for line in proc.stderr.splitlines() if not line.startswith("import time:"))
+        raise RuntimeError(f"import {target} 실패:\n{tail[-2000:]}")
+    return proc.stderr
+
+
+def _parse(stderr: str, target: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Returns:
+        (대상 모듈 누적 ms, {최상위 패키지: self ms 합}, import된 모듈 목록)
+    """
+    per_package: Dict[str, float] = {}
+    modules = []
+    total_ms = 0.0
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 헤더
+
+        self_us = int(parts[0])
+        cumulative_us = int(parts[1])
+        module = parts[2].strip()
+        modules.append(module)
+
+        package = module.split(".")[0]
+        per_package[package] = per_package.get(package, 0.0) + self_us / 1000.0
+        if module == target:
+            total_ms = cumulative_us / 1000.0
+
+    return total_ms, per_package, modules
+
+
+def measure(target: str) -> Dict:
+    best = None
+    for _ in range(RUNS):
+        total_ms, per_package, modules = _parse(_run_importtime(target), target)
+        if best is None or total_ms < best["total_ms"]:
+            best = {"total_ms": total_ms, "packages": per_package, "modules": modules}
+    return best
+
+
+# ============================================================
+# 리포트 + 검사
+# ============================================================
+def _load_baseline() -> Optional[Dict]:
+    if BASELINE_PATH.exists():
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+def main():
+    print("="*60)
+    print(f"⏱️  Import Time Report (targets={','.join(TARGETS)}, runs={RUNS})")
+    print("="*60)
+
+    baseline = _load_baseline()
+    results = {}
+    failures = []
+
+    for target in TARGETS:
+        try:
+            result = measure(target)
+        except RuntimeError as e:
+            print(f"\n❌ {e}")
+            failures.append(f"{target}: import 실패")
+            continue
+        results[target] = result
+
+        print(f"\n📦 {target}: {result['total_ms']:.0f}ms (모듈 {len(result['modules'])}개)")
+        ranked = sorted(result["packages"].items(), key=lambda kv: -kv[1])
+        for package, ms in ranked[:TOP]:
+            share = ms / result["total_ms"] * 100 if result["total_ms"] > 0 else 0.0
+            print(f"   {package:<28} {ms:8.1f}ms  {share:5.1f}%")
+
+        # 1) 무거운 패키지가 시작 시 import됨
+        eager = sorted({m.split(".")[0] for m in result["modules"]} & set(LAZY_PACKAGES))
+        if eager:
+            failures.append(f"{target}: 시작 시 import됨 → {', '.join(eager)}")
+
+        # 2) 예산
+        if BUDGET_MS is not None and result["total_ms"] > float(BUDGET_MS):
+            failures.append(f"{target}: {result['total_ms']:.0f}ms > 예산 {float(BUDGET_MS):.0f}ms")
+
+        # 3) 기준값 대비
+        if baseline and target in baseline:
+            limit = baseline[target] * (1.0 + TOLERANCE)
+            if result["total_ms"] > limit:
+                failures.append(
+                    f"{target}: {result['total_ms']:.0f}ms > 기준 {baseline[target]:.0f}ms (+{TOLERANCE:.0%})"
+                )
+
+    if SAVE_BASELINE and results:
+        saved = dict(baseline or {})
+        saved.update({target: round(r["total_ms"], 1) for target, r in results.items()})
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(saved, f, indent=2)
+        print(f"\n💾 기준값 저장: {BASELINE_PATH}")
+
+    print()
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ 통과")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# ============================================================
+# 📦 TryAngle Embedder Compile
+# RobustScaler 5개 + 블록 가중치 + MLP 투영 + KMeans 중심 → embedder_compiled.npz
+# ============================================================
+#
+# 실행 (distill_umap.py로 umap_128d_mlp.npz를 만든 뒤):
+#   python training/compile_embedder.py
+#
+# 출력: feature_models/embedder_compiled.npz (embedder/compiled.py)
+#   → 서빙 시 embedder / cluster_matcher가 자동으로 사용 (TRYANGLE_EMBEDDER_ARTIFACT=auto)
+#
+# scaler / weights.json / MLP / KMeans 중 하나라도 바꾸면 다시 실행할 것.
+# 빌드 후 parquet 코퍼스로 기존 경로(scaler 5개 + MLP + KMeans.predict)와 비교해서
+# 임베딩 오차와 클러스터 일치를 확인한다.
+
+import os
+import sys
+import time
+import numpy as np
+import polars as pl
+import joblib
+from pathlib import Path
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = VERSION3_DIR
+while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
+    PROJECT_ROOT = PROJECT_ROOT.parent
+
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from embedder.embedder import (
+    FEATURE_MODEL_DIR, FUSION_BLOCKS, BRANCH_DIMS, UMAP_MLP_PATH, COMPILED_PATH,
+    fuse_features, get_embedder_weights, _load_scalers,
+)
+from embedder.projection import MLPProjection
+from embedder.compiled import CompiledEmbedder
+
+# ============================================================
+# 설정
+# ============================================================
+INPUT_PARQUET = PROJECT_ROOT / "feature_models" / "features" / "fusion_features_v2.parquet"
+KMEANS_MODEL_PATH = FEATURE_MODEL_DIR / "kmeans_model.pkl"
+
+VERIFY_SAMPLES = 500
+MAX_EMBED_DIFF = 1e-3   # float32 affine vs float64 scaler 차이 수준
+
+
+def build(scalers, weights, projection, centroids) -> CompiledEmbedder:
+    """scaler / 가중치를 융합 레이아웃 전체의 (center, multiplier)로 합침"""
+    branches, dims, active = [], [], []
+    centers, multipliers = [], []
+
+    for block, (block_branches, dim) in FUSION_BLOCKS.items():
+        if sum(BRANCH_DIMS[name] for name in block_branches) != dim:
+            raise ValueError(f"❌ {block} 블록 차원 불일치")
+
+        weight = float(weights.get(block, 0.0))
+        scaler = scalers.get(f"scaler_{block}")
+
+        # RobustScaler: (x - center_) / scale_  (with_centering / with_scaling=False면 None)
+        center = np.zeros(dim)
+        scale = np.ones(dim)
+        if scaler is not None:
+            if scaler.center_ is not None:
+                center = np.asarray(scaler.center_, dtype=np.float64)
+            if scaler.scale_ is not None:
+                scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        centers.append(center if weight != 0.0 else np.zeros(dim))
+        multipliers.append(weight / scale if weight != 0.0 else np.zeros(dim))
+
+        for name in block_branches:
+            branches.append(name)
+            dims.append(BRANCH_DIMS[name])
+            active.append(weight != 0.0)
+
+    return CompiledEmbedder(
+        branches=branches,
+        dims=dims,
+        active=active,
+        center=np.concatenate(centers),
+        multiplier=np.concatenate(multipliers),
+        projection=projection,
+        centroids=centroids,
+        block_weights={block: float(weights.get(block, 0.0)) for block in FUSION_BLOCKS},
+    )
+
+
+def main():
+    print("="*60)
+    print("📦 TryAngle Embedder Compile")
+    print("="*60)
+
+    if not os.path.exists(UMAP_MLP_PATH):
+        print(f"❌ {UMAP_MLP_PATH} 없음 → 먼저 python training/distill_umap.py")
+        print("   (UMAP.transform은 학습 데이터가 필요해서 .npz로 합칠 수 없음)")
+        sys.exit(1)
+
+    # --------------------------------------------------------
+    # Step 1: 빌드
+    # --------------------------------------------------------
+    start = time.perf_counter()
+    scalers = _load_scalers()
+    weights = get_embedder_weights()
+    projection = MLPProjection.load(UMAP_MLP_PATH)
+    kmeans = joblib.load(KMEANS_MODEL_PATH)
+    joblib_load_ms = (time.perf_counter() - start) * 1000
+
+    compiled = build(scalers, weights, projection, kmeans.cluster_centers_)
+    compiled.save(COMPILED_PATH)
+    print(f"💾 {COMPILED_PATH} ({os.path.getsize(COMPILED_PATH) / 1e6:.1f}MB, {compiled.dim}D → "
+          f"{compiled.projection.n_components}D, {len(compiled.centroids)} clusters)")
+    print(f"   active branches: {sorted(compiled.active_branches)}")
+
+    # --------------------------------------------------------
+    # Step 2: 기존 경로와 비교
+    # --------------------------------------------------------
+    print(f"\n🔍 Verifying against scaler + MLP + KMeans ({VERIFY_SAMPLES} samples)...")
+
+    start = time.perf_counter()
+    loaded = CompiledEmbedder.load(COMPILED_PATH)
+    compiled_load_ms = (time.perf_counter() - start) * 1000
+
+    df = pl.read_parquet(INPUT_PARQUET).head(VERIFY_SAMPLES)
+    branch_arrays = {name: np.vstack(df[name].to_list()) for name in BRANCH_DIMS if name in df.columns}
+
+    reference = projection.transform(fuse_features(branch_arrays, scalers, weights))
+    reference_clusters = kmeans.predict(reference.astype(np.float64))
+
+    result = loaded.transform(branch_arrays)
+    result_clusters = loaded.predict(result)
+
+    embed_diff = float(np.abs(result - reference).max())
+    agreement = float(np.mean(result_clusters == reference_clusters))
+
+    row = {name: array[:1] for name, array in branch_arrays.items()}
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        projection.transform(fuse_features(row, scalers, weights))
+    reference_ms = (time.perf_counter() - start) * 1000 / runs
+    start = time.perf_counter()
+    for _ in range(runs):
+        loaded.transform(row)
+    compiled_ms = (time.perf_counter() - start) * 1000 / runs
+
+    print(f"   임베딩 최대 절대 오차: {embed_diff:.2e}")
+    print(f"   클러스터 일치:         {agreement:.1%}")
+    print(f"   로드 시간:   joblib {joblib_load_ms:.0f}ms → compiled {compiled_load_ms:.1f}ms")
+    print(f"   1장 임베딩:  {reference_ms:.3f}ms → {compiled_ms:.3f}ms")
+
+    if embed_diff > MAX_EMBED_DIFF or agreement < 1.0:
+        print("\n❌ 기존 경로와 결과가 다릅니다 → 아티팩트 삭제")
+        os.remove(COMPILED_PATH)
+        sys.exit(1)
+
+    print("\n🎉 완료! (TRYANGLE_EMBEDDER_ARTIFACT=joblib이면 기존 경로 사용)")
+
+
+if __name__ == "__main__":
+    main()
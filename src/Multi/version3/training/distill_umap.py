@@ -0,0 +1,183 @@
+# ============================================================
+# 🧪 TryAngle UMAP → MLP Distillation
+# 학습 코퍼스의 UMAP 128D 좌표를 재현하는 MLP 학습 + 충실도 리포트
+# ============================================================
+#
+# 실행 (retrain_clustering.py 결과를 feature_models/에 배포한 뒤):
+#   python training/distill_umap.py
+#
+# 입력:  fusion_features_v2.parquet + feature_models/의 scaler / weights.json /
+#        umap_128d_model.joblib (embedding_ = 학습 코퍼스 UMAP 좌표) / kmeans_model.pkl
+# 출력:  feature_models/umap_128d_mlp.npz        (embedder가 자동으로 사용, embedder/projection.py)
+#        feature_models/umap_128d_mlp_report.json
+#
+# 검증 세트 클러스터 일치율이 MIN_CLUSTER_AGREEMENT보다 낮으면 저장하지 않는다
+# (embedder는 TRYANGLE_EMBED_PROJECTION=auto일 때 파일이 있으면 MLP를 쓰므로).
+
+import os
+import sys
+import json
+import time
+import numpy as np
+import polars as pl
+import joblib
+from pathlib import Path
+from sklearn.neural_network import MLPRegressor
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = VERSION3_DIR
+while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
+    PROJECT_ROOT = PROJECT_ROOT.parent
+
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from embedder.embedder import (
+    FEATURE_MODEL_DIR, UMAP_MODEL_PATH, UMAP_MLP_PATH,
+    fuse_features, get_embedder_weights, _load_scalers,
+)
+from embedder.projection import MLPProjection
+
+# ============================================================
+# 설정
+# ============================================================
+INPUT_PARQUET = PROJECT_ROOT / "feature_models" / "features" / "fusion_features_v2.parquet"
+KMEANS_MODEL_PATH = FEATURE_MODEL_DIR / "kmeans_model.pkl"
+REPORT_PATH = FEATURE_MODEL_DIR / "umap_128d_mlp_report.json"
+
+HIDDEN_LAYERS = (512, 256)
+VALIDATION_RATIO = 0.1
+MIN_CLUSTER_AGREEMENT = 0.95
+SPEED_RUNS = 20
+
+BRANCHES = ("clip", "openclip", "dino", "color", "midas", "yolo_pose", "face")
+
+
+def _per_call_ms(fn, x) -> float:
+    """1장씩 호출 평균 시간 (ms)"""
+    start = time.perf_counter()
+    for i in range(SPEED_RUNS):
+        fn(x[i % len(x)].reshape(1, -1))
+    return (time.perf_counter() - start) * 1000 / SPEED_RUNS
+
+
+def main():
+    print("="*60)
+    print("🧪 TryAngle UMAP → MLP Distillation")
+    print("="*60)
+
+    # --------------------------------------------------------
+    # Step 1: 학습 코퍼스 융합 벡터 (embedder와 같은 scaler / 가중치)
+    # --------------------------------------------------------
+    print("\n📂 Loading features from parquet...")
+    df = pl.read_parquet(INPUT_PARQUET)
+    branch_arrays = {name: np.vstack(df[name].to_list()) for name in BRANCHES if name in df.columns}
+
+    # embedder scaler만 사용 (투영 모델은 아래에서 UMAP을 직접 로드)
+    fusion = fuse_features(branch_arrays, _load_scalers(), get_embedder_weights()).astype(np.float32)
+    print(f"✅ Fusion shape: {fusion.shape}")
+
+    # --------------------------------------------------------
+    # Step 2: UMAP 좌표 (타깃) + KMeans
+    # --------------------------------------------------------
+    umap_model = joblib.load(UMAP_MODEL_PATH)
+    kmeans = joblib.load(KMEANS_MODEL_PATH)
+    target = np.asarray(umap_model.embedding_, dtype=np.float32)
+
+    if len(target) != len(fusion):
+        print(f"❌ UMAP 학습 샘플 수({len(target)})와 parquet 행 수({len(fusion)})가 다릅니다")
+        print("   retrain_clustering.py와 같은 parquet으로 실행하세요")
+        sys.exit(1)
+
+    rng = np.random.default_rng(42)
+    order = rng.permutation(len(fusion))
+    n_val = max(1, int(len(fusion) * VALIDATION_RATIO))
+    val_idx, train_idx = order[:n_val], order[n_val:]
+
+    # --------------------------------------------------------
+    # Step 3: MLP 학습
+    # --------------------------------------------------------
+    print(f"\n🔧 Training MLP {fusion.shape[1]} → {' → '.join(map(str, HIDDEN_LAYERS))} → {target.shape[1]} "
+          f"(train {len(train_idx)}, val {len(val_idx)})...")
+
+    mlp = MLPRegressor(
+        hidden_layer_sizes=HIDDEN_LAYERS,
+        activation="relu",
+        alpha=1e-4,
+        learning_rate_init=1e-3,
+        max_iter=500,
+        early_stopping=True,
+        random_state=42,
+        verbose=False
+    )
+    mlp.fit(fusion[train_idx], target[train_idx])
+    projection = MLPProjection.from_sklearn(mlp)
+    print(f"✅ Trained ({mlp.n_iter_} epochs)")
+
+    # --------------------------------------------------------
+    # Step 4: 충실도 리포트
+    # --------------------------------------------------------
+    print("\n📊 Fidelity (validation set)...")
+
+    x_val = fusion[val_idx]
+    mlp_val = projection.transform(x_val)
+    umap_val = umap_model.transform(x_val)   # 현재 서빙 경로 (UMAP.transform)
+    fit_val = target[val_idx]                # 학습 시 UMAP 좌표 (KMeans 학습 입력)
+
+    spread = float(np.mean(np.linalg.norm(target - target.mean(axis=0), axis=1)))
+    mlp_dist = np.linalg.norm(mlp_val - fit_val, axis=1)
+    umap_dist = np.linalg.norm(umap_val - fit_val, axis=1)
+    mlp_vs_transform = np.linalg.norm(mlp_val - umap_val, axis=1)
+
+    labels_fit = kmeans.predict(fit_val)
+    labels_mlp = kmeans.predict(mlp_val)
+    labels_umap = kmeans.predict(umap_val)
+
+    report = {
+        "hidden_layers": list(HIDDEN_LAYERS),
+        "epochs": int(mlp.n_iter_),
+        "train_samples": int(len(train_idx)),
+        "val_samples": int(len(val_idx)),
+        "embedding_spread": spread,
+        "mlp_vs_fit_distance_mean": float(mlp_dist.mean()),
+        "mlp_vs_fit_distance_p95": float(np.percentile(mlp_dist, 95)),
+        "umap_transform_vs_fit_distance_mean": float(umap_dist.mean()),
+        "mlp_vs_umap_transform_distance_mean": float(mlp_vs_transform.mean()),
+        "cluster_agreement_mlp_vs_fit": float(np.mean(labels_mlp == labels_fit)),
+        "cluster_agreement_umap_transform_vs_fit": float(np.mean(labels_umap == labels_fit)),
+        "cluster_agreement_mlp_vs_umap_transform": float(np.mean(labels_mlp == labels_umap)),
+        "umap_transform_ms": _per_call_ms(umap_model.transform, x_val),
+        "mlp_transform_ms": _per_call_ms(projection.transform, x_val),
+        "umap_model_bytes": os.path.getsize(UMAP_MODEL_PATH),
+        "mlp_model_bytes": int(sum(w.nbytes + b.nbytes for w, b in zip(projection.weights, projection.biases))),
+    }
+
+    print(f"   UMAP 좌표 평균 반경:            {spread:.4f}")
+    print(f"   L2 거리 (MLP vs 학습 좌표):      mean {report['mlp_vs_fit_distance_mean']:.4f}  p95 {report['mlp_vs_fit_distance_p95']:.4f}")
+    print(f"   L2 거리 (UMAP.transform vs 학습): mean {report['umap_transform_vs_fit_distance_mean']:.4f}")
+    print(f"   L2 거리 (MLP vs UMAP.transform): mean {report['mlp_vs_umap_transform_distance_mean']:.4f}")
+    print(f"   클러스터 일치 (MLP vs 학습):      {report['cluster_agreement_mlp_vs_fit']:.1%}")
+    print(f"   클러스터 일치 (UMAP.transform vs 학습): {report['cluster_agreement_umap_transform_vs_fit']:.1%}")
+    print(f"   클러스터 일치 (MLP vs UMAP.transform): {report['cluster_agreement_mlp_vs_umap_transform']:.1%}")
+    print(f"   1장 투영 시간: UMAP {report['umap_transform_ms']:.2f}ms → MLP {report['mlp_transform_ms']:.3f}ms")
+    print(f"   모델 크기:     UMAP {report['umap_model_bytes'] / 1e6:.1f}MB → MLP {report['mlp_model_bytes'] / 1e6:.1f}MB")
+
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report → {REPORT_PATH}")
+
+    # --------------------------------------------------------
+    # Step 5: 저장 (충실도 기준 통과 시)
+    # --------------------------------------------------------
+    if report["cluster_agreement_mlp_vs_fit"] < MIN_CLUSTER_AGREEMENT:
+        print(f"\n❌ 클러스터 일치율 {report['cluster_agreement_mlp_vs_fit']:.1%} < {MIN_CLUSTER_AGREEMENT:.0%} → 저장하지 않음")
+        sys.exit(1)
+
+    projection.save(UMAP_MLP_PATH)
+    print(f"💾 MLP → {UMAP_MLP_PATH}")
+    print("\n🎉 완료! (TRYANGLE_EMBED_PROJECTION=umap이면 기존 UMAP 사용)")
+    print("   → python training/compile_embedder.py로 embedder_compiled.npz 다시 빌드")
+
+
+if __name__ == "__main__":
+    main()
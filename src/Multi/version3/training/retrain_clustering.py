@@ -13,6 +13,13 @@ from sklearn.preprocessing import RobustScaler
 from umap import UMAP
 from sklearn.cluster import KMeans
 from sklearn.metrics import silhouette_score
+import sys
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from matching.centroid_tree import build_centroid_tree
 
 # ============================================================
 # 경로 설정
@@ -27,6 +34,10 @@ OUTPUT_DIR = PROJECT_ROOT / "feature_models" / "feature_models_v3"
 # 🔥 최적 K 설정
 K = 20   # <-- Auto Optimizer 결과
 
+# 세부 스타일 트리: K개 스타일 아래 전체 TREE_K_FINE개 fine 중심 (0이면 생략)
+# 배정 지연 / 정확도: python scripts/benchmark_centroid_tree.py
+TREE_K_FINE = 400
+
 # 🔥 최적 가중치(original_style)
 WEIGHTS = {
     "clip": 0.30,
@@ -130,6 +141,18 @@ def main():
     centroids = kmeans.cluster_centers_
     
     print("✅ KMeans complete")
+
+    # --------------------------------------------------------
+    # Step 5.5: 세부 스타일 트리 (coarse = 위 K개 중심)
+    # --------------------------------------------------------
+    tree = None
+    if TREE_K_FINE > 0:
+        print(f"\n🌳 Centroid tree (K={K} → fine {TREE_K_FINE})...")
+        tree = build_centroid_tree(
+            fusion_128d, TREE_K_FINE,
+            coarse_centroids=centroids, coarse_labels=clusters, random_state=42
+        )
+        print(f"✅ Tree: {tree.n_coarse} coarse / {tree.n_fine} fine")
     
     # --------------------------------------------------------
     # Step 6: Silhouette
@@ -153,11 +176,15 @@ def main():
     for feat_name, scaler in scalers.items():
         joblib.dump(scaler, os.path.join(OUTPUT_DIR, f"scaler_{feat_name}.joblib"))
     
+    # UMAP을 다시 학습했으면 배포 후 training/distill_umap.py로 MLP(umap_128d_mlp.npz)도 다시 증류할 것
+    # (그 다음 training/compile_embedder.py로 embedder_compiled.npz도 다시 빌드)
     joblib.dump(umap_model, os.path.join(OUTPUT_DIR, "umap_128d_model.joblib"))
     joblib.dump(kmeans, os.path.join(OUTPUT_DIR, "kmeans_model.pkl"))
     
     np.save(os.path.join(OUTPUT_DIR, "kmeans_centroids.npy"), centroids)
     np.save(os.path.join(OUTPUT_DIR, "fusion_128d.npy"), fusion_128d)
+    if tree is not None:
+        tree.save(os.path.join(OUTPUT_DIR, "centroid_tree.npz"))
     
     # cluster info json
     cluster_info = {
@@ -169,7 +196,7 @@ def main():
     with open(os.path.join(OUTPUT_DIR, "cluster_info.json"), "w", encoding="utf-8") as f:
         json.dump(cluster_info, f, indent=2, ensure_ascii=False)
     
-    # weight 저장
+    # weight 저장 (embedder/embedder.py가 읽음: 가중치 0인 블록의 브랜치는 추출 생략)
     with open(os.path.join(OUTPUT_DIR, "weights.json"), "w") as f:
         json.dump(WEIGHTS, f, indent=2)
     
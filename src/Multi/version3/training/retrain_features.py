@@ -20,7 +20,7 @@ while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exist
 if str(VERSION3_DIR) not in sys.path:
     sys.path.append(str(VERSION3_DIR))
 
-from feature_extraction.feature_extractor_v2 import extract_features_v2
+from feature_extraction.batch_extractor import iter_features_v2_batch, BATCH_SIZE, NUM_PROCESSES
 
 # ============================================================
 # 경로 설정
@@ -49,43 +49,42 @@ def main():
     # --------------------------------------------------------
     # Step 2: 각 이미지에서 v2 특징 추출
     # --------------------------------------------------------
-    print("\n🔧 Extracting features v2...")
+    # 배치 추출 (디코드/전처리 prefetch + backbone 배치 forward + 수작업 특징 멀티프로세스)
+    print(f"\n🔧 Extracting features v2 (batch={BATCH_SIZE}, processes={NUM_PROCESSES})...")
     
     results = []
     failed_count = 0
     
-    for filename in tqdm(filenames, desc="Processing"):
-        img_path = IMG_DIR / filename
-        
-        if not img_path.exists():
+    existing = []
+    for filename in filenames:
+        if (IMG_DIR / filename).exists():
+            existing.append(filename)
+        else:
             print(f"\n⚠️ Image not found: {filename}")
             failed_count += 1
-            continue
+    
+    paths = [str(IMG_DIR / filename) for filename in existing]
+    
+    # 이미지별 실패는 feat=None으로 나옴 (배치 forward 실패도 이미지별로 재시도됨)
+    for index, feat in tqdm(iter_features_v2_batch(paths), total=len(paths), desc="Processing"):
+        filename = existing[index]
         
-        try:
-            feat = extract_features_v2(str(img_path))
-            
-            if feat is None:
-                print(f"\n❌ Feature extraction failed: {filename}")
-                failed_count += 1
-                continue
-            
-            # 1D로 flatten
-            results.append({
-                "filename": filename,
-                "clip": feat["clip"],
-                "openclip": feat["openclip"],
-                "dino": feat["dino"],
-                "midas": feat["midas"],
-                "color": feat["color"],
-                "yolo_pose": feat["yolo_pose"],
-                "face": feat["face"],
-            })
-            
-        except Exception as e:
-            print(f"\n❌ Error processing {filename}: {e}")
+        if feat is None:
+            print(f"\n❌ Feature extraction failed: {filename}")
             failed_count += 1
             continue
+        
+        # 1D로 flatten
+        results.append({
+            "filename": filename,
+            "clip": feat["clip"],
+            "openclip": feat["openclip"],
+            "dino": feat["dino"],
+            "midas": feat["midas"],
+            "color": feat["color"],
+            "yolo_pose": feat["yolo_pose"],
+            "face": feat["face"],
+        })
     
     print(f"\n✅ Extracted {len(results)} / {len(filenames)} images")
     print(f"❌ Failed: {failed_count}")
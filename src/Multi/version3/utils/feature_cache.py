@@ -4,11 +4,18 @@
 # ============================================================
 
 import hashlib
+import os
+import tempfile
 import numpy as np
 from pathlib import Path
 from typing import Dict, Optional
 import json
 
+from utils.metrics import record_cache
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
 
 class FeatureCache:
     """
@@ -33,27 +40,31 @@ class FeatureCache:
             'total_saved_time': 0.0  # 초 단위
         }
 
-    def _compute_hash(self, image_path: str) -> str:
+    def _compute_hash(self, image) -> str:
         """
         이미지 파일의 SHA256 해시 계산
 
         파일 내용 기반이므로 같은 파일이면 같은 해시
+        ImageContext면 이미 메모리에 있는 바이트로 계산 (디스크 읽기 없음)
         """
-        with open(image_path, 'rb') as f:
+        if hasattr(image, 'content_hash'):
+            return image.content_hash
+
+        with open(image, 'rb') as f:
             file_hash = hashlib.sha256(f.read()).hexdigest()
         return file_hash[:16]  # 처음 16자만 사용
 
-    def get(self, image_path: str) -> Optional[Dict]:
+    def get(self, image) -> Optional[Dict]:
         """
         캐시에서 특징 로드
 
         Args:
-            image_path: 이미지 경로
+            image: 이미지 경로 또는 ImageContext
 
         Returns:
             캐시된 특징 dict (없으면 None)
         """
-        img_hash = self._compute_hash(image_path)
+        img_hash = self._compute_hash(image)
         cache_path = self.cache_dir / f"{img_hash}.npz"
 
         if cache_path.exists():
@@ -82,19 +93,27 @@ class FeatureCache:
         self.stats['misses'] += 1
         return None
 
-    def set(self, image_path: str, features: Dict):
+    def set(self, image, features: Dict):
         """
         특징을 캐시에 저장
 
         Args:
-            image_path: 이미지 경로
+            image: 이미지 경로 또는 ImageContext
             features: 저장할 특징 dict
         """
-        img_hash = self._compute_hash(image_path)
+        img_hash = self._compute_hash(image)
         cache_path = self.cache_dir / f"{img_hash}.npz"
 
         # dict → npz 저장
-        np.savez_compressed(cache_path, **features)
+        # 같은 디렉토리 임시 파일에 다 쓴 뒤 rename (다른 스레드/워커가 쓰다 만 파일을 읽지 않도록)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{img_hash}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, **features)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
 
     def clear(self):
         """캐시 전체 삭제"""
@@ -161,36 +180,63 @@ class CachedFeatureExtractor:
     def __init__(self, cache_dir: str = "./cache/features"):
         self.cache = FeatureCache(cache_dir=cache_dir)
 
-    def extract(self, image_path: str, force_recompute: bool = False):
+    def extract(self, image, force_recompute: bool = False, branches=None, depth_tier=None):
         """
         캐시 우선 특징 추출
 
         Args:
-            image_path: 이미지 경로
+            image: 이미지 경로 또는 ImageContext
             force_recompute: True면 캐시 무시하고 재계산
+            branches: 필요한 브랜치 집합 (None이면 전체).
+                      캐시에 일부만 있으면 빠진 브랜치만 추출해서 합쳐 저장
+            depth_tier: midas depth 티어 (None이면 DEPTH_TIER).
+                        midas 특징은 티어별로 따로 저장 (키: "midas" / "midas_reduced" / "midas_small")
 
         Returns:
-            특징 dict
+            특징 dict (최소한 요청한 브랜치 포함, midas는 요청 티어 값)
         """
-        # 캐시 체크
+        # feature_extractor_v2.extract_features_v2() 호출
+        from feature_extraction.feature_extractor_v2 import (
+            extract_features_v2, FEATURE_BRANCHES, DEPTH_TIER, DEPTH_TIER_BACKBONES
+        )
+
+        name = getattr(image, 'name', image)
+        needed = set(FEATURE_BRANCHES) if branches is None else set(branches)
+        depth_tier = DEPTH_TIER if depth_tier is None else depth_tier
+        midas_key = DEPTH_TIER_BACKBONES[depth_tier]
+
+        # 캐시 체크 (stored: 파일 그대로, cached: 요청 티어의 midas를 "midas"로)
+        stored = {}
+        cached = {}
         if not force_recompute:
-            cached = self.cache.get(image_path)
-            if cached is not None:
-                print(f"♻️  Using cached features ({image_path})")
+            stored = self.cache.get(image) or {}
+            cached = {key: value for key, value in stored.items() if key in FEATURE_BRANCHES and key != "midas"}
+            if midas_key in stored:
+                cached["midas"] = stored[midas_key]
+
+            missing = needed - set(cached)
+            # 메트릭: 요청한 브랜치가 전부 캐시에 있어야 hit (일부만 있으면 추출이 필요하므로 miss)
+            record_cache("feature_cache", hit=not missing)
+            if not missing:
+                logger.debug("using cached features image=%s", name)
                 return cached
+        else:
+            missing = needed
 
-        # 캐시 miss → 추출
-        print(f"⏳ Extracting features ({image_path})")
-
-        # feature_extractor_v2.extract_features_v2() 호출
-        from feature_extraction.feature_extractor_v2 import extract_features_v2
+        # 캐시 miss (또는 일부만 있음) → 빠진 브랜치만 추출
+        logger.debug("extracting features image=%s branches=%s depth_tier=%s", name, sorted(missing), depth_tier)
 
-        features = extract_features_v2(image_path)
+        features = extract_features_v2(image, branches=missing, depth_tier=depth_tier)
+        if features is None:
+            return None
 
-        # 캐시 저장
-        self.cache.set(image_path, features)
+        # 캐시 저장 (기존 브랜치/다른 티어 midas와 합침)
+        merged = {**stored, **{key: value for key, value in features.items() if key != "midas"}}
+        if "midas" in features:
+            merged[midas_key] = features["midas"]
+        self.cache.set(image, merged)
 
-        return features
+        return {**cached, **features}
 
     def get_stats(self):
         """캐시 통계 반환"""
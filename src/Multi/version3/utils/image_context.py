@@ -0,0 +1,256 @@
+# ============================================================
+# 🖼️ Image Context
+# 이미지 1장을 메모리에서 한 번만 디코드해서 모든 분석기가 공유
+# ============================================================
+
+import hashlib
+import os
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from utils.metrics import stage_timer
+
+# model_output() 키 (특징 추출과 분석기가 같은 키로 공유)
+YOLO_POSE_OUTPUT = "yolo_pose"   # (YOLO_POSE_OUTPUT, id(model)): ultralytics 결과 (BGR 입력)
+FACE_MESH_OUTPUT = "face_mesh"   # FaceMesh(static, max_num_faces=1, refine_landmarks=True) 결과
+DEPTH_MAP_OUTPUT = "depth_map"   # MiDaS predicted_depth (H', W'), 상대 역깊이 (클수록 가까움)
+
+# EXIF orientation 처리는 기존 두 경로를 그대로 따른다:
+#   bgr (및 파생 plane)  cv2.imread와 같이 EXIF 회전 적용 (포즈 / 얼굴 / 색감 / 구도 분석, 손수 만든 특징)
+#   pil                 Image.open().convert("RGB")와 같이 회전 없음 (CLIP / OpenCLIP / DINO / MiDaS 전처리)
+IMREAD_FLAGS = cv2.IMREAD_COLOR
+EXIF_ORIENTATION_TAG = 0x0112
+
+# 파생 plane 이름 → BGR 기준 색 변환 코드
+_CONVERSIONS = {
+    "rgb": cv2.COLOR_BGR2RGB,
+    "gray": cv2.COLOR_BGR2GRAY,
+    "hsv": cv2.COLOR_BGR2HSV,
+    "lab": cv2.COLOR_BGR2LAB,
+}
+
+
+class ImageContext:
+    """
+    디코드된 이미지 + 원본 바이트 컨테이너
+
+    업로드(bytes), 파일 경로, ndarray(BGR) 어느 쪽으로 만들어도
+    디코드는 한 번만 하고, 분석기들은 같은 배열을 읽기 전용으로 공유한다.
+    (임시 파일 저장/삭제 없음)
+
+    - bgr: (H, W, 3) uint8 BGR 배열 (OpenCV 규약)
+    - raw_bytes: 인코딩된 원본 바이트 (EXIF 추출, 해시용). ndarray로 만들면 None
+    - path: 파일에서 만든 경우 원본 경로
+    - name: 로그 표시용 이름
+
+    파생 plane(rgb / gray / hsv / lab, 리사이즈본, PIL)은 처음 요청될 때 한 번만 만들고
+    이후 호출은 같은 배열을 돌려준다. 공유 배열이므로 읽기 전용으로 잠근다
+    (수정이 필요하면 .copy() 해서 사용).
+
+    모델 추론 결과(YOLO pose, FaceMesh, MiDaS depth map)도 model_output()으로
+    이미지별로 보관해서 특징 추출과 분석기가 같은 추론을 다시 하지 않는다.
+    """
+
+    def __init__(
+        self,
+        bgr: np.ndarray,
+        raw_bytes: Optional[bytes] = None,
+        name: str = "<memory>",
+        path: Optional[str] = None
+    ):
+        if bgr is None or bgr.ndim != 3 or bgr.shape[2] != 3:
+            raise ValueError(f"❌ BGR (H, W, 3) 이미지가 필요합니다: {name}")
+
+        self.bgr = bgr
+        self.raw_bytes = raw_bytes
+        self.name = name
+        self.path = path
+
+        self._pil = None
+        self._content_hash = None
+        self._planes = {}  # {(plane, size): ndarray}
+        self._stats = {}   # {size: ImageStats}
+        self._outputs = {}  # {key: 모델 추론 결과}
+        self._outputs_lock = threading.RLock()
+
+    # --------------------------------------------------------
+    # 생성
+    # --------------------------------------------------------
+    @classmethod
+    def from_bytes(cls, data: bytes, name: str = "<upload>") -> "ImageContext":
+        """인코딩된 이미지 바이트(JPEG/PNG 등)에서 생성"""
+        buf = np.frombuffer(data, dtype=np.uint8)
+        with stage_timer("decode"):
+            bgr = cv2.imdecode(buf, IMREAD_FLAGS)
+        if bgr is None:
+            raise ValueError(f"❌ 이미지 디코드 실패: {name}")
+        return cls(bgr, raw_bytes=data, name=name)
+
+    @classmethod
+    def from_path(cls, image_path: Union[str, Path]) -> "ImageContext":
+        """파일 경로에서 생성 (디스크 읽기 1회)"""
+        image_path = str(image_path)
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"❌ Image not found: {image_path}")
+
+        with open(image_path, "rb") as f:
+            data = f.read()
+
+        ctx = cls.from_bytes(data, name=os.path.basename(image_path))
+        ctx.path = image_path
+        return ctx
+
+    @classmethod
+    def from_array(cls, bgr: np.ndarray, name: str = "<array>") -> "ImageContext":
+        """이미 디코드된 BGR 배열에서 생성 (카메라 프레임 등)"""
+        return cls(np.ascontiguousarray(bgr), name=name)
+
+    @classmethod
+    def ensure(cls, source) -> "ImageContext":
+        """
+        경로 / bytes / ndarray / ImageContext → ImageContext
+
+        분석기 생성자들이 입력 형식에 상관없이 호출한다.
+        """
+        if isinstance(source, ImageContext):
+            return source
+        if isinstance(source, (str, Path)):
+            return cls.from_path(source)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return cls.from_bytes(bytes(source))
+        if isinstance(source, np.ndarray):
+            return cls.from_array(source)
+        raise TypeError(f"❌ 지원하지 않는 이미지 입력 형식: {type(source)}")
+
+    # --------------------------------------------------------
+    # 파생 정보
+    # --------------------------------------------------------
+    @property
+    def shape(self) -> tuple:
+        return self.bgr.shape
+
+    def plane(self, name: str, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        파생 plane (memoized, 읽기 전용)
+
+        Args:
+            name: "bgr" / "rgb" / "gray" / "hsv" / "lab"
+            size: (width, height)면 cv2.resize(bgr, size) 후 변환 (예: 색감 특징 256x256)
+
+        Returns:
+            (H, W, 3) 또는 gray (H, W) uint8 배열
+        """
+        key = (name, size)
+        plane = self._planes.get(key)
+        if plane is not None:
+            return plane
+
+        if name != "bgr" and name not in _CONVERSIONS:
+            raise ValueError(f"❌ 지원하지 않는 plane: {name}")
+
+        if name == "bgr":
+            if size is None:
+                return self.bgr
+            plane = cv2.resize(self.bgr, size)
+        else:
+            plane = cv2.cvtColor(self.plane("bgr", size), _CONVERSIONS[name])
+
+        plane.setflags(write=False)
+        self._planes[key] = plane
+        return plane
+
+    def resized(self, size: Tuple[int, int]) -> np.ndarray:
+        """BGR 리사이즈본 (width, height), memoized"""
+        return self.plane("bgr", size)
+
+    @property
+    def rgb(self) -> np.ndarray:
+        return self.plane("rgb")
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self.plane("gray")
+
+    @property
+    def hsv(self) -> np.ndarray:
+        return self.plane("hsv")
+
+    @property
+    def lab(self) -> np.ndarray:
+        return self.plane("lab")
+
+    def model_output(self, key, compute=None):
+        """
+        이미지별 모델 추론 결과 공유 (같은 이미지에 같은 추론을 두 번 하지 않음)
+
+        Args:
+            key: 결과 키 (예: ("yolo_pose", id(model)), "face_mesh", "depth_map")
+            compute: 결과가 없을 때 호출할 함수 (None이면 조회만)
+
+        Returns:
+            저장된 결과 또는 None (compute 없이 조회했는데 아직 없을 때)
+        """
+        with self._outputs_lock:
+            if key in self._outputs or compute is None:
+                return self._outputs.get(key)
+            value = compute()
+            self._outputs[key] = value
+            return value
+
+    def set_model_output(self, key, value):
+        """다른 경로(배치 forward 등)에서 계산한 추론 결과 저장"""
+        with self._outputs_lock:
+            self._outputs[key] = value
+
+    def stats(self, size: Optional[Tuple[int, int]] = None):
+        """공유 이미지 통계 (utils/image_stats.py), 해상도별 1개"""
+        stats = self._stats.get(size)
+        if stats is None:
+            from utils.image_stats import ImageStats
+            stats = ImageStats(self, size)
+            self._stats[size] = stats
+        return stats
+
+    @property
+    def pil(self):
+        """
+        RGB PIL 이미지 (CLIP/OpenCLIP/DINO/MiDaS 전처리용)
+
+        EXIF 회전 없음 (= Image.open().convert("RGB")). 회전 태그가 없으면 bgr과
+        픽셀 배치가 같으므로 rgb plane을 공유하고, 있으면 원본 바이트를 PIL로 따로 디코드한다.
+        """
+        if self._pil is None:
+            from PIL import Image
+
+            pil = None
+            if self.raw_bytes is not None:
+                opened = Image.open(BytesIO(self.raw_bytes))  # 헤더만 읽음
+                if opened.getexif().get(EXIF_ORIENTATION_TAG, 1) != 1:
+                    pil = opened.convert("RGB")
+            self._pil = pil if pil is not None else Image.fromarray(self.rgb)
+        return self._pil
+
+    @property
+    def content_hash(self) -> str:
+        """
+        이미지 내용 해시 (SHA256 앞 16자)
+
+        원본 바이트가 있으면 바이트 기준 (FeatureCache / ReferenceRegistry와 동일),
+        없으면 디코드된 픽셀 기준
+        """
+        if self._content_hash is None:
+            if self.raw_bytes is not None:
+                digest = hashlib.sha256(self.raw_bytes).hexdigest()
+            else:
+                digest = hashlib.sha256(self.bgr.tobytes()).hexdigest()
+            self._content_hash = digest[:16]
+        return self._content_hash
+
+    def __repr__(self) -> str:
+        h, w = self.bgr.shape[:2]
+        return f"ImageContext(name={self.name!r}, size={w}x{h})"
@@ -0,0 +1,257 @@
+# ============================================================
+# 📊 Image Statistics
+# 색감 특징 / 품질 / 조명 / 픽셀 분석이 같이 쓰는 이미지 통계
+# (히스토그램, Laplacian, Canny, LBP, 영역 평균, 주요 색)
+# ============================================================
+#
+# 사용:
+#   stats = ctx.stats()                 # 원본 해상도 (품질/조명/픽셀 분석)
+#   stats = ctx.stats((256, 256))       # 색감 특징 (extract_color_extended)
+#
+#   stats.gray_mean, stats.gray_std, stats.laplacian_var, stats.edge_ratio, ...
+#
+# 각 통계는 처음 요청될 때 한 번만 계산하고 ImageContext 수명 동안 공유한다.
+# - 채널 히스토그램(256 bin)을 한 번 구하고 평균/표준편차/왜도/첨도, 32·16 bin
+#   히스토그램, hue 구간 비율, 클리핑 비율은 모두 히스토그램에서 계산
+#   (픽셀을 다시 훑지 않음, scipy 불필요)
+# - Laplacian 분산, Canny 엣지는 노이즈/블러/선명도/구도/색감 특징이 공유
+# - 영역 평균(좌/우/상/하, 중앙, 얼굴 bbox)은 적분 영상으로 O(1)
+# - 주요 색 K-Means는 픽셀을 DOMINANT_COLOR_SAMPLES개로 균등 샘플링
+#
+# 값 일치 확인: scripts/check_image_stats.py
+
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 주요 색 K-Means에 쓰는 최대 픽셀 수 (256x256 = 65536 → 16384)
+DOMINANT_COLOR_SAMPLES = 16384
+
+# 색감 특징 hue 구간 (OpenCV H: 0~179), red는 양 끝을 합친다
+HUE_RANGES = (
+    ("red", ((0, 15), (165, 180))),
+    ("orange", ((15, 30),)),
+    ("yellow", ((30, 60),)),
+    ("green", ((60, 90),)),
+    ("cyan", ((90, 120),)),
+    ("blue", ((120, 150),)),
+    ("purple", ((150, 165),)),
+)
+
+_LEVELS = np.arange(256, dtype=np.float64)
+
+
+def _channel_histograms(plane: np.ndarray) -> np.ndarray:
+    """uint8 plane → (채널 수, 256) float64 히스토그램 (채널당 1패스)"""
+    if plane.ndim == 2:
+        return cv2.calcHist([plane], [0], None, [256], [0, 256]).reshape(1, 256).astype(np.float64)
+    return np.stack([
+        cv2.calcHist([plane], [c], None, [256], [0, 256]).ravel()
+        for c in range(plane.shape[2])
+    ]).astype(np.float64)
+
+
+def _histogram_moments(hist: np.ndarray) -> Tuple[float, float, float, float]:
+    """
+    256 bin 히스토그램 → (평균, 표준편차, 왜도, 첨도)
+
+    np.mean / np.std / scipy.stats.skew / kurtosis (기본값: 편향, Fisher)와 같은 정의.
+    분산이 0이면 왜도/첨도는 nan (scipy와 동일)
+    """
+    n = hist.sum()
+    mean = float((hist * _LEVELS).sum() / n)
+    d = _LEVELS - mean
+    d2 = d * d
+    m2 = float((hist * d2).sum() / n)
+    m3 = float((hist * d2 * d).sum() / n)
+    m4 = float((hist * d2 * d2).sum() / n)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skewness = float(np.float64(m3) / np.float64(m2) ** 1.5)
+        kurt = float(np.float64(m4) / np.float64(m2) ** 2 - 3.0)
+
+    return mean, float(np.sqrt(m2)), skewness, kurt
+
+
+class ImageStats:
+    """
+    ImageContext 1개(+ 해상도 1개)의 공유 통계 (memoized)
+
+    ImageContext.stats(size)로 얻는다. size가 있으면 해당 크기로 리사이즈한 plane 기준.
+    반환 배열은 공유되므로 수정하지 말 것.
+    """
+
+    def __init__(self, context, size: Optional[Tuple[int, int]] = None):
+        self.context = context
+        self.size = size
+        self._values: Dict[str, object] = {}
+
+    def _memo(self, key: str, compute):
+        value = self._values.get(key)
+        if value is None:
+            value = compute()
+            self._values[key] = value
+        return value
+
+    # --------------------------------------------------------
+    # plane
+    # --------------------------------------------------------
+    @property
+    def bgr(self) -> np.ndarray:
+        return self.context.plane("bgr", self.size)
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self.context.plane("gray", self.size)
+
+    @property
+    def hsv(self) -> np.ndarray:
+        return self.context.plane("hsv", self.size)
+
+    @property
+    def lab(self) -> np.ndarray:
+        return self.context.plane("lab", self.size)
+
+    @property
+    def pixel_count(self) -> int:
+        h, w = self.gray.shape
+        return h * w
+
+    # --------------------------------------------------------
+    # 히스토그램 기반
+    # --------------------------------------------------------
+    @property
+    def gray_hist(self) -> np.ndarray:
+        """gray 256 bin 히스토그램 (float64 개수)"""
+        return self._memo("gray_hist", lambda: _channel_histograms(self.gray)[0])
+
+    @property
+    def hsv_hist(self) -> np.ndarray:
+        """(3, 256) H/S/V 히스토그램"""
+        return self._memo("hsv_hist", lambda: _channel_histograms(self.hsv))
+
+    @property
+    def lab_hist(self) -> np.ndarray:
+        """(3, 256) L/A/B 히스토그램"""
+        return self._memo("lab_hist", lambda: _channel_histograms(self.lab))
+
+    @property
+    def gray_moments(self) -> Tuple[float, float, float, float]:
+        return self._memo("gray_moments", lambda: _histogram_moments(self.gray_hist))
+
+    @property
+    def gray_mean(self) -> float:
+        return self.gray_moments[0]
+
+    @property
+    def gray_std(self) -> float:
+        return self.gray_moments[1]
+
+    @property
+    def hsv_moments(self) -> Tuple[Tuple[float, float, float, float], ...]:
+        """채널별 (평균, 표준편차, 왜도, 첨도)"""
+        return self._memo("hsv_moments", lambda: tuple(_histogram_moments(h) for h in self.hsv_hist))
+
+    @property
+    def lab_moments(self) -> Tuple[Tuple[float, float, float, float], ...]:
+        """채널별 (평균, 표준편차, 왜도, 첨도)"""
+        return self._memo("lab_moments", lambda: tuple(_histogram_moments(h) for h in self.lab_hist))
+
+    def gray_range_ratio(self, low: int, high: int) -> float:
+        """gray 값이 [low, high)인 픽셀 비율 (클리핑/HDR 검사)"""
+        return float(self.gray_hist[low:high].sum() / self.pixel_count)
+
+    @property
+    def hue_ratios(self) -> np.ndarray:
+        """HUE_RANGES 순서의 hue 구간별 픽셀 비율 (7,)"""
+        def compute():
+            hue_hist = self.hsv_hist[0]
+            return np.array([
+                sum(hue_hist[low:high].sum() for low, high in ranges) / self.pixel_count
+                for _, ranges in HUE_RANGES
+            ], dtype=np.float64)
+        return self._memo("hue_ratios", compute)
+
+    # --------------------------------------------------------
+    # 필터 기반
+    # --------------------------------------------------------
+    @property
+    def bgr_means(self) -> Tuple[float, float, float]:
+        """(B, G, R) 채널 평균"""
+        return self._memo("bgr_means", lambda: tuple(float(v) for v in cv2.mean(self.bgr)[:3]))
+
+    @property
+    def laplacian_var(self) -> float:
+        """gray Laplacian(CV_64F) 분산 (노이즈 / 블러 / 선명도 공용)"""
+        return self._memo("laplacian_var", lambda: float(cv2.Laplacian(self.gray, cv2.CV_64F).var()))
+
+    @property
+    def edges(self) -> np.ndarray:
+        """Canny(50, 150) 엣지 맵 (0/255)"""
+        def compute():
+            edges = cv2.Canny(self.gray, 50, 150)
+            edges.setflags(write=False)
+            return edges
+        return self._memo("edges", compute)
+
+    @property
+    def edge_ratio(self) -> float:
+        """엣지 픽셀 비율"""
+        return self._memo("edge_ratio", lambda: float(cv2.countNonZero(self.edges)) / self.edges.size)
+
+    @property
+    def lbp_hist(self) -> np.ndarray:
+        """uniform LBP (P=8, R=1) 10 bin 히스토그램 개수"""
+        def compute():
+            from skimage.feature import local_binary_pattern  # 색감 특징에서만 필요
+
+            lbp = local_binary_pattern(self.gray, P=8, R=1, method='uniform')
+            hist, _ = np.histogram(lbp.ravel(), bins=10, range=(0, 10))
+            return hist
+        return self._memo("lbp_hist", compute)
+
+    # --------------------------------------------------------
+    # 영역 평균 (적분 영상)
+    # --------------------------------------------------------
+    @property
+    def integral(self) -> np.ndarray:
+        """gray 적분 영상 (H+1, W+1), float64 (큰 이미지에서도 overflow 없음)"""
+        return self._memo("integral", lambda: cv2.integral(self.gray, sdepth=cv2.CV_64F))
+
+    def region_mean(self, x1: int, y1: int, x2: int, y2: int) -> float:
+        """gray[y1:y2, x1:x2].mean()과 같은 값 (O(1))"""
+        s = self.integral
+        area = (y2 - y1) * (x2 - x1)
+        if area <= 0:
+            return float("nan")
+        total = s[y2, x2] - s[y1, x2] - s[y2, x1] + s[y1, x1]
+        return float(total / area)
+
+    def quadrant_means(self, x: int, y: int, w: int, h: int) -> Dict[str, float]:
+        """(x, y, w, h) 영역의 좌/우/상/하 절반 평균 밝기"""
+        return {
+            "left": self.region_mean(x, y, x + w // 2, y + h),
+            "right": self.region_mean(x + w // 2, y, x + w, y + h),
+            "top": self.region_mean(x, y, x + w, y + h // 2),
+            "bottom": self.region_mean(x, y + h // 2, x + w, y + h),
+        }
+
+    # --------------------------------------------------------
+    # 주요 색
+    # --------------------------------------------------------
+    def dominant_colors(self, k: int = 2) -> np.ndarray:
+        """
+        K-Means 주요 색 (k, 3) BGR 0~255
+
+        픽셀을 DOMINANT_COLOR_SAMPLES개 이하로 균등 샘플링 후 클러스터링
+        (클러스터 순서는 K-Means 결과 그대로)
+        """
+        def compute():
+            pixels = self.bgr.reshape(-1, 3)
+            step = max(1, len(pixels) // DOMINANT_COLOR_SAMPLES)
+            samples = pixels[::step].astype(np.float32)
+            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+            _, _, centers = cv2.kmeans(samples, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+            return centers
+        return self._memo(f"dominant_colors_{k}", compute)
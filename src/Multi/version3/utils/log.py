@@ -0,0 +1,88 @@
+# ============================================================
+# 📝 Logging
+# 요청 경로(hot path) 로그는 print() 대신 레벨이 있는 logging으로
+# ============================================================
+#
+# 환경변수:
+#   TRYANGLE_LOG_LEVEL    DEBUG / INFO (기본) / WARNING / ERROR / OFF
+#                         요청마다 찍히던 단계별 진행 로그는 DEBUG
+#   TRYANGLE_LOG_FORMAT   text (기본) / json (한 줄에 JSON 1개, trace_id 포함)
+#
+# 모듈에서는 logger = get_logger(__name__)만 쓰고,
+# 핸들러 설정은 진입점(backend/main.py)에서 configure_logging() 1회.
+
+import json
+import logging
+import os
+
+from utils.tracing import current_trace_id
+
+_configured = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """tryangle.* 네임스페이스 로거"""
+    return logging.getLogger(f"tryangle.{name}")
+
+
+class _TraceIdFilter(logging.Filter):
+    """레코드에 현재 trace_id 부착 (트레이스 중이 아니면 "-")"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id() or "-"
+        return True
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "msg": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(level: str = None, fmt: str = None):
+    """
+    tryangle.* 로거 핸들러 설정 (여러 번 호출해도 1번만 적용)
+
+    Args:
+        level: 로그 레벨 (None이면 TRYANGLE_LOG_LEVEL)
+        fmt: "text" 또는 "json" (None이면 TRYANGLE_LOG_FORMAT)
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    level = (level or os.environ.get("TRYANGLE_LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.environ.get("TRYANGLE_LOG_FORMAT", "text")).lower()
+
+    logger = logging.getLogger("tryangle")
+    logger.propagate = False
+
+    if level == "OFF":
+        # 자식 로거(tryangle.*)의 레코드는 disabled와 상관없이 여기까지 올라오고,
+        # 핸들러가 없으면 logging.lastResort가 WARNING 이상을 stderr에 찍는다
+        logger.addHandler(logging.NullHandler())
+        logger.setLevel(logging.CRITICAL + 1)
+        return
+
+    handler = logging.StreamHandler()
+    handler.addFilter(_TraceIdFilter())
+    if fmt == "json":
+        handler.setFormatter(_JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s.%(msecs)03d %(levelname)s %(name)s [%(threadName)s trace=%(trace_id)s] %(message)s",
+            datefmt="%H:%M:%S"
+        ))
+
+    logger.addHandler(handler)
+    logger.setLevel(getattr(logging, level, logging.INFO))
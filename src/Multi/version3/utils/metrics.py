@@ -0,0 +1,363 @@
+# ============================================================
+# 📈 Pipeline Metrics
+# 분석 단계별 지연 히스토그램 + 캐시 hit/miss 카운터
+# Prometheus 텍스트 포맷으로 출력 (backend /metrics)
+# ============================================================
+#
+# 사용:
+#   from utils.metrics import stage_timer, timed, record_cache
+#
+#   with stage_timer("decode"):
+#       ...
+#
+#   @timed("embed")
+#   def embed_features(...): ...
+#
+#   record_cache("feature_cache", hit=True)
+#
+# 외부 의존성 없음 (prometheus_client 불필요).
+#
+# 프리포크(backend/serve.py):
+#   레지스트리는 워커 프로세스마다 따로 있고 /metrics 요청은 아무 워커나 받는다.
+#   serve.py가 워커마다 enable_multiprocess(dir, index)를 호출하면
+#   각 워커가 자기 값을 공유 디렉토리에 주기적으로 스냅샷으로 쓰고,
+#   /metrics를 받은 워커가 모든 워커 스냅샷을 합쳐서 출력한다.
+#   모든 시계열에 worker="<index>" 라벨이 붙으므로 합계는 쿼리에서
+#   sum without (worker) (...)로 구한다. 다른 워커 값은 최대 FLUSH 주기만큼 늦다.
+#   단일 프로세스(uvicorn main:app)에서는 worker 라벨이 없다.
+#
+# 환경변수:
+#   TRYANGLE_METRICS                 "0"이면 타이머 기록 생략 (기본 1)
+#   TRYANGLE_METRICS_FLUSH_SECONDS   프리포크 워커 스냅샷 주기 (초, 기본 5)
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.log import get_logger
+from utils.tracing import span
+
+logger = get_logger(__name__)
+
+METRICS_ENABLED = os.environ.get("TRYANGLE_METRICS", "1") != "0"
+FLUSH_SECONDS = float(os.environ.get("TRYANGLE_METRICS_FLUSH_SECONDS", "5"))
+# 이보다 오래 갱신되지 않은 워커 스냅샷은 죽은 워커로 보고 출력하지 않음
+STALE_SNAPSHOT_SECONDS = max(30.0, FLUSH_SECONDS * 3)
+
+# 메트릭 family: (name, type, help, [샘플 라인])
+Family = Tuple[str, str, str, List[str]]
+
+# 단계 지연 버킷 (초): 수 ms짜리 전처리부터 수 초짜리 backbone(CPU)까지
+STAGE_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Histogram:
+    """라벨 1개(stage 등)별 누적 버킷 히스토그램"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Iterable[float] = STAGE_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+                self._series[label_value] = series
+
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def collect(self) -> Family:
+        lines = []
+        with self._lock:
+            for label_value, series in sorted(self._series.items()):
+                label = _label_block(((self.label, label_value),))
+                for bound, count in zip(self.buckets, series['counts']):
+                    bucket = _label_block(((self.label, label_value), ("le", f"{bound:g}")))
+                    lines.append(f'{self.name}_bucket{bucket} {count}')
+                inf = _label_block(((self.label, label_value), ("le", "+Inf")))
+                lines.append(f'{self.name}_bucket{inf} {series["count"]}')
+                lines.append(f'{self.name}_sum{label} {series["sum"]:.6f}')
+                lines.append(f'{self.name}_count{label} {series["count"]}')
+        return self.name, "histogram", self.help_text, lines
+
+
+class Counter:
+    """라벨 튜플별 단조 증가 카운터"""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def get(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0.0)
+
+    def label_values(self) -> list:
+        with self._lock:
+            return list(self._values)
+
+    def collect(self) -> Family:
+        with self._lock:
+            lines = [
+                f"{self.name}{_label_block(zip(self.labels, label_values))} {value:g}"
+                for label_values, value in sorted(self._values.items())
+            ]
+        return self.name, "counter", self.help_text, lines
+
+
+class _Registry:
+    """히스토그램/카운터 + 수집 시점에 값을 읽는 게이지/카운터 콜백"""
+
+    def __init__(self):
+        self.stage_latency = Histogram(
+            "tryangle_stage_duration_seconds",
+            "Analysis pipeline stage latency",
+            label="stage"
+        )
+        self.cache_requests = Counter(
+            "tryangle_cache_requests_total",
+            "Cache lookups by cache and result",
+            labels=("cache", "result")
+        )
+
+        # name -> (type, help, labels, fn() -> {label_values_tuple: value})
+        self._collectors: Dict[str, Tuple[str, str, Tuple[str, ...], Callable]] = {}
+        self._lock = threading.Lock()
+
+    def register_collector(self, name: str, kind: str, help_text: str,
+                           labels: Tuple[str, ...], fn: Callable[[], Dict]):
+        """
+        수집 시점 콜백 등록 (같은 이름이면 교체)
+
+        fn은 /metrics 수집 때마다 호출되어 {라벨값 튜플: 값}을 반환한다.
+        (대기열 길이처럼 다른 객체가 이미 들고 있는 값을 그대로 노출)
+        kind: "gauge" 또는 "counter" (누적 횟수 → rate()를 쓸 수 있게 counter)
+        """
+        if kind not in ("gauge", "counter"):
+            raise ValueError(f"unknown metric kind: {kind}")
+        with self._lock:
+            self._collectors[name] = (kind, help_text, labels, fn)
+
+    def collect(self) -> List[Family]:
+        families = [self.stage_latency.collect(), self.cache_requests.collect(), self._collect_cache_hit_ratio()]
+
+        with self._lock:
+            collectors = list(self._collectors.items())
+
+        for name, (kind, help_text, labels, fn) in collectors:
+            try:
+                values = fn()
+            except Exception as e:
+                logger.warning("metric collection failed name=%s: %s", name, e)
+                continue
+
+            lines = [
+                f"{name}{_label_block(zip(labels, label_values))} {float(value):g}"
+                for label_values, value in sorted(values.items())
+            ]
+            families.append((name, kind, help_text, lines))
+
+        return families
+
+    def _collect_cache_hit_ratio(self) -> Family:
+        name = "tryangle_cache_hit_ratio"
+        lines = [
+            f'{name}{_label_block((("cache", cache),))} {ratio:.6f}'
+            for cache, ratio in sorted(self.cache_hit_ratios().items())
+        ]
+        return name, "gauge", "Cache hit ratio since process start", lines
+
+    def cache_hit_ratios(self) -> Dict[str, float]:
+        caches = sorted({cache for cache, _ in self.cache_requests.label_values()})
+        ratios = {}
+        for cache in caches:
+            hits = self.cache_requests.get(cache, "hit")
+            misses = self.cache_requests.get(cache, "miss")
+            total = hits + misses
+            ratios[cache] = hits / total if total > 0 else 0.0
+        return ratios
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_block(pairs: Iterable[Tuple[str, str]]) -> str:
+    """{a="1",b="2"} (프리포크 워커면 worker 라벨을 앞에 붙임, 라벨이 없으면 빈 문자열)"""
+    pairs = list(_process_labels) + list(pairs)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{label}="{_escape(value)}"' for label, value in pairs) + "}"
+
+
+# 프리포크 워커 상태 (enable_multiprocess 이후에만 설정됨)
+_process_labels: Tuple[Tuple[str, str], ...] = ()
+_multiprocess_dir: Optional[Path] = None
+_snapshot_path: Optional[Path] = None
+
+
+registry = _Registry()
+
+
+# ============================================================
+# 기록 API
+# ============================================================
+def observe_stage(stage: str, seconds: float):
+    """단계 지연 기록 (초)"""
+    if METRICS_ENABLED:
+        registry.stage_latency.observe(stage, seconds)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """
+    with 블록 실행 시간을 stage 히스토그램에 기록 (예외가 나도 기록)
+
+    요청 트레이스 중이면 같은 이름의 span도 남긴다 (utils/tracing.py)
+    """
+    start = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        if METRICS_ENABLED:
+            registry.stage_latency.observe(stage, time.perf_counter() - start)
+
+
+def timed(stage: str):
+    """함수 실행 시간을 stage로 기록하는 데코레이터"""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def record_cache(cache: str, hit: bool):
+    """캐시 조회 결과 기록 (cache: "feature_cache", "model_cache", ...)"""
+    registry.cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+def register_gauge(name: str, help_text: str, fn: Callable[[], Dict], labels: Tuple[str, ...] = ()):
+    """수집 시점 게이지 등록 (registry.register_collector 참고)"""
+    registry.register_collector(name, "gauge", help_text, labels, fn)
+
+
+def register_counter(name: str, help_text: str, fn: Callable[[], Dict], labels: Tuple[str, ...] = ()):
+    """
+    수집 시점 카운터 등록 (다른 객체가 들고 있는 누적 횟수용)
+
+    fn이 반환하는 값은 프로세스 수명 동안 줄어들지 않아야 한다. 이름은 _total로 끝낸다.
+    """
+    registry.register_collector(name, "counter", help_text, labels, fn)
+
+
+# ============================================================
+# 프리포크 워커 집계
+# ============================================================
+def enable_multiprocess(metrics_dir: str, worker: int):
+    """
+    프리포크 워커에서 fork 후 호출: worker 라벨 + 공유 디렉토리 스냅샷 시작
+
+    워커 번호는 재시작해도 같으므로 스냅샷 파일을 덮어쓴다
+    (재시작한 워커의 카운터는 0부터 → Prometheus가 counter reset으로 처리).
+    """
+    global _process_labels, _multiprocess_dir, _snapshot_path
+
+    _process_labels = (("worker", str(worker)),)
+    _multiprocess_dir = Path(metrics_dir)
+    _multiprocess_dir.mkdir(parents=True, exist_ok=True)
+    _snapshot_path = _multiprocess_dir / f"worker_{worker}.json"
+
+    _write_snapshot(registry.collect())
+    threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_SECONDS)
+        try:
+            _write_snapshot(registry.collect())
+        except Exception as e:
+            logger.warning("metric snapshot failed path=%s: %s", _snapshot_path, e)
+
+
+def _write_snapshot(families: List[Family]):
+    """다른 워커가 읽는 도중에 잘린 파일을 보지 않도록 임시 파일 → rename"""
+    tmp = _snapshot_path.with_name(f"{_snapshot_path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(families), encoding="utf-8")
+    os.replace(tmp, _snapshot_path)
+
+
+def _read_other_snapshots() -> List[List[Family]]:
+    snapshots = []
+    now = time.time()
+    for path in sorted(_multiprocess_dir.glob("worker_*.json")):
+        if path == _snapshot_path:
+            continue
+        try:
+            if now - path.stat().st_mtime > STALE_SNAPSHOT_SECONDS:
+                continue
+            snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError) as e:
+            logger.warning("metric snapshot unreadable path=%s: %s", path, e)
+    return snapshots
+
+
+def _merge_families(snapshots: List[List[Family]]) -> List[Family]:
+    """같은 이름 family는 HELP/TYPE 한 번 + 워커별 샘플 라인을 이어 붙임"""
+    merged: Dict[str, Family] = {}
+    for families in snapshots:
+        for name, kind, help_text, lines in families:
+            if name not in merged:
+                merged[name] = (name, kind, help_text, [])
+            merged[name][3].extend(lines)
+    return list(merged.values())
+
+
+# ============================================================
+# 출력
+# ============================================================
+def render_prometheus() -> str:
+    """Prometheus text exposition format (0.0.4), 프리포크면 전체 워커 합본"""
+    families = registry.collect()
+
+    if _multiprocess_dir is not None:
+        try:
+            _write_snapshot(families)
+        except OSError as e:
+            logger.warning("metric snapshot failed path=%s: %s", _snapshot_path, e)
+        families = _merge_families([families] + _read_other_snapshots())
+
+    parts = []
+    for name, kind, help_text, lines in families:
+        parts.append("\n".join([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"] + lines))
+    return "\n".join(parts) + "\n"
@@ -1,22 +1,72 @@
 # Model Cache
+import threading
+import time
+
+from utils.metrics import record_cache
+from utils.log import get_logger
+from utils.torch_runtime import prepare_model
+
+logger = get_logger(__name__)
 from typing import Dict, Any, Callable, Optional
 
 class ModelCache:
     def __init__(self):
         self._cache: Dict[str, Any] = {}
-    
+        self._load_seconds: Dict[str, float] = {}
+        # 키별 잠금: 같은 모델은 여러 스레드가 동시에 요청해도 한 번만 로드하고,
+        # 다른 모델 로드(수 초)는 서로 기다리지 않는다 (중첩 로드 허용)
+        self._key_locks: Dict[str, threading.RLock] = {}
+        # 키별 추론 잠금: 스레드 안전하지 않은 모델(YOLO / MediaPipe / TFLite)을
+        # 분석 풀 스레드들이 공유하므로 추론 호출을 직렬화
+        self._inference_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
     def get_or_load(self, key: str, load_fn: Callable) -> Any:
-        if key not in self._cache:
-            print(f"  🔄 Loading {key}...")
-            self._cache[key] = load_fn()
-        else:
-            print(f"  ♻️  Using cached {key}")
-        return self._cache[key]
-    
+        # 이미 로드된 모델은 잠금 없이 반환 (요청 경로에서 매번 호출됨)
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            record_cache("model_cache", hit=True)
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.RLock())
+
+        with key_lock:
+            if key in self._cache:
+                record_cache("model_cache", hit=True)
+                return self._cache[key]
+
+            logger.info("loading %s", key)
+            record_cache("model_cache", hit=False)
+            start = time.perf_counter()
+            value = prepare_model(key, load_fn())  # torch 모델이면 런타임 프로필 적용
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self._cache[key] = value
+                self._load_seconds[key] = elapsed
+            logger.info("loaded %s in %.2fs", key, elapsed)
+            return value
+
+    def inference_lock(self, key: str) -> threading.Lock:
+        """key 모델 추론용 잠금 (with model_cache.inference_lock("yolo_pose"): ...)"""
+        with self._lock:
+            return self._inference_locks.setdefault(key, threading.Lock())
+
+    def load_times(self) -> Dict[str, float]:
+        """키별 로드 소요 시간 (초, 로드된 것만)"""
+        with self._lock:
+            return dict(self._load_seconds)
+
     def clear(self, key: Optional[str] = None):
-        if key is None:
-            self._cache.clear()
-        elif key in self._cache:
-            del self._cache[key]
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+                self._load_seconds.clear()
+            elif key in self._cache:
+                del self._cache[key]
+                self._load_seconds.pop(key, None)
+
+_MISSING = object()
 
 model_cache = ModelCache()
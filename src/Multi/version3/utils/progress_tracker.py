@@ -19,10 +19,46 @@ class ProgressTracker:
     - "언제 끝나지?" → 예상 완료 시간
     """
 
-    def __init__(self):
-        """초기 상태 저장"""
+    # 진행도 비교에 필요한 피드백 필드 (나머지는 저장하지 않음)
+    FEEDBACK_FIELDS = ('priority', 'category', 'message')
+
+    def __init__(self, max_history: int = 50, compact_history: bool = True):
+        """
+        초기 상태 저장
+
+        Args:
+            max_history: 보관할 최근 시도 수 (오래된 것부터 버림)
+            compact_history: True면 히스토리에 점수/문제 수만 저장 (피드백 본문 제외)
+        """
+        self.max_history = max(1, max_history)
+        self.compact_history = compact_history
+
         self.initial_feedback = None
-        self.history = []  # [{timestamp, feedback, score}, ...]
+        self.initial_score = None
+        self.attempt_count = 0
+        self.history = []  # [{attempt, score, issues_count(, feedback)}, ...] 최근 max_history개
+
+    def _slim_feedback(self, feedback_list: List[Dict]) -> List[Dict]:
+        """비교에 쓰는 필드만 남긴 피드백 (세션 저장 크기 축소)"""
+        return [
+            {key: fb[key] for key in self.FEEDBACK_FIELDS if key in fb}
+            for fb in feedback_list
+        ]
+
+    def _append_history(self, feedback_list: List[Dict], score: float):
+        self.attempt_count += 1
+
+        entry = {
+            'attempt': self.attempt_count,
+            'score': score,
+            'issues_count': self._count_issues(feedback_list)
+        }
+        if not self.compact_history:
+            entry['feedback'] = feedback_list
+
+        self.history.append(entry)
+        if len(self.history) > self.max_history:
+            del self.history[:len(self.history) - self.max_history]
 
     def set_initial_state(self, feedback_list: List[Dict]):
         """
@@ -31,18 +67,29 @@ class ProgressTracker:
         Args:
             feedback_list: get_prioritized_feedback() 출력
         """
-        self.initial_feedback = feedback_list
+        self.initial_feedback = self._slim_feedback(feedback_list)
         self.history = []
+        self.attempt_count = 0
 
         # 초기 스코어 계산
-        initial_score = self._calculate_score(feedback_list)
+        self.initial_score = self._calculate_score(feedback_list)
 
-        self.history.append({
-            'attempt': 1,
-            'feedback': feedback_list,
-            'score': initial_score,
-            'issues_count': self._count_issues(feedback_list)
-        })
+        self._append_history(feedback_list, self.initial_score)
+
+    def initial_progress(self) -> Dict:
+        """첫 촬영 직후 진행도 (update_progress()와 같은 형식)"""
+        return {
+            'overall_score': self.initial_score,
+            'initial_score': self.initial_score,
+            'score_improvement': 0.0,
+            'progress_percent': 0,
+            'improved_items': [],
+            'remaining_items': [],
+            'new_issues': [],
+            'celebration': False,
+            'attempt_number': self.attempt_count,
+            'total_attempts': self.attempt_count
+        }
 
     def update_progress(self, current_feedback: List[Dict]) -> Dict:
         """
@@ -67,13 +114,8 @@ class ProgressTracker:
         # 현재 스코어 계산
         current_score = self._calculate_score(current_feedback)
 
-        # 히스토리 추가
-        self.history.append({
-            'attempt': len(self.history) + 1,
-            'feedback': current_feedback,
-            'score': current_score,
-            'issues_count': self._count_issues(current_feedback)
-        })
+        # 히스토리 추가 (최근 max_history개만 유지)
+        self._append_history(current_feedback, current_score)
 
         # 개선/남은/새로운 항목 분석
         improved, remaining, new_issues = self._analyze_changes(
@@ -91,15 +133,15 @@ class ProgressTracker:
 
         return {
             'overall_score': current_score,
-            'initial_score': self.history[0]['score'],
-            'score_improvement': current_score - self.history[0]['score'],
+            'initial_score': self.initial_score,
+            'score_improvement': current_score - self.initial_score,
             'progress_percent': min(progress, 100),
             'improved_items': improved,
             'remaining_items': remaining,
             'new_issues': new_issues,
             'celebration': celebration,
-            'attempt_number': len(self.history),
-            'total_attempts': len(self.history)
+            'attempt_number': self.attempt_count,
+            'total_attempts': self.attempt_count
         }
 
     def _calculate_score(self, feedback_list: List[Dict]) -> float:
@@ -279,6 +321,30 @@ class ProgressTracker:
         else:
             return "📸 하나씩 차근차근 해볼까요?"
 
+    def to_dict(self) -> Dict:
+        """세션 저장소용 직렬화 (JSON 가능)"""
+        return {
+            'max_history': self.max_history,
+            'compact_history': self.compact_history,
+            'initial_feedback': self.initial_feedback,
+            'initial_score': self.initial_score,
+            'attempt_count': self.attempt_count,
+            'history': self.history
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ProgressTracker":
+        """to_dict() 결과에서 복원"""
+        tracker = cls(
+            max_history=data.get('max_history', 50),
+            compact_history=data.get('compact_history', True)
+        )
+        tracker.initial_feedback = data.get('initial_feedback')
+        tracker.initial_score = data.get('initial_score')
+        tracker.attempt_count = data.get('attempt_count', len(data.get('history', [])))
+        tracker.history = data.get('history', [])
+        return tracker
+
     def save_history(self, filepath: str):
         """히스토리 저장 (나중에 분석용)"""
         with open(filepath, 'w', encoding='utf-8') as f:
@@ -290,7 +356,11 @@ class ProgressTracker:
             self.history = json.load(f)
 
         if self.history:
-            self.initial_feedback = self.history[0]['feedback']
+            first = self.history[0]
+            if 'feedback' in first:
+                self.initial_feedback = self._slim_feedback(first['feedback'])
+            self.initial_score = first['score']
+            self.attempt_count = self.history[-1].get('attempt', len(self.history))
 
 
 # ============================================================
@@ -318,7 +388,7 @@ if __name__ == "__main__":
     print("="*60)
 
     print("\n📸 1회차: 초기 촬영")
-    print(f"점수: {tracker.history[0]['score']:.0f}점")
+    print(f"점수: {tracker.initial_score:.0f}점")
     print(f"문제: {tracker.history[0]['issues_count']}개")
 
     # 2회차: 거리와 노출 개선
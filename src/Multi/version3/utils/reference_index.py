@@ -0,0 +1,325 @@
+# ============================================================
+# 🗂️ Reference Embedding Index
+# 레퍼런스 이미지 128D 임베딩의 영구 인덱스 (memmap) + top-k 중심화 cosine 검색
+# ============================================================
+#
+# 빌드: python scripts/build_reference_index.py
+#
+# 디렉토리 구성 (TRYANGLE_REFERENCE_INDEX_DIR):
+#   embeddings.npy   (N, 128) float32, 코퍼스 평균을 뺀 뒤 L2 정규화
+#                                                 → np.load(mmap_mode="r")로 열어서
+#                                                   검색 때 필요한 행만 페이지 인
+#   clusters.npy     (N,) int32     레퍼런스 클러스터 (data/clustered_images/cluster_<id>)
+#   quality.npy      (N,) float32   품질 점수 0~1
+#   meta.json        {"dim", "count", "mean": (128,) 코퍼스 평균, "paths": [PROJECT_ROOT 기준 상대 경로]}
+#
+# 임베딩은 UMAP 좌표라 원점이 의미 없고 모든 점이 한쪽에 몰려 있어서, 원시 좌표의
+# cosine은 거의 다 1에 가깝다. 빌드 때 코퍼스 평균을 빼고 정규화하고, 질의에도 같은
+# 평균을 빼서 "평균 대비 방향"으로 비교한다 (mean이 없는 예전 인덱스는 0 = 중심화 없음).
+#   ivf_centroids.npy (L, 128)  ┐
+#   ivf_order.npy     (N,)      ├ 근사 검색용 IVF (선택): 리스트 l의 행 = order[offsets[l]:offsets[l+1]]
+#   ivf_offsets.npy   (L+1,)    ┘
+#
+# 검색 모드 (TRYANGLE_INDEX_MODE):
+#   exact  전수 scan (청크 단위 행렬-벡터곱). 클러스터 필터가 있으면 그 클러스터 행만 scan
+#   ivf    질의와 가까운 nprobe개 리스트의 행만 scan (대규모 라이브러리용)
+#   auto   IVF가 있고 N >= TRYANGLE_INDEX_IVF_MIN이면 ivf, 아니면 exact (기본)
+#
+# 환경변수 (기본값):
+#   TRYANGLE_REFERENCE_INDEX_DIR  인덱스 위치 (feature_models/reference_index)
+#   TRYANGLE_INDEX_MODE           auto | exact | ivf (auto)
+#   TRYANGLE_INDEX_NPROBE         ivf에서 scan할 리스트 수 (8)
+#   TRYANGLE_INDEX_IVF_MIN        auto에서 ivf를 쓰기 시작하는 N (50000)
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.log import get_logger
+from utils.model_cache import model_cache
+
+logger = get_logger(__name__)
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = VERSION3_DIR
+while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exists() and (PROJECT_ROOT / "src").exists()):
+    PROJECT_ROOT = PROJECT_ROOT.parent
+
+INDEX_DIR = Path(os.environ.get("TRYANGLE_REFERENCE_INDEX_DIR", str(PROJECT_ROOT / "feature_models" / "reference_index")))
+INDEX_MODES = ("auto", "exact", "ivf")
+INDEX_MODE = os.environ.get("TRYANGLE_INDEX_MODE", "auto")
+NPROBE = int(os.environ.get("TRYANGLE_INDEX_NPROBE", "8"))
+IVF_MIN = int(os.environ.get("TRYANGLE_INDEX_IVF_MIN", "50000"))
+
+if INDEX_MODE not in INDEX_MODES:
+    raise ValueError(f"❌ TRYANGLE_INDEX_MODE는 {INDEX_MODES} 중 하나여야 합니다: {INDEX_MODE}")
+
+# 전수 scan 청크 행 수 (65536 x 128 x 4B = 32MB)
+SCAN_CHUNK = 65536
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12)
+
+
+def _top_k(scores: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(scores, rows) 중 점수 상위 k개 (내림차순)"""
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        scores, rows = scores[keep], rows[keep]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
+
+
+class ReferenceIndex:
+    """
+    레퍼런스 임베딩 인덱스
+
+    Args:
+        embeddings: (N, D) L2 정규화 임베딩 (np.memmap 가능)
+        paths: 행별 이미지 경로 (PROJECT_ROOT 기준 상대 경로)
+        clusters: (N,) 클러스터 id
+        quality: (N,) 품질 점수
+        ivf: (centroids, order, offsets) 또는 None
+        mean: (D,) 정규화 전에 뺀 코퍼스 평균 (None이면 0, 질의에도 같은 값을 뺌)
+    """
+
+    def __init__(self, embeddings: np.ndarray, paths: List[str], clusters: np.ndarray,
+                 quality: np.ndarray, ivf: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+                 mean: Optional[np.ndarray] = None):
+        self.embeddings = embeddings
+        self.mean = np.zeros(embeddings.shape[1], dtype=np.float32) if mean is None else np.asarray(mean, dtype=np.float32)
+        self.paths = list(paths)
+        self.clusters = np.asarray(clusters, dtype=np.int64)
+        self.quality = np.asarray(quality, dtype=np.float32)
+        self.ivf = ivf
+
+        if not (len(self.embeddings) == len(self.paths) == len(self.clusters) == len(self.quality)):
+            raise ValueError("❌ 인덱스 배열 길이가 서로 다릅니다")
+
+        # 클러스터별 행 (클러스터 필터 검색 시 해당 행만 scan)
+        order = np.argsort(self.clusters, kind="stable")
+        ids, starts = np.unique(self.clusters[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        self._cluster_rows = {int(c): order[s:e] for c, s, e in zip(ids, starts, ends)}
+        self._path_rows = {path: row for row, path in enumerate(self.paths)}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    def rows_for_paths(self, paths: Iterable) -> np.ndarray:
+        """이미지 경로 → 인덱스 행 (인덱스에 없는 경로는 무시)"""
+        rows = []
+        for path in paths:
+            key = _relative_path(path)
+            if key in self._path_rows:
+                rows.append(self._path_rows[key])
+        return np.asarray(rows, dtype=np.int64)
+
+    # --------------------------------------------------------
+    # 검색
+    # --------------------------------------------------------
+    def search(self, query: np.ndarray, top_k: int = 10, cluster_id: Optional[int] = None,
+               exclude_rows: Optional[np.ndarray] = None, mode: Optional[str] = None,
+               nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        top-k cosine 검색 (코퍼스 평균 기준)
+
+        Args:
+            query: (D,) 질의 임베딩 (embed_features 출력 그대로, 중심화 / 정규화는 여기서)
+            top_k: 결과 수
+            cluster_id: 주어지면 이 클러스터 레퍼런스만
+            exclude_rows: 결과에서 뺄 행 (사용자 이미지 자신 등)
+            mode: "auto" / "exact" / "ivf" (None이면 TRYANGLE_INDEX_MODE)
+            nprobe: ivf에서 scan할 리스트 수 (None이면 TRYANGLE_INDEX_NPROBE)
+
+        Returns:
+            (rows (k,), cosine (k,)) 점수 내림차순
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.dim:
+            raise ValueError(f"❌ 질의 차원({query.shape[0]})이 인덱스({self.dim})와 다릅니다")
+        q = _normalize(query - self.mean)
+
+        mode = self._resolve_mode(mode)
+        exclude = np.asarray([] if exclude_rows is None else exclude_rows, dtype=np.int64)
+        # 제외할 행만큼 더 가져온 뒤 제거
+        k = top_k + len(exclude)
+
+        if mode == "ivf":
+            rows = self._ivf_rows(q, NPROBE if nprobe is None else nprobe)
+            if cluster_id is not None:
+                rows = rows[self.clusters[rows] == cluster_id]
+            result = self._score_rows(q, rows, k)
+            # 탐색한 리스트에 후보가 부족하면 전수 scan으로
+            if len(result[0]) < k:
+                result = self._exact(q, k, cluster_id)
+        else:
+            result = self._exact(q, k, cluster_id)
+
+        rows, scores = result
+        if len(exclude):
+            keep = ~np.isin(rows, exclude)
+            rows, scores = rows[keep], scores[keep]
+        return rows[:top_k], scores[:top_k]
+
+    def _resolve_mode(self, mode: Optional[str]) -> str:
+        mode = INDEX_MODE if mode is None else mode
+        if mode not in INDEX_MODES:
+            raise ValueError(f"❌ 검색 모드는 {INDEX_MODES} 중 하나여야 합니다: {mode}")
+        if mode == "auto":
+            return "ivf" if self.ivf is not None and len(self) >= IVF_MIN else "exact"
+        if mode == "ivf" and self.ivf is None:
+            logger.warning("ivf requested but index has no IVF lists, using exact scan")
+            return "exact"
+        return mode
+
+    def _exact(self, q: np.ndarray, k: int, cluster_id: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        if cluster_id is not None:
+            rows = self._cluster_rows.get(int(cluster_id), np.empty(0, dtype=np.int64))
+            return self._score_rows(q, rows, k)
+
+        best_rows, best_scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        for start in range(0, len(self), SCAN_CHUNK):
+            scores = np.asarray(self.embeddings[start:start + SCAN_CHUNK]) @ q
+            rows = np.arange(start, start + len(scores))
+            best_rows, best_scores = _top_k(
+                np.concatenate([best_scores, scores]), np.concatenate([best_rows, rows]), k
+            )
+        return best_rows, best_scores
+
+    def _score_rows(self, q: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """지정한 행만 scan (memmap에서 정렬된 순서로 읽기)"""
+        rows = np.sort(np.asarray(rows, dtype=np.int64))
+        if len(rows) == 0:
+            return rows, np.empty(0, dtype=np.float32)
+
+        best_rows, best_scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        for start in range(0, len(rows), SCAN_CHUNK):
+            chunk = rows[start:start + SCAN_CHUNK]
+            scores = np.asarray(self.embeddings[chunk]) @ q
+            best_rows, best_scores = _top_k(
+                np.concatenate([best_scores, scores]), np.concatenate([best_rows, chunk]), k
+            )
+        return best_rows, best_scores
+
+    def _ivf_rows(self, q: np.ndarray, nprobe: int) -> np.ndarray:
+        centroids, order, offsets = self.ivf
+        nprobe = max(1, min(nprobe, len(centroids)))
+        lists = np.argpartition(-(centroids @ q), nprobe - 1)[:nprobe]
+        return np.concatenate([order[offsets[l]:offsets[l + 1]] for l in lists])
+
+    # --------------------------------------------------------
+    # 저장 / 로드
+    # --------------------------------------------------------
+    def save(self, index_dir=INDEX_DIR):
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        np.save(index_dir / "embeddings.npy", np.ascontiguousarray(self.embeddings, dtype=np.float32))
+        np.save(index_dir / "clusters.npy", self.clusters.astype(np.int32))
+        np.save(index_dir / "quality.npy", self.quality)
+        if self.ivf is not None:
+            centroids, order, offsets = self.ivf
+            np.save(index_dir / "ivf_centroids.npy", centroids.astype(np.float32))
+            np.save(index_dir / "ivf_order.npy", order.astype(np.int64))
+            np.save(index_dir / "ivf_offsets.npy", offsets.astype(np.int64))
+        else:
+            for name in ("ivf_centroids.npy", "ivf_order.npy", "ivf_offsets.npy"):
+                (index_dir / name).unlink(missing_ok=True)
+
+        with open(index_dir / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {"dim": self.dim, "count": len(self), "mean": self.mean.tolist(), "paths": self.paths},
+                f, ensure_ascii=False
+            )
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR) -> "ReferenceIndex":
+        index_dir = Path(index_dir)
+        if not (index_dir / "meta.json").exists():
+            raise FileNotFoundError(
+                f"Reference index not found: {index_dir}\n"
+                f"Build first: python scripts/build_reference_index.py"
+            )
+
+        with open(index_dir / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        ivf = None
+        if (index_dir / "ivf_centroids.npy").exists():
+            ivf = (
+                np.load(index_dir / "ivf_centroids.npy"),
+                np.load(index_dir / "ivf_order.npy", mmap_mode="r"),
+                np.load(index_dir / "ivf_offsets.npy"),
+            )
+
+        return cls(
+            embeddings=np.load(index_dir / "embeddings.npy", mmap_mode="r"),
+            paths=meta["paths"],
+            clusters=np.load(index_dir / "clusters.npy"),
+            quality=np.load(index_dir / "quality.npy"),
+            ivf=ivf,
+            mean=meta.get("mean"),
+        )
+
+
+def get_reference_index() -> ReferenceIndex:
+    """INDEX_DIR 인덱스 (싱글톤, 요청마다 다시 열지 않음)"""
+    return model_cache.get_or_load("reference_index", ReferenceIndex.load)
+
+
+def _relative_path(path) -> str:
+    """PROJECT_ROOT 기준 상대 경로 (인덱스 키, POSIX 구분자)"""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def absolute_path(path: str) -> Path:
+    """인덱스 경로 → 절대 경로"""
+    return PROJECT_ROOT / path
+
+
+# ============================================================
+# 빌드 (scripts/build_reference_index.py, IVF는 sklearn 필요)
+# ============================================================
+def build_reference_index(embeddings: np.ndarray, paths: Iterable, clusters: np.ndarray, quality: np.ndarray,
+                          n_lists: int = 0, random_state: int = 42) -> ReferenceIndex:
+    """
+    레퍼런스 임베딩 → ReferenceIndex
+
+    Args:
+        embeddings: (N, 128) embed_features 출력 (평균 중심화 + 정규화는 여기서)
+        paths: 이미지 경로 (절대/상대 모두 가능, PROJECT_ROOT 기준 상대 경로로 저장)
+        clusters: (N,) 클러스터 id
+        quality: (N,) 품질 점수 0~1
+        n_lists: IVF 리스트 수 (0이면 IVF 없음, 보통 sqrt(N) 근처)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    mean = embeddings.mean(axis=0)
+    embeddings = _normalize(embeddings - mean)
+    paths = [_relative_path(p) for p in paths]
+
+    ivf = None
+    if n_lists > 0:
+        from sklearn.cluster import MiniBatchKMeans
+
+        # 정규화된 벡터의 KMeans ≈ spherical KMeans (cosine 기준 리스트)
+        km = MiniBatchKMeans(n_clusters=min(n_lists, len(embeddings)), random_state=random_state, n_init=3)
+        labels = km.fit_predict(embeddings)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=km.n_clusters))])
+        ivf = (_normalize(km.cluster_centers_), order, offsets)
+
+    return ReferenceIndex(embeddings, paths, clusters, quality, ivf, mean=mean)
@@ -4,6 +4,7 @@
 # ============================================================
 
 import json
+import os
 import numpy as np
 from pathlib import Path
 from typing import List, Dict, Optional
@@ -19,6 +20,22 @@ while PROJECT_ROOT != PROJECT_ROOT.parent and not ((PROJECT_ROOT / "data").exist
 if str(VERSION3_DIR) not in sys.path:
     sys.path.append(str(VERSION3_DIR))
 
+from utils.model_cache import model_cache
+from utils.log import get_logger
+from utils.reference_index import ReferenceIndex, INDEX_DIR, get_reference_index, absolute_path
+
+logger = get_logger(__name__)
+
+DEFAULT_CLUSTER_INFO_PATH = PROJECT_ROOT / "features" / "cluster_interpretation.json"
+
+# 품질 필터 기본값 (인덱스 quality = scripts/build_reference_index.py의 QualityAnalyzer 점수)
+MIN_QUALITY = float(os.environ.get("TRYANGLE_REFERENCE_MIN_QUALITY", "0.5"))
+
+
+def _load_cluster_info(path: Path) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 
 class ReferenceRecommender:
     """
@@ -28,131 +45,101 @@ class ReferenceRecommender:
     - "어떤 사진을 목표로 해야 할지 모르겠어요"
     - "내 사진과 비슷한 좋은 예시 보여주세요"
     - "이 스타일로 더 잘 찍는 법?"
+
+    레퍼런스 임베딩 인덱스(utils/reference_index.py)에서 같은 클러스터의
+    (코퍼스 평균 기준) cosine 최근접 레퍼런스를 찾는다. 인덱스 빌드: python scripts/build_reference_index.py
     """
 
     def __init__(
         self,
-        clustered_images_dir: Optional[str] = None,
+        index: Optional[ReferenceIndex] = None,
         cluster_info_path: Optional[str] = None
     ):
         """
         Args:
-            clustered_images_dir: data/clustered_images 경로
+            index: 레퍼런스 인덱스 (None이면 TRYANGLE_REFERENCE_INDEX_DIR 인덱스, 프로세스당 1회 로드)
             cluster_info_path: cluster_interpretation.json 경로
         """
-        if clustered_images_dir is None:
-            clustered_images_dir = PROJECT_ROOT / "data" / "clustered_images"
+        if index is None:
+            try:
+                index = get_reference_index()
+            except FileNotFoundError as e:
+                logger.warning("reference index unavailable, no recommendations: %s", e)
+        self.index = index
+
+        # 클러스터 정보 로드 (기본 경로는 프로세스당 1회)
         if cluster_info_path is None:
-            cluster_info_path = PROJECT_ROOT / "features" / "cluster_interpretation.json"
-
-        self.clustered_dir = Path(clustered_images_dir)
-        self.cluster_info_path = Path(cluster_info_path)
-
-        # 클러스터 정보 로드
-        with open(self.cluster_info_path, 'r', encoding='utf-8') as f:
-            self.cluster_info = json.load(f)
+            self.cluster_info = model_cache.get_or_load(
+                "cluster_interpretation", lambda: _load_cluster_info(DEFAULT_CLUSTER_INFO_PATH)
+            )
+        else:
+            self.cluster_info = _load_cluster_info(Path(cluster_info_path))
 
     def recommend(
         self,
-        user_image_path: str,
+        user_image_path: Optional[str],
         user_cluster_id: int,
         user_embedding: np.ndarray,
         top_k: int = 3,
-        quality_threshold: float = 0.7
+        quality_threshold: Optional[float] = None
     ) -> List[Dict]:
         """
         레퍼런스 추천
 
         Args:
-            user_image_path: 사용자 이미지 경로
+            user_image_path: 사용자 이미지 경로 (메모리 업로드면 None)
             user_cluster_id: 사용자 이미지의 클러스터 ID
             user_embedding: 사용자 이미지의 embedding (128D)
             top_k: 추천할 개수
-            quality_threshold: 품질 필터 (0-1)
+            quality_threshold: 품질 필터 (0-1, None이면 TRYANGLE_REFERENCE_MIN_QUALITY)
 
         Returns:
             [
                 {
                     'image_path': 추천 이미지 경로,
                     'cluster_id': 클러스터 ID,
-                    'similarity': 유사도 (0-1),
+                    'similarity': cosine 유사도,
+                    'quality_score': 품질 점수,
                     'reason': 추천 이유
                 },
                 ...
             ]
         """
-        # 같은 클러스터의 이미지들 수집
-        cluster_folder = self.clustered_dir / f"cluster_{user_cluster_id}"
-
-        if not cluster_folder.exists():
-            return []
-
-        # 클러스터 내 이미지 목록
-        image_files = list(cluster_folder.glob("*.jpg")) + list(cluster_folder.glob("*.png")) + list(cluster_folder.glob("*.jpeg"))
-
-        if len(image_files) == 0:
+        if self.index is None or user_embedding is None:
             return []
 
-        # 사용자 이미지 제외
-        user_path = Path(user_image_path).resolve()
-        candidates = [img for img in image_files if img.resolve() != user_path]
+        # 사용자 이미지 제외 (인덱스에 있는 경로인 경우만)
+        exclude = self.index.rows_for_paths([user_image_path]) if user_image_path is not None else None
 
-        if len(candidates) == 0:
+        # 같은 클러스터에서 가까운 순으로, 품질 필터를 위해 여유있게 4배
+        rows, scores = self.index.search(
+            user_embedding, top_k=top_k * 4, cluster_id=user_cluster_id, exclude_rows=exclude
+        )
+        if len(rows) == 0:
             return []
 
-        # 간단한 휴리스틱으로 품질 추정
-        # (실제로는 quality_analyzer를 사용할 수 있지만, 여기선 파일 크기 & 개수로 추정)
-        quality_scores = self._estimate_quality(candidates)
-
-        # 품질 필터링
-        high_quality = [
-            (img, score) for img, score in zip(candidates, quality_scores)
-            if score >= quality_threshold
-        ]
-
-        if len(high_quality) == 0:
+        quality_threshold = MIN_QUALITY if quality_threshold is None else quality_threshold
+        quality = self.index.quality[rows]
+        keep = quality >= quality_threshold
+        if not keep.any():
             # 품질 기준 낮추기
-            high_quality = [(img, score) for img, score in zip(candidates, quality_scores)]
+            logger.info(
+                "no reference above quality %.2f in cluster %s (best %.2f), ignoring quality filter",
+                quality_threshold, user_cluster_id, float(quality.max())
+            )
+            keep[:] = True
 
-        # 유사도 계산 (여기서는 랜덤, 실제로는 embedding 거리)
-        # 실제 구현에서는 각 이미지의 embedding을 로드해서 cosine similarity 계산
         recommendations = []
-
-        for img_path, quality_score in high_quality[:top_k * 2]:  # 여유있게 2배
-            # 유사도 (0-1, 랜덤 시뮬레이션)
-            # 실제로는: cosine_similarity(user_embedding, image_embedding)
-            similarity = np.random.uniform(0.7, 0.95)
-
+        for row, similarity, quality_score in zip(rows[keep][:top_k], scores[keep][:top_k], quality[keep][:top_k]):
             recommendations.append({
-                'image_path': str(img_path),
+                'image_path': str(absolute_path(self.index.paths[row])),
                 'cluster_id': user_cluster_id,
-                'similarity': similarity,
-                'quality_score': quality_score,
-                'reason': self._generate_reason(similarity, quality_score)
+                'similarity': float(similarity),
+                'quality_score': float(quality_score),
+                'reason': self._generate_reason(float(similarity), float(quality_score))
             })
 
-        # 유사도 순 정렬
-        recommendations.sort(key=lambda x: x['similarity'], reverse=True)
-
-        return recommendations[:top_k]
-
-    def _estimate_quality(self, image_paths: List[Path]) -> List[float]:
-        """
-        간단한 품질 추정 (휴리스틱)
-
-        실제로는 quality_analyzer 사용 권장
-        """
-        quality_scores = []
-
-        for img_path in image_paths:
-            # 파일 크기 기반 (큰 파일 = 고품질)
-            file_size = img_path.stat().st_size
-            size_score = min(file_size / (5 * 1024 * 1024), 1.0)  # 5MB 기준
-
-            # 랜덤 노이즈
-            quality_scores.append(size_score * np.random.uniform(0.8, 1.0))
-
-        return quality_scores
+        return recommendations
 
     def _generate_reason(self, similarity: float, quality_score: float) -> str:
         """
@@ -201,12 +188,10 @@ if __name__ == "__main__":
     print("Phase 3.1: AI 레퍼런스 추천 시스템 테스트")
     print("="*60)
 
-    # 실제 데이터로 테스트 (clustered_images가 있다면)
-    clustered_dir = PROJECT_ROOT / "data" / "clustered_images"
-
-    if not clustered_dir.exists():
-        print(f"\n⚠️  {clustered_dir} 없음")
-        print("실제 클러스터링 데이터가 필요합니다")
+    # 실제 데이터로 테스트 (레퍼런스 인덱스가 있다면)
+    if not (INDEX_DIR / "meta.json").exists():
+        print(f"\n⚠️  {INDEX_DIR} 없음")
+        print("레퍼런스 인덱스가 필요합니다: python scripts/build_reference_index.py")
         print("\n시뮬레이션 모드:")
 
         # 시뮬레이션
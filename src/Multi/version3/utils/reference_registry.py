@@ -0,0 +1,157 @@
+# ============================================================
+# 📌 Reference Registry
+# 레퍼런스 이미지 1회 분석 → content hash로 재사용
+# ============================================================
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class ReferenceRegistry:
+    """
+    레퍼런스 분석 결과 등록소
+
+    실시간 세션에서 레퍼런스는 수백 프레임 동안 동일하므로
+    ImageAnalyzer 결과(ref_data)를 한 번만 계산해두고
+    reference_id(이미지 내용 해시)로 재사용한다.
+
+    - reference_id: 이미지 바이트의 SHA256 앞 16자 (FeatureCache와 동일 규칙)
+    - 같은 이미지라도 포즈 모델(yolo11/movenet)별로 따로 저장
+    - 최대 개수를 넘으면 가장 오래 사용 안 된 항목부터 제거 (LRU)
+    """
+
+    def __init__(self, max_entries: int = 64):
+        """
+        Args:
+            max_entries: 메모리에 보관할 최대 레퍼런스 수
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 통계
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'registrations': 0,
+            'evictions': 0
+        }
+
+    @staticmethod
+    def compute_reference_id(image_bytes: bytes) -> str:
+        """이미지 바이트 → reference_id (SHA256 앞 16자)"""
+        return hashlib.sha256(image_bytes).hexdigest()[:16]
+
+    def get(self, reference_id: str, pose_model: str) -> Optional[Dict]:
+        """
+        등록된 레퍼런스 분석 결과 조회
+
+        Returns:
+            ref_data (ImageAnalyzer.analyze() 결과) 또는 None
+        """
+        key = (reference_id, pose_model)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            entry['last_used'] = time.time()
+            entry['hit_count'] += 1
+            self.stats['hits'] += 1
+            return entry['data']
+
+    def register(self, reference_id: str, pose_model: str, ref_data: Dict) -> Dict:
+        """
+        분석 결과 등록
+
+        Returns:
+            등록 정보 (reference_id, pose_model, registered_at)
+        """
+        key = (reference_id, pose_model)
+        now = time.time()
+
+        with self._lock:
+            self._entries[key] = {
+                'data': ref_data,
+                'registered_at': now,
+                'last_used': now,
+                'hit_count': 0
+            }
+            self._entries.move_to_end(key)
+            self.stats['registrations'] += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+        return {
+            'reference_id': reference_id,
+            'pose_model': pose_model,
+            'registered_at': now
+        }
+
+    def get_or_register(
+        self,
+        reference_id: str,
+        pose_model: str,
+        analyze_fn: Callable[[], Dict]
+    ) -> Dict:
+        """
+        캐시에 있으면 반환, 없으면 analyze_fn()으로 분석 후 등록
+
+        analyze_fn은 락 밖에서 실행된다 (분석이 수 초 걸리므로).
+        동시에 같은 레퍼런스가 들어오면 중복 분석될 수 있지만 결과는 동일하다.
+        """
+        ref_data = self.get(reference_id, pose_model)
+        if ref_data is not None:
+            return ref_data
+
+        ref_data = analyze_fn()
+        self.register(reference_id, pose_model, ref_data)
+        return ref_data
+
+    def has(self, reference_id: str, pose_model: Optional[str] = None) -> bool:
+        """등록 여부 (pose_model=None이면 모델 무관)"""
+        with self._lock:
+            if pose_model is not None:
+                return (reference_id, pose_model) in self._entries
+            return any(key[0] == reference_id for key in self._entries)
+
+    def remove(self, reference_id: str) -> int:
+        """레퍼런스 삭제 (모든 포즈 모델). 삭제된 항목 수 반환"""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == reference_id]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        """전체 삭제"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        등록소 통계
+
+        Returns:
+            {
+                'entries': 등록된 레퍼런스 수,
+                'hits', 'misses', 'registrations', 'evictions',
+                'hit_rate': 적중률
+            }
+        """
+        with self._lock:
+            total = self.stats['hits'] + self.stats['misses']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                **self.stats,
+                'hit_rate': self.stats['hits'] / total if total > 0 else 0.0
+            }
@@ -0,0 +1,260 @@
+# ============================================================
+# 🗂️ Session Store
+# 세션별 ProgressTracker 저장소 (LRU + 유휴 TTL 만료)
+# - InMemorySessionStore: 단일 프로세스
+# - SQLiteSessionStore: 로컬 SQLite 파일 → 여러 워커가 같은 세션 공유
+# ============================================================
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+VERSION3_DIR = Path(__file__).resolve().parents[1]
+if str(VERSION3_DIR) not in sys.path:
+    sys.path.append(str(VERSION3_DIR))
+
+from utils.progress_tracker import ProgressTracker
+
+
+class SessionStore:
+    """
+    세션 저장소 인터페이스
+
+    get()으로 받은 트래커를 수정한 뒤 put()으로 다시 저장한다
+    (SQLite 백엔드는 put 시점에 직렬화되므로 put을 빼먹으면 반영되지 않음)
+
+    - max_sessions: 최대 세션 수 (넘으면 가장 오래 안 쓴 세션부터 제거)
+    - ttl_seconds: 마지막 사용 후 이 시간이 지나면 만료
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800.0):
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds
+
+        # 통계
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evicted': 0
+        }
+
+    def get(self, session_id: str) -> Optional[ProgressTracker]:
+        raise NotImplementedError
+
+    def put(self, session_id: str, tracker: ProgressTracker):
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict:
+        """
+        저장소 통계
+
+        Returns:
+            {'backend', 'sessions', 'max_sessions', 'ttl_seconds',
+             'hits', 'misses', 'expired', 'evicted'}
+        """
+        return {
+            'backend': self.__class__.__name__,
+            'sessions': len(self),
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl_seconds,
+            **self.stats
+        }
+
+
+class InMemorySessionStore(SessionStore):
+    """프로세스 메모리 저장소 (OrderedDict LRU)"""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800.0):
+        super().__init__(max_sessions, ttl_seconds)
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()  # {id: (tracker, last_used)}
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        """유휴 TTL 지난 세션 제거 (락 안에서 호출, 오래된 순이므로 앞에서부터)"""
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+            self.stats['expired'] += 1
+
+    def get(self, session_id: str) -> Optional[ProgressTracker]:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            self._sessions[session_id] = (entry[0], now)
+            self._sessions.move_to_end(session_id)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def put(self, session_id: str, tracker: ProgressTracker):
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (tracker, now)
+            self._sessions.move_to_end(session_id)
+
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    로컬 SQLite 저장소
+
+    프리포크 워커(backend/serve.py)들이 같은 DB 파일을 열어서
+    어느 워커로 요청이 가도 같은 세션을 이어간다.
+    트래커는 ProgressTracker.to_dict() JSON으로 저장 (compact history라 수 KB 이하).
+    """
+
+    # 만료/용량 정리 주기 (put N회마다)
+    CLEANUP_INTERVAL = 64
+
+    def __init__(self, db_path: str, max_sessions: int = 10000, ttl_seconds: float = 1800.0):
+        super().__init__(max_sessions, ttl_seconds)
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._local = threading.local()
+        self._put_count = 0
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "  session_id TEXT PRIMARY KEY,"
+            "  data TEXT NOT NULL,"
+            "  last_used REAL NOT NULL"
+            ")"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_used ON sessions(last_used)")
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """스레드별 연결 (fork된 워커에서는 pid가 바뀌므로 새로 연결)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, session_id: str) -> Optional[ProgressTracker]:
+        now = time.time()
+        conn = self._connect()
+
+        row = conn.execute(
+            "SELECT data, last_used FROM sessions WHERE session_id = ?",
+            (session_id,)
+        ).fetchone()
+
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+
+        data, last_used = row
+        if now - last_used > self.ttl_seconds:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            conn.commit()
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return None
+
+        conn.execute(
+            "UPDATE sessions SET last_used = ? WHERE session_id = ?",
+            (now, session_id)
+        )
+        conn.commit()
+        self.stats['hits'] += 1
+        return ProgressTracker.from_dict(json.loads(data))
+
+    def put(self, session_id: str, tracker: ProgressTracker):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, data, last_used) VALUES (?, ?, ?)",
+            (session_id, json.dumps(tracker.to_dict(), ensure_ascii=False), time.time())
+        )
+        conn.commit()
+
+        self._put_count += 1
+        if self._put_count % self.CLEANUP_INTERVAL == 0:
+            self.cleanup()
+
+    def delete(self, session_id: str) -> bool:
+        conn = self._connect()
+        cursor = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        conn.commit()
+        return cursor.rowcount > 0
+
+    def cleanup(self):
+        """만료 세션 + 용량 초과분(오래 안 쓴 순) 삭제"""
+        conn = self._connect()
+
+        cursor = conn.execute(
+            "DELETE FROM sessions WHERE last_used < ?",
+            (time.time() - self.ttl_seconds,)
+        )
+        self.stats['expired'] += cursor.rowcount
+
+        cursor = conn.execute(
+            "DELETE FROM sessions WHERE session_id IN ("
+            "  SELECT session_id FROM sessions ORDER BY last_used DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.max_sessions,)
+        )
+        self.stats['evicted'] += cursor.rowcount
+        conn.commit()
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store() -> SessionStore:
+    """
+    환경변수로 저장소 생성
+
+    - TRYANGLE_SESSION_STORE: "memory" (기본) 또는 "sqlite"
+    - TRYANGLE_SESSION_DB: SQLite 파일 경로 (기본: version3/cache/sessions.db)
+    - TRYANGLE_MAX_SESSIONS: 최대 세션 수 (기본 1000)
+    - TRYANGLE_SESSION_TTL: 유휴 만료 시간 (초, 기본 1800)
+    """
+    backend = os.environ.get("TRYANGLE_SESSION_STORE", "memory").lower()
+    max_sessions = int(os.environ.get("TRYANGLE_MAX_SESSIONS", "1000"))
+    ttl_seconds = float(os.environ.get("TRYANGLE_SESSION_TTL", "1800"))
+
+    if backend == "sqlite":
+        db_path = os.environ.get(
+            "TRYANGLE_SESSION_DB",
+            str(VERSION3_DIR / "cache" / "sessions.db")
+        )
+        return SQLiteSessionStore(db_path, max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+
+    return InMemorySessionStore(max_sessions=max_sessions, ttl_seconds=ttl_seconds)
@@ -0,0 +1,174 @@
+# ============================================================
+# ⚙️ Torch Runtime Profiles
+# model_cache가 로드하는 torch 모델에 공통으로 적용하는 CPU 추론 설정
+# ============================================================
+#
+# 프로필 (TRYANGLE_TORCH_PROFILE):
+#   default     기존 동작 (no_grad, torch 기본 스레드, 변환 없음)
+#   latency     실시간 단일 요청용: inference_mode, intra-op = 코어 수 / 풀 워커 수, inter-op 1,
+#               conv backbone channels_last, compile 안 함
+#               (마이크로배치 크기가 매번 달라서 compile 재컴파일/워밍업 비용이 더 큼)
+#   throughput  배치 추출용: inference_mode, intra-op = 코어 수 / 풀 워커 수, inter-op 2,
+#               conv backbone channels_last, torch.compile
+#
+# 개별 설정 덮어쓰기 (환경변수):
+#   TRYANGLE_TORCH_COMPILE         "1" / "0"
+#   TRYANGLE_TORCH_INTRA_THREADS   intra-op 스레드 수
+#   TRYANGLE_WORKERS               분석 풀 워커 수 (backend/main.py, 기본 2) → intra-op 기본값 계산
+#   TRYANGLE_TORCH_INTER_THREADS   inter-op 스레드 수
+#   (backend/serve.py 워커는 fork 후 TRYANGLE_TORCH_THREADS로 intra-op를 다시 나눔)
+#
+# 적용 위치:
+#   - 모델: ModelCache.get_or_load가 로드 직후 prepare_model(key, value) 호출
+#   - forward: inference_context() (no_grad 대신)
+#   - 입력: to_channels_last(key, batch) (channels_last 모델의 입력도 같은 레이아웃으로)
+#
+# 이 머신에서 프로필 비교: python scripts/benchmark_torch_runtime.py
+
+import os
+import sys
+import threading
+from typing import Dict
+
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+_CPU_COUNT = os.cpu_count() or 1
+
+# 풀 워커들이 동시에 forward하므로 intra-op 스레드를 워커 수로 나눔
+# (코어 수 그대로면 워커 x 코어 수 스레드가 경쟁, backend/serve.py가 프로세스별로 나누는 것과 같은 방식)
+_POOL_WORKERS = max(1, int(os.environ.get("TRYANGLE_WORKERS", "2")))
+_INTRA_OP_THREADS = max(1, _CPU_COUNT // _POOL_WORKERS)
+
+TORCH_PROFILES: Dict[str, Dict] = {
+    "default": {
+        "inference_mode": False,
+        "intra_op_threads": None,
+        "inter_op_threads": None,
+        "channels_last": False,
+        "compile": False,
+    },
+    "latency": {
+        "inference_mode": True,
+        "intra_op_threads": _INTRA_OP_THREADS,
+        "inter_op_threads": 1,
+        "channels_last": True,
+        "compile": False,
+    },
+    "throughput": {
+        "inference_mode": True,
+        "intra_op_threads": _INTRA_OP_THREADS,
+        "inter_op_threads": 2,
+        "channels_last": True,
+        "compile": True,
+    },
+}
+
+PROFILE_NAME = os.environ.get("TRYANGLE_TORCH_PROFILE", "default")
+if PROFILE_NAME not in TORCH_PROFILES:
+    raise ValueError(f"❌ TRYANGLE_TORCH_PROFILE는 {tuple(TORCH_PROFILES)} 중 하나여야 합니다: {PROFILE_NAME}")
+
+PROFILE = dict(TORCH_PROFILES[PROFILE_NAME])
+if "TRYANGLE_TORCH_COMPILE" in os.environ:
+    PROFILE["compile"] = os.environ["TRYANGLE_TORCH_COMPILE"] == "1"
+if "TRYANGLE_TORCH_INTRA_THREADS" in os.environ:
+    PROFILE["intra_op_threads"] = int(os.environ["TRYANGLE_TORCH_INTRA_THREADS"])
+if "TRYANGLE_TORCH_INTER_THREADS" in os.environ:
+    PROFILE["inter_op_threads"] = int(os.environ["TRYANGLE_TORCH_INTER_THREADS"])
+
+# model_cache 키 → channels_last로 바꿀 conv backbone (로더 반환값 안의 dict 키 / tuple 인덱스)
+# 입력도 to_channels_last()로 바꿔야 함 (가중치만 바꾸면 첫 conv가 NCHW 입력을 매번 변환)
+CHANNELS_LAST_TARGETS = {
+    "feature_midas": ("midas_model",),              # DPT-Hybrid (ResNet stem)
+    "feature_midas_small": ("midas_small_model",),  # EfficientNet-Lite
+    "contrastive_model": (0,),                      # ResNet50 (model, device, transform)
+}
+
+# model_cache 키 → {항목: compile할 메서드} (추론 경로에서 실제로 호출하는 메서드)
+COMPILE_TARGETS = {
+    "feature_clip": {"clip_model": "encode_image"},
+    "feature_openclip": {"openclip_model": "encode_image"},
+    "feature_dino": {"dino_model": "forward_features"},
+    "feature_midas": {"midas_model": "forward"},
+    "feature_midas_small": {"midas_small_model": "forward"},
+    "contrastive_model": {0: "forward"},  # get_embeddings → forward
+}
+
+_threads_lock = threading.Lock()
+_threads_applied = False
+
+
+def _apply_threads(torch):
+    """프로세스 전역 스레드 설정 (첫 torch 모델 로드 때 1회)"""
+    global _threads_applied
+    with _threads_lock:
+        if _threads_applied:
+            return
+        _threads_applied = True
+
+        if PROFILE["intra_op_threads"]:
+            torch.set_num_threads(PROFILE["intra_op_threads"])
+        if PROFILE["inter_op_threads"]:
+            try:
+                torch.set_num_interop_threads(PROFILE["inter_op_threads"])
+            except RuntimeError as e:
+                # inter-op 병렬 작업이 이미 시작된 뒤에는 바꿀 수 없음
+                logger.warning("inter-op threads not applied: %s", e)
+
+        logger.info(
+            "torch runtime profile=%s intra_op=%d inter_op=%d",
+            PROFILE_NAME, torch.get_num_threads(), torch.get_num_interop_threads()
+        )
+
+
+def prepare_model(key: str, value):
+    """
+    model_cache 로드 직후 호출: 프로필의 모델 설정 적용
+
+    torch 모델이 아닌 값(sklearn, TFLite, 설정 dict 등)과
+    CHANNELS_LAST_TARGETS / COMPILE_TARGETS에 없는 키는 그대로 반환
+    """
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return value  # torch를 import하지 않은 로더 → torch 모델 없음
+
+    _apply_threads(torch)
+
+    if PROFILE["channels_last"]:
+        for item in CHANNELS_LAST_TARGETS.get(key, ()):
+            value[item].to(memory_format=torch.channels_last)
+
+    if PROFILE["compile"]:
+        for item, method in COMPILE_TARGETS.get(key, {}).items():
+            module = value[item]
+            # 같은 모듈 객체의 메서드만 교체 (호출부는 그대로)
+            setattr(module, method, torch.compile(getattr(module, method), dynamic=True))
+
+    return value
+
+
+def to_channels_last(key: str, batch):
+    """
+    CHANNELS_LAST_TARGETS 모델(model_cache 키)의 (B, C, H, W) 입력을 channels_last로
+
+    프로필이 channels_last가 아니거나 대상이 아니면 그대로 반환
+    """
+    if not PROFILE["channels_last"] or key not in CHANNELS_LAST_TARGETS or batch.ndim != 4:
+        return batch
+
+    import torch
+
+    return batch.contiguous(memory_format=torch.channels_last)
+
+
+def inference_context():
+    """forward를 감싸는 컨텍스트 (프로필에 따라 inference_mode 또는 no_grad)"""
+    import torch
+
+    return torch.inference_mode() if PROFILE["inference_mode"] else torch.no_grad()
+
+
+def describe_profile() -> Dict:
+    """현재 프로필 설정 (로그/벤치마크 출력용)"""
+    return {"profile": PROFILE_NAME, **PROFILE}
@@ -0,0 +1,213 @@
+# ============================================================
+# 🧵 Request Tracing
+# 요청 1건의 span 트리 (ImageComparator → ImageAnalyzer → 분석기/모델 호출)
+# Chrome trace_event JSON으로 내보내기 (Perfetto / chrome://tracing에서 열기)
+# ============================================================
+#
+# 사용:
+#   trace = start_trace("POST /api/analyze/realtime")
+#   try:
+#       with span("ImageComparator"):
+#           ...
+#   finally:
+#       finish_trace(trace)
+#   trace.to_chrome_trace()
+#
+# 현재 트레이스는 contextvar로 전달된다.
+# - AnalysisPool(backend)은 contextvars.copy_context()로 워커 스레드에 넘기므로
+#   풀 안의 분석 호출도 같은 트레이스에 기록된다.
+# - 마이크로배치(feature_extraction/batching.py)는 submit 때 호출자 컨텍스트를 저장해 두고
+#   배치 forward를 첫 호출자 컨텍스트에서 실행, 나머지 호출자에게는 record_span()으로
+#   같은 구간을 기록한다 (배치 1번을 여러 트레이스가 공유).
+# 트레이스가 없으면 span()은 contextvar 조회 1번만 하고 끝난다.
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class Trace:
+    """요청 1건의 span 기록 (완료된 span = Chrome 'X' complete event)"""
+
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.pid = os.getpid()
+        self.started_at = time.time()
+
+        self._origin = time.perf_counter()
+        self._events: List[Dict] = []
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._next_span_id = 0
+
+        # 루트 span (start_trace / finish_trace)
+        self._root_id = self._new_span_id()
+        self._root_start = self._now_us()
+        self._tokens = None
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _new_span_id(self) -> int:
+        with self._lock:
+            self._next_span_id += 1
+            return self._next_span_id
+
+    def add_event(self, name: str, start_us: float, dur_us: float, span_id: int,
+                  parent_id: Optional[int], args: Optional[Dict] = None):
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": round(start_us, 3),
+            "dur": round(dur_us, 3),
+            "pid": self.pid,
+            "tid": thread.ident,
+            "args": {"span_id": span_id, "parent_id": parent_id, **(args or {})}
+        }
+        with self._lock:
+            self._events.append(event)
+            self._thread_names.setdefault(thread.ident, thread.name)
+
+    @property
+    def span_count(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+    def to_chrome_trace(self) -> Dict:
+        """Chrome trace_event 포맷 dict ({"traceEvents": [...]})"""
+        with self._lock:
+            events = sorted(self._events, key=lambda e: (e["ts"], -e["dur"]))
+            metadata = [
+                {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": f"tryangle {self.pid}"}}
+            ] + [
+                {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self._thread_names.items()
+            ]
+
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "trace_id": self.trace_id,
+                "name": self.name,
+                "started_at": self.started_at
+            }
+        }
+
+
+# 현재 요청의 트레이스 / 현재 span id (부모 연결용)
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("tryangle_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("tryangle_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+def start_trace(name: str) -> Trace:
+    """현재 컨텍스트에서 트레이스 시작 (이후 span()이 여기에 기록됨)"""
+    trace = Trace(name)
+    trace._tokens = (_current_trace.set(trace), _current_span.set(trace._root_id))
+    return trace
+
+
+def finish_trace(trace: Trace, args: Optional[Dict] = None):
+    """루트 span 기록 후 컨텍스트에서 해제"""
+    trace.add_event(
+        trace.name, trace._root_start, trace._now_us() - trace._root_start,
+        trace._root_id, None, args
+    )
+    trace_token, span_token = trace._tokens
+    _current_span.reset(span_token)
+    _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **args):
+    """현재 트레이스에 span 기록 (트레이스가 없으면 no-op)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    span_id = trace._new_span_id()
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    start = trace._now_us()
+    try:
+        yield
+    finally:
+        trace.add_event(name, start, trace._now_us() - start, span_id, parent_id, args)
+        _current_span.reset(token)
+
+
+def record_span(name: str, start: float, end: float, **args):
+    """
+    이미 끝난 구간을 현재 트레이스에 span으로 기록 (트레이스가 없으면 no-op)
+
+    start/end: time.perf_counter() 값. 다른 스레드가 대신 실행한 작업을
+    호출자 컨텍스트(contextvars.Context.run)에서 기록할 때 사용
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return
+
+    start_us = (start - trace._origin) * 1e6
+    trace.add_event(name, start_us, (end - start) * 1e6, trace._new_span_id(), _current_span.get(), args)
+
+
+# ============================================================
+# 완료된 트레이스 보관 (최근 N개)
+# ============================================================
+class TraceStore:
+    """
+    최근 트레이스 보관소 (LRU)
+
+    - dump_dir가 있으면 <trace_id>.json 파일로도 저장
+    """
+
+    def __init__(self, max_traces: int = 100, dump_dir: Optional[str] = None):
+        self.max_traces = max(1, max_traces)
+        self.dump_dir = dump_dir
+        self._traces: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+
+    def put(self, trace: Trace) -> Dict:
+        chrome_trace = trace.to_chrome_trace()
+        with self._lock:
+            self._traces[trace.trace_id] = chrome_trace
+            self._traces.move_to_end(trace.trace_id)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+        if self.dump_dir:
+            path = os.path.join(self.dump_dir, f"{trace.trace_id}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(chrome_trace, f)
+
+        return chrome_trace
+
+    def get(self, trace_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def list_ids(self) -> List[str]:
+        """최근 것부터"""
+        with self._lock:
+            return list(reversed(self._traces))